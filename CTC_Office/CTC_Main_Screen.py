@@ -530,6 +530,7 @@ class MainScreen:
                 self.send_to_ui("Train Model", {"command": "MULT", "value": self.clockSpeed})
                 self.send_to_ui("Train SW", {"command": "MULT", "value": float(self.clockSpeed)})
                 self.send_to_ui("Train HW", {"command": "MULT", "value": self.clockSpeed})
+                self.send_to_ui("Track Model", {"command": "MULT", "value": self.clockSpeed})
                 #send time multiplier down the line
 
                 self.clockDec.configure(text = "<<")
@@ -543,6 +544,7 @@ class MainScreen:
                 self.send_to_ui("Train Model", {"command": "MULT", "value": self.clockSpeed})
                 self.send_to_ui("Train SW", {"command": "MULT", "value": float(self.clockSpeed)})
                 self.send_to_ui("Train HW", {"command": "MULT", "value": self.clockSpeed})
+                self.send_to_ui("Track Model", {"command": "MULT", "value": self.clockSpeed})
                 #send time multiplier down the line
 
                 self.clockDec.configure(text = "<<<")
@@ -557,6 +559,7 @@ class MainScreen:
                 self.send_to_ui("Train Model", {"command": "MULT", "value": self.clockSpeed})
                 self.send_to_ui("Train SW", {"command": "MULT", "value": float(self.clockSpeed)})
                 self.send_to_ui("Train HW", {"command": "MULT", "value": self.clockSpeed})
+                self.send_to_ui("Track Model", {"command": "MULT", "value": self.clockSpeed})
                 #send time multiplier down the line
 
                 self.clockDec.configure(text = "<<")
@@ -570,6 +573,7 @@ class MainScreen:
                 self.send_to_ui("Train Model", {"command": "MULT", "value": self.clockSpeed})
                 self.send_to_ui("Train SW", {"command": "MULT", "value": float(self.clockSpeed)})
                 self.send_to_ui("Train HW", {"command": "MULT", "value": self.clockSpeed})
+                self.send_to_ui("Track Model", {"command": "MULT", "value": self.clockSpeed})
                 #send time multiplier down the line
 
                 self.clockDec.configure(text = "<")
@@ -25,13 +25,34 @@ Hardware Setup:
 - Brake Failure LED: GPIO 25 (output only)
 - Engine Failure LED: GPIO 5 (output only)
 - Signal Failure LED: GPIO 6 (output only)
+
+Buttons are edge-triggered: lgpio alert callbacks put each edge on an event
+queue, and one event thread debounces them per pin and broadcasts the new
+state. Clients get the full state on connect and every SNAPSHOT_PERIOD
+seconds ('state_update'), and in between only the keys that changed
+('state_delta'); both carry a sequence number (seq) so clients can spot a
+missing update and ask for the full state again (TC_GPIO_StateMirror). Off the Pi (no lgpio), or with --simulate, the server runs on the
+TC_GPIO_Simulator stand-in; --benchmark measures button-to-broadcast latency.
+
+Usage:
+    python TC_GPIO_Server.py [--simulate] [--benchmark [presses]]
 """
 
 import socket
 import json
+import queue
+import sys
 import threading
 import time
-import lgpio
+from collections import deque
+
+try:
+    import lgpio
+    HAS_LGPIO = True
+except ImportError:
+    # Not on the Pi: run against the stand-in backend (buttons driven from software)
+    import TC_GPIO_Simulator as lgpio
+    HAS_LGPIO = False
 
 # GPIO Pin Configuration Constants
 LEFT_DOOR_BUTTON = 17
@@ -56,12 +77,33 @@ BRAKE_FAILURE_LED = 25
 ENGINE_FAILURE_LED = 5
 SIGNAL_FAILURE_LED = 6
 
+# Buttons (pull-up, pressed = 0): name -> (pin, debounce time in seconds)
+# Edges on a pin within its debounce time after an accepted edge are contact
+# bounce; the pin is re-read when the time is up so no final state is lost.
+BUTTONS = {
+    'left_door': (LEFT_DOOR_BUTTON, 0.3),
+    'right_door': (RIGHT_DOOR_BUTTON, 0.3),
+    'headlights': (HEADLIGHTS_BUTTON, 0.3),
+    'interior': (INTERIOR_LIGHTS_BUTTON, 0.3),
+    'service_brake': (SERVICE_BRAKE_BUTTON, 0.05),
+    'train_horn': (TRAIN_HORN_BUTTON, 0.05),
+    'emergency_brake': (EMERGENCY_BRAKE_BUTTON, 0.3),
+    'drivetrain': (DRIVETRAIN_MODE_BUTTON, 0.3),
+    'speed_up': (SPEED_UP_BUTTON, 0.2),
+    'speed_down': (SPEED_DOWN_BUTTON, 0.2),
+    'speed_confirm': (SPEED_CONFIRM_BUTTON, 0.05),
+}
+
+# Seconds between full state snapshots sent to every client
+SNAPSHOT_PERIOD = 5.0
+
 class GPIOServer:
-    def __init__(self, host='10.6.3.77', port=12348):
+    def __init__(self, host='10.6.3.77', port=12348, backend=None):
         self.host = host
         self.port = port
         self.running = True
         self.h = None
+        self.lgpio = backend if backend is not None else lgpio
         
         # GPIO State variables
         self.leftDoorOpen = False
@@ -77,32 +119,38 @@ class GPIOServer:
         self.speedConfirmPressed = False
         self.manualSetpointSpeed = 0
         
-        # Previous button states for edge detection
-        self.prevStates = {}
+        # Button edges from the lgpio callbacks: (name, level, time.monotonic())
+        self.events = queue.Queue()
+        self.buttonLevels = {}  # Last accepted level of each button
+        self.debounceUntil = {}  # Edges before this time are bounce
+        self.lastEdgeTime = {}  # Latest edge seen on each button, bounce included
+        self.settlePending = set()  # Buttons to re-read when their debounce time is up
+        self.pinNames = {pin: name for name, (pin, _) in BUTTONS.items()}
+        self.callbacks = []
+        self.broadcastLatencies = deque(maxlen=1000)  # Seconds from edge to broadcast
         
         # Connected clients
         self.clients = []
         self.clients_lock = threading.Lock()
+        self.listening = threading.Event()
+        
+        # Sequenced state broadcasts (seq counts state changes)
+        self.stateSeq = 0
+        self.lastBroadcastState = {}
+        self.nextSnapshotTime = 0.0
         
         self.setupGPIO()
         
     def setupGPIO(self):
         """Initialize GPIO pins"""
+        lgpio = self.lgpio
         self.h = lgpio.gpiochip_open(4)
         self.log(f"GPIO chip handle: {self.h}", 'system')
         
-        # Configure input pins with pull-up resistors
-        lgpio.gpio_claim_input(self.h, LEFT_DOOR_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, RIGHT_DOOR_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, HEADLIGHTS_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, INTERIOR_LIGHTS_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, SERVICE_BRAKE_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, TRAIN_HORN_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, EMERGENCY_BRAKE_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, DRIVETRAIN_MODE_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, SPEED_UP_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, SPEED_DOWN_BUTTON, lgpio.SET_PULL_UP)
-        lgpio.gpio_claim_input(self.h, SPEED_CONFIRM_BUTTON, lgpio.SET_PULL_UP)
+        # Configure button pins with pull-up resistors, alerting on both edges
+        for name, (pin, _) in BUTTONS.items():
+            lgpio.gpio_claim_alert(self.h, pin, lgpio.BOTH_EDGES, lgpio.SET_PULL_UP)
+            self.callbacks.append(lgpio.callback(self.h, pin, lgpio.BOTH_EDGES, self.onEdge))
         
         # Configure output pins
         lgpio.gpio_claim_output(self.h, LEFT_DOOR_LED)
@@ -128,12 +176,10 @@ class GPIOServer:
         lgpio.gpio_write(self.h, ENGINE_FAILURE_LED, 0)
         lgpio.gpio_write(self.h, SIGNAL_FAILURE_LED, 0)
         
-        # Initialize previous states
-        self.prevStates = {
-            'left_door': 1, 'right_door': 1, 'headlights': 1, 'interior': 1,
-            'service_brake': 1, 'train_horn': 1, 'emergency_brake': 1,
-            'drivetrain': 1, 'speed_up': 1, 'speed_down': 1, 'speed_confirm': 1
-        }
+        # Initialize button levels (released)
+        self.buttonLevels = {name: 1 for name in BUTTONS}
+        self.debounceUntil = {name: 0.0 for name in BUTTONS}
+        self.lastEdgeTime = {name: 0.0 for name in BUTTONS}
         
         self.log("GPIO Server Initialized", 'system')
         print("=" * 50)
@@ -151,142 +197,168 @@ class GPIOServer:
         }
         
         with self.clients_lock:
-            disconnected = []
-            for client in self.clients:
-                try:
-                    client.sendall((json.dumps(log_msg) + '\n').encode('utf-8'))
-                except:
-                    disconnected.append(client)
-            
-            # Remove disconnected clients
-            for client in disconnected:
-                if client in self.clients:
-                    self.clients.remove(client)
+            self.sendToClients(log_msg)
     
-    def checkButtons(self):
-        """Monitor all button inputs and update states"""
+    def sendToClients(self, msg):
+        """Send msg to every connected client (caller holds clients_lock)"""
+        line = (json.dumps(msg) + '\n').encode('utf-8')
+        disconnected = []
+        for client in self.clients:
+            try:
+                client.sendall(line)
+            except:
+                disconnected.append(client)
+        
+        # Remove disconnected clients
+        for client in disconnected:
+            if client in self.clients:
+                self.clients.remove(client)
+    
+    def onEdge(self, chip, gpio, level, tick):
+        """lgpio alert callback: queue the edge and return at once"""
+        if level in (0, 1) and gpio in self.pinNames:
+            self.events.put_nowait((self.pinNames[gpio], level, time.monotonic()))
+    
+    def processEvents(self):
+        """Debounce queued button edges per pin and broadcast each batch of changes"""
+        # Buttons held at startup (service brake, horn) take effect right away
+        if self.settleButtons(list(BUTTONS), force=True):
+            self.broadcastState()
+        
         while self.running:
-            # Read all button states
-            leftState = lgpio.gpio_read(self.h, LEFT_DOOR_BUTTON)
-            rightState = lgpio.gpio_read(self.h, RIGHT_DOOR_BUTTON)
-            headlightsState = lgpio.gpio_read(self.h, HEADLIGHTS_BUTTON)
-            interiorState = lgpio.gpio_read(self.h, INTERIOR_LIGHTS_BUTTON)
-            serviceBrakeState = lgpio.gpio_read(self.h, SERVICE_BRAKE_BUTTON)
-            trainHornState = lgpio.gpio_read(self.h, TRAIN_HORN_BUTTON)
-            emergencyBrakeState = lgpio.gpio_read(self.h, EMERGENCY_BRAKE_BUTTON)
-            drivetrainState = lgpio.gpio_read(self.h, DRIVETRAIN_MODE_BUTTON)
-            speedUpState = lgpio.gpio_read(self.h, SPEED_UP_BUTTON)
-            speedDownState = lgpio.gpio_read(self.h, SPEED_DOWN_BUTTON)
-            speedConfirmState = lgpio.gpio_read(self.h, SPEED_CONFIRM_BUTTON)
+            try:
+                event = self.events.get(timeout=self.nextSettleTimeout())
+            except queue.Empty:
+                event = None
             
-            # Update pressed states
-            self.speedUpPressed = (speedUpState == 0)
-            self.speedDownPressed = (speedDownState == 0)
-            self.speedConfirmPressed = (speedConfirmState == 0)
-            
-            # Detect button press edges (falling edge, 1→0 transition)
             stateChanged = False
+            firstEdgeTime = None
+            while event is not None:
+                if self.handleEdge(*event):
+                    stateChanged = True
+                    if firstEdgeTime is None:
+                        firstEdgeTime = event[2]
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    event = None
             
-            # Left Door
-            if self.prevStates['left_door'] == 1 and leftState == 0:
-                self.leftDoorOpen = not self.leftDoorOpen
-                lgpio.gpio_write(self.h, LEFT_DOOR_LED, 1 if self.leftDoorOpen else 0)
-                self.log(f"Left Door: {'OPEN' if self.leftDoorOpen else 'CLOSED'}", 'doors')
-                stateChanged = True
-                time.sleep(0.3)
-            
-            # Right Door
-            if self.prevStates['right_door'] == 1 and rightState == 0:
-                self.rightDoorOpen = not self.rightDoorOpen
-                lgpio.gpio_write(self.h, RIGHT_DOOR_LED, 1 if self.rightDoorOpen else 0)
-                self.log(f"Right Door: {'OPEN' if self.rightDoorOpen else 'CLOSED'}", 'doors')
-                stateChanged = True
-                time.sleep(0.3)
-            
-            # Headlights
-            if self.prevStates['headlights'] == 1 and headlightsState == 0:
-                self.headlightsOn = not self.headlightsOn
-                lgpio.gpio_write(self.h, HEADLIGHTS_LED, 1 if self.headlightsOn else 0)
-                self.log(f"Headlights: {'ON' if self.headlightsOn else 'OFF'}", 'lights')
-                stateChanged = True
-                time.sleep(0.3)
-            
-            # Interior Lights
-            if self.prevStates['interior'] == 1 and interiorState == 0:
-                self.interiorLightsOn = not self.interiorLightsOn
-                lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 1 if self.interiorLightsOn else 0)
-                self.log(f"Interior Lights: {'ON' if self.interiorLightsOn else 'OFF'}", 'lights')
-                stateChanged = True
-                time.sleep(0.3)
-            
-            # Service Brake (continuous state)
-            if serviceBrakeState == 0 and not self.serviceBrakeActive:
-                self.serviceBrakeActive = True
-                self.log("Service Brake: ENGAGED", 'brakes')
-                stateChanged = True
-            elif serviceBrakeState == 1 and self.serviceBrakeActive:
-                self.serviceBrakeActive = False
-                self.log("Service Brake: RELEASED", 'brakes')
-                stateChanged = True
-            
-            # Train Horn (continuous state)
-            if trainHornState == 0 and not self.trainHornActive:
-                self.trainHornActive = True
-                self.log("Train Horn: SOUNDING", 'brakes')
-                stateChanged = True
-            elif trainHornState == 1 and self.trainHornActive:
-                self.trainHornActive = False
-                self.log("Train Horn: OFF", 'brakes')
+            # Debounce times that ran out: pick up any level that changed meanwhile
+            now = time.monotonic()
+            due = [name for name in self.settlePending if self.debounceUntil[name] <= now]
+            if due and self.settleButtons(due):
                 stateChanged = True
             
-            # Emergency Brake
-            if self.prevStates['emergency_brake'] == 1 and emergencyBrakeState == 0:
-                self.emergencyBrakeEngaged = not self.emergencyBrakeEngaged
-                lgpio.gpio_write(self.h, EMERGENCY_BRAKE_LED, 1 if self.emergencyBrakeEngaged else 0)
-                self.log(f"EMERGENCY BRAKE: {'🚨 ENGAGED 🚨' if self.emergencyBrakeEngaged else 'RELEASED'}", 'brakes')
-                stateChanged = True
-                time.sleep(0.3)
+            # Broadcast state update to all clients if something changed
+            if stateChanged:
+                self.broadcastState()
+                if firstEdgeTime is not None:
+                    self.broadcastLatencies.append(time.monotonic() - firstEdgeTime)
             
-            # Drivetrain Mode
-            if self.prevStates['drivetrain'] == 1 and drivetrainState == 0:
-                self.drivetrainManualMode = not self.drivetrainManualMode
-                lgpio.gpio_write(self.h, DRIVETRAIN_MODE_LED, 1 if self.drivetrainManualMode else 0)
-                self.log(f"Drivetrain Mode: {'MANUAL' if self.drivetrainManualMode else 'AUTOMATIC'}", 'speed')
-                stateChanged = True
-                time.sleep(0.3)
+            # Periodic full snapshot so clients can never drift for long
+            if time.monotonic() >= self.nextSnapshotTime:
+                self.broadcastState(snapshot=True)
+    
+    def nextSettleTimeout(self):
+        """Seconds until the next pending debounce time runs out (None: nothing pending)"""
+        if not self.settlePending:
+            return 0.5  # Wake up now and then to notice self.running going False
+        return max(0.0, min(self.debounceUntil[name] for name in self.settlePending) - time.monotonic())
+    
+    def handleEdge(self, name, level, edgeTime):
+        """Accept an edge unless it is bounce on its pin; returns True if state changed"""
+        self.lastEdgeTime[name] = edgeTime
+        if edgeTime < self.debounceUntil[name]:
+            self.settlePending.add(name)
+            return False
+        self.debounceUntil[name] = edgeTime + BUTTONS[name][1]
+        return self.applyButton(name, level)
+    
+    def settleButtons(self, names, force=False):
+        """Re-read buttons whose debounce time is up; returns True if state changed"""
+        stateChanged = False
+        for name in names:
+            self.settlePending.discard(name)
+            level = self.lgpio.gpio_read(self.h, BUTTONS[name][0])
+            if level != self.buttonLevels[name] or force:
+                # The new level dates from the last edge, so is its debounce time
+                self.debounceUntil[name] = self.lastEdgeTime[name] + BUTTONS[name][1]
+                if self.applyButton(name, level):
+                    stateChanged = True
+        return stateChanged
+    
+    def applyButton(self, name, level):
+        """Act on a debounced button level (0 = pressed); returns True if state changed"""
+        pressed = (level == 0)
+        wasPressed = (self.buttonLevels[name] == 0)
+        self.buttonLevels[name] = level
+        lgpio = self.lgpio
+        
+        # Continuous-state buttons follow the button
+        if name == 'service_brake':
+            if pressed != self.serviceBrakeActive:
+                self.serviceBrakeActive = pressed
+                self.log(f"Service Brake: {'ENGAGED' if pressed else 'RELEASED'}", 'brakes')
+                return True
+            return False
+        if name == 'train_horn':
+            if pressed != self.trainHornActive:
+                self.trainHornActive = pressed
+                self.log(f"Train Horn: {'SOUNDING' if pressed else 'OFF'}", 'brakes')
+                return True
+            return False
+        if name in ('speed_up', 'speed_down', 'speed_confirm'):
+            stateChanged = False
+            if name == 'speed_up':
+                stateChanged = self.speedUpPressed != pressed
+                self.speedUpPressed = pressed
+            elif name == 'speed_down':
+                stateChanged = self.speedDownPressed != pressed
+                self.speedDownPressed = pressed
+            else:
+                stateChanged = self.speedConfirmPressed != pressed
+                self.speedConfirmPressed = pressed
             
             # Speed buttons (only in manual mode)
-            if self.drivetrainManualMode:
-                if self.prevStates['speed_up'] == 1 and speedUpState == 0:
+            if pressed and not wasPressed and self.drivetrainManualMode and name != 'speed_confirm':
+                if name == 'speed_up':
                     self.manualSetpointSpeed = min(self.manualSetpointSpeed + 5, 70)
-                    self.log(f"Manual Speed Setpoint: {self.manualSetpointSpeed} MPH", 'speed')
-                    stateChanged = True
-                    time.sleep(0.2)
-                
-                if self.prevStates['speed_down'] == 1 and speedDownState == 0:
+                else:
                     self.manualSetpointSpeed = max(self.manualSetpointSpeed - 5, 0)
-                    self.log(f"Manual Speed Setpoint: {self.manualSetpointSpeed} MPH", 'speed')
-                    stateChanged = True
-                    time.sleep(0.2)
-            
-            # Update previous states
-            self.prevStates['left_door'] = leftState
-            self.prevStates['right_door'] = rightState
-            self.prevStates['headlights'] = headlightsState
-            self.prevStates['interior'] = interiorState
-            self.prevStates['service_brake'] = serviceBrakeState
-            self.prevStates['train_horn'] = trainHornState
-            self.prevStates['emergency_brake'] = emergencyBrakeState
-            self.prevStates['drivetrain'] = drivetrainState
-            self.prevStates['speed_up'] = speedUpState
-            self.prevStates['speed_down'] = speedDownState
-            self.prevStates['speed_confirm'] = speedConfirmState
-            
-            # Broadcast state update to all clients if something changed
-            if stateChanged:
-                self.broadcastState()
-            
-            time.sleep(0.05)
+                self.log(f"Manual Speed Setpoint: {self.manualSetpointSpeed} MPH", 'speed')
+                stateChanged = True
+            return stateChanged
+        
+        # Toggle buttons act on the press (falling edge, 1→0 transition)
+        if not pressed or wasPressed:
+            return False
+        if name == 'left_door':
+            self.leftDoorOpen = not self.leftDoorOpen
+            lgpio.gpio_write(self.h, LEFT_DOOR_LED, 1 if self.leftDoorOpen else 0)
+            self.log(f"Left Door: {'OPEN' if self.leftDoorOpen else 'CLOSED'}", 'doors')
+        elif name == 'right_door':
+            self.rightDoorOpen = not self.rightDoorOpen
+            lgpio.gpio_write(self.h, RIGHT_DOOR_LED, 1 if self.rightDoorOpen else 0)
+            self.log(f"Right Door: {'OPEN' if self.rightDoorOpen else 'CLOSED'}", 'doors')
+        elif name == 'headlights':
+            self.headlightsOn = not self.headlightsOn
+            lgpio.gpio_write(self.h, HEADLIGHTS_LED, 1 if self.headlightsOn else 0)
+            self.log(f"Headlights: {'ON' if self.headlightsOn else 'OFF'}", 'lights')
+        elif name == 'interior':
+            self.interiorLightsOn = not self.interiorLightsOn
+            lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 1 if self.interiorLightsOn else 0)
+            self.log(f"Interior Lights: {'ON' if self.interiorLightsOn else 'OFF'}", 'lights')
+        elif name == 'emergency_brake':
+            self.emergencyBrakeEngaged = not self.emergencyBrakeEngaged
+            lgpio.gpio_write(self.h, EMERGENCY_BRAKE_LED, 1 if self.emergencyBrakeEngaged else 0)
+            self.log(f"EMERGENCY BRAKE: {'🚨 ENGAGED 🚨' if self.emergencyBrakeEngaged else 'RELEASED'}", 'brakes')
+        elif name == 'drivetrain':
+            self.drivetrainManualMode = not self.drivetrainManualMode
+            lgpio.gpio_write(self.h, DRIVETRAIN_MODE_LED, 1 if self.drivetrainManualMode else 0)
+            self.log(f"Drivetrain Mode: {'MANUAL' if self.drivetrainManualMode else 'AUTOMATIC'}", 'speed')
+        else:
+            return False
+        return True
     
     def getState(self):
         """Return current GPIO state as dictionary"""
@@ -318,7 +390,7 @@ class GPIOServer:
         
         if led_name in led_map:
             pin = led_map[led_name]
-            lgpio.gpio_write(self.h, pin, 1 if state else 0)
+            self.lgpio.gpio_write(self.h, pin, 1 if state else 0)
             self.log(f"LED {led_name}: {'ON' if state else 'OFF'}", 'system')
             
             # Update internal door state when doors are controlled via setLED
@@ -330,42 +402,48 @@ class GPIOServer:
             return True
         return False
     
-    def broadcastState(self):
-        """Send current state to all connected clients"""
-        state_msg = {
-            'type': 'state_update',
-            'data': self.getState()
-        }
-        
+    def broadcastState(self, snapshot=False):
+        """
+        Send the keys that changed since the last broadcast to all connected
+        clients as the next seq ('state_delta'), or the full state if snapshot
+        """
         with self.clients_lock:
-            disconnected = []
-            for client in self.clients:
-                try:
-                    client.sendall((json.dumps(state_msg) + '\n').encode('utf-8'))
-                except:
-                    disconnected.append(client)
+            state = self.getState()
+            changed = {key: value for key, value in state.items()
+                       if key not in self.lastBroadcastState or self.lastBroadcastState[key] != value}
+            if changed:
+                self.stateSeq += 1
+                self.lastBroadcastState = state
             
-            # Remove disconnected clients
-            for client in disconnected:
-                if client in self.clients:
-                    self.clients.remove(client)
+            if snapshot:
+                self.nextSnapshotTime = time.monotonic() + SNAPSHOT_PERIOD
+                self.sendToClients(self.stateMessage(state))
+            elif changed:
+                self.sendToClients({
+                    'type': 'state_delta',
+                    'seq': self.stateSeq,
+                    'data': changed
+                })
+    
+    def stateMessage(self, state=None):
+        """Full state message for the current seq (caller holds clients_lock)"""
+        return {
+            'type': 'state_update',
+            'seq': self.stateSeq,
+            'data': state if state is not None else self.getState()
+        }
     
     def handleClient(self, client_socket, address):
         """Handle individual client connection"""
         self.log(f"Client connected from {address}", 'system')
         
+        # Send initial state (under the lock, so no delta can overtake it)
         with self.clients_lock:
             self.clients.append(client_socket)
-        
-        # Send initial state
-        try:
-            initial_state = {
-                'type': 'state_update',
-                'data': self.getState()
-            }
-            client_socket.sendall((json.dumps(initial_state) + '\n').encode('utf-8'))
-        except:
-            pass
+            try:
+                client_socket.sendall((json.dumps(self.stateMessage()) + '\n').encode('utf-8'))
+            except:
+                pass
         
         buffer = ""
         try:
@@ -411,7 +489,7 @@ class GPIOServer:
                 # Control headlights from main UI (for underground sections)
                 state = command.get('state')
                 self.headlightsOn = bool(state)
-                lgpio.gpio_write(self.h, HEADLIGHTS_LED, 1 if state else 0)
+                self.lgpio.gpio_write(self.h, HEADLIGHTS_LED, 1 if state else 0)
                 self.log(f"Headlights: {'ON' if state else 'OFF'} (Auto)", 'lights')
                 self.broadcastState()
             
@@ -419,16 +497,14 @@ class GPIOServer:
                 # Control interior lights from main UI (for underground sections)
                 state = command.get('state')
                 self.interiorLightsOn = bool(state)
-                lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 1 if state else 0)
+                self.lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 1 if state else 0)
                 self.log(f"Interior Lights: {'ON' if state else 'OFF'} (Auto)", 'lights')
                 self.broadcastState()
             
             elif cmd_type == 'get_state':
-                state_msg = {
-                    'type': 'state_update',
-                    'data': self.getState()
-                }
-                client_socket.sendall((json.dumps(state_msg) + '\n').encode('utf-8'))
+                # Full state - also how a client resyncs after a missing seq
+                with self.clients_lock:
+                    client_socket.sendall((json.dumps(self.stateMessage()) + '\n').encode('utf-8'))
         
         except json.JSONDecodeError:
             self.log(f"Invalid JSON received: {command_str}", 'error')
@@ -437,8 +513,8 @@ class GPIOServer:
     
     def start(self):
         """Start the GPIO server"""
-        # Start button monitoring thread
-        button_thread = threading.Thread(target=self.checkButtons, daemon=True)
+        # Start button event thread
+        button_thread = threading.Thread(target=self.processEvents, daemon=True)
         button_thread.start()
         
         # Start server socket
@@ -446,6 +522,8 @@ class GPIOServer:
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         server_socket.bind((self.host, self.port))
         server_socket.listen(5)
+        self.port = server_socket.getsockname()[1]  # Actual port when started on port 0
+        self.listening.set()
         
         self.log(f"GPIO Server listening on {self.host}:{self.port}", 'system')
         self.log("Waiting for Windows client connection...", 'system')
@@ -470,23 +548,96 @@ class GPIOServer:
     def cleanup(self):
         """Clean up GPIO resources"""
         self.running = False
+        for cb in self.callbacks:
+            cb.cancel()
+        self.callbacks = []
         time.sleep(0.2)
         
         if self.h is not None:
-            lgpio.gpio_write(self.h, LEFT_DOOR_LED, 0)
-            lgpio.gpio_write(self.h, RIGHT_DOOR_LED, 0)
-            lgpio.gpio_write(self.h, HEADLIGHTS_LED, 0)
-            lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 0)
-            lgpio.gpio_write(self.h, EMERGENCY_BRAKE_LED, 0)
-            lgpio.gpio_write(self.h, DRIVETRAIN_MODE_LED, 0)
-            lgpio.gpio_write(self.h, PASSENGER_EMERGENCY_LED, 0)
-            lgpio.gpio_write(self.h, BRAKE_FAILURE_LED, 0)
-            lgpio.gpio_write(self.h, ENGINE_FAILURE_LED, 0)
-            lgpio.gpio_write(self.h, SIGNAL_FAILURE_LED, 0)
-            lgpio.gpiochip_close(self.h)
+            self.lgpio.gpio_write(self.h, LEFT_DOOR_LED, 0)
+            self.lgpio.gpio_write(self.h, RIGHT_DOOR_LED, 0)
+            self.lgpio.gpio_write(self.h, HEADLIGHTS_LED, 0)
+            self.lgpio.gpio_write(self.h, INTERIOR_LIGHTS_LED, 0)
+            self.lgpio.gpio_write(self.h, EMERGENCY_BRAKE_LED, 0)
+            self.lgpio.gpio_write(self.h, DRIVETRAIN_MODE_LED, 0)
+            self.lgpio.gpio_write(self.h, PASSENGER_EMERGENCY_LED, 0)
+            self.lgpio.gpio_write(self.h, BRAKE_FAILURE_LED, 0)
+            self.lgpio.gpio_write(self.h, ENGINE_FAILURE_LED, 0)
+            self.lgpio.gpio_write(self.h, SIGNAL_FAILURE_LED, 0)
+            self.lgpio.gpiochip_close(self.h)
         
         self.log("GPIO cleaned up. Goodbye!", 'system')
 
+def benchmarkLatency(presses=100):
+    """
+    Run the full server on the stand-in backend and time button presses from
+    the pin edge to the state_update a connected client receives
+
+    Returns:
+        tuple: (latencies in milliseconds, state message bytes received per press)
+    """
+    import TC_GPIO_Simulator
+    
+    server = GPIOServer('127.0.0.1', 0, backend=TC_GPIO_Simulator)
+    threading.Thread(target=server.start, daemon=True).start()
+    server.listening.wait(5.0)
+    
+    client = socket.create_connection(('127.0.0.1', server.port))
+    reader = client.makefile('r', encoding='utf-8')
+    
+    import TC_GPIO_StateMirror
+    mirror = TC_GPIO_StateMirror.GPIOStateMirror()
+    stateBytes = [0]
+    
+    def nextState():
+        while True:
+            line = reader.readline()
+            msg = json.loads(line)
+            if msg.get('type', '').startswith('state_'):
+                stateBytes[0] += len(line.encode('utf-8'))
+            if mirror.apply(msg) is not None:
+                return mirror.state
+    
+    nextState()  # Initial state
+    stateBytes[0] = 0
+    
+    # Rotate through the toggle buttons so no press lands in its pin's debounce time
+    toggles = [('left_door', 'leftDoorOpen'), ('right_door', 'rightDoorOpen'),
+               ('headlights', 'headlightsOn'), ('interior', 'interiorLightsOn')]
+    latencies = []
+    for i in range(presses):
+        name, field = toggles[i % len(toggles)]
+        pin = BUTTONS[name][0]
+        expected = not getattr(server, field)
+        start = time.perf_counter()
+        TC_GPIO_Simulator.press(server.h, pin, bounces=2)
+        while nextState()[field] != expected:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+        TC_GPIO_Simulator.release(server.h, pin, bounces=2)
+        time.sleep(0.1)
+    
+    client.close()
+    server.running = False
+    return latencies, stateBytes[0] / max(1, presses)
+
+
 if __name__ == "__main__":
-    server = GPIOServer()
-    server.start()
\ No newline at end of file
+    if '--benchmark' in sys.argv:
+        index = sys.argv.index('--benchmark')
+        presses = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 100
+        latencies, bytesPerPress = benchmarkLatency(presses)
+        latencies.sort()
+        print(f"{len(latencies)} presses, button edge to client state update: "
+              f"min {latencies[0]:.2f} ms, median {latencies[len(latencies) // 2]:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms, max {latencies[-1]:.2f} ms, "
+              f"{bytesPerPress:.0f} state bytes per press")
+    elif '--simulate' in sys.argv or not HAS_LGPIO:
+        if not HAS_LGPIO:
+            print("Warning: lgpio not found. Running on the TC_GPIO_Simulator stand-in.")
+        import TC_GPIO_Simulator
+        server = GPIOServer(backend=TC_GPIO_Simulator)
+        server.start()
+    else:
+        server = GPIOServer()
+        server.start()
\ No newline at end of file
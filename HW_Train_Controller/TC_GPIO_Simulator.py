@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Software stand-in for the lgpio module used by TC_GPIO_Server.py
+
+Implements the part of the lgpio API the GPIO server uses (chip open/close,
+input/output/alert claims, reads, writes and edge callbacks) on in-memory
+pins, so the server runs on any Linux box. Buttons are driven from software
+with press()/release() (active low, like the pull-up wired buttons on the Pi).
+
+Like lgpio, edge callbacks are delivered on a separate thread, in order.
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+SET_PULL_UP = 32
+SET_PULL_DOWN = 64
+RISING_EDGE = 1
+FALLING_EDGE = 2
+BOTH_EDGES = 3
+
+_handles = itertools.count(1)
+_chips = {}
+_deliveries = queue.Queue()
+_deliveryThread = None
+_deliveryLock = threading.Lock()
+
+
+class _Chip:
+    def __init__(self, number):
+        self.number = number
+        self.levels = {}
+        self.outputs = set()
+        self.alerts = {}  # gpio -> edge flags
+        self.callbacks = []
+
+
+class _Callback:
+    """Handle returned by callback(); cancel() stops the callbacks"""
+
+    def __init__(self, handle, gpio, edge, func):
+        self.handle = handle
+        self.gpio = gpio
+        self.edge = edge
+        self.func = func
+
+    def cancel(self):
+        chip = _chips.get(self.handle)
+        if chip is not None and self in chip.callbacks:
+            chip.callbacks.remove(self)
+
+
+def _deliver():
+    # Calls edge callbacks one at a time, like lgpio's callback thread
+    while True:
+        func, args = _deliveries.get()
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"[GPIO SIM] Callback error: {e}")
+
+
+def _startDelivery():
+    global _deliveryThread
+    with _deliveryLock:
+        if _deliveryThread is None:
+            _deliveryThread = threading.Thread(target=_deliver, daemon=True)
+            _deliveryThread.start()
+
+
+def gpiochip_open(gpiochip):
+    handle = next(_handles)
+    _chips[handle] = _Chip(gpiochip)
+    _startDelivery()
+    return handle
+
+
+def gpiochip_close(handle):
+    _chips.pop(handle, None)
+    return 0
+
+
+def gpio_claim_input(handle, gpio, lFlags=0):
+    _chips[handle].levels[gpio] = 0 if lFlags & SET_PULL_DOWN else 1
+    return 0
+
+
+def gpio_claim_output(handle, gpio, level=0, lFlags=0):
+    chip = _chips[handle]
+    chip.outputs.add(gpio)
+    chip.levels[gpio] = level
+    return 0
+
+
+def gpio_claim_alert(handle, gpio, eFlags, lFlags=0, notify_handle=None):
+    gpio_claim_input(handle, gpio, lFlags)
+    _chips[handle].alerts[gpio] = eFlags
+    return 0
+
+
+def gpio_read(handle, gpio):
+    return _chips[handle].levels.get(gpio, 0)
+
+
+def gpio_write(handle, gpio, level):
+    _chips[handle].levels[gpio] = 1 if level else 0
+    return 0
+
+
+def callback(handle, gpio, edge=RISING_EDGE, func=None):
+    cb = _Callback(handle, gpio, edge, func)
+    _chips[handle].callbacks.append(cb)
+    return cb
+
+
+# ===== Stand-in only: drive inputs from software =====
+
+def set_input(handle, gpio, level):
+    """Set an input pin's level, firing alert callbacks on a change"""
+    chip = _chips[handle]
+    level = 1 if level else 0
+    if chip.levels.get(gpio) == level:
+        return
+    chip.levels[gpio] = level
+    edge = RISING_EDGE if level else FALLING_EDGE
+    if not chip.alerts.get(gpio, 0) & edge:
+        return
+    tick = time.time_ns()
+    for cb in list(chip.callbacks):
+        if cb.gpio == gpio and cb.edge & edge and cb.func is not None:
+            _deliveries.put((cb.func, (chip.number, gpio, level, tick)))
+
+
+def press(handle, gpio, bounces=0):
+    """Press an active-low button; bounces adds that many extra open/close chatters"""
+    set_input(handle, gpio, 0)
+    for _ in range(bounces):
+        set_input(handle, gpio, 1)
+        set_input(handle, gpio, 0)
+
+
+def release(handle, gpio, bounces=0):
+    """Release an active-low button"""
+    set_input(handle, gpio, 1)
+    for _ in range(bounces):
+        set_input(handle, gpio, 0)
+        set_input(handle, gpio, 1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Client-side copy of the GPIO server state
+
+The GPIO server numbers every state change (seq) and sends:
+- 'state_update': the full state - on connect, in reply to get_state and
+  every few seconds as a snapshot
+- 'state_delta': only the keys that changed, for one seq
+
+A GPIOStateMirror applies both and notices a missing seq (a dropped or
+unparsable line). It then ignores deltas until the next full state and sets
+needsResync, so the client can ask for one with {'type': 'get_state'}.
+"""
+
+
+class GPIOStateMirror:
+    def __init__(self):
+        self.state = {}
+        self.seq = None
+        self.synced = False
+        self.needsResync = False
+        self.resyncCount = 0
+
+    def apply(self, message):
+        """
+        Apply a state_update or state_delta message
+
+        Returns:
+            dict: The keys that changed and their new values, or None if the
+            message changed nothing (not a state message, stale, or out of sync)
+        """
+        msgType = message.get('type')
+        data = message.get('data', {})
+        seq = message.get('seq')
+
+        if msgType == 'state_update':
+            # A snapshot older than what we have already applied is stale
+            if self.synced and seq is not None and self.seq is not None and seq < self.seq:
+                return None
+            changed = {key: value for key, value in data.items()
+                       if key not in self.state or self.state[key] != value}
+            self.state.update(data)
+            self.seq = seq
+            self.synced = True
+            self.needsResync = False
+            return changed
+
+        if msgType == 'state_delta':
+            if not self.synced:
+                return None
+            if seq is not None and self.seq is not None and seq != self.seq + 1:
+                if seq <= self.seq:
+                    return None  # Already covered by a snapshot
+                # Gap: wait for a full state before applying deltas again
+                self.synced = False
+                self.needsResync = True
+                self.resyncCount += 1
+                return None
+            self.state.update(data)
+            self.seq = seq
+            return data
+
+        return None
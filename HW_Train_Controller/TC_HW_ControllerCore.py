@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Hardware Train Controller - Control Core
+
+The control logic of one hardware-backed train, without the UI:
+position tracking along the line's station-to-station route (stations,
+doors, tunnel lights, yard return) and the PI power command.
+
+All state lives on a HWTrainController instance, so a process can run one
+per train and the logic runs headless. Everything the controller does to the
+outside world goes through its HardwareIO (GPIO server LEDs and lights,
+Train Model commands, system log); TC_HW_MainUI.py supplies the one for the
+Pi and the Train Model.
+
+The PI step is PIKernel.pi_power, the same kernel the software controller
+uses, and the braking curve and clock are the shared SpeedProfile and SimClock.
+"""
+
+import os
+import sys
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
+if os.path.join(_ROOT, 'train_controller_sw') not in sys.path:
+    sys.path.append(os.path.join(_ROOT, 'train_controller_sw'))
+
+from SimClock import SimClock
+from SpeedProfile import get_speed_profile
+from RouteIndex import get_route_index, LINE_STATION_DOOR_SIDES, LINE_TRACK_INFORMATION
+from PIKernel import pi_power, SAMPLE_TIME
+
+MPH_TO_MS = 0.44704  # 1 mph = 0.44704 m/s
+MS_TO_MPH = 2.23694  # 1 m/s = 2.23694 mph
+
+YARD_BLOCK = {'GREEN': 63, 'RED': 8}
+# Segment the loop restarts at (after the YARD initialization) and the station it runs to
+LOOP_START_SEGMENT = {line: info['loop_start'] for line, info in LINE_TRACK_INFORMATION.items()}
+LOOP_FIRST_STATION = {line: info['segments'][info['loop_start']]['to_station']
+                      for line, info in LINE_TRACK_INFORMATION.items()}
+
+# RED LINE switches, by segment (from_block, to_block):
+# (beacon number, switch block, branch blocks in order, block the branch rejoins the main line at)
+RED_LINE_BRANCHES = {
+    (25, 35): (1, 27, (76, 75, 74, 73, 72), 32),  # PENN STATION to STEEL PLAZA
+    (35, 45): (2, 38, (71, 70, 69, 68, 67), 38),  # STEEL PLAZA to FIRST AVE
+}
+
+# Yard return: entering this block with authority 1 sends the train to the yard
+YARD_RETURN_BLOCK = {'GREEN': 58, 'RED': 9}
+
+# Automatic mode control parameters
+DECELERATION_DISTANCE = 200.0  # Start decelerating 200m before station (meters)
+STATION_STOP_THRESHOLD = 5.0  # Consider "at station" when within 5m
+STATION_DWELL_TIME = 30.0  # Time to wait at station (simulation seconds)
+
+# Speed reduction detection - use the service brake to slow down
+SPEED_REDUCTION_THRESHOLD = 5.0  # MPH - significant speed reduction
+SERVICE_BRAKE_DURATION = 0.5  # seconds to apply brake
+
+
+class HardwareIO:
+    """
+    Outputs of one HWTrainController
+
+    An implementation sends these to the train's GPIO server and Train Model
+    (tagged with the train id). This base class drops them, for running a
+    controller headless.
+    """
+
+    def setLED(self, ledName, state):
+        """Door LED on the Pi ('left_door' or 'right_door')"""
+
+    def setHeadlights(self, state):
+        """Headlights on the Pi"""
+
+    def setInteriorLights(self, state):
+        """Interior lights on the Pi"""
+
+    def sendToTrainModel(self, command, value):
+        """One command for this train to the Train Model"""
+
+    def log(self, message):
+        """Line for the System Log UI"""
+
+
+class HWTrainController:
+    """
+    Control core of one hardware-backed train
+
+    Inputs are plain attributes, set by whoever receives the Train Model,
+    Track Model and GPIO server messages:
+        currentSpeed (m/s), commandedSpeed and displayCommandedSpeed (MPH),
+        commandedAuthority, manualSetpointSpeed (MPH), drivetrainManualMode,
+        emergencyBrakeEngaged, serviceBrakeActive, beacon1, beacon2
+
+    calculatePowerCommand() runs one control period: it advances the
+    position along the route and returns the PI power command in kW.
+    """
+
+    def __init__(self, trainId=1, selectedLine='GREEN', io=None, clock=None):
+        self.trainId = trainId
+        self.io = io if io is not None else HardwareIO()
+        self.clock = clock if clock is not None else SimClock()
+
+        # Inputs
+        self.beacon1 = False  # RED LINE: Switch at block 27 (to blocks 76-72)
+        self.beacon2 = False  # RED LINE: Switch at block 38 (to blocks 71-67)
+        self.serviceBrakeActive = True  # Train starts with brakes engaged for safety
+        self.emergencyBrakeEngaged = False
+        self.drivetrainManualMode = False
+        self.commandedSpeed = 0  # Internal commanded speed (authority-adjusted)
+        self.displayCommandedSpeed = 0  # Raw commanded speed for display (not authority-adjusted)
+        self.previousCommandedSpeed = 0.0  # Track previous commanded speed for detecting reductions
+        self.commandedAuthority = 0
+        self.currentSpeed = 0
+        self.manualSetpointSpeed = 0
+        self.returningToYard = False  # Flag to indicate train is returning to yard
+
+        # PI controller state
+        self.integralError = 0.0
+        self.prevError = 0.0  # Previous error for trapezoidal integration
+        self.sampleTime = SAMPLE_TIME  # 100ms update rate
+        self.speedReductionBrakeTime = 0.0
+        self.lastBrakeCheckTime = time.time()
+
+        # Results of the last control period, for the displays
+        self.lastCommandedSpeedMPH = 0.0
+        self.lastVelocityError = 0.0
+        self.lastPower = 0.0
+
+        # Automatic mode position tracking
+        self.autoModeEnabled = True  # Set to True to enable automatic mode station stopping
+        self.currentSegmentIndex = 0  # Which segment we're currently traveling through
+        self.distanceTraveledInSegment = 0.0  # How far we've traveled in current segment (meters)
+        self.lastPositionUpdateTime = None  # Sim time of the last position update (seconds)
+        self.lastPositionSpeed = 0.0  # Speed at the last position update, for trapezoidal displacement
+        self.trackReportsBlocks = False  # True once the Track Model reports block entries (Current Block)
+        self.stationDwellStartTime = None  # Track when we arrived at station
+        self.isAtStation = False  # Flag to track if we're stopped at a station
+        self.lastUndergroundState = False  # Track if we were underground last update
+
+        # Debug output counters
+        self._positionPrintCounter = 0
+        self._diagnosticCounter = 0
+        self._holdingPrintCounter = 0
+        self._decelPrintCounter = 0
+        self._speedDebugCounter = 0
+
+        self.selectLine(selectedLine)
+
+    def selectLine(self, line):
+        """Load the route, tunnel and door tables of a line ('GREEN' or 'RED') and start at its yard"""
+        self.selectedLine = line
+        self.stationDoorSides = LINE_STATION_DOOR_SIDES[line]
+        self.currentBlock = YARD_BLOCK[line]
+        self.prevBlock = self.currentBlock
+        self.setTrackInformation(LINE_TRACK_INFORMATION[line])
+
+    def setTrackInformation(self, trackInformation):
+        """Use a station-to-station table (the line's, or one received as Beacon Data)"""
+        self.trackInformation = trackInformation
+        self.distanceToNextStation = trackInformation['segments'][0]['distance']
+        self.routeIndex = get_route_index(self.selectedLine, trackInformation)
+
+    @property
+    def segments(self):
+        return self.trackInformation['segments']
+
+    @property
+    def undergroundBlocks(self):
+        return self.routeIndex.underground
+
+    # ===== Queries =====
+
+    def getNextStationName(self):
+        """Get the name of the next station"""
+        # If returning to yard, always show YARD
+        if self.returningToYard:
+            return "YARD"
+
+        # Check if we're on RED LINE at a switch point with beacon active OR in alternative route blocks
+        if self.selectedLine == 'RED':
+            # Beacon1 alternative route blocks: 27 (switch), 76, 75, 74, 73, 72 (NOT 32 - that's back on main)
+            if self.beacon1 and self.currentBlock in [27, 76, 75, 74, 73, 72]:
+                return "ALTERNATIVE ROUTE (Blocks 76-72)"
+
+            # Beacon2 alternative route blocks: 38 (switch), 71, 70, 69, 68, 67 (NOT 39 - that's back on main)
+            if self.beacon2 and self.currentBlock in [38, 71, 70, 69, 68, 67]:
+                return "ALTERNATIVE ROUTE (Blocks 71-67)"
+
+        if self.currentSegmentIndex < len(self.segments):
+            return self.segments[self.currentSegmentIndex]['to_station']
+        # Both lines loop back to their first station
+        if self.selectedLine == 'RED':
+            return "SHADYSIDE"  # Red Line loops: YARD → SHADYSIDE
+        return "GLENBURY"  # Green Line loops: YARD → GLENBURY
+
+    def shouldStartDecelerating(self):
+        """Check if train should start decelerating for station approach"""
+        return self.distanceToNextStation <= DECELERATION_DISTANCE and not self.isAtStation
+
+    def getCurrentBlockNumber(self):
+        """Determine current block based on position in route"""
+        if self.currentSegmentIndex >= len(self.segments):
+            return YARD_BLOCK.get(self.selectedLine, 63)  # Default to the yard
+
+        block = self.routeIndex.block_at(self.currentSegmentIndex, self.distanceTraveledInSegment)
+
+        # RED LINE switches: a beacon sends the train through a branch
+        segment = self.segments[self.currentSegmentIndex]
+        if self.selectedLine == 'RED' and (segment['from_block'], segment['to_block']) in RED_LINE_BRANCHES:
+            return self._switchedBlock(block, *RED_LINE_BRANCHES[(segment['from_block'], segment['to_block'])])
+        return block
+
+    def _switchedBlock(self, mainBlock, beaconNumber, switchBlock, altBlocks, rejoinBlock):
+        """
+        Block on a RED LINE segment with a switch: with the beacon active the
+        train leaves the main line at switchBlock, runs through altBlocks one
+        block per update and rejoins the main line at rejoinBlock
+        """
+        beacon = self.beacon1 if beaconNumber == 1 else self.beacon2
+        if beacon and self.currentBlock in altBlocks:
+            # At the END of the alternative route, rejoin the main line
+            if self.currentBlock == altBlocks[-1]:
+                print(f"[ALT ROUTE {beaconNumber}] Completed alternative route, rejoining main at block {rejoinBlock}")
+                return rejoinBlock
+            nextBlock = altBlocks[altBlocks.index(self.currentBlock) + 1]
+            print(f"[ALT ROUTE {beaconNumber}] Continuing: {self.currentBlock} → {nextBlock}")
+            return nextBlock
+
+        if mainBlock == switchBlock and beacon:
+            # Switch activated! Redirect to the branch
+            print(f"[SWITCH] Beacon {beaconNumber} detected at block {switchBlock} - taking branch to blocks {altBlocks[0]}-{altBlocks[-1]}")
+            return altBlocks[0]
+        return mainBlock
+
+    # ===== Position tracking =====
+
+    def resyncPosition(self, block):
+        """
+        Correct the integrated position from a Track Model block-entry report.
+        Entering the station block of the current segment puts the train half that
+        block before its stop point.
+        """
+        self.currentBlock = block
+        self.trackReportsBlocks = True
+        if self.isAtStation or self.currentSegmentIndex >= len(self.segments):
+            return
+
+        segment = self.segments[self.currentSegmentIndex]
+        if block != segment['to_block']:
+            return
+
+        expected = segment['distance'] - segment.get('station_block_half_length', 0.0)
+        correction = expected - self.distanceTraveledInSegment
+        self.distanceTraveledInSegment = expected
+        self.distanceToNextStation = segment['distance'] - expected
+        if abs(correction) > 1.0:
+            print(f"[POSITION] Resync at block {block}: corrected by {correction:+.1f} m")
+
+    def _setServiceBrake(self, active):
+        self.serviceBrakeActive = active
+        self.io.sendToTrainModel('Service Brake', active)
+
+    def _announce(self, text):
+        self.io.sendToTrainModel('Announcement', text)
+        print(f"📢 Announcement: {text}")
+
+    def _startYardReturn(self):
+        """Authority 1 at the line's yard-return block: stop and stay stopped"""
+        self.returningToYard = True
+        self.commandedSpeed = 0.0  # Stop the train completely
+
+        print(f"⚠️  {self.selectedLine} LINE: Authority 1 detected at block {self.currentBlock} - RETURNING TO YARD")
+        print(f"🛑 STOPPING ALL MOVEMENT - Service brake ENGAGED")
+        self._setServiceBrake(True)
+        self._announce("Returning to yard. All movement terminated.")
+        self.io.log(f"{self.selectedLine} LINE: Train returning to yard from block {self.currentBlock} (Authority 1)")
+
+    def _setTunnelLights(self, underground):
+        self.io.setHeadlights(underground)
+        self.io.setInteriorLights(underground)
+        self.io.sendToTrainModel('Headlights', underground)
+        self.io.sendToTrainModel('Cabin Lights', underground)
+        if underground:
+            print(f"💡 Headlights & cabin lights turned ON for tunnel safety")
+        else:
+            print(f"💡 Headlights & cabin lights turned OFF")
+
+    def _setDoors(self, left, right):
+        """Door LEDs on the Pi and door signals to the Train Model (None leaves a side alone)"""
+        for side, state in (('left', left), ('right', right)):
+            if state is None:
+                continue
+            self.io.setLED(f'{side}_door', state)
+            self.io.sendToTrainModel(f'{side.capitalize()} Door Signal', state)
+
+    def _arriveAtStation(self, currentTime):
+        self.isAtStation = True
+        self.stationDwellStartTime = currentTime
+        self.distanceToNextStation = 0.0
+        currentStation = self.segments[self.currentSegmentIndex]['to_station']
+
+        arrival_msg = f"*** ARRIVED AT {currentStation} ***"
+        print(arrival_msg)
+        self._announce(f"Arrived at {currentStation}")
+
+        # ENGAGE SERVICE BRAKE at station
+        self._setServiceBrake(True)
+        print(f"🛑 Service brake ENGAGED at {currentStation}")
+
+        # Open the doors on the platform side
+        door_side = self.routeIndex.door_side(self.currentSegmentIndex)
+        self._setDoors(True if door_side in ('left', 'both') else None,
+                       True if door_side in ('right', 'both') else None)
+        print(f"🚪 Doors opening ({door_side})")
+
+        self.io.log(arrival_msg)
+
+    def _departStation(self):
+        # RELEASE SERVICE BRAKE and close doors before departing
+        self._setServiceBrake(False)
+        print(f"🟢 Service brake RELEASED for departure")
+        self._setDoors(False, False)
+        print(f"🚪 Doors closing")
+
+        departure_msg = f"Departing {self.segments[self.currentSegmentIndex]['to_station']}"
+        print(departure_msg)
+        self.io.log(departure_msg)
+
+        # Move to next segment; both lines loop back to the main loop beginning (after YARD initialization)
+        self.currentSegmentIndex += 1
+        if self.currentSegmentIndex >= len(self.segments):
+            line = 'RED' if self.selectedLine == 'RED' else 'GREEN'
+            self.currentSegmentIndex = LOOP_START_SEGMENT[line]
+            loop_msg = f"Completed {line.capitalize()} Line loop - Continuing to {LOOP_FIRST_STATION[line]}"
+            print(loop_msg)
+            self.io.log(loop_msg)
+
+        # Reset for next segment
+        self.distanceTraveledInSegment = 0.0
+        self.distanceToNextStation = self.segments[self.currentSegmentIndex]['distance']
+        self.isAtStation = False
+        self.stationDwellStartTime = None
+        self._announce(f"Travelling to {self.segments[self.currentSegmentIndex]['to_station']}")
+
+    def updatePositionTracking(self):
+        """
+        Update position tracking for automatic mode based on current velocity and time.
+        Uses continuous integration: displacement = velocity × time
+        Also controls headlights and interior lights based on underground sections.
+        """
+        if not self.autoModeEnabled:
+            return
+
+        prevBlock = self.prevBlock
+        if not self.trackReportsBlocks:
+            self.currentBlock = self.getCurrentBlockNumber()
+
+        if self.currentBlock != prevBlock:
+            print(f"[BLOCK CHANGE] Block {prevBlock} → {self.currentBlock}")
+            self.prevBlock = self.currentBlock
+
+            # YARD RETURN LOGIC - authority 1 at the line's yard-return block
+            if self.commandedAuthority == 1 and self.currentBlock == YARD_RETURN_BLOCK.get(self.selectedLine):
+                self._startYardReturn()
+
+            # Inform driver of underground status on block changes
+            isUnderground = self.routeIndex.is_underground(self.currentBlock)
+            if isUnderground:
+                print(f"📍 Inside underground tunnel (Block {self.currentBlock})")
+            elif self.routeIndex.is_underground(prevBlock):
+                print(f"📍 Exiting underground tunnel - returning to surface (Block {self.currentBlock})")
+
+        # Only send light commands when the underground state changes
+        isUnderground = self.routeIndex.is_underground(self.currentBlock)
+        if isUnderground != self.lastUndergroundState:
+            self._setTunnelLights(isUnderground)
+            self.lastUndergroundState = isUnderground
+
+        currentTime = self.clock.now()
+
+        # If returning to yard, don't update position - train is stopped
+        if self.returningToYard:
+            return
+
+        # Initialize timing on first call
+        if self.lastPositionUpdateTime is None:
+            self.lastPositionUpdateTime = currentTime
+            self.lastPositionSpeed = self.currentSpeed
+            print(f"Position tracking initialized")
+            print(f"Starting segment: {self.segments[0]['from_station']} → {self.segments[0]['to_station']}")
+            print(f"Initial distance to station: {self.distanceToNextStation:.1f}m")
+            return
+
+        # Simulation time elapsed since last update (already scaled by the CTC multiplier)
+        dt = currentTime - self.lastPositionUpdateTime
+        self.lastPositionUpdateTime = currentTime
+        averageSpeed = (self.currentSpeed + self.lastPositionSpeed) / 2.0
+        self.lastPositionSpeed = self.currentSpeed
+
+        # If we're at a station, don't update position - wait out the dwell time
+        if self.isAtStation:
+            if self.stationDwellStartTime is not None and currentTime - self.stationDwellStartTime >= STATION_DWELL_TIME:
+                self._departStation()
+            return
+
+        # Calculate displacement: distance = velocity × time (trapezoidal over the step)
+        # speeds are in m/s, dt is in simulation seconds
+        segment = self.segments[self.currentSegmentIndex]
+        self.distanceTraveledInSegment += averageSpeed * dt
+        self.distanceToNextStation = segment['distance'] - self.distanceTraveledInSegment
+
+        # Debug output showing position updates (about every second at 100ms updates)
+        self._positionPrintCounter += 1
+        if self._positionPrintCounter >= 10:
+            self._positionPrintCounter = 0
+            # Convert meters to feet for display (1 meter = 3.28084 feet)
+            print(f"Speed: {self.currentSpeed:.2f} m/s, Traveled: {self.distanceTraveledInSegment * 3.28084:.1f}ft, "
+                  f"Remaining: {self.distanceToNextStation * 3.28084:.1f}ft to {segment['to_station']}")
+
+        # Check if we've reached the station
+        if self.distanceToNextStation <= STATION_STOP_THRESHOLD:
+            self._arriveAtStation(currentTime)
+
+    # ===== Power command =====
+
+    def targetSpeedMPH(self):
+        """Speed to control to this period (MPH): the setpoint, capped by the station stop and braking curve"""
+        if self.drivetrainManualMode:
+            # In manual mode, use manual setpoint speed
+            commandedSpeedMPH = self.manualSetpointSpeed
+
+            # MANUAL MODE SPEED LIMIT ENFORCEMENT
+            # Unless authority is 4, manual speed cannot exceed the track speed limit
+            # (displayCommandedSpeed is the raw track speed limit, authority-unadjusted)
+            if self.commandedAuthority != 4 and commandedSpeedMPH > self.displayCommandedSpeed:
+                commandedSpeedMPH = self.displayCommandedSpeed
+                print(f"[MANUAL MODE] Speed limited to track limit: {self.displayCommandedSpeed:.1f} MPH (Authority={self.commandedAuthority})")
+            return commandedSpeedMPH
+
+        # In automatic mode, use commanded speed from track
+        commandedSpeedMPH = self.commandedSpeed
+
+        # AUTOMATIC MODE STATION LOGIC
+        if self.autoModeEnabled and not self.emergencyBrakeEngaged:
+            if self.isAtStation:
+                # Force stop at station
+                self._holdingPrintCounter += 1
+                if self._holdingPrintCounter >= 20:
+                    self._holdingPrintCounter = 0
+                    print(f"Holding at station: {self.getNextStationName()}")
+                return 0.0
+
+            # Braking curve: precomputed per segment from the line's speed limits,
+            # grades and the service brake (v² = v_next² + 2a·dx back from the stop)
+            speedProfile = get_speed_profile(self.selectedLine or 'GREEN', self.trackInformation)
+            targetSpeedMS = speedProfile.allowed_speed(self.currentSegmentIndex, self.distanceTraveledInSegment)
+            if targetSpeedMS < commandedSpeedMPH * MPH_TO_MS:
+                commandedSpeedMPH = targetSpeedMS * MS_TO_MPH
+
+                self._decelPrintCounter += 1
+                if self._decelPrintCounter >= 5:
+                    self._decelPrintCounter = 0
+                    print(f"Braking curve to {self.getNextStationName()}: {self.distanceToNextStation:.1f}m, target {commandedSpeedMPH:.1f} MPH")
+        return commandedSpeedMPH
+
+    def _checkSpeedReduction(self, commandedSpeedMPH):
+        """
+        Apply the service brake briefly when the commanded speed drops a lot
+        and the train is well above it
+
+        Returns:
+            bool: False if the brake must stay on (returning to yard) and power must be 0
+        """
+        currentSpeedMPH = self.currentSpeed * MS_TO_MPH
+        current_time = time.time()
+        dt_check = current_time - self.lastBrakeCheckTime
+        self.lastBrakeCheckTime = current_time
+
+        # Detect commanded speed reduction (not at station, not in manual mode)
+        if not self.drivetrainManualMode and not self.isAtStation and not self.emergencyBrakeEngaged:
+            speedReduction = self.previousCommandedSpeed - commandedSpeedMPH
+            if (speedReduction > SPEED_REDUCTION_THRESHOLD and currentSpeedMPH > commandedSpeedMPH + 3.0
+                    and self.speedReductionBrakeTime <= 0):
+                self.speedReductionBrakeTime = SERVICE_BRAKE_DURATION
+                print(f"⚠️  Speed reduced from {self.previousCommandedSpeed:.1f} to {commandedSpeedMPH:.1f} MPH - applying service brake to slow down")
+                self._setServiceBrake(True)
+
+        # Count down brake time and release when done
+        if self.speedReductionBrakeTime > 0:
+            self.speedReductionBrakeTime -= dt_check
+            if self.speedReductionBrakeTime <= 0:
+                self.speedReductionBrakeTime = 0.0
+                # Don't release brake if returning to yard
+                if self.returningToYard:
+                    print(f"[YARD RETURN] Keeping service brake engaged - train at yard")
+                    return False
+                self._setServiceBrake(False)
+                print(f"🟢 Service brake released - now controlling to {commandedSpeedMPH:.1f} MPH with power")
+        return True
+
+    def calculatePowerCommand(self, kp, ki, maxPower):
+        """
+        One control period: update the position, then the PI power command.
+
+        In AUTOMATIC mode, handles station approach and stopping:
+        - Decelerates along the braking curve as the train approaches a station
+        - Stops and holds at the station for the dwell time
+        - Uses service brake when commanded speed is reduced to slow down safely
+
+        Commanded speed is in MPH, current speed is in m/s.
+
+        Returns:
+            Power in kW (kilowatts)
+        """
+        self.updatePositionTracking()
+
+        # Diagnostic output (first 5 calls only to avoid spam)
+        if self._diagnosticCounter < 5:
+            self._diagnosticCounter += 1
+            print(f"[DIAGNOSTIC {self._diagnosticCounter}] commandedSpeed: {self.commandedSpeed} MPH, currentSpeed: {self.currentSpeed} m/s, drivetrainManualMode: {self.drivetrainManualMode}, autoModeEnabled: {self.autoModeEnabled}")
+
+        commandedSpeedMPH = self.targetSpeedMPH()
+        commandedSpeedMS = commandedSpeedMPH * MPH_TO_MS
+        currentSpeedMS = self.currentSpeed
+        self.lastCommandedSpeedMPH = commandedSpeedMPH
+
+        if not self._checkSpeedReduction(commandedSpeedMPH):
+            return 0.0
+
+        self._speedDebugCounter += 1
+        if self._speedDebugCounter % 20 == 0:
+            print(f"[SPEED DEBUG] Commanded={commandedSpeedMPH:.1f} MPH ({commandedSpeedMS:.2f}m/s), Current={currentSpeedMS * MS_TO_MPH:.1f} MPH ({currentSpeedMS:.2f}m/s), Error={commandedSpeedMS - currentSpeedMS:.2f}m/s")
+
+        # PI control law (trapezoidal integration with anti-windup), shared with the software controller.
+        # The service brake is applied by the GPIO button, station stops and speed reduction
+        # detection; power is cut while it is on by whoever sends the command.
+        power, self.integralError, self.prevError = pi_power(
+            commandedSpeedMS, currentSpeedMS, kp, ki, maxPower,
+            self.integralError, self.prevError, sample_time=self.sampleTime)
+        self.lastVelocityError = self.prevError
+        self.lastPower = power
+        return power
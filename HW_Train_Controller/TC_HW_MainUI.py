@@ -30,6 +30,9 @@ from TC_HW_TrackInfo_UI import TrackInformationPanel
 from TC_HW_PowerEngineer_UI import PowerEngineerPanel
 from TC_HW_SystemLogUI import SystemLogViewer
 from TrainSocketServer import TrainSocketServer
+from SimClock import SimClock
+from TC_GPIO_StateMirror import GPIOStateMirror
+from TC_HW_ControllerCore import HWTrainController, HardwareIO, MS_TO_MPH, DECELERATION_DISTANCE
 
 # CONFIGURATION - SET YOUR PI'S IP ADDRESS HERE
 PI_HOST = '172.20.10.4'  # ← CHANGE THIS to your Pi's IP address
@@ -44,31 +47,20 @@ def load_socket_config():
     return {}
 
 # Global state variables (mirrored from Pi)
-selectedLine = None  # Will be set by line selection dialog: 'GREEN' or 'RED'
-beacon1 = False  # RED LINE: Switch at block 27 (to blocks 76-72)
-beacon2 = False  # RED LINE: Switch at block 38 (to blocks 71-67)
 leftDoorOpen = False
 rightDoorOpen = False
 headlightsOn = False
 interiorLightsOn = False
-serviceBrakeActive = True  # Train starts with brakes engaged for safety
 trainHornActive = False
-emergencyBrakeEngaged = False
-drivetrainManualMode = False
 speedUpPressed = False
 speedDownPressed = False
 speedConfirmPressed = False
-commandedSpeed = 0  # Internal commanded speed (authority-adjusted)
-displayCommandedSpeed = 0  # Raw commanded speed for display (not authority-adjusted)
-commandedAuthority = 0
-currentSpeed = 0
-manualSetpointSpeed = 0
-previousCommandedSpeed = 0.0  # Track previous commanded speed for detecting reductions
 passengerEmergencySignal = False
 brakeFailure = False
 engineFailure = False
 signalFailure = False
 mult_value = 1.0  # MULT value from CTC (default 1.0x speed until CTC connects)
+simClock = SimClock()  # Simulation time from CTC TIME/MULT - drives position tracking
 
 running = True
 acPanel = None
@@ -77,383 +69,8 @@ trackInfoPanel = None
 powerEngineerPanel = None
 systemLogViewer = None
 speedDisplay = None  # Main UI instance for GPIO access
-returningToYard = False  # Flag to indicate train is returning to yard
-
-# PI Controller state
-integralError = 0.0
-prevError = 0.0  # Previous error for trapezoidal integration
-lastUpdateTime = None
-sampleTime = 0.1  # 100ms update rate
 lastSentPower = None  # Track last power sent to avoid duplicates
 
-# PRELOADED TRACK INFORMATION
-# Complete route starting from block 63 (YARD):
-# 63→150 (forward), then 28→1 (backward through F to A), then 13→62 (forward through D back to yard)
-# This creates a continuous loop through the entire Green Line
-# YARD (block 63) is only visited on initialization, then the train enters the main loop at GLENBURY
-preloadedTrackInformation = {
-    'segments': [
-        # INITIALIZATION SEGMENT (YARD to first loop station)
-        {
-            'from_station': 'YARD',
-            'to_station': 'GLENBURY',
-            'distance': 200.0 + 100.0,  # meters + half of block 65 (200m block)
-            'from_block': 63,
-            'to_block': 65,
-            'station_block_half_length': 100.0
-        },
-        # MAIN LOOP BEGINS HERE - will restart at index 1 after completion
-        {
-            'from_station': 'GLENBURY',
-            'to_station': 'DORMONT',
-            'distance': 100.0 + 200.0 + 100.0 + 100.0 + 100.0 + 100.0 + 100.0 + 50.0,  # blocks 65, 66, 67, 68, 69, 70, 71, 72, 73
-            'from_block': 65,
-            'to_block': 73,
-            'station_block_half_length': 50.0
-        },
-        {
-            'from_station': 'DORMONT',
-            'to_station': 'MT LEBANON',
-            'distance': 400.0 + 150.0,  # meters + half of block 77 (300m block)
-            'from_block': 73,
-            'to_block': 77,
-            'station_block_half_length': 150.0
-        },
-        {
-            'from_station': 'MT LEBANON',
-            'to_station': 'POPLAR',
-            'distance': 2886.6 + 50.0,  # meters + half of block 88 (100m block)
-            'from_block': 77,
-            'to_block': 88,
-            'station_block_half_length': 50.0
-        },
-        {
-            'from_station': 'POPLAR',
-            'to_station': 'CASTLE SHANNON',
-            'distance': 625.0 + 37.5,  # meters + half of block 96 (75m block)
-            'from_block': 88,
-            'to_block': 96,
-            'station_block_half_length': 37.5
-        },
-        {
-            'from_station': 'CASTLE SHANNON',
-            'to_station': 'DORMONT',
-            'distance': 690.0 + 50.0,  # meters + half of block 105 (100m block)
-            'from_block': 96,
-            'to_block': 105,
-            'station_block_half_length': 50.0
-        },
-        {
-            'from_station': 'DORMONT',
-            'to_station': 'GLENBURY',
-            'distance': 890.0 + 81.0,  # meters + half of block 114 (162m block)
-            'from_block': 105,
-            'to_block': 114,
-            'station_block_half_length': 81.0
-        },
-        {
-            'from_station': 'GLENBURY',
-            'to_station': 'OVERBROOK',
-            'distance': 652.0 + 25.0,  # meters + half of block 123 (50m block)
-            'from_block': 114,
-            'to_block': 123,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'OVERBROOK',
-            'to_station': 'INGLEWOOD',
-            'distance': 450.0 + 25.0,  # meters + half of block 132 (50m block)
-            'from_block': 123,
-            'to_block': 132,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'INGLEWOOD',
-            'to_station': 'CENTRAL',
-            'distance': 450.0 + 25.0,  # meters + half of block 141 (50m block)
-            'from_block': 132,
-            'to_block': 141,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'CENTRAL',
-            'to_station': 'WHITED',
-            'distance': 1609.0 + 150.0,  # meters + half of block 22 (300m block)
-            'from_block': 141,
-            'to_block': 22,
-            'station_block_half_length': 150.0
-        },
-        {
-            'from_station': 'WHITED',
-            'to_station': 'LLC PLAZA',
-            'distance': 1200.0 + 75.0,  # meters + half of block 16 (150m block)
-            'from_block': 22,
-            'to_block': 16,
-            'station_block_half_length': 75.0
-        },
-        {
-            'from_station': 'LLC PLAZA',
-            'to_station': 'EDGEBROOK',
-            'distance': 900.0 + 50.0,  # meters + half of block 9 (100m block)
-            'from_block': 16,
-            'to_block': 9,
-            'station_block_half_length': 50.0
-        },
-        {
-            'from_station': 'EDGEBROOK',
-            'to_station': 'PIONEER',
-            'distance': 700.0 + 50.0,  # meters + half of block 2 (100m block)
-            'from_block': 9,
-            'to_block': 2,
-            'station_block_half_length': 50.0
-        },
-        {
-            'from_station': 'PIONEER',
-            'to_station': 'LLC PLAZA',
-            'distance': 650.0 + 75.0,  # meters + half of block 16 (150m block)
-            'from_block': 2,
-            'to_block': 16,
-            'station_block_half_length': 75.0
-        },
-        {
-            'from_station': 'LLC PLAZA',
-            'to_station': 'WHITED',
-            'distance': 1050.0 + 150.0,  # meters + half of block 22 (300m block)
-            'from_block': 16,
-            'to_block': 22,
-            'station_block_half_length': 150.0
-        },
-        {
-            'from_station': 'WHITED',
-            'to_station': 'SOUTH BANK',
-            'distance': 1400.0 + 25.0,  # meters + half of block 31 (50m block)
-            'from_block': 22,
-            'to_block': 31,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'SOUTH BANK',
-            'to_station': 'CENTRAL',
-            'distance': 400.0 + 25.0,  # meters + half of block 39 (50m block)
-            'from_block': 31,
-            'to_block': 39,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'CENTRAL',
-            'to_station': 'INGLEWOOD',
-            'distance': 450.0 + 25.0,  # meters + half of block 48 (50m block)
-            'from_block': 39,
-            'to_block': 48,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'INGLEWOOD',
-            'to_station': 'OVERBROOK',
-            'distance': 450.0 + 25.0,  # meters + half of block 57 (50m block)
-            'from_block': 48,
-            'to_block': 57,
-            'station_block_half_length': 25.0
-        },
-        {
-            'from_station': 'OVERBROOK',
-            'to_station': 'GLENBURY',
-            'distance': 500.0 + 100.0,  # meters + half of block 65 (200m block)
-            'from_block': 57,
-            'to_block': 65,
-            'station_block_half_length': 100.0
-        }
-        # MAIN LOOP ENDS HERE - restarts at segment index 1 (GLENBURY → DORMONT)
-    ]
-}
-
-# RED LINE PRELOADED TRACK INFORMATION
-# Route: YARD (Block 8) → SHADYSIDE (7) → HERRON AVE (16) [initialization]
-# Main Loop: HERRON AVE (16) → SWISSVILLE → ... → SHADYSIDE (7) → HERRON AVE (16)
-# YARD (block 8) is only visited on initialization, then the train enters the main loop at HERRON AVE
-redLineTrackInformation = {
-    'segments': [
-        # INITIALIZATION SEGMENTS (YARD to first loop station)
-        # YARD to SHADYSIDE (Block 8 backwards to Block 7)
-        {
-            'from_station': 'YARD',
-            'to_station': 'SHADYSIDE',
-            'distance': 37.5,
-            'from_block': 8,
-            'to_block': 7,
-            'station_block_half_length': 37.5
-        },
-        # SHADYSIDE to HERRON AVE (Block 7 backwards through blocks 6,5,4,3,2,1, then jump to 15, then to 16)
-        {
-            'from_station': 'SHADYSIDE',
-            'to_station': 'HERRON AVE',
-            'distance': 37.5 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 60.0 + 25.0,  # blocks 7,6,5,4,3,2,1, jump to 15, then 16
-            'from_block': 7,
-            'to_block': 16,
-            'station_block_half_length': 25.0
-        },
-        # MAIN LOOP BEGINS HERE - will restart at index 2 after completion
-        # HERRON AVE to SWISSVILLE (Block 16 forward to Block 21)
-        {
-            'from_station': 'HERRON AVE',
-            'to_station': 'SWISSVILLE',
-            'distance': 25.0 + 200.0 + 400.0 + 400.0 + 200.0 + 50.0,  # blocks 16, 17, 18, 19, 20, 21
-            'from_block': 16,
-            'to_block': 21,
-            'station_block_half_length': 50.0
-        },
-        # SWISSVILLE to PENN STATION (Block 21 forward to Block 25 - underground)
-        {
-            'from_station': 'SWISSVILLE',
-            'to_station': 'PENN STATION',
-            'distance': 325.0,
-            'from_block': 21,
-            'to_block': 25,
-            'station_block_half_length': 25.0
-        },
-        # PENN STATION to STEEL PLAZA (Block 25 forward to Block 35 - underground)
-        {
-            'from_station': 'PENN STATION',
-            'to_station': 'STEEL PLAZA',
-            'distance': 520.0,
-            'from_block': 25,
-            'to_block': 35,
-            'station_block_half_length': 25.0
-        },
-        # STEEL PLAZA to FIRST AVE (Block 35 forward to Block 45 - underground)
-        {
-            'from_station': 'STEEL PLAZA',
-            'to_station': 'FIRST AVE',
-            'distance': 520.0,
-            'from_block': 35,
-            'to_block': 45,
-            'station_block_half_length': 25.0
-        },
-        # FIRST AVE to STATION SQUARE (Block 45 forward to Block 48 - underground then surface)
-        {
-            'from_station': 'FIRST AVE',
-            'to_station': 'STATION SQUARE',
-            'distance': 212.5,
-            'from_block': 45,
-            'to_block': 48,
-            'station_block_half_length': 37.5
-        },
-        # STATION SQUARE to SOUTH HILLS JUNCTION (Block 48 forward to Block 60)
-        {
-            'from_station': 'STATION SQUARE',
-            'to_station': 'SOUTH HILLS JUNCTION',
-            'distance': 743.2,
-            'from_block': 48,
-            'to_block': 60,
-            'station_block_half_length': 37.5
-        },
-        # SOUTH HILLS JUNCTION back to block 15 (Block 60 forward to 66, then jump to 52 and backwards to 15)
-        {
-            'from_station': 'SOUTH HILLS JUNCTION',
-            'to_station': 'HERRON AVE',
-            'distance': 37.5 + 75.0 + 75.0 + 75.0 + 75.0 + 75.0 + 75.0 + 43.2 + 50.0 + 50.0 + 50.0 + 50.0 + 75.0 + 75.0 + 75.0 + 75.0 + 75.0 + 75.0 + 50.0 + 60.0 + 60.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 200.0 + 50.0 + 60.0 + 25.0,  # 60→66, jump to 52, then 52→15, then to 16
-            'from_block': 60,
-            'to_block': 16,
-            'station_block_half_length': 25.0
-        },
-        # HERRON AVE to SHADYSIDE via YARD (Block 16→15→1, then 1→2→3→4→5→6→7(SHADYSIDE)→8→9(YARD)→10→11→12→13→14→15→16)
-        # This is the return route that passes through the YARD (blocks 8-9)
-        # SHADYSIDE station is at block 7, but train continues through to complete the route
-        {
-            'from_station': 'HERRON AVE',
-            'to_station': 'SHADYSIDE',
-            'distance': 25.0 + 60.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 50.0 + 37.5,  # blocks 16→15→1→2→3→4→5→6→7 (arrive at SHADYSIDE)
-            'from_block': 16,
-            'to_block': 7,
-            'station_block_half_length': 37.5
-        },
-        # SHADYSIDE continuing past yard back to HERRON AVE (7→8→9→10→11→12→13→14→15→16)
-        # Train passes through blocks 8-9 (YARD) with authority=1 check at block 9
-        {
-            'from_station': 'SHADYSIDE',
-            'to_station': 'HERRON AVE',
-            'distance': 37.5 + 75.0 + 75.0 + 75.0 + 75.0 + 75.0 + 70.0 + 60.0 + 60.0 + 25.0,  # blocks 7→8→9→10→11→12→13→14→15→16
-            'from_block': 7,
-            'to_block': 16,
-            'station_block_half_length': 25.0
-        }
-        # MAIN LOOP ENDS HERE - restarts at segment index 2 (HERRON AVE → SWISSVILLE)
-    ]
-}
-
-# Automatic mode position tracking variables
-autoModeEnabled = True  # Set to True to enable automatic mode station stopping
-currentSegmentIndex = 0  # Which segment we're currently traveling through
-distanceTraveledInSegment = 0.0  # How far we've traveled in current segment (meters)
-distanceToNextStation = preloadedTrackInformation['segments'][0]['distance']  # Distance remaining to next station
-lastPositionUpdateTime = None  # For calculating displacement
-
-# Underground sections - blocks where headlights and interior lights should be ON
-# GREEN LINE
-greenLineUndergroundBlocks = {36, 37, 38, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 
-                      53, 54, 55, 56, 57, 122, 123, 124, 125, 126, 127, 128, 129, 130, 
-                      131, 132, 133, 134, 135, 136, 137, 138, 139, 140, 142, 143}
-
-# RED LINE - Blocks 24-46 are underground according to the data, plus branch blocks
-redLineUndergroundBlocks = {24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46,
-                            67, 68, 69, 70, 71, 72, 73, 74, 75, 76}
-
-# Station door side mapping - which doors open at each station
-# Format: station_name: 'left', 'right', or 'both'
-# GREEN LINE
-greenLineStationDoorSides = {
-    'PIONEER': 'left',
-    'EDGEBROOK': 'left',
-    'LLC PLAZA': 'both',
-    'WHITED': 'both',
-    'SOUTH BANK': 'left',
-    'CENTRAL': 'right',
-    'INGLEWOOD': 'right',  # Block 48
-    'OVERBROOK': 'right',  # Block 57, 123
-    'GLENBURY': 'right',   # Block 65, 114
-    'DORMONT': 'right',    # Block 73, 105
-    'MT LEBANON': 'both',
-    'POPLAR': 'left',
-    'CASTLE SHANNON': 'left'
-}
-
-# RED LINE
-redLineStationDoorSides = {
-    'SHADYSIDE': 'both',
-    'HERRON AVE': 'both',
-    'SWISSVILLE': 'both',
-    'PENN STATION': 'both',
-    'STEEL PLAZA': 'both',
-    'FIRST AVE': 'both',
-    'STATION SQUARE': 'both',
-    'SOUTH HILLS JUNCTION': 'both'
-}
-
-# Will be set based on selected line
-UNDERGROUND_BLOCKS = greenLineUndergroundBlocks
-STATION_DOOR_SIDES = greenLineStationDoorSides
-
-# Special case: INGLEWOOD at block 132 uses left door instead of right
-STATION_DOOR_EXCEPTIONS = {
-    132: 'left'  # INGLEWOOD at block 132 uses left door
-}
-
-# Current block tracking - will be set based on selected line
-currentBlock = 63  # Default to Green Line yard
-lastUndergroundState = False  # Track if we were underground last update
-
-# Automatic mode control parameters
-DECELERATION_DISTANCE = 200.0  # Start decelerating 200m before station (meters)
-STATION_STOP_THRESHOLD = 5.0  # Consider "at station" when within 5m
-STATION_DWELL_TIME = 30.0  # Time to wait at station (seconds) - will be adjusted by mult_value
-stationDwellStartTime = None  # Track when we arrived at station
-isAtStation = False  # Flag to track if we're stopped at a station
-
-# Position tracking counter for debug output
-_position_print_counter = 0
-_diagnostic_counter = 0
-_holding_print_counter = 0
-_decel_print_counter = 0
 
 class GPIOClient:
     """Client that connects to Raspberry Pi GPIO Server"""
@@ -465,7 +82,8 @@ class GPIOClient:
         self.connected = False
         self.running = True
         self.buffer = ""
-        self.state_update_callback = None
+        self.state_update_callback = None  # Called with the changed keys of each update
+        self.stateMirror = GPIOStateMirror()
     
     def connect(self):
         """Connect to GPIO server on Pi"""
@@ -516,13 +134,31 @@ class GPIOClient:
             message = json.loads(message_str)
             msg_type = message.get('type')
             
-            if msg_type == 'state_update':
-                if self.state_update_callback:
-                    self.state_update_callback(message.get('data', {}))
+            if msg_type in ('state_update', 'state_delta'):
+                # Only the keys that changed reach the callback
+                changed = self.stateMirror.apply(message)
+                if self.stateMirror.needsResync:
+                    self.stateMirror.needsResync = False
+                    print(f"GPIO state update missing (seq {message.get('seq')}) - requesting full state")
+                    self.requestState()
+                if changed and self.state_update_callback:
+                    self.state_update_callback(changed)
         
         except json.JSONDecodeError:
             print(f"Invalid JSON from GPIO server: {message_str}")
     
+    def requestState(self):
+        """Ask the GPIO server for its full state (resync)"""
+        if not self.connected:
+            return False
+        
+        try:
+            self.socket.sendall((json.dumps({'type': 'get_state'}) + '\n').encode('utf-8'))
+            return True
+        except:
+            self.connected = False
+            return False
+    
     def setLED(self, led_name, state):
         """Send command to set LED state on Pi"""
         if not self.connected:
@@ -602,897 +238,127 @@ class GPIOClient:
             except:
                 pass
 
+class TrainHardwareIO(HardwareIO):
+    """
+    Outputs of one train's controller: LEDs and lights on the Pi through the
+    display's GPIO client, commands to the Train Model tagged with the train id
+    """
+
+    def __init__(self, trainId, display=None):
+        self.trainId = trainId
+        self.display = display  # TrainSpeedDisplayUI - set when the UI starts
+
+    def _gpioClient(self):
+        display = self.display
+        if display is not None and display.gpio_client and display.gpio_client.connected:
+            return display.gpio_client
+        return None
+
+    def setLED(self, ledName, state):
+        gpioClient = self._gpioClient()
+        if gpioClient:
+            gpioClient.setLED(ledName, state)
+
+    def setHeadlights(self, state):
+        gpioClient = self._gpioClient()
+        if gpioClient:
+            gpioClient.setHeadlights(state)
+
+    def setInteriorLights(self, state):
+        gpioClient = self._gpioClient()
+        if gpioClient:
+            gpioClient.setInteriorLights(state)
+
+    def sendToTrainModel(self, command, value):
+        display = self.display
+        if display is not None and display.server and display.train_model_connected:
+            display.server.send_to_ui("Train Model", {
+                'command': command,
+                'value': value,
+                'train_id': self.trainId
+            })
+
+    def log(self, message):
+        if systemLogViewer:
+            systemLogViewer.handleLogMessage(message, 'system')
+
+# Control core of the train this UI drives: speed, authority, brakes, position and PI state
+controller = HWTrainController(trainId=1, io=TrainHardwareIO(1), clock=simClock)
+
+def __getattr__(name):
+    # The controller state used to be module globals - keep TC_HW_MainUI.<name> reads working
+    if not name.startswith('_') and hasattr(controller, name):
+        return getattr(controller, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Helper functions
 def getCurrentSpeed():
     """Get current speed in MPH (converted from m/s for display)"""
-    MS_TO_MPH = 2.23694  # 1 m/s = 2.23694 mph
-    return currentSpeed * MS_TO_MPH
+    return controller.currentSpeed * MS_TO_MPH
 
 def getCommandedSpeed():
     """Return the display commanded speed (raw from track, not authority-adjusted)"""
-    return displayCommandedSpeed 
+    return controller.displayCommandedSpeed
 
 def getCommandedAuthority():
-    return commandedAuthority
+    return controller.commandedAuthority
 
 def getManualSetpointSpeed():
-    return manualSetpointSpeed
+    return controller.manualSetpointSpeed
 
 def getDrivetrainMode():
-    return "MANUAL" if drivetrainManualMode else "AUTOMATIC"
+    return "MANUAL" if controller.drivetrainManualMode else "AUTOMATIC"
 
 def isManualMode():
-    return drivetrainManualMode
+    return controller.drivetrainManualMode
 
 def getDistanceToNextStation():
     """Get distance to next station in meters"""
-    return distanceToNextStation
+    return controller.distanceToNextStation
 
 def getNextStationName():
     """Get the name of the next station"""
-    # If returning to yard, always show YARD
-    if returningToYard:
-        return "YARD"
-    
-    # Check if we're on RED LINE at a switch point with beacon active OR in alternative route blocks
-    if selectedLine == 'RED':
-        # Beacon1 alternative route blocks: 27 (switch), 76, 75, 74, 73, 72 (NOT 32 - that's back on main)
-        if beacon1 and currentBlock in [27, 76, 75, 74, 73, 72]:
-            print(f"[BEACON DEBUG] ✓ ALTERNATIVE ROUTE 1: Block={currentBlock}, Beacon1={beacon1}")
-            return "ALTERNATIVE ROUTE (Blocks 76-72)"
-        
-        # Beacon2 alternative route blocks: 38 (switch), 71, 70, 69, 68, 67 (NOT 39 - that's back on main)
-        if beacon2 and currentBlock in [38, 71, 70, 69, 68, 67]:
-            print(f"[BEACON DEBUG] ✓ ALTERNATIVE ROUTE 2: Block={currentBlock}, Beacon2={beacon2}")
-            return "ALTERNATIVE ROUTE (Blocks 71-67)"
-        
-        # Debug when at beacon blocks but beacon not active
-        if currentBlock == 27:
-            print(f"[BEACON DEBUG] At Block 27 but Beacon1={beacon1}")
-        elif currentBlock == 38:
-            print(f"[BEACON DEBUG] At Block 38 but Beacon2={beacon2}")
-    
-    if currentSegmentIndex < len(preloadedTrackInformation['segments']):
-        return preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']
-    # Return appropriate looping station based on selected line
-    # Both lines loop back to their first station
-    if selectedLine == 'RED':
-        return "SHADYSIDE"  # Red Line loops: YARD → SHADYSIDE
-    else:
-        return "GLENBURY"  # Green Line loops: YARD → GLENBURY
+    return controller.getNextStationName()
 
 def shouldStartDecelerating():
     """Check if train should start decelerating for station approach"""
-    return distanceToNextStation <= DECELERATION_DISTANCE and not isAtStation
+    return controller.shouldStartDecelerating()
+
+def resyncPosition(block):
+    """Correct the controller's position from a Track Model block-entry report"""
+    controller.resyncPosition(block)
 
 def updatePositionTracking():
-    """
-    Update position tracking for automatic mode based on current velocity and time.
-    Uses continuous integration: displacement = velocity × time
-    Also controls headlights and interior lights based on underground sections.
-    """
-    global distanceTraveledInSegment, distanceToNextStation, lastPositionUpdateTime
-    global currentSegmentIndex, isAtStation, stationDwellStartTime, systemLogViewer
-    global _position_print_counter
-    global currentBlock, lastUndergroundState
-    global serviceBrakeActive, returningToYard, commandedSpeed
-    
-    if not autoModeEnabled:
-        return
-    
-    # Calculate current block based on segment and distance traveled
-    def getCurrentBlockNumber():
-        """Determine current block based on position in route"""
-        global beacon1, beacon2
-        
-        if selectedLine == 'GREEN':
-            # GREEN LINE Route order: 63→150 (forward), jump to 28, 28→1 (backward), jump to 13, 13→63 (forward loop back to yard)
-            route_order = list(range(63, 151)) + list(range(28, 0, -1)) + list(range(13, 64))
-        else:  # RED LINE
-            # RED LINE Route - Complex with switches
-            # Main route: 8→7→...→1 → jump to 16 → 17...→66 → jump to 52 → 51...→16 → jump to 1 → ...→8 (loop)
-            # This is handled segment by segment since switches can redirect
-            
-            if currentSegmentIndex >= len(preloadedTrackInformation['segments']):
-                return 8  # Default to Red Line yard
-            
-            segment = preloadedTrackInformation['segments'][currentSegmentIndex]
-            from_block = segment['from_block']
-            to_block = segment['to_block']
-            
-            # Calculate progress through segment (0.0 to 1.0)
-            total_distance = segment['distance']
-            progress = min(1.0, distanceTraveledInSegment / total_distance) if total_distance > 0 else 0.0
-            
-            # Determine route for this specific segment
-            if from_block == 8 and to_block == 7:
-                # YARD to SHADYSIDE
-                return 8 if progress < 0.5 else 7
-            elif from_block == 7 and to_block == 16:
-                # Two segments have this pattern:
-                # - Index 1 (initialization): 7→6→5→4→3→2→1→15→16
-                # - Index 10 (return with yard): 7→8→9→10→11→12→13→14→15→16
-                print(f"[ROUTE DEBUG] from_block=7, to_block=16, currentSegmentIndex={currentSegmentIndex}")
-                if currentSegmentIndex == 1:
-                    # SHADYSIDE to HERRON AVE - Initialization (7→6→5→4→3→2→1→15→16)
-                    blocks = [7, 6, 5, 4, 3, 2, 1, 15, 16]
-                    print(f"[ROUTE DEBUG] Using INITIALIZATION route: 7→6→5→4→3→2→1→15→16")
-                else:
-                    # SHADYSIDE to HERRON AVE - Return through YARD (7→8→9→10→11→12→13→14→15→16)
-                    blocks = [7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
-                    print(f"[ROUTE DEBUG] Using RETURN route: 7→8→9→10→11→12→13→14→15→16")
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 16 and to_block == 21:
-                # HERRON AVE to SWISSVILLE (16→17→18→19→20→21)
-                blocks = [16, 17, 18, 19, 20, 21]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 21 and to_block == 25:
-                # SWISSVILLE to PENN STATION (21→22→23→24→25)
-                blocks = [21, 22, 23, 24, 25]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 25 and to_block == 35:
-                # PENN STATION to STEEL PLAZA (25→26→27→28→29→30→31→32→33→34→35)
-                
-                # If beacon1 active and we're IN alternative route blocks
-                if beacon1 and currentBlock in [76, 75, 74, 73, 72]:
-                    alt_blocks = [76, 75, 74, 73, 72]
-                    current_idx = alt_blocks.index(currentBlock)
-                    
-                    # If at the END of alternative route (block 72), rejoin main at block 32
-                    if currentBlock == 72:
-                        print("[ALT ROUTE 1] Completed alternative route, rejoining main at block 32")
-                        return 32
-                    
-                    # Otherwise continue through alternative blocks
-                    next_idx = current_idx + 1
-                    next_block = alt_blocks[next_idx]
-                    print(f"[ALT ROUTE 1] Continuing: {currentBlock} → {next_block}")
-                    return next_block
-                
-                blocks = [25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                current = blocks[idx]
-                
-                # Check for switch at block 27
-                if current == 27 and beacon1:
-                    # Switch activated! Redirect to branch 76→72
-                    print("[SWITCH] Beacon 1 detected at block 27 - taking branch to blocks 76-72")
-                    return 76  # Enter branch
-                    
-                return current
-            
-            elif from_block == 35 and to_block == 45:
-                # STEEL PLAZA to FIRST AVE (35→36→37→38→39→40→41→42→43→44→45)
-                
-                # If beacon2 active and we're IN alternative route blocks
-                if beacon2 and currentBlock in [71, 70, 69, 68, 67]:
-                    alt_blocks = [71, 70, 69, 68, 67]
-                    current_idx = alt_blocks.index(currentBlock)
-                    
-                    # If at the END of alternative route (block 67), rejoin main at block 38
-                    if currentBlock == 67:
-                        print("[ALT ROUTE 2] Completed alternative route, rejoining main at block 38")
-                        return 38
-                    
-                    # Otherwise continue through alternative blocks
-                    next_idx = current_idx + 1
-                    next_block = alt_blocks[next_idx]
-                    print(f"[ALT ROUTE 2] Continuing: {currentBlock} → {next_block}")
-                    return next_block
-                
-                blocks = [35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                current = blocks[idx]
-                
-                # Check for switch at block 38
-                if current == 38 and beacon2:
-                    # Switch activated! Redirect to branch 71→67
-                    print("[SWITCH] Beacon 2 detected at block 38 - taking branch to blocks 71-67")
-                    return 71  # Enter branch
-                    
-                return current
-            elif from_block == 45 and to_block == 48:
-                # FIRST AVE to STATION SQUARE (45→46→47→48)
-                blocks = [45, 46, 47, 48]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 48 and to_block == 60:
-                # STATION SQUARE to SOUTH HILLS JUNCTION (48→49→50→51→52→53→54→55→56→57→58→59→60)
-                blocks = [48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 58, 59, 60]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 60 and to_block == 16:
-                # SOUTH HILLS JUNCTION back to HERRON AVE (complex return path)
-                # 60→61→62→63→64→65→66→52→51→...→15→16
-                blocks = [60, 61, 62, 63, 64, 65, 66, 52, 51, 50, 49, 48, 47, 46, 45, 44, 43, 42, 41, 40, 39, 38, 37, 36, 35, 34, 33, 32, 31, 30, 29, 28, 27, 26, 25, 24, 23, 22, 21, 20, 19, 18, 17, 15, 16]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            elif from_block == 16 and to_block == 7:
-                # HERRON AVE to SHADYSIDE (16→15→1→2→3→4→5→6→7)
-                # This is the return route coming back to SHADYSIDE
-                blocks = [16, 15, 1, 2, 3, 4, 5, 6, 7]
-                idx = min(int(progress * len(blocks)), len(blocks) - 1)
-                return blocks[idx]
-            else:
-                return from_block  # Fallback
-        
-        # GREEN LINE logic
-        if currentSegmentIndex >= len(preloadedTrackInformation['segments']):
-            return 63  # Default to start
-        
-        segment = preloadedTrackInformation['segments'][currentSegmentIndex]
-        from_block = segment['from_block']
-        to_block = segment['to_block']
-        
-        # Calculate progress through segment (0.0 to 1.0)
-        total_distance = segment['distance']
-        progress = min(1.0, distanceTraveledInSegment / total_distance) if total_distance > 0 else 0.0
-        
-        # Handle segments with jumps explicitly
-        if from_block == 2 and to_block == 16:
-            # PIONEER to LLC PLAZA: 2→1→13→14→15→16
-            blocks = [2, 1, 13, 14, 15, 16]
-            idx = min(int(progress * len(blocks)), len(blocks) - 1)
-            return blocks[idx]
-        elif from_block == 16 and to_block == 22:
-            # LLC PLAZA to WHITED: 16→17→18→19→20→21→22
-            blocks = [16, 17, 18, 19, 20, 21, 22]
-            idx = min(int(progress * len(blocks)), len(blocks) - 1)
-            return blocks[idx]
-        elif from_block == 22 and to_block == 31:
-            # WHITED to SOUTH BANK: 22→23→24→25→26→27→28→29→30→31
-            # This crosses the junction where route_order goes 28→1→13→29
-            blocks = [22, 23, 24, 25, 26, 27, 28, 29, 30, 31]
-            idx = min(int(progress * len(blocks)), len(blocks) - 1)
-            return blocks[idx]
-        elif from_block == 57 and to_block == 65:
-            # OVERBROOK to GLENBURY (completes the loop): 57→58→59→60→61→62→63→64→65
-            # This segment includes block 58 where yard return can be triggered
-            blocks = [57, 58, 59, 60, 61, 62, 63, 64, 65]
-            idx = min(int(progress * len(blocks)), len(blocks) - 1)
-            return blocks[idx]
-        
-        # For all other segments, use route_order calculation
-        try:
-            from_idx = route_order.index(from_block)
-            to_idx = route_order.index(to_block)
-            
-            # Determine current block index
-            if to_idx > from_idx:
-                # Forward path
-                blocks_in_segment = to_idx - from_idx
-                block_offset = int(progress * blocks_in_segment)
-                current_idx = from_idx + block_offset
-            else:
-                # Wrapping path - this shouldn't happen now that we handle jumps explicitly
-                total_blocks = (len(route_order) - from_idx) + to_idx
-                block_offset = int(progress * total_blocks)
-                current_idx = (from_idx + block_offset) % len(route_order)
-            
-            return route_order[current_idx]
-        except (ValueError, IndexError):
-            return from_block  # Fallback
-    
-    # Update current block
-    if not hasattr(updatePositionTracking, 'prevBlock'):
-        updatePositionTracking.prevBlock = currentBlock
-    
-    prevBlock = updatePositionTracking.prevBlock
-    currentBlock = getCurrentBlockNumber()
-    
-    # Debug: Print block changes
-    if currentBlock != prevBlock:
-        print(f"[BLOCK CHANGE] Block {prevBlock} → {currentBlock}")
-        updatePositionTracking.prevBlock = currentBlock
-        
-        # YARD RETURN LOGIC - Check for special blocks with authority 1
-        if commandedAuthority == 1:
-            # RED LINE: Return to yard if entering block 9 with authority 1
-            if selectedLine == 'RED' and currentBlock == 9:
-                returningToYard = True
-                commandedSpeed = 0.0  # Stop the train completely
-                
-                print(f"⚠️  RED LINE: Authority 1 detected at block 9 - RETURNING TO YARD")
-                print(f"🛑 STOPPING ALL MOVEMENT - Service brake ENGAGED")
-                
-                # Engage service brake to stop the train
-                serviceBrakeActive = True
-                
-                # Send service brake command to Train Model
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Service Brake',
-                            'value': True,
-                            'train_id': 1
-                        })
-                        print(f"[YARD RETURN] Service brake command sent to Train Model")
-                        
-                        # Send announcement for yard return
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Announcement',
-                            'value': "Returning to yard. All movement terminated.",
-                            'train_id': 1
-                        })
-                        print(f"📢 Announcement: Returning to yard")
-                
-                # Log to system log
-                yard_msg = "RED LINE: Train returning to yard from block 9 (Authority 1)"
-                if systemLogViewer:
-                    systemLogViewer.handleLogMessage(yard_msg, 'system')
-            
-            # GREEN LINE: Return to yard if entering block 58 with authority 1
-            elif selectedLine == 'GREEN' and currentBlock == 58:
-                returningToYard = True
-                commandedSpeed = 0.0  # Stop the train completely
-                
-                print(f"⚠️  GREEN LINE: Authority 1 detected at block 58 - RETURNING TO YARD")
-                print(f"🛑 STOPPING ALL MOVEMENT - Service brake ENGAGED")
-                
-                # Engage service brake to stop the train
-                serviceBrakeActive = True
-                
-                # Send service brake command to Train Model
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Service Brake',
-                            'value': True,
-                            'train_id': 1
-                        })
-                        print(f"[YARD RETURN] Service brake command sent to Train Model")
-                        
-                        # Send announcement for yard return
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Announcement',
-                            'value': "Returning to yard. All movement terminated.",
-                            'train_id': 1
-                        })
-                        print(f"📢 Announcement: Returning to yard")
-                
-                # Log to system log
-                yard_msg = "GREEN LINE: Train returning to yard from block 58 (Authority 1)"
-                if systemLogViewer:
-                    systemLogViewer.handleLogMessage(yard_msg, 'system')
-    
-    # Check underground status and control lights
-    isUnderground = currentBlock in UNDERGROUND_BLOCKS
-    
-    # Inform driver of underground status on block changes
-    if currentBlock != prevBlock and (isUnderground or prevBlock in UNDERGROUND_BLOCKS):
-        if isUnderground:
-            print(f"📍 Inside underground tunnel (Block {currentBlock})")
-        else:
-            print(f"📍 Exiting underground tunnel - returning to surface (Block {currentBlock})")
-    
-    # Only send commands when state changes
-    if isUnderground != lastUndergroundState:
-        # Access gpio_client through the global speedDisplay instance
-        print(f"[LIGHT DEBUG] Underground state changed: {lastUndergroundState} → {isUnderground}")
-        try:
-            print(f"[LIGHT DEBUG] Checking speedDisplay in globals: {'speedDisplay' in globals()}")
-            if 'speedDisplay' in globals():
-                sd = globals()['speedDisplay']
-                print(f"[LIGHT DEBUG] speedDisplay found: {sd is not None}")
-                print(f"[LIGHT DEBUG] Has gpio_client: {hasattr(sd, 'gpio_client')}")
-                if hasattr(sd, 'gpio_client'):
-                    print(f"[LIGHT DEBUG] gpio_client exists: {sd.gpio_client is not None}")
-                    print(f"[LIGHT DEBUG] gpio_client connected: {sd.gpio_client.connected if sd.gpio_client else False}")
-                
-                if hasattr(sd, 'gpio_client') and sd.gpio_client and sd.gpio_client.connected:
-                    if isUnderground:
-                        sd.gpio_client.setHeadlights(True)
-                        sd.gpio_client.setInteriorLights(True)
-                        print(f"💡 Headlights & cabin lights turned ON for tunnel safety")
-                        
-                        # Send to Train Model
-                        if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Headlights',
-                                'value': True,
-                                'train_id': 1
-                            })
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Cabin Lights',
-                                'value': True,
-                                'train_id': 1
-                            })
-                    else:
-                        sd.gpio_client.setHeadlights(False)
-                        sd.gpio_client.setInteriorLights(False)
-                        print(f"💡 Headlights & cabin lights turned OFF")
-                        
-                        # Send to Train Model
-                        if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Headlights',
-                                'value': False,
-                                'train_id': 1
-                            })
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Cabin Lights',
-                                'value': False,
-                                'train_id': 1
-                            })
-                else:
-                    print(f"[LIGHT DEBUG] GPIO client not ready!")
-        except Exception as e:
-            print(f"⚠️  Warning: Unable to control lights - {e}")
-            import traceback
-            traceback.print_exc()
-        
-        lastUndergroundState = isUnderground
-    
-    currentTime = time.time()
-    
-    # If returning to yard, don't update position - train is stopped
-    if returningToYard:
-        return
-    
-    # Initialize timing on first call
-    if lastPositionUpdateTime is None:
-        lastPositionUpdateTime = currentTime
-        print(f"Position tracking initialized")
-        print(f"Starting segment: {preloadedTrackInformation['segments'][0]['from_station']} → {preloadedTrackInformation['segments'][0]['to_station']}")
-        print(f"Initial distance to station: {distanceToNextStation:.1f}m")
-        return
-    
-    # Calculate time elapsed since last update
-    dt = currentTime - lastPositionUpdateTime
-    lastPositionUpdateTime = currentTime
-    
-    # TIME ACCELERATION: Use time scale from CTC (mult_value)
-    global mult_value
-    dt = dt * mult_value
-    
-    # If we're at a station, don't update position
-    if isAtStation:
-        # Check if dwell time is complete
-        if stationDwellStartTime is not None:
-            dwellElapsed = currentTime - stationDwellStartTime
-            if dwellElapsed >= STATION_DWELL_TIME:
-                # Don't release brake if returning to yard
-                if returningToYard:
-                    print(f"[YARD RETURN] Keeping service brake engaged - train at yard")
-                    return
-                
-                # RELEASE SERVICE BRAKE before departing
-                serviceBrakeActive = False
-                print(f"🟢 Service brake RELEASED for departure")
-                
-                # Send service brake command to Train Model
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Service Brake',
-                            'value': False,
-                            'train_id': 1
-                        })
-                        print(f"[AUTO BRAKE] Service brake release sent to Train Model")
-                
-                # Close doors before departing
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'gpio_client') and sd.gpio_client and sd.gpio_client.connected:
-                        # Close both doors via GPIO server
-                        sd.gpio_client.setLED('left_door', False)
-                        sd.gpio_client.setLED('right_door', False)
-                        print(f"🚪 Doors closing")
-                        
-                        # Send door commands to Train Model
-                        if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Left Door Signal',
-                                'value': False,
-                                'train_id': 1
-                            })
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Right Door Signal',
-                                'value': False,
-                                'train_id': 1
-                            })
-                
-                # Move to next segment
-                departure_msg = f"Departing {preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']}"
-                print(departure_msg)
-                
-                # Send to System Log UI
-                if systemLogViewer:
-                    systemLogViewer.handleLogMessage(departure_msg, 'system')
-                
-                currentSegmentIndex += 1
-                
-                # Check if we've reached the end
-                if currentSegmentIndex >= len(preloadedTrackInformation['segments']):
-                    # Both lines loop - restart at the main loop beginning (after YARD initialization)
-                    if selectedLine == 'RED':
-                        loop_msg = "Completed Red Line loop - Continuing to SWISSVILLE"
-                        currentSegmentIndex = 2  # Restart at HERRON AVE → SWISSVILLE (main loop start)
-                    else:
-                        loop_msg = "Completed Green Line loop - Continuing to DORMONT"
-                        currentSegmentIndex = 1  # Restart at GLENBURY → DORMONT (main loop start)
-                    
-                    print(loop_msg)
-                    
-                    # Send to System Log UI
-                    if systemLogViewer:
-                        systemLogViewer.handleLogMessage(loop_msg, 'system')
-                    
-                    # Reset for next segment
-                    distanceTraveledInSegment = 0.0
-                    distanceToNextStation = preloadedTrackInformation['segments'][currentSegmentIndex]['distance']
-                    isAtStation = False
-                    stationDwellStartTime = None
-                    
-                    # Send announcement for next station
-                    next_station = preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']
-                    if 'speedDisplay' in globals():
-                        sd = globals()['speedDisplay']
-                        if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                            announcement_text = f"Travelling to {next_station}"
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Announcement',
-                                'value': announcement_text,
-                                'train_id': 1
-                            })
-                            print(f"📢 Announcement: {announcement_text}")
-                    return
-                
-                # Send departure announcement to Train Model (port 12345)
-                next_station = preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        announcement_text = f"Travelling to {next_station}"
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Announcement',
-                            'value': announcement_text,
-                            'train_id': 1
-                        })
-                        print(f"📢 Announcement: {announcement_text}")
-                
-                # Reset for next segment
-                distanceTraveledInSegment = 0.0
-                distanceToNextStation = preloadedTrackInformation['segments'][currentSegmentIndex]['distance']
-                isAtStation = False
-                stationDwellStartTime = None
-        return
-    
-    # Calculate displacement: distance = velocity × time
-    # currentSpeed is in m/s, dt is in seconds
-    displacement = currentSpeed * dt
-    
-    # Update position tracking
-    distanceTraveledInSegment += displacement
-    distanceToNextStation = preloadedTrackInformation['segments'][currentSegmentIndex]['distance'] - distanceTraveledInSegment
-    
-    # Debug output showing position updates (reduced frequency to avoid spam)
-    # Print approximately every second (every 10 updates at 100ms intervals)
-    _position_print_counter += 1
-    if _position_print_counter >= 10:
-        _position_print_counter = 0
-        # Convert meters to feet for display (1 meter = 3.28084 feet)
-        distanceTraveledFeet = distanceTraveledInSegment * 3.28084
-        distanceToNextStationFeet = distanceToNextStation * 3.28084
-        print(f"Speed: {currentSpeed:.2f} m/s, Traveled: {distanceTraveledFeet:.1f}ft, Remaining: {distanceToNextStationFeet:.1f}ft to {preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']}")
-    
-    # Check if we've reached the station
-    if distanceToNextStation <= STATION_STOP_THRESHOLD:
-        isAtStation = True
-        stationDwellStartTime = currentTime
-        distanceToNextStation = 0.0
-        currentStation = preloadedTrackInformation['segments'][currentSegmentIndex]['to_station']
-        
-        arrival_msg = f"*** ARRIVED AT {currentStation} ***"
-        print(arrival_msg)
-        
-        # Send arrival announcement to Train Model (port 12345)
-        if 'speedDisplay' in globals():
-            sd = globals()['speedDisplay']
-            if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                announcement_text = f"Arrived at {currentStation}"
-                sd.server.send_to_ui("Train Model", {
-                    'command': 'Announcement',
-                    'value': announcement_text,
-                    'train_id': 1
-                })
-                print(f"📢 Announcement: {announcement_text}")
-        
-        # ENGAGE SERVICE BRAKE at station
-        serviceBrakeActive = True
-        print(f"🛑 Service brake ENGAGED at {currentStation}")
-        
-        # Send service brake command to Train Model
-        if 'speedDisplay' in globals():
-            sd = globals()['speedDisplay']
-            if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                sd.server.send_to_ui("Train Model", {
-                    'command': 'Service Brake',
-                    'value': True,
-                    'train_id': 1
-                })
-                print(f"[AUTO BRAKE] Service brake command sent to Train Model")
-        
-        # Control door LEDs based on station platform side
-        print(f"[DOOR DEBUG] At station {currentStation}, checking door control")
-        print(f"[DOOR DEBUG] speedDisplay in globals: {'speedDisplay' in globals()}")
-        if 'speedDisplay' in globals():
-            sd = globals()['speedDisplay']
-            print(f"[DOOR DEBUG] speedDisplay found: {sd is not None}")
-            print(f"[DOOR DEBUG] Has gpio_client: {hasattr(sd, 'gpio_client')}")
-            if hasattr(sd, 'gpio_client'):
-                print(f"[DOOR DEBUG] gpio_client connected: {sd.gpio_client.connected if sd.gpio_client else False}")
-            
-            if hasattr(sd, 'gpio_client') and sd.gpio_client and sd.gpio_client.connected:
-                # Check for block-specific exceptions first
-                door_side = STATION_DOOR_EXCEPTIONS.get(currentBlock)
-                if not door_side:
-                    # Use station default
-                    door_side = STATION_DOOR_SIDES.get(currentStation, 'both')
-                
-                print(f"[DOOR DEBUG] Door side for {currentStation} at block {currentBlock}: {door_side}")
-                
-                # Turn on appropriate door LEDs by sending commands directly to GPIO server
-                if door_side == 'left' or door_side == 'both':
-                    result = sd.gpio_client.setLED('left_door', True)
-                    print(f"[DOOR DEBUG] Left door command sent, result: {result}")
-                    print(f"🚪 Left door opening")
-                    
-                    # Send to Train Model
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Left Door Signal',
-                            'value': True,
-                            'train_id': 1
-                        })
-                
-                if door_side == 'right' or door_side == 'both':
-                    result = sd.gpio_client.setLED('right_door', True)
-                    print(f"[DOOR DEBUG] Right door command sent, result: {result}")
-                    print(f"🚪 Right door opening")
-                    
-                    # Send to Train Model
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Right Door Signal',
-                            'value': True,
-                            'train_id': 1
-                        })
-            else:
-                print(f"[DOOR DEBUG] GPIO client not ready!")
-        
-        # Send to System Log UI
-        if systemLogViewer:
-            systemLogViewer.handleLogMessage(arrival_msg, 'system')
+    """Advance the controller's position along the route (automatic mode)"""
+    controller.updatePositionTracking()
 
 def calculatePowerCommand():
     """
     Calculate power command using PI controller.
-    Uses Kp and Ki from PowerEngineer panel.
-    
-    In AUTOMATIC mode, handles station approach and stopping:
-    - Decelerates as train approaches station
-    - Stops at station
-    - Maintains stop during dwell time
-    - Uses service brake when commanded speed is reduced to slow down safely
-    
-    Commanded speed is in MPH, current speed is in m/s.
-    
+    Uses Kp and Ki from PowerEngineer panel and shows the result on it.
+
     Returns:
         Power in kW (kilowatts)
     """
-    global integralError, lastUpdateTime, powerEngineerPanel, prevError
-    global _diagnostic_counter, _holding_print_counter, _decel_print_counter
-    global previousCommandedSpeed, serviceBrakeActive, returningToYard
-    
     if not powerEngineerPanel:
         return 0.0
-    
-    # Conversion constants
-    MPH_TO_MS = 0.44704  # 1 mph = 0.44704 m/s
-    MS_TO_MPH = 2.23694  # 1 m/s = 2.23694 mph
-    
-    # Update position tracking for automatic mode
-    updatePositionTracking()
-    
-    # Diagnostic output (first 5 calls only to avoid spam)
-    if _diagnostic_counter < 5:
-        _diagnostic_counter += 1
-        print(f"[DIAGNOSTIC {_diagnostic_counter}] commandedSpeed: {commandedSpeed} MPH, currentSpeed: {currentSpeed} m/s, drivetrainManualMode: {drivetrainManualMode}, autoModeEnabled: {autoModeEnabled}")
-    
-    # Get commanded speed
-    if drivetrainManualMode:
-        # In manual mode, use manual setpoint speed (in MPH, convert to m/s)
-        commandedSpeedMPH = manualSetpointSpeed
-        
-        # MANUAL MODE SPEED LIMIT ENFORCEMENT
-        # Unless authority is 4, manual speed cannot exceed the track speed limit
-        if commandedAuthority != 4:
-            # displayCommandedSpeed is the raw track speed limit (authority-unadjusted)
-            # Limit manual setpoint to not exceed track speed limit
-            if commandedSpeedMPH > displayCommandedSpeed:
-                commandedSpeedMPH = displayCommandedSpeed
-                print(f"[MANUAL MODE] Speed limited to track limit: {displayCommandedSpeed:.1f} MPH (Authority={commandedAuthority})")
-        
-        commandedSpeedMS = commandedSpeedMPH * MPH_TO_MS
-    else:
-        # In automatic mode, use commanded speed from track (already in MPH, convert to m/s)
-        commandedSpeedMPH = commandedSpeed
-        commandedSpeedMS = commandedSpeedMPH * MPH_TO_MS
-        
-        # AUTOMATIC MODE STATION LOGIC
-        if autoModeEnabled and not emergencyBrakeEngaged:
-            if isAtStation:
-                # Force stop at station
-                commandedSpeedMS = 0.0
-                commandedSpeedMPH = 0.0
-                # Print holding message occasionally (not every 100ms)
-                _holding_print_counter += 1
-                if _holding_print_counter >= 20:
-                    _holding_print_counter = 0
-                    print(f"Holding at station: {getNextStationName()}")
-            elif shouldStartDecelerating():
-                # Calculate deceleration profile for smooth stop
-                # Use simple linear deceleration based on distance remaining
-                distToStation = getDistanceToNextStation()
-                
-                # Target deceleration: v² = v₀² + 2a·d
-                # Solving for target velocity to reach 0 at station
-                # v = sqrt(2 * decel * distance)
-                DECEL_RATE = 1.0  # m/s² - comfortable deceleration
-                
-                if distToStation > 0:
-                    targetSpeed = (2 * DECEL_RATE * distToStation) ** 0.5
-                    # Limit to current commanded speed (don't accelerate)
-                    commandedSpeedMS = min(commandedSpeedMS, targetSpeed)
-                    commandedSpeedMPH = commandedSpeedMS * MS_TO_MPH
-                    
-                    # Print deceleration status (reduced frequency)
-                    _decel_print_counter += 1
-                    if _decel_print_counter >= 5:
-                        _decel_print_counter = 0
-                        print(f"Decelerating for {getNextStationName()}: {distToStation:.1f}m, target {commandedSpeedMPH:.1f} MPH")
-                else:
-                    commandedSpeedMS = 0.0
-                    commandedSpeedMPH = 0.0
-    
-    # Get current actual speed (in m/s from Train Model)
-    currentSpeedMS = currentSpeed
-    currentSpeedMPH = currentSpeedMS * MS_TO_MPH  # Convert for display only
-    
-    # SPEED REDUCTION DETECTION - Use service brake to slow down
-    # Service brake deceleration is approximately -2.67 m/s²
-    # Only apply if commanded speed dropped significantly and we're going faster than commanded
-    SPEED_REDUCTION_THRESHOLD = 5.0  # MPH - significant speed reduction
-    SERVICE_BRAKE_DURATION = 0.5  # seconds to apply brake
-    
-    if not hasattr(calculatePowerCommand, '_speed_reduction_brake_time'):
-        calculatePowerCommand._speed_reduction_brake_time = 0.0
-        calculatePowerCommand._last_check_time = time.time()
-    
-    current_time = time.time()
-    dt_check = current_time - calculatePowerCommand._last_check_time
-    calculatePowerCommand._last_check_time = current_time
-    
-    # Detect commanded speed reduction (not at station, not in manual mode)
-    if not drivetrainManualMode and not isAtStation and not emergencyBrakeEngaged:
-        speedReduction = previousCommandedSpeed - commandedSpeedMPH
-        
-        if speedReduction > SPEED_REDUCTION_THRESHOLD and currentSpeedMPH > commandedSpeedMPH + 3.0:
-            # Significant speed reduction detected and we're going too fast
-            # Apply service brake briefly to slow down
-            if calculatePowerCommand._speed_reduction_brake_time <= 0:
-                # Start brake application
-                calculatePowerCommand._speed_reduction_brake_time = SERVICE_BRAKE_DURATION
-                print(f"⚠️  Speed reduced from {previousCommandedSpeed:.1f} to {commandedSpeedMPH:.1f} MPH - applying service brake to slow down")
-                
-                # Apply service brake via GPIO
-                if 'speedDisplay' in globals():
-                    sd = globals()['speedDisplay']
-                    if hasattr(sd, 'gpio_client') and sd.gpio_client and sd.gpio_client.connected:
-                        sd.gpio_client.setServiceBrake(True)
-                        serviceBrakeActive = True
-                        
-                        # Send to Train Model
-                        if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                            sd.server.send_to_ui("Train Model", {
-                                'command': 'Service Brake',
-                                'value': True,
-                                'train_id': 1
-                            })
-    
-    # Count down brake time and release when done
-    if calculatePowerCommand._speed_reduction_brake_time > 0:
-        calculatePowerCommand._speed_reduction_brake_time -= dt_check
-        
-        if calculatePowerCommand._speed_reduction_brake_time <= 0:
-            # Don't release brake if returning to yard
-            if returningToYard:
-                calculatePowerCommand._speed_reduction_brake_time = 0.0
-                print(f"[YARD RETURN] Keeping service brake engaged - train at yard")
-                return 0.0
-            
-            # Release service brake
-            calculatePowerCommand._speed_reduction_brake_time = 0.0
-            
-            if 'speedDisplay' in globals():
-                sd = globals()['speedDisplay']
-                if hasattr(sd, 'gpio_client') and sd.gpio_client and sd.gpio_client.connected:
-                    sd.gpio_client.setServiceBrake(False)
-                    serviceBrakeActive = False
-                    print(f"🟢 Service brake released - now controlling to {commandedSpeedMPH:.1f} MPH with power")
-                    
-                    # Send to Train Model
-                    if hasattr(sd, 'server') and sd.server and sd.train_model_connected:
-                        sd.server.send_to_ui("Train Model", {
-                            'command': 'Service Brake',
-                            'value': False,
-                            'train_id': 1
-                        })
-    
-    # DEBUG: Print speeds every 20 calls
-    if not hasattr(calculatePowerCommand, '_speed_debug_counter'):
-        calculatePowerCommand._speed_debug_counter = 0
-    calculatePowerCommand._speed_debug_counter += 1
-    if calculatePowerCommand._speed_debug_counter % 20 == 0:
-        print(f"[SPEED DEBUG] Commanded={commandedSpeedMPH:.1f} MPH ({commandedSpeedMS:.2f}m/s), Current={currentSpeedMPH:.1f} MPH ({currentSpeedMS:.2f}m/s), Error={commandedSpeedMS - currentSpeedMS:.2f}m/s")
-    
-    # SERVICE BRAKE CONTROL:
-    # Service brake controlled by:
-    # 1. GPIO hardware button (manual control)
-    # 2. Automatic station stops
-    # 3. Speed reduction detection (above)
-    # The PI controller controls speed through POWER COMMANDS
-    
-    # Calculate velocity error in METRIC (m/s)
-    velocityError = commandedSpeedMS - currentSpeedMS
-    
-    # Get PI gains from PowerEngineer panel
-    kp = powerEngineerPanel.hw_kp.get()
-    ki = powerEngineerPanel.hw_ki.get()
-    maxPower = powerEngineerPanel.maxPower.get()
-    
-    # TRAPEZOIDAL INTEGRATION (per control law document)
-    # u_k = u_{k-1} + (T/2)(e_k + e_{k-1})
-    # where u_k is the integral term
-    
-    # Calculate power WITHOUT integral term first (for anti-windup check)
-    pTerm = kp * velocityError
-    powerWithoutIntegral = pTerm
-    
-    # ANTI-WINDUP: Only update integral if P^cmd < P^max
-    if powerWithoutIntegral < maxPower:
-        # Update integral using trapezoidal rule
-        # u_k = u_{k-1} + (T/2)(e_k + e_{k-1})
-        integralError += (sampleTime / 2.0) * (velocityError + prevError)
-    # else: at power limit - don't integrate (anti-windup)
-    
-    # Store current error for next iteration
-    prevError = velocityError
-    
-    # Calculate PI control output
-    # P^cmd = Kp * e_k + Ki * u_k
-    iTerm = ki * integralError
-    power = pTerm + iTerm
-    
-    # Limit power to max and ensure non-negative
-    power = max(0.0, min(maxPower, power))
-    
+
+    power = controller.calculatePowerCommand(
+        powerEngineerPanel.hw_kp.get(),
+        powerEngineerPanel.hw_ki.get(),
+        powerEngineerPanel.maxPower.get()
+    )
+
     # Update PowerEngineer panel displays (convert to MPH for display)
-    powerEngineerPanel.setCurrentSpeed(currentSpeedMPH)
-    powerEngineerPanel.setCommandedSpeed(commandedSpeedMPH)
-    powerEngineerPanel.speedError.set(velocityError * MS_TO_MPH)  # Convert error to MPH for display
-    powerEngineerPanel.integralError.set(integralError)
+    powerEngineerPanel.setCurrentSpeed(controller.currentSpeed * MS_TO_MPH)
+    powerEngineerPanel.setCommandedSpeed(controller.lastCommandedSpeedMPH)
+    powerEngineerPanel.speedError.set(controller.lastVelocityError * MS_TO_MPH)  # Convert error to MPH for display
+    powerEngineerPanel.integralError.set(controller.integralError)
     powerEngineerPanel.powerOutput.set(power)
-    
+
     return power
 
+
 def cleanupAll():
     global acPanel, announcementPanel, trackInfoPanel, powerEngineerPanel, systemLogViewer
     try:
@@ -1526,39 +392,27 @@ def selectTrainLine():
     Display a dialog for the user to select which train line to operate.
     Returns 'GREEN' or 'RED' based on user selection.
     """
-    global selectedLine, preloadedTrackInformation, UNDERGROUND_BLOCKS, STATION_DOOR_SIDES, currentBlock, distanceToNextStation
-    
+
     selection_made = [False]  # Use list to allow modification in nested function
-    
+
     def select_line(line):
-        global selectedLine, preloadedTrackInformation, UNDERGROUND_BLOCKS, STATION_DOOR_SIDES, currentBlock, distanceToNextStation
-        selectedLine = line
-        
+        controller.selectLine(line)
+
         if line == 'GREEN':
-            # preloadedTrackInformation is already set to Green Line by default
-            UNDERGROUND_BLOCKS = greenLineUndergroundBlocks
-            STATION_DOOR_SIDES = greenLineStationDoorSides
-            currentBlock = 63  # Green Line yard
             print(f"\n[LINE SELECTION] GREEN LINE Selected")
-            print(f"[INIT] Underground lighting system loaded: {len(UNDERGROUND_BLOCKS)} underground blocks")
-            print(f"[INIT] Station door system loaded: {len(STATION_DOOR_SIDES)} stations configured")
+            print(f"[INIT] Underground lighting system loaded: {len(controller.undergroundBlocks)} underground blocks")
+            print(f"[INIT] Station door system loaded: {len(controller.stationDoorSides)} stations configured")
             print(f"[INIT] Complete route: 22 station stops including 2 visits to LLC PLAZA")
-            print(f"[INIT] Starting at block {currentBlock} (Underground: {currentBlock in UNDERGROUND_BLOCKS})")
         else:  # RED
-            preloadedTrackInformation = redLineTrackInformation
-            UNDERGROUND_BLOCKS = redLineUndergroundBlocks
-            STATION_DOOR_SIDES = redLineStationDoorSides
-            currentBlock = 8  # Red Line yard
             print(f"\n[LINE SELECTION] RED LINE Selected")
-            print(f"[INIT] RED LINE - Underground lighting system loaded: {len(UNDERGROUND_BLOCKS)} underground blocks")
-            print(f"[INIT] RED LINE - Station door system loaded: {len(STATION_DOOR_SIDES)} stations configured")
+            print(f"[INIT] RED LINE - Underground lighting system loaded: {len(controller.undergroundBlocks)} underground blocks")
+            print(f"[INIT] RED LINE - Station door system loaded: {len(controller.stationDoorSides)} stations configured")
             print(f"[INIT] RED LINE - Complete route with switch logic for beacons")
-            print(f"[INIT] Starting at block {currentBlock} (Underground: {currentBlock in UNDERGROUND_BLOCKS})")
-        
-        distanceToNextStation = preloadedTrackInformation['segments'][0]['distance']
+        print(f"[INIT] Starting at block {controller.currentBlock} (Underground: {controller.currentBlock in controller.undergroundBlocks})")
+
         selection_made[0] = True
         dialog.destroy()
-    
+
     # Create selection dialog
     dialog = tk.Tk()
     dialog.title("Train Line Selection")
@@ -1634,7 +488,8 @@ def selectTrainLine():
         import sys
         sys.exit(1)
     
-    return selectedLine
+    return controller.selectedLine
+
 
 def main():
     global powerEngineerPanel, speedDisplay
@@ -1679,6 +534,9 @@ class TrainSpeedDisplayUI:
         self.root.geometry("1000x750")
         self.root.configure(bg='#1e3c72')
         
+        # The controller's outputs go through this UI's GPIO client and server
+        controller.io.display = self
+        
         # GPIO Client Setup
         self.gpio_client = GPIOClient(PI_HOST, PI_GPIO_PORT)
         self.gpio_client.state_update_callback = self._onGPIOStateUpdate
@@ -1719,11 +577,11 @@ class TrainSpeedDisplayUI:
                 
                 # Send initial service brake state to release train
                 time.sleep(0.5)
-                print(f"\n[INIT] Sending Service Brake: {serviceBrakeActive} to Train Model")
+                print(f"\n[INIT] Sending Service Brake: {controller.serviceBrakeActive} to Train Model")
                 self.server.send_to_ui("Train Model", {
                     'command': 'Service Brake',
-                    'value': serviceBrakeActive,
-                    'train_id': 1
+                    'value': controller.serviceBrakeActive,
+                    'train_id': controller.trainId
                 })
                 print(f"[INIT] Service brake command sent\n")
                 
@@ -1748,63 +606,62 @@ class TrainSpeedDisplayUI:
         self.root.protocol("WM_DELETE_WINDOW", self._onClose)
     
     def _onGPIOStateUpdate(self, state):
-        """Handle state update from GPIO server"""
+        """Handle state update from GPIO server (state holds only the keys that changed)"""
         global leftDoorOpen, rightDoorOpen, headlightsOn, interiorLightsOn
-        global serviceBrakeActive, trainHornActive, emergencyBrakeEngaged
-        global drivetrainManualMode, manualSetpointSpeed
+        global trainHornActive
         global speedUpPressed, speedDownPressed, speedConfirmPressed
         
         # Track previous values to detect changes
-        prev_emergency = emergencyBrakeEngaged
-        prev_service = serviceBrakeActive
-        prev_manual_mode = drivetrainManualMode
-        prev_manual_speed = manualSetpointSpeed
+        prev_emergency = controller.emergencyBrakeEngaged
+        prev_service = controller.serviceBrakeActive
+        prev_manual_mode = controller.drivetrainManualMode
+        prev_manual_speed = controller.manualSetpointSpeed
         prev_left_door = leftDoorOpen
         prev_right_door = rightDoorOpen
         prev_headlights = headlightsOn
         prev_interior_lights = interiorLightsOn
         prev_train_horn = trainHornActive
         
-        # Update local state
-        leftDoorOpen = state.get('leftDoorOpen', False)
-        rightDoorOpen = state.get('rightDoorOpen', False)
-        headlightsOn = state.get('headlightsOn', False)
-        interiorLightsOn = state.get('interiorLightsOn', False)
-        serviceBrakeActive = state.get('serviceBrakeActive', False)
-        trainHornActive = state.get('trainHornActive', False)
-        emergencyBrakeEngaged = state.get('emergencyBrakeEngaged', False)
-        drivetrainManualMode = state.get('drivetrainManualMode', False)
-        manualSetpointSpeed = state.get('manualSetpointSpeed', 0)
-        speedUpPressed = state.get('speedUpPressed', False)
-        speedDownPressed = state.get('speedDownPressed', False)
-        speedConfirmPressed = state.get('speedConfirmPressed', False)
+        # Update local state (keys not in this update keep their value)
+        leftDoorOpen = state.get('leftDoorOpen', leftDoorOpen)
+        rightDoorOpen = state.get('rightDoorOpen', rightDoorOpen)
+        headlightsOn = state.get('headlightsOn', headlightsOn)
+        interiorLightsOn = state.get('interiorLightsOn', interiorLightsOn)
+        controller.serviceBrakeActive = state.get('serviceBrakeActive', controller.serviceBrakeActive)
+        trainHornActive = state.get('trainHornActive', trainHornActive)
+        controller.emergencyBrakeEngaged = state.get('emergencyBrakeEngaged', controller.emergencyBrakeEngaged)
+        controller.drivetrainManualMode = state.get('drivetrainManualMode', controller.drivetrainManualMode)
+        controller.manualSetpointSpeed = state.get('manualSetpointSpeed', controller.manualSetpointSpeed)
+        speedUpPressed = state.get('speedUpPressed', speedUpPressed)
+        speedDownPressed = state.get('speedDownPressed', speedDownPressed)
+        speedConfirmPressed = state.get('speedConfirmPressed', speedConfirmPressed)
         
         # Send relevant updates to Train Model ONLY when they change
         if self.server and self.train_model_connected:
             try:
                 # Send manual setpoint speed when in manual mode and it changed
-                if drivetrainManualMode and (manualSetpointSpeed != prev_manual_speed or drivetrainManualMode != prev_manual_mode):
+                if controller.drivetrainManualMode and (controller.manualSetpointSpeed != prev_manual_speed or controller.drivetrainManualMode != prev_manual_mode):
                     self.server.send_to_ui("Train Model", {
                         'command': 'Manual Setpoint Speed',
-                        'value': manualSetpointSpeed,
-                        'train_id': 1
+                        'value': controller.manualSetpointSpeed,
+                        'train_id': controller.trainId
                     })
                 
                 # Send emergency brake state changes
-                if emergencyBrakeEngaged != prev_emergency:
+                if controller.emergencyBrakeEngaged != prev_emergency:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Emergency Brake',
-                        'value': emergencyBrakeEngaged,
-                        'train_id': 1
+                        'value': controller.emergencyBrakeEngaged,
+                        'train_id': controller.trainId
                     })
                 
                 # Send service brake state changes
-                if serviceBrakeActive != prev_service:
-                    print(f"\n[GPIO BRAKE CHANGE] Service Brake: {prev_service} → {serviceBrakeActive}")
+                if controller.serviceBrakeActive != prev_service:
+                    print(f"\n[GPIO BRAKE CHANGE] Service Brake: {prev_service} → {controller.serviceBrakeActive}")
                     self.server.send_to_ui("Train Model", {
                         'command': 'Service Brake',
-                        'value': serviceBrakeActive,
-                        'train_id': 1
+                        'value': controller.serviceBrakeActive,
+                        'train_id': controller.trainId
                     })
                     print(f"[GPIO BRAKE SENT] Command sent to Train Model\n")
                 
@@ -1813,7 +670,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Left Door Signal',
                         'value': leftDoorOpen,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
                 
                 # Send right door state changes
@@ -1821,7 +678,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Right Door Signal',
                         'value': rightDoorOpen,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
                 
                 # Send headlights state changes
@@ -1829,7 +686,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Headlights',
                         'value': headlightsOn,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
                 
                 # Send interior lights state changes
@@ -1837,7 +694,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Cabin Lights',
                         'value': interiorLightsOn,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
                 
                 # Send train horn state changes
@@ -1845,7 +702,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Train Horn',
                         'value': trainHornActive,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
             except Exception as e:
                 print(f"Error sending to Train Model: {e}")
@@ -1867,11 +724,8 @@ class TrainSpeedDisplayUI:
     def _process_message(self, message, source_ui_id):
         """Process incoming messages from Train Model"""
         # Declare all globals at function level
-        global commandedSpeed, displayCommandedSpeed, previousCommandedSpeed, commandedAuthority
-        global serviceBrakeActive, currentSpeed, passengerEmergencySignal
+        global passengerEmergencySignal
         global brakeFailure, engineFailure, signalFailure, acPanel
-        global preloadedTrackInformation, distanceToNextStation
-        global beacon1, beacon2, emergencyBrakeEngaged, returningToYard
         global mult_value
         
         try:
@@ -1896,102 +750,99 @@ class TrainSpeedDisplayUI:
                 # Commanded speed comes from Track Model in MPH (already converted)
                 
                 # If returning to yard, ignore commanded speed updates - keep it at 0
-                if returningToYard:
+                if controller.returningToYard:
                     print(f"[YARD RETURN] Ignoring Commanded Speed update (returningToYard=True)")
                     return  # Don't update commanded speed when returning to yard
                 
                 # Track previous commanded speed to detect reductions
-                if 'previousCommandedSpeed' not in globals():
-                    previousCommandedSpeed = 0.0
-                
-                previousCommandedSpeed = commandedSpeed
+                controller.previousCommandedSpeed = controller.commandedSpeed
                 
                 # Store the raw commanded speed for display
-                displayCommandedSpeed = float(value)
+                controller.displayCommandedSpeed = float(value)
                 
                 # Apply authority-based limiting to internal commanded speed
-                if commandedAuthority == 0:
-                    commandedSpeed = 0.0  # Authority 0: stop
-                elif commandedAuthority == 1:
-                    commandedSpeed = displayCommandedSpeed * 0.5  # Authority 1: 50%
-                elif commandedAuthority == 2:
-                    commandedSpeed = displayCommandedSpeed * 0.75  # Authority 2: 75%
-                elif commandedAuthority == 3:
-                    commandedSpeed = displayCommandedSpeed  # Authority 3: 100%
+                if controller.commandedAuthority == 0:
+                    controller.commandedSpeed = 0.0  # Authority 0: stop
+                elif controller.commandedAuthority == 1:
+                    controller.commandedSpeed = controller.displayCommandedSpeed * 0.5  # Authority 1: 50%
+                elif controller.commandedAuthority == 2:
+                    controller.commandedSpeed = controller.displayCommandedSpeed * 0.75  # Authority 2: 75%
+                elif controller.commandedAuthority == 3:
+                    controller.commandedSpeed = controller.displayCommandedSpeed  # Authority 3: 100%
                 else:
-                    commandedSpeed = displayCommandedSpeed  # Default: 100%
+                    controller.commandedSpeed = controller.displayCommandedSpeed  # Default: 100%
             
             elif command == 'Commanded Authority':
                 # If returning to yard, ignore authority updates - keep speed at 0
-                if returningToYard:
+                if controller.returningToYard:
                     print(f"[YARD RETURN] Ignoring Commanded Authority update (returningToYard=True)")
                     return  # Don't update commanded speed when returning to yard
                 
-                prev_authority = commandedAuthority
-                commandedAuthority = value
+                prev_authority = controller.commandedAuthority
+                controller.commandedAuthority = value
                 
                 # Recalculate internal commanded speed based on new authority
-                if commandedAuthority == 0:
+                if controller.commandedAuthority == 0:
                     # Authority 0: Emergency stop
-                    if not isAtStation:
+                    if not controller.isAtStation:
                         # NOT at station - EMERGENCY STOP via service brake
                         print(f"⚠️  AUTHORITY 0 - IMMEDIATE STOP (not at station)")
-                        commandedSpeed = 0.0
+                        controller.commandedSpeed = 0.0
                         
                         # Engage service brake immediately
-                        serviceBrakeActive = True
+                        controller.serviceBrakeActive = True
                         
                         # Send to Train Model
                         if self.server and self.train_model_connected:
                             self.server.send_to_ui("Train Model", {
                                 'command': 'Service Brake',
                                 'value': True,
-                                'train_id': 1
+                                'train_id': controller.trainId
                             })
                             print(f"[AUTHORITY 0] Service brake ENGAGED for emergency stop")
                     else:
                         # At station - ignore authority 0 (station logic already handles stopping)
                         print(f"[AUTHORITY 0] At station - ignoring (station logic handles stop)")
-                        commandedSpeed = 0.0
+                        controller.commandedSpeed = 0.0
                 
-                elif commandedAuthority == 1:
+                elif controller.commandedAuthority == 1:
                     # Authority 1: 50% of commanded speed
-                    commandedSpeed = displayCommandedSpeed * 0.5
-                    print(f"[AUTHORITY 1] Speed limited to 50% → {commandedSpeed:.1f} MPH")
+                    controller.commandedSpeed = controller.displayCommandedSpeed * 0.5
+                    print(f"[AUTHORITY 1] Speed limited to 50% → {controller.commandedSpeed:.1f} MPH")
                 
-                elif commandedAuthority == 2:
+                elif controller.commandedAuthority == 2:
                     # Authority 2: 75% of commanded speed
-                    commandedSpeed = displayCommandedSpeed * 0.75
-                    print(f"[AUTHORITY 2] Speed limited to 75% → {commandedSpeed:.1f} MPH")
+                    controller.commandedSpeed = controller.displayCommandedSpeed * 0.75
+                    print(f"[AUTHORITY 2] Speed limited to 75% → {controller.commandedSpeed:.1f} MPH")
                 
-                elif commandedAuthority == 3:
+                elif controller.commandedAuthority == 3:
                     # Authority 3: 100% of commanded speed (full speed)
-                    commandedSpeed = displayCommandedSpeed
-                    print(f"[AUTHORITY 3] Full speed allowed → {commandedSpeed:.1f} MPH")
+                    controller.commandedSpeed = controller.displayCommandedSpeed
+                    print(f"[AUTHORITY 3] Full speed allowed → {controller.commandedSpeed:.1f} MPH")
                 
                 else:
                     # Unknown authority - default to full speed
-                    commandedSpeed = displayCommandedSpeed
+                    controller.commandedSpeed = controller.displayCommandedSpeed
                 
                 # Release service brake if transitioning from authority 0 to non-zero
                 # But NOT if returning to yard
-                if prev_authority == 0 and commandedAuthority > 0 and serviceBrakeActive and not isAtStation and not returningToYard:
-                    print(f"🟢 AUTHORITY {commandedAuthority} - Releasing emergency stop brake")
+                if prev_authority == 0 and controller.commandedAuthority > 0 and controller.serviceBrakeActive and not controller.isAtStation and not controller.returningToYard:
+                    print(f"🟢 AUTHORITY {controller.commandedAuthority} - Releasing emergency stop brake")
                     
-                    serviceBrakeActive = False
+                    controller.serviceBrakeActive = False
                     
                     # Send to Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'Service Brake',
                             'value': False,
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
-                        print(f"[AUTHORITY {commandedAuthority}] Service brake released")
+                        print(f"[AUTHORITY {controller.commandedAuthority}] Service brake released")
             
             elif command == 'Current Speed':
                 # Update current speed from Train Model - critical for PI controller feedback!
-                currentSpeed = float(value)
+                controller.currentSpeed = float(value)
             
             elif command == 'Passenger Emergency Signal':
                 passengerEmergencySignal = value
@@ -1999,31 +850,31 @@ class TrainSpeedDisplayUI:
                     self.gpio_client.setLED('passenger_emergency', value)
                 
                 # Activate or deactivate emergency brake based on passenger emergency
-                if value and not emergencyBrakeEngaged:
+                if value and not controller.emergencyBrakeEngaged:
                     print("⚠️  PASSENGER EMERGENCY - Activating Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(True)
-                    emergencyBrakeEngaged = True
+                    controller.emergencyBrakeEngaged = True
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'on',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
-                elif not value and emergencyBrakeEngaged:
+                elif not value and controller.emergencyBrakeEngaged:
                     print("✓ PASSENGER EMERGENCY CLEARED - Releasing Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(False)
-                    emergencyBrakeEngaged = False
+                    controller.emergencyBrakeEngaged = False
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'off',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
             
             elif command == 'Service Brake Failure':
@@ -2033,31 +884,31 @@ class TrainSpeedDisplayUI:
                     self.gpio_client.setLED('brake_failure', value)
                 
                 # Activate or deactivate emergency brake based on brake failure
-                if value and not emergencyBrakeEngaged:
+                if value and not controller.emergencyBrakeEngaged:
                     print("⚠️  BRAKE FAILURE - Activating Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(True)
-                    emergencyBrakeEngaged = True
+                    controller.emergencyBrakeEngaged = True
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'on',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
-                elif not value and emergencyBrakeEngaged:
+                elif not value and controller.emergencyBrakeEngaged:
                     print("✓ BRAKE FAILURE CLEARED - Releasing Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(False)
-                    emergencyBrakeEngaged = False
+                    controller.emergencyBrakeEngaged = False
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'off',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
             
             elif command == 'Train Engine Failure':
@@ -2066,31 +917,31 @@ class TrainSpeedDisplayUI:
                     self.gpio_client.setLED('engine_failure', value)
                 
                 # Activate or deactivate emergency brake based on engine failure
-                if value and not emergencyBrakeEngaged:
+                if value and not controller.emergencyBrakeEngaged:
                     print("⚠️  ENGINE FAILURE - Activating Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(True)
-                    emergencyBrakeEngaged = True
+                    controller.emergencyBrakeEngaged = True
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'on',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
-                elif not value and emergencyBrakeEngaged:
+                elif not value and controller.emergencyBrakeEngaged:
                     print("✓ ENGINE FAILURE CLEARED - Releasing Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(False)
-                    emergencyBrakeEngaged = False
+                    controller.emergencyBrakeEngaged = False
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'off',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
             
             elif command == 'Signal Pickup Failure':
@@ -2099,31 +950,31 @@ class TrainSpeedDisplayUI:
                     self.gpio_client.setLED('signal_failure', value)
                 
                 # Activate or deactivate emergency brake based on signal failure
-                if value and not emergencyBrakeEngaged:
+                if value and not controller.emergencyBrakeEngaged:
                     print("⚠️  SIGNAL PICKUP FAILURE - Activating Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(True)
-                    emergencyBrakeEngaged = True
+                    controller.emergencyBrakeEngaged = True
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'on',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
-                elif not value and emergencyBrakeEngaged:
+                elif not value and controller.emergencyBrakeEngaged:
                     print("✓ SIGNAL PICKUP FAILURE CLEARED - Releasing Emergency Brake")
                     if self.gpio_client and self.gpio_client.connected:
                         self.gpio_client.setEmergencyBrake(False)
-                    emergencyBrakeEngaged = False
+                    controller.emergencyBrakeEngaged = False
                     
                     # Notify Train Model
                     if self.server and self.train_model_connected:
                         self.server.send_to_ui("Train Model", {
                             'command': 'emergency_brake',
                             'value': 'off',
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
             
             elif command == 'Temp':
@@ -2139,45 +990,47 @@ class TrainSpeedDisplayUI:
                 received_beacon = value
                 
                 if received_beacon and 'segments' in received_beacon:
-                    preloadedTrackInformation = received_beacon
-                    # Reset distance to first segment
-                    distanceToNextStation = preloadedTrackInformation['segments'][0]['distance']
+                    # Use it from the first segment's distance on
+                    controller.setTrackInformation(received_beacon)
                     
                     print("[BEACON DATA] Received station information:")
-                    for segment in preloadedTrackInformation['segments']:
+                    for segment in controller.trackInformation['segments']:
                         print(f"  - {segment['from_station']} → {segment['to_station']}: {segment['distance']}m")
                     print("[BEACON DATA] Automatic mode station stopping enabled")
             
             elif command == 'Beacon1':
                 # RED LINE: Switch at block 27 (to blocks 76-72)
-                global beacon1
-                beacon1 = bool(value)
-                print(f"[BEACON1] Received: {beacon1} (Switch at block 27)")
-                print(f"[BEACON1] Current state: selectedLine={selectedLine}, currentBlock={currentBlock}, beacon1={beacon1}")
-                if selectedLine == 'RED' and currentBlock == 27:
+                controller.beacon1 = bool(value)
+                print(f"[BEACON1] Received: {controller.beacon1} (Switch at block 27)")
+                print(f"[BEACON1] Current state: selectedLine={controller.selectedLine}, currentBlock={controller.currentBlock}, beacon1={controller.beacon1}")
+                if controller.selectedLine == 'RED' and controller.currentBlock == 27:
                     print(f"[BEACON1] ✓ Conditions met for alternative route display!")
             
             elif command == 'Beacon2':
                 # RED LINE: Switch at block 38 (to blocks 71-67)
-                global beacon2
-                beacon2 = bool(value)
-                print(f"[BEACON2] Received: {beacon2} (Switch at block 38)")
-                print(f"[BEACON2] Current state: selectedLine={selectedLine}, currentBlock={currentBlock}, beacon2={beacon2}")
-                if selectedLine == 'RED' and currentBlock == 38:
+                controller.beacon2 = bool(value)
+                print(f"[BEACON2] Received: {controller.beacon2} (Switch at block 38)")
+                print(f"[BEACON2] Current state: selectedLine={controller.selectedLine}, currentBlock={controller.currentBlock}, beacon2={controller.beacon2}")
+                if controller.selectedLine == 'RED' and controller.currentBlock == 38:
                     print(f"[BEACON2] ✓ Conditions met for alternative route display!")
             
             elif command == 'MULT':
                 # MULT command from CTC - updates time scale
-                global mult_value, STATION_DWELL_TIME
-                mult_value = float(value)
-                
-                # Recalculate STATION_DWELL_TIME to maintain 30 real-world seconds
-                # At 1.0x: 30 seconds simulation time = 30 seconds real time
-                # At 10.0x: 3 seconds simulation time = 30 seconds real time
-                STATION_DWELL_TIME = 30.0 / mult_value
-                
-                print(f"[CTC] Received MULT command from {source_ui_id}: value={mult_value}")
-                print(f"[CTC] Updated STATION_DWELL_TIME to {STATION_DWELL_TIME:.1f} seconds (30s real-world time)")
+                global mult_value
+                if simClock.set_multiplier(value):
+                    mult_value = simClock.multiplier
+                    # Dwell and position run on sim time, so they follow the multiplier by themselves
+                    print(f"[CTC] Received MULT command from {source_ui_id}: value={mult_value}")
+                else:
+                    print(f"[CTC] Invalid MULT value from {source_ui_id}: {value}")
+            
+            elif command == 'TIME':
+                # CTC clock (forwarded by the Train Model) anchors the simulation clock
+                simClock.set_time(value)
+            
+            elif command == 'Current Block':
+                # Track Model block entry (forwarded by the Train Model): resync position
+                resyncPosition(int(value))
 
         
         except Exception as e:
@@ -2600,34 +1453,34 @@ class TrainSpeedDisplayUI:
                 cache['manualSetpoint'] = None
         
         # Update station information (show in both manual and automatic modes)
-        if autoModeEnabled:
+        if controller.autoModeEnabled:
             nextStation = getNextStationName()
             distToStation = getDistanceToNextStation()
             
             # Debug output every time we're at a beacon block
-            if currentBlock in [27, 38]:
-                print(f"[DISPLAY DEBUG] At beacon block {currentBlock}: beacon1={beacon1}, beacon2={beacon2}, nextStation={nextStation}")
+            if controller.currentBlock in [27, 38]:
+                print(f"[DISPLAY DEBUG] At beacon block {controller.currentBlock}: beacon1={controller.beacon1}, beacon2={controller.beacon2}, nextStation={nextStation}")
             
             # Check if beacons or current block changed - force station name update
-            if (cache['beacon1'] != beacon1 or cache['beacon2'] != beacon2 or 
-                cache['currentBlock'] != currentBlock or cache['nextStation'] != nextStation):
+            if (cache['beacon1'] != controller.beacon1 or cache['beacon2'] != controller.beacon2 or 
+                cache['currentBlock'] != controller.currentBlock or cache['nextStation'] != nextStation):
                 
                 # Debug when updating
-                if currentBlock in [27, 38]:
+                if controller.currentBlock in [27, 38]:
                     print(f"[DISPLAY DEBUG] Updating display: {cache['nextStation']} → {nextStation}")
                 
                 self.nextStationValue.config(text=nextStation)
                 cache['nextStation'] = nextStation
-                cache['beacon1'] = beacon1
-                cache['beacon2'] = beacon2
-                cache['currentBlock'] = currentBlock
+                cache['beacon1'] = controller.beacon1
+                cache['beacon2'] = controller.beacon2
+                cache['currentBlock'] = controller.currentBlock
                 
                 # Highlight alternative route in orange
                 if "ALTERNATIVE ROUTE" in nextStation:
                     self.nextStationValue.config(fg='#ffa500')  # Orange for alternative route
                 else:
                     # Reset to normal color (or yellow if at station)
-                    if isAtStation:
+                    if controller.isAtStation:
                         self.nextStationValue.config(fg='#ffff00')
                     else:
                         self.nextStationValue.config(fg='white')
@@ -2646,12 +1499,12 @@ class TrainSpeedDisplayUI:
                 cache['distToStation'] = distToStationFeet
             
             # Highlight next station display if at station
-            if cache['isAtStation'] != isAtStation:
-                if isAtStation:
+            if cache['isAtStation'] != controller.isAtStation:
+                if controller.isAtStation:
                     self.nextStationValue.config(fg='#ffff00')
                 else:
                     self.nextStationValue.config(fg='white')
-                cache['isAtStation'] = isAtStation
+                cache['isAtStation'] = controller.isAtStation
         else:
             # Auto mode not enabled, show disabled
             if cache['nextStation'] != 'DISABLED':
@@ -2701,13 +1554,13 @@ class TrainSpeedDisplayUI:
                 power_changed = lastSentPower is None or abs(powerWatts - lastSentPower) > 100
                 
                 # SAFETY: Do not send power if service brake is active
-                if serviceBrakeActive:
+                if controller.serviceBrakeActive:
                     # Service brake engaged - force power to zero
                     if lastSentPower != 0:
                         self.server.send_to_ui("Train Model", {
                             'command': 'Power Command',
                             'value': 0,
-                            'train_id': 1
+                            'train_id': controller.trainId
                         })
                         lastSentPower = 0
                         self._last_power_send_time = current_time
@@ -2716,7 +1569,7 @@ class TrainSpeedDisplayUI:
                     self.server.send_to_ui("Train Model", {
                         'command': 'Power Command',
                         'value': powerWatts,
-                        'train_id': 1
+                        'train_id': controller.trainId
                     })
                     lastSentPower = powerWatts
                     self._last_power_send_time = current_time
@@ -15,6 +15,8 @@ import threading
 from datetime import datetime
 from pathlib import Path
 
+from TC_GPIO_StateMirror import GPIOStateMirror
+
 # Configuration
 PI_HOST = '172.20.10.8'  # ← CHANGE THIS to your Pi's IP
 PI_GPIO_PORT = 12348
@@ -39,6 +41,7 @@ class SystemLogViewer:
         self.gpio_client = None
         self.connected = False
         self.last_state = {}
+        self.stateMirror = GPIOStateMirror()
         
         # Log categories
         self.log_filters = {
@@ -257,9 +260,13 @@ class SystemLogViewer:
             message = json.loads(message_str)
             msg_type = message.get('type')
             
-            if msg_type == 'state_update':
-                state = message.get('data', {})
-                self._handleStateUpdate(state)
+            if msg_type in ('state_update', 'state_delta'):
+                if self.stateMirror.apply(message) is not None:
+                    self._handleStateUpdate(self.stateMirror.state)
+                if self.stateMirror.needsResync:
+                    # Missing seq: ask for the full state again
+                    self.stateMirror.needsResync = False
+                    self.gpio_client.sendall((json.dumps({'type': 'get_state'}) + '\n').encode('utf-8'))
             
             elif msg_type == 'log_message':
                 # Handle log messages from Pi
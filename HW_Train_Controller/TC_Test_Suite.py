@@ -193,7 +193,8 @@ class GPIOTestClient:
                     if line:
                         try:
                             msg = json.loads(line)
-                            if msg.get('type') == 'state_update':
+                            if msg.get('type') in ('state_update', 'state_delta'):
+                                # Full state or only the changed keys - both merge the same way
                                 with self.lock:
                                     self.state.update(msg.get('data', {}))
                         except json.JSONDecodeError:
@@ -31,6 +31,8 @@ import sys
 import os
 from pathlib import Path
 
+from TC_GPIO_StateMirror import GPIOStateMirror
+
 # Try to import TrainSocketServer
 try:
     # Try relative import first (if in TRAINS-TEAM2 structure)
@@ -70,7 +72,8 @@ class GPIOClient:
         self.connected = False
         self.running = True
         self.buffer = ""
-        self.state_update_callback = None
+        self.state_update_callback = None  # Called with the changed keys of each update
+        self.stateMirror = GPIOStateMirror()
     
     def connect(self):
         """Connect to GPIO server"""
@@ -121,13 +124,31 @@ class GPIOClient:
             message = json.loads(message_str)
             msg_type = message.get('type')
             
-            if msg_type == 'state_update':
-                if self.state_update_callback:
-                    self.state_update_callback(message.get('data', {}))
+            if msg_type in ('state_update', 'state_delta'):
+                # Only the keys that changed reach the callback
+                changed = self.stateMirror.apply(message)
+                if self.stateMirror.needsResync:
+                    self.stateMirror.needsResync = False
+                    print(f"GPIO state update missing (seq {message.get('seq')}) - requesting full state")
+                    self.requestState()
+                if changed and self.state_update_callback:
+                    self.state_update_callback(changed)
         
         except json.JSONDecodeError:
             print(f"Invalid JSON from GPIO server: {message_str}")
     
+    def requestState(self):
+        """Ask the GPIO server for its full state (resync)"""
+        if not self.connected:
+            return False
+        
+        try:
+            self.socket.sendall((json.dumps({'type': 'get_state'}) + '\n').encode('utf-8'))
+            return True
+        except:
+            self.connected = False
+            return False
+    
     def setLED(self, led_name, state):
         """Send command to set LED state"""
         if not self.connected:
@@ -642,27 +663,23 @@ class EnhancedTrainControlUI:
                 )
     
     def _onGPIOStateUpdate(self, state):
-        """Handle state update from GPIO server"""
+        """Handle state update from GPIO server (state holds only the keys that changed)"""
         self.gpio_state.update(state)
         self.root.after(0, self._updateHardwareStatus)
         
         # Send relevant updates to Train Model
         if self.socket_server and self.train_model_connected:
             # Send manual setpoint speed
-            if state.get('drivetrainManualMode'):
-                self._sendToTrainModel('Manual Setpoint Speed', state.get('manualSetpointSpeed', 0))
+            if self.gpio_state.get('drivetrainManualMode') and ('manualSetpointSpeed' in state or 'drivetrainManualMode' in state):
+                self._sendToTrainModel('Manual Setpoint Speed', self.gpio_state.get('manualSetpointSpeed', 0))
             
             # Send emergency brake status
-            if state.get('emergencyBrakeEngaged'):
-                self._sendToTrainModel('Emergency Brake', True)
-            else:
-                self._sendToTrainModel('Emergency Brake', False)
+            if 'emergencyBrakeEngaged' in state:
+                self._sendToTrainModel('Emergency Brake', bool(state['emergencyBrakeEngaged']))
             
             # Send service brake status
-            if state.get('serviceBrakeActive'):
-                self._sendToTrainModel('Service Brake', True)
-            else:
-                self._sendToTrainModel('Service Brake', False)
+            if 'serviceBrakeActive' in state:
+                self._sendToTrainModel('Service Brake', bool(state['serviceBrakeActive']))
     
     def _updateHardwareStatus(self):
         """Update hardware status displays from GPIO state"""
@@ -0,0 +1,184 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+
+class ImageAssetCache:
+    """
+    Shared cache of pre-scaled image assets.
+
+    Images are keyed by (path, size) so every UI that asks for the same
+    picture at the same size gets the already-resized copy instead of
+    calling Image.open() + resize() again. Old entries are dropped in
+    least-recently-used order once max_entries is reached.
+
+    PIL images can be scaled on a background thread (prescale), but
+    ImageTk.PhotoImage objects must always be created on the Tk thread,
+    so get_photo() should only be called from UI code.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._sources = {}                 # path -> original PIL image (converted once)
+        self._scaled = OrderedDict()       # (path, size) -> resized PIL image
+        self._photos = OrderedDict()       # (path, size) -> ImageTk.PhotoImage
+        self._pending = set()              # keys currently being pre-scaled
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- KEY HELPERS ----------------
+
+    @staticmethod
+    def _make_key(path, size):
+        """Normalize a (path, size) pair into a cache key."""
+        return (os.path.abspath(path), (int(size[0]), int(size[1])))
+
+    def _touch(self, store, key):
+        """Mark key as most recently used."""
+        store.move_to_end(key)
+
+    def _trim(self, store):
+        """Evict least recently used entries past max_entries."""
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    # ---------------- SOURCE IMAGES ----------------
+
+    def _load_source(self, path):
+        """Open the original image once and keep it in memory."""
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            source = self._sources.get(abs_path)
+        if source is not None:
+            return source
+
+        img = Image.open(abs_path)
+        img.load()
+        with self._lock:
+            self._sources.setdefault(abs_path, img)
+            return self._sources[abs_path]
+
+    def get_source_size(self, path):
+        """Return (width, height) of the original image without resizing it."""
+        return self._load_source(path).size
+
+    def fit_size(self, path, max_width, max_height):
+        """
+        Largest size that fits inside max_width x max_height while keeping
+        the original aspect ratio of the image.
+        """
+        width, height = self.get_source_size(path)
+        aspect = width / height
+        if max_width / max_height > aspect:
+            new_height = max_height
+            new_width = int(new_height * aspect)
+        else:
+            new_width = max_width
+            new_height = int(new_width / aspect)
+        return (max(new_width, 1), max(new_height, 1))
+
+    # ---------------- SCALED IMAGES ----------------
+
+    def get_image(self, path, size):
+        """
+        Return the PIL image at path resized to size (width, height).
+
+        Safe to call from any thread.
+        """
+        key = self._make_key(path, size)
+        with self._lock:
+            img = self._scaled.get(key)
+            if img is not None:
+                self._touch(self._scaled, key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        img = self._load_source(path).resize(key[1], Image.LANCZOS)
+        with self._lock:
+            self._scaled[key] = img
+            self._touch(self._scaled, key)
+            self._trim(self._scaled)
+        return img
+
+    def get_photo(self, path, size):
+        """
+        Return a Tk PhotoImage of path at size. Must be called from the Tk thread.
+
+        The cache holds a reference to the PhotoImage, but callers should still
+        keep their own reference (e.g. self.track_bg) while it is on a canvas.
+        """
+        key = self._make_key(path, size)
+        with self._lock:
+            photo = self._photos.get(key)
+            if photo is not None:
+                self._touch(self._photos, key)
+                self.hits += 1
+                return photo
+
+        photo = ImageTk.PhotoImage(self.get_image(path, size))
+        with self._lock:
+            self._photos[key] = photo
+            self._touch(self._photos, key)
+            self._trim(self._photos)
+        return photo
+
+    def prescale(self, path, sizes, background=True):
+        """
+        Resize path to each size ahead of time so the first get_photo() is cheap.
+
+        Args:
+            path: Image file to load
+            sizes: Iterable of (width, height) tuples
+            background: Run the resizing in a daemon thread
+
+        Returns:
+            The worker thread if background is True, otherwise None
+        """
+        keys = []
+        with self._lock:
+            for size in sizes:
+                key = self._make_key(path, size)
+                if key in self._scaled or key in self._pending:
+                    continue
+                self._pending.add(key)
+                keys.append(key)
+
+        def worker():
+            for key in keys:
+                try:
+                    self.get_image(key[0], key[1])
+                except Exception as e:
+                    print(f"[ImageAssetCache] Could not pre-scale {key[0]} {key[1]}: {e}")
+                finally:
+                    with self._lock:
+                        self._pending.discard(key)
+
+        if not keys:
+            return None
+        if background:
+            thread = threading.Thread(target=worker, daemon=True)
+            thread.start()
+            return thread
+        worker()
+        return None
+
+    def clear(self, path=None):
+        """Drop cached entries (all of them, or only the ones for path)."""
+        with self._lock:
+            if path is None:
+                self._sources.clear()
+                self._scaled.clear()
+                self._photos.clear()
+                return
+            abs_path = os.path.abspath(path)
+            self._sources.pop(abs_path, None)
+            for store in (self._scaled, self._photos):
+                for key in [k for k in store if k[0] == abs_path]:
+                    del store[key]
+
+
+image_cache = ImageAssetCache()
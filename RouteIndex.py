@@ -0,0 +1,269 @@
+from bisect import bisect_right
+
+from GreenLineData import GreenLine
+from RedLineData import RedLine
+from SpeedProfile import block_speed_limit_kmh, segment_blocks
+
+# Underground sections - blocks where headlights and interior lights should be ON.
+# The line data marks most of them (infrastructure UNDERGROUND); these lists
+# also cover the tunnel blocks it leaves out.
+# GREEN LINE
+greenLineUndergroundBlocks = {36, 37, 38, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52,
+                              53, 54, 55, 56, 57, 122, 123, 124, 125, 126, 127, 128, 129, 130,
+                              131, 132, 133, 134, 135, 136, 137, 138, 139, 140, 142, 143}
+
+# RED LINE - Blocks 24-46 are underground according to the data, plus branch blocks
+redLineUndergroundBlocks = {24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46,
+                            67, 68, 69, 70, 71, 72, 73, 74, 75, 76}
+
+# Station door side mapping - which doors open at each station, for stops
+# whose block has no station side in the line data
+# Format: station_name: 'left', 'right', or 'both'
+greenLineStationDoorSides = {
+    'PIONEER': 'left',
+    'EDGEBROOK': 'left',
+    'LLC PLAZA': 'both',
+    'WHITED': 'both',
+    'SOUTH BANK': 'left',
+    'CENTRAL': 'right',
+    'INGLEWOOD': 'right',  # Block 48
+    'OVERBROOK': 'right',  # Block 57, 123
+    'GLENBURY': 'right',   # Block 65, 114
+    'DORMONT': 'right',    # Block 73, 105
+    'MT LEBANON': 'both',
+    'POPLAR': 'left',
+    'CASTLE SHANNON': 'left'
+}
+
+redLineStationDoorSides = {
+    'SHADYSIDE': 'both',
+    'HERRON AVE': 'both',
+    'SWISSVILLE': 'both',
+    'PENN STATION': 'both',
+    'STEEL PLAZA': 'both',
+    'FIRST AVE': 'both',
+    'STATION SQUARE': 'both',
+    'SOUTH HILLS JUNCTION': 'both'
+}
+
+# Special case: INGLEWOOD at block 132 uses left door instead of right
+STATION_DOOR_EXCEPTIONS = {
+    132: 'left'  # INGLEWOOD at block 132 uses left door
+}
+
+LINE_UNDERGROUND_BLOCKS = {'GREEN': greenLineUndergroundBlocks, 'RED': redLineUndergroundBlocks}
+LINE_STATION_DOOR_SIDES = {'GREEN': greenLineStationDoorSides, 'RED': redLineStationDoorSides}
+
+_STATION_SIDES = {'left': 'left', 'right': 'right', 'left/right': 'both'}
+
+
+class SegmentRoute:
+    """
+    Blocks of one station-to-station segment and where each one starts,
+    in meters from the from-station stop point
+    """
+
+    def __init__(self, blocks, starts):
+        self.blocks = blocks
+        self.starts = starts
+
+    def block_at(self, distance_traveled):
+        """Block the train is in at distance_traveled meters into the segment (binary search)"""
+        index = bisect_right(self.starts, distance_traveled) - 1
+        return self.blocks[max(0, index)]
+
+
+def build_segment_route(segment, line_data):
+    """
+    Lay the blocks of a segment out between its two stop points (the middle
+    of each station block), from the line data block lengths scaled to the
+    segment's distance - the same layout as the SpeedProfile tables. Blocks
+    without line data get the average length of the others.
+    """
+    blocks = segment_blocks(segment)
+    lengths = []
+    for block in blocks:
+        data = line_data.getBlock(block) if line_data is not None else None
+        lengths.append(float(data['blockLengthM']) if data else None)
+    known = [length for length in lengths if length]
+    average = sum(known) / len(known) if known else 1.0
+    lengths = [length or average for length in lengths]
+    lengths[0] /= 2.0
+    if len(lengths) > 1:
+        lengths[-1] /= 2.0
+
+    scale = float(segment['distance']) / sum(lengths)
+    starts = []
+    start = 0.0
+    for length in lengths:
+        starts.append(start)
+        start += length * scale
+    return SegmentRoute(tuple(blocks), starts)
+
+
+class RouteIndex:
+    """
+    Precomputed route of one line's station-to-station table (the 'segments'
+    of a controller's track information), built once from the line data:
+
+    - segments: a SegmentRoute per segment (blocks in order and their starts)
+    - blocks: the whole route's blocks in order
+    - segment_starts / station_positions: route distance (m) of each segment's
+      from-station and to-station stop point
+    - stop_door_sides: doors to open at each segment's to-station
+    - underground: every tunnel block
+
+    Per-tick queries are a binary search (block_at) or a lookup.
+    """
+
+    def __init__(self, track_info, line_data, underground_blocks=(), station_door_sides=None):
+        self.track_info = track_info
+        segments = track_info['segments']
+        self.segments = [build_segment_route(segment, line_data) for segment in segments]
+
+        self.blocks = []
+        for route in self.segments:
+            start = 1 if self.blocks and self.blocks[-1] == route.blocks[0] else 0
+            self.blocks.extend(route.blocks[start:])
+
+        self.segment_starts = []
+        self.station_positions = []
+        position = 0.0
+        for segment in segments:
+            self.segment_starts.append(position)
+            position += float(segment['distance'])
+            self.station_positions.append(position)
+
+        self.underground = set(underground_blocks)
+        self.stop_door_sides = []
+        station_door_sides = station_door_sides or {}
+        for segment in segments:
+            data = line_data.getBlock(segment['to_block']) if line_data is not None else None
+            side = _STATION_SIDES.get(str(data.get('stationSide', '')).lower()) if data else None
+            self.stop_door_sides.append(STATION_DOOR_EXCEPTIONS.get(segment['to_block']) or side
+                                        or station_door_sides.get(segment['to_station'], 'both'))
+        if line_data is not None:
+            for block in self.blocks:
+                data = line_data.getBlock(block)
+                if data and 'UNDERGROUND' in str(data.get('infrastructure', '')).upper():
+                    self.underground.add(block)
+        self.underground = frozenset(self.underground)
+
+    def block_at(self, segment_index, distance_traveled):
+        """Block at distance_traveled meters into segment segment_index"""
+        return self.segments[segment_index].block_at(distance_traveled)
+
+    def next_station(self, segment_index):
+        """Station segment segment_index runs to"""
+        return self.track_info['segments'][segment_index]['to_station']
+
+    def door_side(self, segment_index):
+        """'left', 'right' or 'both' - doors to open at the end of segment segment_index"""
+        return self.stop_door_sides[segment_index]
+
+    def is_underground(self, block):
+        return block in self.underground
+
+    def route_position(self, segment_index, distance_traveled):
+        """Distance (m) along the whole route"""
+        return self.segment_starts[segment_index] + distance_traveled
+
+
+_indexes = {}
+
+
+def get_route_index(selected_line, track_info):
+    """
+    Shared RouteIndex for the segments of track_info on a line ('GREEN' or
+    'RED'), built on first use - every controller with the same track
+    information gets the same index
+    """
+    key = (selected_line, id(track_info))
+    index = _indexes.get(key)
+    if index is None or index.track_info is not track_info:
+        line_data = GreenLine() if selected_line == 'GREEN' else RedLine()
+        index = _indexes[key] = RouteIndex(track_info, line_data,
+                                           LINE_UNDERGROUND_BLOCKS.get(selected_line, ()),
+                                           LINE_STATION_DOOR_SIDES.get(selected_line))
+    return index
+
+
+KMH_TO_MPH = 0.621371
+
+# Route of a line's trains out of the yard: the blocks run over, in order
+# (yard block first), and the station blocks stopped at. A train that
+# finishes the last stop goes on from segment loop_start. Distances, stop
+# points, speed limits, names and door sides come from the line data.
+LINE_ROUTES = {
+    'GREEN': {
+        # 63→150, jump 150→28 and back to 1, then 13→65 (GLENBURY again)
+        'blocks': [63, 64] + list(range(65, 151)) + list(range(28, 0, -1)) + list(range(13, 66)),
+        'stops': [65, 73, 77, 88, 96, 105, 114, 123, 132, 141, 22, 16, 9, 2, 16, 22, 31, 39, 48, 57, 65],
+        'loop_start': 1,  # GLENBURY to DORMONT
+    },
+    'RED': {
+        # 8→1, jump 1→15, 16→66, jump 66→52 and back to 16, 15→1, then 1→16 through the yard switch
+        'blocks': ([8] + list(range(7, 0, -1)) + [15] + list(range(16, 67)) + list(range(52, 15, -1))
+                   + [15] + list(range(1, 17))),
+        'stops': [7, 16, 21, 25, 35, 45, 48, 60, 16, 7, 16],
+        'loop_start': 2,  # HERRON AVE to SWISSVILLE
+    },
+}
+
+# Station names the line data abbreviates or leaves out
+STATION_NAMES = {
+    'GREEN': {16: 'LLC PLAZA', 105: 'DORMONT', 114: 'GLENBURY', 123: 'OVERBROOK', 132: 'INGLEWOOD', 141: 'CENTRAL'},
+    'RED': {},
+}
+
+
+def station_name(block_data, names=None):
+    """Station at a line-data block ('STATION; NAME' or 'STATION: NAME' infrastructure)"""
+    block = block_data['blockNumber']
+    if names and block in names:
+        return names[block]
+    fields = [field.strip() for field in str(block_data.get('infrastructure', '')).replace(':', ';').split(';')]
+    if len(fields) < 2 or fields[0].upper() != 'STATION':
+        raise ValueError(f"Block {block} is not a station in the line data")
+    return fields[1]
+
+
+def build_track_information(route, line_data, names=None):
+    """
+    Station-to-station segments of a route, from the line data:
+
+    - distance: half the from-station block, every block in between and half
+      the to-station block (the train starts at the beginning of the yard
+      block, so the first segment counts all of it)
+    - station_block_half_length: half the to-station block
+    - speed_limit: lowest limit on the segment's blocks (mph)
+    """
+    blocks = route['blocks']
+    lengths = [float(line_data.getBlock(block)['blockLengthM']) for block in blocks]
+    segments = []
+    start = 0
+    from_station = 'YARD'
+    for stop in route['stops']:
+        end = blocks.index(stop, start + 1)
+        to_station = station_name(line_data.getBlock(stop), names)
+        distance = (lengths[start] if start == 0 else lengths[start] / 2.0) + sum(lengths[start + 1:end]) + lengths[end] / 2.0
+        speed_limit = min(block_speed_limit_kmh(line_data.getBlock(block)) for block in blocks[start:end + 1])
+        segments.append({
+            'from_station': from_station,
+            'to_station': to_station,
+            'distance': round(distance, 2),
+            'from_block': blocks[start],
+            'to_block': stop,
+            'blocks': blocks[start:end + 1],
+            'station_block_half_length': lengths[end] / 2.0,
+            'speed_limit': round(speed_limit * KMH_TO_MPH, 2)
+        })
+        start = end
+        from_station = to_station
+    return {'segments': segments, 'loop_start': route['loop_start']}
+
+
+# Each line's segment table, built once for every controller
+greenLineTrackInformation = build_track_information(LINE_ROUTES['GREEN'], GreenLine(), STATION_NAMES['GREEN'])
+redLineTrackInformation = build_track_information(LINE_ROUTES['RED'], RedLine(), STATION_NAMES['RED'])
+LINE_TRACK_INFORMATION = {'GREEN': greenLineTrackInformation, 'RED': redLineTrackInformation}
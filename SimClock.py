@@ -0,0 +1,97 @@
+import threading
+import time
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def parse_clock_time(value):
+    """
+    Seconds since midnight from a CTC TIME value ("HH:MM:SS", or already seconds)
+
+    Returns:
+        float, or None if value is not a time
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        hours, minutes, seconds = (int(part) for part in str(value).strip().split(":"))
+    except (TypeError, ValueError):
+        return None
+    return float(hours * 3600 + minutes * 60 + seconds)
+
+
+class SimClock:
+    """
+    Simulation time for the train controllers, in seconds.
+
+    The CTC broadcasts its clock as "HH:MM:SS" (TIME, about every 100 ms) and
+    the speed multiplier (MULT) when it changes. Between TIME messages the
+    clock runs on from the last one at multiplier x wall time, so controllers
+    get sub-second deltas from a clock that only shows whole seconds. A TIME
+    message for a different second re-anchors it. now() never goes backwards:
+    if the extrapolation ran ahead, the clock holds until the CTC catches up.
+
+    Before the first TIME message the clock runs from 0 at the multiplier.
+    """
+
+    def __init__(self, multiplier=1.0, wall=time.monotonic):
+        self.multiplier = float(multiplier)
+        self.synced = False  # True once a TIME message has anchored the clock
+        self._wall = wall
+        self._anchor_sim = 0.0
+        self._anchor_wall = wall()
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def _extrapolated(self):
+        return self._anchor_sim + (self._wall() - self._anchor_wall) * self.multiplier
+
+    def now(self):
+        """Current simulation time (seconds, monotonic)"""
+        with self._lock:
+            self._last = max(self._last, self._extrapolated())
+            return self._last
+
+    def set_time(self, value):
+        """
+        Re-anchor on a TIME message
+
+        Returns:
+            bool: False if value is not a time
+        """
+        seconds = parse_clock_time(value)
+        if seconds is None:
+            return False
+        with self._lock:
+            current = max(self._last, self._extrapolated())
+            # TIME is a time of day: keep counting days so midnight is not a jump back
+            day = (current // SECONDS_PER_DAY) * SECONDS_PER_DAY
+            reported = day + seconds
+            if reported < current - SECONDS_PER_DAY / 2:
+                reported += SECONDS_PER_DAY
+            # Same second as the extrapolation: keep its sub-second part
+            if self.synced and int(current) == int(reported):
+                return True
+            self._anchor_sim = reported
+            self._anchor_wall = self._wall()
+            self.synced = True
+        return True
+
+    def set_multiplier(self, multiplier):
+        """
+        Change the speed multiplier (MULT) from now on - any positive value
+
+        Returns:
+            bool: False if multiplier is not a positive number
+        """
+        try:
+            multiplier = float(multiplier)
+        except (TypeError, ValueError):
+            return False
+        if multiplier <= 0:
+            return False
+        with self._lock:
+            self._anchor_sim = max(self._last, self._extrapolated())
+            self._anchor_wall = self._wall()
+            self.multiplier = multiplier
+        return True
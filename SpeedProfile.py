@@ -0,0 +1,144 @@
+from GreenLineData import GreenLine
+from RedLineData import RedLine
+
+GRAVITY = 9.8  # m/s² (same value as the Train Model grade force)
+KMH_TO_MS = 1 / 3.6
+MS_TO_MPH = 2.23694
+
+SERVICE_BRAKE_DECEL = 1.2  # m/s² - Train Model service brake
+BRAKE_MARGIN = 0.8  # Plan on this fraction of the brake, the rest covers controller lag
+MIN_DECEL = 0.3  # m/s² - floor for steep downgrades
+RESOLUTION = 1.0  # meters per table entry
+
+
+def segment_blocks(segment):
+    """
+    Blocks a station-to-station segment runs over, in order
+
+    Uses the segment's 'blocks' list when it has one, otherwise every block
+    number from from_block to to_block (either direction).
+    """
+    if segment.get('blocks'):
+        return list(segment['blocks'])
+    from_block, to_block = segment['from_block'], segment['to_block']
+    step = 1 if to_block >= from_block else -1
+    return list(range(from_block, to_block + step, step))
+
+
+def block_speed_limit_kmh(block_data):
+    """Speed limit of a line-data block (the Red line data names it speedLimitKmh)"""
+    if 'speedLimit' in block_data:
+        return float(block_data['speedLimit'])
+    return float(block_data['speedLimitKmh'])
+
+
+class SegmentProfile:
+    """
+    Distance-indexed speed envelope for one segment: the highest speed (m/s)
+    from which the train can still obey every speed limit ahead and stop at
+    the station with the service brake, one entry per RESOLUTION meters.
+    """
+
+    def __init__(self, speeds, distance):
+        self.speeds = speeds
+        self.distance = distance
+
+    def allowed_speed(self, distance_traveled):
+        """Envelope speed (m/s) at distance_traveled meters into the segment"""
+        index = int(distance_traveled / RESOLUTION)
+        if index < 0:
+            index = 0
+        elif index >= len(self.speeds):
+            return 0.0
+        return self.speeds[index]
+
+
+def build_segment_profile(segment, line_data, service_brake_decel=SERVICE_BRAKE_DECEL):
+    """
+    Precompute the envelope of one segment from the line data of its blocks
+
+    The block lengths are laid out between the two station stop points (the
+    middle of each station block) and scaled to the segment's own distance.
+    Blocks missing from the line data use the segment speed limit on level
+    track. Braking is planned at BRAKE_MARGIN x service_brake_decel, helped
+    by upgrades and reduced by downgrades (mass cancels out of both).
+    """
+    distance = float(segment['distance'])
+    cells = max(1, int(distance / RESOLUTION) + 1)
+    default_limit = segment['speed_limit'] / MS_TO_MPH if segment.get('speed_limit') else float('inf')
+
+    # Block spans from the from-station stop point to the to-station stop point
+    spans = []
+    blocks = segment_blocks(segment)
+    for index, block in enumerate(blocks):
+        data = line_data.getBlock(block) if line_data is not None else None
+        length = float(data['blockLengthM']) if data else 0.0
+        if index == 0 or index == len(blocks) - 1:
+            length /= 2.0
+        limit = block_speed_limit_kmh(data) * KMH_TO_MS if data else default_limit
+        grade = float(data['blockGradePercent']) if data else 0.0
+        spans.append((length, limit, grade))
+    total = sum(length for length, _, _ in spans)
+
+    limits = [default_limit] * cells
+    decels = [max(MIN_DECEL, BRAKE_MARGIN * service_brake_decel)] * cells
+    if total > 0:
+        # A cell on a block boundary takes the lower limit and the weaker brake of the two
+        covered = [False] * cells
+        scale = distance / total
+        start = 0.0
+        for length, limit, grade in spans:
+            end = start + length * scale
+            decel = max(MIN_DECEL, BRAKE_MARGIN * service_brake_decel + GRAVITY * grade / 100.0)
+            for cell in range(int(start / RESOLUTION), min(cells, int(end / RESOLUTION) + 1)):
+                if covered[cell]:
+                    limits[cell] = min(limits[cell], limit)
+                    decels[cell] = min(decels[cell], decel)
+                else:
+                    limits[cell], decels[cell], covered[cell] = limit, decel, True
+            start = end
+
+    # Backward pass from a stand at the stop point: v² = v_next² + 2·a·dx
+    speeds = [0.0] * cells
+    next_speed = 0.0
+    for cell in range(cells - 1, -1, -1):
+        dx = distance - cell * RESOLUTION if cell == cells - 1 else RESOLUTION
+        reachable = (next_speed * next_speed + 2.0 * decels[cell] * dx) ** 0.5
+        next_speed = speeds[cell] = min(limits[cell], reachable)
+    return SegmentProfile(speeds, distance)
+
+
+class SpeedProfile:
+    """
+    Braking-curve tables for automatic train operation on one line, one
+    SegmentProfile per segment of the line's station-to-station table
+    (the 'segments' of a controller's track information).
+
+    The tables are built once; lookups are a list index per tick.
+    """
+
+    def __init__(self, track_info, line_data, service_brake_decel=SERVICE_BRAKE_DECEL):
+        self.track_info = track_info
+        self.segments = [build_segment_profile(segment, line_data, service_brake_decel)
+                         for segment in track_info['segments']]
+
+    def allowed_speed(self, segment_index, distance_traveled):
+        """Envelope speed (m/s) at distance_traveled meters into segment segment_index"""
+        if segment_index >= len(self.segments):
+            return 0.0
+        return self.segments[segment_index].allowed_speed(distance_traveled)
+
+
+_profiles = {}
+
+
+def get_speed_profile(selected_line, track_info):
+    """
+    Shared SpeedProfile for the segments of track_info on a line ('GREEN' or
+    'RED'), built on first use and rebuilt if the line gets new track_info
+    """
+    profile = _profiles.get(selected_line)
+    if profile is None or profile.track_info is not track_info:
+        line_data = GreenLine() if selected_line == 'GREEN' else RedLine()
+        profile = _profiles[selected_line] = SpeedProfile(track_info, line_data)
+    return profile
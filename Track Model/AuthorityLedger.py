@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+
+# Authority is used up once less than this is left (m) - absorbs float error
+AUTHORITY_EPSILON = 1e-3
+
+# One stop-point event: the train used up its authority at the end of block
+AuthorityEvent = namedtuple("AuthorityEvent", ["kind", "train_id", "block", "time"])
+
+
+class AuthorityLedger:
+    # Remaining authority per train, in metres.
+
+    """
+    The Wayside grants authority in blocks. When a grant arrives it is turned
+    into metres once (rest of the current block plus every block on the
+    predicted route) and from then on the Track Model only subtracts the
+    distance each train covers. Checking how far a train may still go is a
+    dict lookup, and a new grant always starts from where the train is.
+
+    Attributes:
+        entries: {train_id: [limit_m, travelled_m, stop_block, blocks, stop_reported]}
+            limit_m is float("inf") for an unlimited grant
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def grant(self, train_id, metres, stop_block=None, blocks=None):
+        """
+        Replace a train's authority.
+
+        Args:
+            metres: Distance from the train's current position to its stop point
+            stop_block: Block whose end is the stop point (None = unknown)
+            blocks: The grant as the Wayside sent it (blocks)
+        """
+        self.entries[train_id] = [float(metres), 0.0, stop_block, blocks, False]
+
+    def remaining(self, train_id):
+        """Metres of authority left (inf if the train has no grant)."""
+        entry = self.entries.get(train_id)
+        if entry is None:
+            return float("inf")
+        return max(entry[0] - entry[1], 0.0)
+
+    def stop_block(self, train_id):
+        """Block the train will stop at the end of (None if unknown / unlimited)."""
+        entry = self.entries.get(train_id)
+        return entry[2] if entry is not None else None
+
+    def advance(self, train_id, metres, block=None, time=None):
+        """
+        Use up authority for distance travelled.
+
+        Returns:
+            AuthorityEvent("stop_point") the first time the authority runs out, else None
+        """
+        entry = self.entries.get(train_id)
+        if entry is None:
+            return None
+        entry[1] += metres
+        if entry[4] or entry[0] - entry[1] > AUTHORITY_EPSILON:
+            return None
+        entry[4] = True
+        return AuthorityEvent("stop_point", train_id, entry[2] if block is None else block, time)
+
+    def snapshot(self):
+        """{train_id: remaining metres} for every train with a grant."""
+        return {train_id: self.remaining(train_id) for train_id in self.entries}
+
+    def __contains__(self, train_id):
+        return train_id in self.entries
+
+    def forget(self, train_id):
+        """Drop a train that left service."""
+        self.entries.pop(train_id, None)
@@ -0,0 +1,151 @@
+import heapq
+
+
+# Beacon blocks on each line and the command the Train Model knows them by
+BEACON_BLOCKS = {
+    "Red Line": {27: "Beacon1", 38: "Beacon2"},
+}
+
+SWITCH_STATES = ("normal", "reverse")
+
+
+def station_side(infrastructure):
+    """Platform side from an infrastructure cell ("" when the layout does not say)."""
+    text = str(infrastructure or "").upper()
+    for side in ("BOTH", "LEFT", "RIGHT"):
+        if side in text:
+            return side.capitalize()
+    return ""
+
+
+class BeaconTable:
+    # Precomputed beacon payloads for every (line, block, switch state).
+
+    """
+    Each beacon block sits on a switch. For both switch positions the payload
+    (branch taken, next station, distance to it, platform side) is computed
+    once from the track graph when the line is loaded. A train entering a
+    beacon block, or a switch change, is then a single dict lookup.
+
+    Attributes:
+        entries: {(line, block, state): payload dict}
+        switch_states: {(line, block): "normal" / "reverse"} as last reported
+    """
+
+    def __init__(self, beacon_blocks=None):
+        self.beacon_blocks = BEACON_BLOCKS if beacon_blocks is None else beacon_blocks
+        self.entries = {}
+        self.switch_states = {}
+
+    # -------------------------------------------------------------------------
+    # BUILD
+    # -------------------------------------------------------------------------
+    def build_line(self, line, blocks, switch_routing, station_location, infrastructure_data=None):
+        """
+        Precompute every beacon payload for one line.
+
+        Args:
+            line: Line name ("Red Line")
+            blocks: Block objects (block_number, length)
+            switch_routing: {block: {"normal": next, "reverse": next}}
+            station_location: [(block_number, station_name)]
+            infrastructure_data: {block_number: infrastructure text}
+        """
+        for key in [k for k in self.entries if k[0] == line]:
+            del self.entries[key]
+        beacons = self.beacon_blocks.get(line, {})
+        if not beacons:
+            return 0
+
+        lengths = {b.block_number: float(getattr(b, "length", 0.0) or 0.0) for b in blocks}
+        graph = self._build_graph(lengths, switch_routing)
+        stations = {int(b): name for b, name in station_location}
+        infrastructure_data = infrastructure_data or {}
+
+        for block_num, command in beacons.items():
+            routes = switch_routing.get(block_num, {})
+            for state in SWITCH_STATES:
+                branch = routes.get(state)
+                station_block, distance = self._nearest_station(graph, lengths, stations, branch, block_num)
+                self.entries[(line, block_num, state)] = {
+                    "command": command,
+                    "value": state == "reverse",
+                    "block": block_num,
+                    "branch": branch,
+                    "next_station": stations.get(station_block, ""),
+                    "station_block": station_block,
+                    "station_distance": distance,
+                    "station_side": station_side(infrastructure_data.get(station_block)),
+                }
+        return len(beacons)
+
+    @staticmethod
+    def _build_graph(lengths, switch_routing):
+        """Undirected block graph: consecutive blocks plus every switch leg."""
+        graph = {b: set() for b in lengths}
+        for b in lengths:
+            if b + 1 in lengths:
+                graph[b].add(b + 1)
+                graph[b + 1].add(b)
+        for b, routes in switch_routing.items():
+            for target in routes.values():
+                if b in graph and target in graph and target != b:
+                    graph[b].add(target)
+                    graph[target].add(b)
+        return graph
+
+    @staticmethod
+    def _nearest_station(graph, lengths, stations, start, beacon_block):
+        """
+        Closest station reachable from start without going back through the beacon block.
+
+        Returns:
+            (station block or None, metres from the end of the beacon block to the station)
+        """
+        if start is None or start not in graph:
+            return None, None
+        queue = [(0.0, start)]
+        seen = {beacon_block}
+        while queue:
+            distance, block = heapq.heappop(queue)
+            if block in seen:
+                continue
+            seen.add(block)
+            if block in stations:
+                return block, round(distance, 1)
+            for neighbour in graph[block]:
+                if neighbour not in seen:
+                    heapq.heappush(queue, (distance + lengths.get(block, 0.0), neighbour))
+        return None, None
+
+    # -------------------------------------------------------------------------
+    # LOOKUP
+    # -------------------------------------------------------------------------
+    def is_beacon(self, line, block_num):
+        """True if block_num carries a beacon on line."""
+        return (line, block_num, "normal") in self.entries
+
+    def beacons_on(self, line):
+        """Beacon block numbers on line."""
+        return sorted(self.beacon_blocks.get(line, {}))
+
+    def lookup(self, line, block_num):
+        """Payload for the beacon in block_num at its current switch state (None = no beacon)."""
+        state = self.switch_states.get((line, block_num), "normal")
+        return self.entries.get((line, block_num, state))
+
+    def set_switch(self, line, block_num, state):
+        """
+        Record a switch position.
+
+        Returns:
+            The beacon payload if block_num is a beacon whose value changed
+            (or was never reported before), else None
+        """
+        state = "reverse" if state in ("reverse", True, 1, "1") else "normal"
+        key = (line, block_num)
+        previous = self.switch_states.get(key)
+        self.switch_states[key] = state
+        if previous == state:
+            return None
+        return self.entries.get((line, block_num, state))
@@ -1,9 +1,3 @@
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from tkinter import ttk
-
-
 class FileUploadManager:
     # Manages file upload operations for track data including Excel, CSV, text, and image files.
     
@@ -92,8 +86,8 @@ class FileUploadManager:
         :param sheet_name: Name of the Excel sheet to load (default: "Green Line", can also be "Red Line")
         """
         import os
-        import pandas as pd
         from Track_Blocks import Block
+        from TrackLayout import load_layout
 
         # Look for the Excel file in the same directory as this script
         main_dir = os.path.dirname(os.path.dirname(__file__))
@@ -104,83 +98,61 @@ class FileUploadManager:
             return False
 
         try:
-            # Load Excel sheet (specified sheet name)
-            df = pd.read_excel(track_file, sheet_name=sheet_name)
-            print(f"[FileUploadManager] 📊 Loaded '{sheet_name}' sheet with columns: {list(df.columns)}")
-            print(f"[FileUploadManager] 📊 Loaded {len(df)} blocks from '{sheet_name}'")
-
-            # --- Verify required columns ---
-            required_cols = [
-                "Block Number",
-                "Block Length (m)",
-                "Block Grade (%)",
-                "ELEVATION (M)",
-                "Speed Limit (Km/Hr)"
-            ]
-            for col in required_cols:
-                if col not in df.columns:
-                    raise ValueError(f"Missing required column: {col}")
-
-            # --- Store Infrastructure info (if column exists) ---
-            if "Infrastructure" in df.columns:
-                self.data_manager.infrastructure_data = {
-                    int(row["Block Number"]): str(row["Infrastructure"])
-                    for _, row in df.iterrows()
-                    if not pd.isna(row["Infrastructure"])
-                }
-                print(f"[FileUploadManager] 🧱 Infrastructure data loaded for "
-                    f"{len(self.data_manager.infrastructure_data)} blocks.")
-            else:
-                self.data_manager.infrastructure_data = {}
-                print("[FileUploadManager] ⚠️ No 'Infrastructure' column found in Excel.")
+            # Compiled layout is reused until Track Data.xlsx changes
+            layout = load_layout(track_file)
+            if sheet_name not in layout.lines:
+                raise ValueError(f"Sheet '{sheet_name}' not found in compiled layout")
+            rows = layout.rows(sheet_name)
+            print(f"[FileUploadManager] 📊 Loaded {len(rows)} blocks from '{sheet_name}'")
+
+            # --- Store Infrastructure info ---
+            self.data_manager.infrastructure_data = {
+                row["block_number"]: row["infrastructure"]
+                for row in rows
+                if row["infrastructure"]
+            }
+            print(f"[FileUploadManager] 🧱 Infrastructure data loaded for "
+                f"{len(self.data_manager.infrastructure_data)} blocks.")
 
             # --- Extract station locations from Infrastructure column ---
             self.data_manager.station_location = []  # Clear existing stations
-            
-            if "Infrastructure" in df.columns:
-                for _, row in df.iterrows():
-                    try:
-                        block_num = int(row["Block Number"])
-                        infrastructure = str(row["Infrastructure"])
-                        
-                        # Skip NaN values
-                        if pd.isna(row["Infrastructure"]) or infrastructure == 'nan':
-                            continue
-                        
-                        print(f"[DEBUG] Block {block_num} infrastructure: '{infrastructure}'")
-                        
-                        # Split by newlines to handle multi-line cells
-                        lines = infrastructure.split('\n')
-                        
-                        for line in lines:
-                            line_upper = line.strip().upper()
-                            
-                            # Check if this line contains "STATION"
-                            if "STATION" in line_upper:
-                                station_name = self._extract_station_name_from_line(line.strip(), block_num)
-                                
-                                # Avoid duplicate stations for the same block
-                                if not any(b == block_num for b, _ in self.data_manager.station_location):
-                                    self.data_manager.station_location.append((block_num, station_name))
-                                    print(f"[FileUploadManager] 🚉 Found station '{station_name}' at block {block_num}")
-                                break  # Only take the first station per block
-                    
-                    except Exception as e:
-                        print(f"[FileUploadManager] ⚠️ Error processing block: {e}")
-                        continue
-            
+
+            for block_num, infrastructure in self.data_manager.infrastructure_data.items():
+                try:
+                    # print(f"[DEBUG] Block {block_num} infrastructure: '{infrastructure}'")
+
+                    # Split by newlines to handle multi-line cells
+                    lines = infrastructure.split('\n')
+
+                    for line in lines:
+                        line_upper = line.strip().upper()
+
+                        # Check if this line contains "STATION"
+                        if "STATION" in line_upper:
+                            station_name = self._extract_station_name_from_line(line.strip(), block_num)
+
+                            # Avoid duplicate stations for the same block
+                            if not any(b == block_num for b, _ in self.data_manager.station_location):
+                                self.data_manager.station_location.append((block_num, station_name))
+                                print(f"[FileUploadManager] 🚉 Found station '{station_name}' at block {block_num}")
+                            break  # Only take the first station per block
+
+                except Exception as e:
+                    print(f"[FileUploadManager] ⚠️ Error processing block: {e}")
+                    continue
+
             print(f"[FileUploadManager] 📍 Loaded {len(self.data_manager.station_location)} stations")
 
             # --- Load block data from the specified sheet ---
             self.data_manager.blocks = []
-            for _, row in df.iterrows():
+            for row in rows:
                 try:
                     block = Block(
-                        block_number=int(row["Block Number"]),
-                        length=float(row["Block Length (m)"]),
-                        grade=float(row["Block Grade (%)"]),
-                        elevation=float(row["ELEVATION (M)"]),
-                        speed_limit=float(row["Speed Limit (Km/Hr)"])
+                        block_number=row["block_number"],
+                        length=row["length"],
+                        grade=row["grade"],
+                        elevation=row["elevation"],
+                        speed_limit=row["speed_limit"]
                     )
 
                     # Attach infrastructure info if available
@@ -308,6 +280,8 @@ class FileUploadManager:
     def handle_text_upload(self, filename):
         # Processes text or CSV file uploads and updates track data.
         """Process text file for track data – supports CSV or delimited formats."""
+        import pandas as pd
+
         try:
             # Try CSV first
             try:
@@ -1,4 +1,4 @@
-import random
+import numpy as np
 
 class HeaterSystemManager:
     # Manages all track heater operations including temperature control and automatic heater management.
@@ -8,17 +8,24 @@ class HeaterSystemManager:
         data_manager: Reference to TrackDataManager containing track blocks
         target_temperature: Temperature heaters try to achieve (default 68°F)
         temperature_threshold: Degrees below target before heater activates (default 3°F)
-        block_temperatures: Dictionary mapping block numbers to current temperatures
+        time_constant: Thermal time constant of a block in sim seconds
+        temperatures / heater_on / heater_working / target_temperatures:
+            Per-block state as NumPy arrays (same order as data_manager.blocks)
+        block_temperatures: Dictionary view mapping block numbers to current temperatures
     """
     
-    def __init__(self, data_manager):
-        # Initializes the Heater System Manager with temperature settings and block temperature tracking.
+    def __init__(self, data_manager, time_constant=25.0, seed=None, noise_std=0.2):
+        # Initializes the Heater System Manager with temperature settings and block temperature arrays.
         """
         Initialize the Heater System Manager.
 
         Args:
             data_manager: Reference to TrackDataManager containing all blocks.
                          Can also accept a UI object - will extract manager attribute.
+            time_constant: Seconds (sim time) for a block to cover ~63% of the gap
+                           to its heated / ambient temperature.
+            seed: Seed for the temperature noise RNG (None = random)
+            noise_std: Std-dev of the temperature noise per sqrt(second), °F
         """
         # Handle if UI object is passed instead of data_manager
         if hasattr(data_manager, 'manager'):
@@ -30,26 +37,66 @@ class HeaterSystemManager:
         # Target temperature is what heaters try to ACHIEVE (comfort level for stations)
         self.target_temperature = 68.0  # Default target temp in Fahrenheit (what heaters maintain)
         self.temperature_threshold = 3.0  # Turn on heater if X degrees below target
+        self.max_overshoot = 10.0  # Heaters never push a block past target + 10°F
+        
+        # Thermal model settings
+        self.time_constant = float(time_constant)
+        self.noise_std = float(noise_std)
+        self.rng = np.random.default_rng(seed)
+        self.last_sim_time = None
         
         # Environmental temp is the OUTSIDE temperature (cold weather)
         # Blocks start at environmental temp and heaters warm them up to target temp
         
-        # Initialize individual block temperatures (start at environmental temp or default)
-        self.block_temperatures = {}
+        # Per-block state arrays (rebuilt whenever the block list changes)
+        self._blocks_ref = None
+        self._index = {}
+        self.block_numbers = np.zeros(0, dtype=int)
+        self.temperatures = np.zeros(0)
+        self.heater_on = np.zeros(0, dtype=bool)
+        self.heater_working = np.zeros(0, dtype=bool)
+        self.target_temperatures = np.zeros(0)
         self.initialize_all_temperatures()
 
+    def _env_temp(self):
+        # Environmental temperature with the usual 23°F fallback.
+        return self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
+
+    def _ensure_arrays(self):
+        # Rebuilds the state arrays if the block list was replaced (line reload / file upload).
+        blocks = getattr(self.data_manager, 'blocks', None) or []
+        if blocks is self._blocks_ref and len(blocks) == len(self.block_numbers):
+            return
+        
+        old_temps = self.block_temperatures
+        env_temp = self._env_temp()
+        
+        self._blocks_ref = blocks
+        self.block_numbers = np.array([block.block_number for block in blocks], dtype=int)
+        self._index = {int(num): i for i, num in enumerate(self.block_numbers)}
+        self.temperatures = np.array([old_temps.get(int(num), env_temp) for num in self.block_numbers], dtype=float)
+        self.target_temperatures = np.full(len(blocks), self.target_temperature, dtype=float)
+        self.sync_from_blocks()
+
+    def sync_from_blocks(self):
+        # Reads heater on/working bits from the blocks into the arrays.
+        """Re-read every block's track_heater bits into the heater arrays."""
+        blocks = self._blocks_ref or []
+        self.heater_on = np.array([self.is_heater_on(block) for block in blocks], dtype=bool)
+        self.heater_working = np.array([self.is_heater_working(block) for block in blocks], dtype=bool)
+
+    @property
+    def block_temperatures(self):
+        """Current temperature of each block as {block_number: temp} (rounded to 0.1°F)."""
+        return dict(zip(self.block_numbers.tolist(), np.round(self.temperatures, 1).tolist()))
+
     def initialize_all_temperatures(self):
         # Initializes or reinitializes all block temperatures to environmental temperature.
         """Initialize or reinitialize all block temperatures"""
-        # Safe initialization - check if blocks exist
-        if hasattr(self.data_manager, 'blocks') and self.data_manager.blocks:
-            env_temp = self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
-            for block in self.data_manager.blocks:
-                # Only initialize if not already set, or reinitialize all
-                self.block_temperatures[block.block_number] = env_temp
-        #     print(f"🌡️ Initialized {len(self.block_temperatures)} block temperatures to {env_temp}°F")
-        # else:
-        #     print("⚠️ Warning: No blocks found during temperature initialization")
+        self._blocks_ref = None
+        self._ensure_arrays()
+        self.temperatures[:] = self._env_temp()
+        #     print(f"🌡️ Initialized {len(self.temperatures)} block temperatures to {env_temp}°F")
 
     # -------------------------------------------------------------------------
     # HEATER STATE CHECKS
@@ -79,6 +126,13 @@ class HeaterSystemManager:
             return False  # Can't turn on a non-working heater
         
         block.track_heater = [1 if is_on else 0, 1 if is_working else 0]
+        
+        # Keep the arrays in step with the block
+        self._ensure_arrays()
+        i = self._index.get(block.block_number)
+        if i is not None:
+            self.heater_on[i] = bool(is_on)
+            self.heater_working[i] = bool(is_working)
         # print(f"🔧 Block {block.block_number} heater: {'ON' if is_on else 'OFF'}, {'WORKING' if is_working else 'BROKEN'}")
         return True
 
@@ -115,6 +169,7 @@ class HeaterSystemManager:
         # Sets the target temperature that heaters will try to maintain.
         """Set the target temperature for the system"""
         self.target_temperature = temp
+        self.target_temperatures[:] = temp
         # print(f"🌡️ Target temperature set to {temp}°F")
 
     def set_environmental_temperature(self, temp):
@@ -122,60 +177,103 @@ class HeaterSystemManager:
         """Update the environmental temperature in data manager and reinitialize block temps"""
         self.data_manager.environmental_temp = temp
         # Reinitialize all block temperatures to the new environmental temp
-        for block_num in self.block_temperatures:
-            self.block_temperatures[block_num] = temp
+        self._ensure_arrays()
+        self.temperatures[:] = temp
         # print(f"🌡️ Environmental temperature set to {temp}°F - All blocks reset to {temp}°F")
         
-        # Immediately trigger heater control based on new temperature
-        self.update_all_temperatures()
+        # Immediately trigger heater control based on new temperature (no time passes)
+        self.step(dt=0.0)
 
     def get_block_temperature(self, block_num):
         # Retrieves the current temperature of a specific block.
         """Get the current temperature of a specific block"""
-        # If block not in dict, initialize it first
-        if block_num not in self.block_temperatures:
-            env_temp = self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
-            self.block_temperatures[block_num] = env_temp
-        return self.block_temperatures[block_num]
+        self._ensure_arrays()
+        i = self._index.get(block_num)
+        if i is None:
+            return self._env_temp()
+        return round(float(self.temperatures[i]), 1)
 
-    def update_block_temperature(self, block):
-        # Updates a single blocks temperature based on heater state and environmental conditions.
+    def step(self, dt=None, sim_time=None):
+        # Advances the thermal model for every block at once.
         """
-        Update a single block's temperature based on heater state.
-        Called during the temperature control cycle.
+        Run heater control and advance every block's temperature in one vectorized step.
+
+        Heaters switch on below (target - threshold) and off at target. Each block then
+        relaxes exponentially toward target + max_overshoot (heating) or the environmental
+        temperature (not heating) with the configured time constant.
+
+        Args:
+            dt: Sim seconds to advance (used when sim_time is not given, default 1.0)
+            sim_time: Current sim time in seconds - dt is taken from the previous call
+
+        Returns:
+            list: Block numbers whose heater turned on or off during this step
         """
-        block_num = block.block_number
+        self._ensure_arrays()
+        if sim_time is not None:
+            dt = 0.0 if self.last_sim_time is None else max(sim_time - self.last_sim_time, 0.0)
+            self.last_sim_time = sim_time
+        elif dt is None:
+            dt = 1.0
         
-        # Ensure block is in temperature dict
-        if block_num not in self.block_temperatures:
-            env_temp = self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
-            self.block_temperatures[block_num] = env_temp
-            
-        current_temp = self.block_temperatures[block_num]
-        environmental_temp = self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
+        if len(self.block_numbers) == 0:
+            return []
+        
+        env_temp = self._env_temp()
+        temps = self.temperatures
+        working = self.heater_working
         
-        if self.is_heater_on(block) and self.is_heater_working(block):
-            # Heater is on and working - heat up (2-3 degrees per refresh)
-            heat_increase = random.uniform(2.0, 3.0)
-            new_temp = current_temp + heat_increase
+        # --- Automatic heater control (hysteresis) ---
+        turn_on = working & ~self.heater_on & (temps < self.target_temperatures - self.temperature_threshold)
+        turn_off = working & self.heater_on & (temps >= self.target_temperatures)
+        flipped = turn_on | turn_off
+        self.heater_on = (self.heater_on | turn_on) & ~turn_off
+        
+        # --- Thermal step (first-order lag toward the equilibrium temperature) ---
+        if dt > 0:
+            heating = self.heater_on & working
+            max_temp = self.target_temperatures + self.max_overshoot
+            equilibrium = np.where(heating, max_temp, env_temp)
+            decay = np.exp(-dt / self.time_constant)
+            new_temps = equilibrium + (temps - equilibrium) * decay
+            new_temps += self.rng.normal(0.0, self.noise_std * np.sqrt(dt), len(new_temps))
             
-            # Don't exceed a reasonable maximum (target + 10 degrees)
-            max_temp = self.target_temperature + 10.0
+            # Heated blocks never pass the max, cooling blocks never drop below ambient
+            new_temps = np.where(heating, np.minimum(new_temps, max_temp), new_temps)
+            new_temps = np.where(~heating & (temps >= env_temp), np.maximum(new_temps, env_temp), new_temps)
+            self.temperatures = new_temps
+        
+        # --- Write flipped heater bits back to the blocks ---
+        flipped_idx = np.flatnonzero(flipped)
+        for i in flipped_idx:
+            self._blocks_ref[i].track_heater = [int(self.heater_on[i]), int(working[i])]
+            # print(f"🔥 AUTO: Block {self.block_numbers[i]} heater turned {'ON' if self.heater_on[i] else 'OFF'}")
+        return self.block_numbers[flipped_idx].tolist()
+
+    def update_block_temperature(self, block):
+        # Updates a single blocks temperature based on heater state and environmental conditions.
+        """
+        Update a single block's temperature based on heater state (one second of sim time).
+        Kept for callers that work block by block - update_all_temperatures() does all blocks at once.
+        """
+        self._ensure_arrays()
+        i = self._index.get(block.block_number)
+        if i is None:
+            return self._env_temp()
+        
+        env_temp = self._env_temp()
+        current_temp = self.temperatures[i]
+        heating = self.heater_on[i] and self.heater_working[i]
+        max_temp = self.target_temperatures[i] + self.max_overshoot
+        equilibrium = max_temp if heating else env_temp
+        new_temp = equilibrium + (current_temp - equilibrium) * np.exp(-1.0 / self.time_constant)
+        if heating:
             new_temp = min(new_temp, max_temp)
-            
-        else:
-            # Heater is off or broken - cool down toward environmental temp (1-2 degrees per refresh)
-            if current_temp > environmental_temp:
-                cool_decrease = random.uniform(1.0, 2.0)
-                new_temp = current_temp - cool_decrease
-                # Don't go below environmental temp
-                new_temp = max(new_temp, environmental_temp)
-            else:
-                # Already at or below environmental temp
-                new_temp = current_temp
+        elif current_temp >= env_temp:
+            new_temp = max(new_temp, env_temp)
         
-        self.block_temperatures[block_num] = round(new_temp, 1)
-        return new_temp
+        self.temperatures[i] = new_temp
+        return float(new_temp)
 
     def automatic_heater_control(self, block):
         # Automatically controls heater based on current temperature versus target temperature.
@@ -183,49 +281,38 @@ class HeaterSystemManager:
         Automatically control heater based on temperature for a single block.
         Returns True if state changed, False otherwise.
         """
-        block_num = block.block_number
-        
-        # Ensure temperature is initialized
-        if block_num not in self.block_temperatures:
-            env_temp = self.data_manager.environmental_temp if self.data_manager.environmental_temp else 23.0
-            self.block_temperatures[block_num] = env_temp
-            
-        current_temp = self.block_temperatures[block_num]
+        self._ensure_arrays()
+        i = self._index.get(block.block_number)
         
         # Only control if heater is working
-        if not self.is_heater_working(block):
+        if i is None or not self.is_heater_working(block):
             return False
         
-        state_changed = False
+        current_temp = self.temperatures[i]
+        target = self.target_temperatures[i]
         
         # Turn on if temperature is below target - threshold
-        if current_temp < (self.target_temperature - self.temperature_threshold):
-            if not self.is_heater_on(block):
-                self.set_heater_state(block, True, True)
-                state_changed = True
-                # print(f"🔥 AUTO: Block {block_num} heater turned ON (temp: {current_temp:.1f}°F < target: {self.target_temperature}°F)")
+        if current_temp < (target - self.temperature_threshold) and not self.is_heater_on(block):
+            self.set_heater_state(block, True, True)
+            return True
         
         # Turn off if temperature reaches or exceeds target
-        elif current_temp >= self.target_temperature:
-            if self.is_heater_on(block):
-                self.set_heater_state(block, False, True)
-                state_changed = True
-                # print(f"❄️ AUTO: Block {block_num} heater turned OFF (temp: {current_temp:.1f}°F >= target: {self.target_temperature}°F)")
+        if current_temp >= target and self.is_heater_on(block):
+            self.set_heater_state(block, False, True)
+            return True
         
-        return state_changed
+        return False
 
-    def update_all_temperatures(self):
+    def update_all_temperatures(self, sim_time=None, dt=None):
         # Updates temperatures for all blocks and manages heaters automatically.
         """
         Update temperatures for all blocks and manage heaters automatically.
-        Call this method periodically (e.g., every second or on UI refresh).
+        Call this method periodically, passing the current sim time.
+
+        Returns:
+            list: Block numbers whose heater flipped on/off
         """
-        for block in self.data_manager.blocks:
-            # First, automatically control the heater
-            self.automatic_heater_control(block)
-            
-            # Then, update the temperature based on current heater state
-            self.update_block_temperature(block)
+        return self.step(dt=dt, sim_time=sim_time)
 
     def get_temperature_status(self):
         # Returns a summary of all block temperatures and heater states.
@@ -235,10 +322,12 @@ class HeaterSystemManager:
         Returns:
             dict: {block_number: {'temp': float, 'heater_on': bool, 'heater_working': bool}}
         """
+        self._ensure_arrays()
+        temps = self.block_temperatures
         status = {}
         for block in self.data_manager.blocks:
             status[block.block_number] = {
-                'temperature': self.block_temperatures[block.block_number],
+                'temperature': temps.get(block.block_number, self._env_temp()),
                 'heater_on': self.is_heater_on(block),
                 'heater_working': self.is_heater_working(block),
                 'target_temp': self.target_temperature
@@ -253,6 +342,8 @@ class HeaterSystemManager:
         """Turn off and fix all heaters in all blocks."""
         for block in self.data_manager.blocks:
             block.track_heater = [0, 1]  # OFF but WORKING
+        self._ensure_arrays()
+        self.sync_from_blocks()
         # print("♻️ All heaters reset to OFF and functional.")
 
     def break_all_heaters(self):
@@ -260,14 +351,16 @@ class HeaterSystemManager:
         """Mark all heaters as broken."""
         for block in self.data_manager.blocks:
             block.track_heater = [0, 0]  # OFF and BROKEN
+        self._ensure_arrays()
+        self.sync_from_blocks()
         # print("💣 All heaters marked as broken.")
 
     def reset_all_temperatures(self):
         # Resets all block temperatures to environmental temperature.
         """Reset all block temperatures to environmental temperature"""
         env_temp = self.data_manager.environmental_temp or 50.0
-        for block_num in self.block_temperatures:
-            self.block_temperatures[block_num] = env_temp
+        self._ensure_arrays()
+        self.temperatures[:] = env_temp
         # print(f"🌡️ All block temperatures reset to {env_temp}°F")
 
     def get_heater_status_summary(self) -> dict:
@@ -299,7 +392,7 @@ class HeaterSystemManager:
         """
         for block_num, label in ui_labels.items():
             block = self.data_manager.blocks[block_num - 1]
-            current_temp = self.block_temperatures[block_num]
+            current_temp = self.get_block_temperature(block_num)
             
             state = "ON 🔥" if self.is_heater_on(block) else "OFF ❄️"
             working = "OK ✅" if self.is_heater_working(block) else "BROKEN ⚠️"
@@ -315,7 +408,7 @@ class HeaterSystemManager:
             temp_labels (dict): Mapping of block numbers to Tkinter Label widgets for temperature.
         """
         for block_num, label in temp_labels.items():
-            current_temp = self.block_temperatures[block_num]
+            current_temp = self.get_block_temperature(block_num)
             target = self.target_temperature
             
             # Color code based on temperature relative to target
@@ -0,0 +1,506 @@
+import random
+import time
+import tracemalloc
+
+from TrackLineManager import TrackLine
+from TrackModel import TrackModel, YARD_ENTRY_BLOCKS
+
+
+# Block counts of the synthetic lines (same numbering as Track Data.xlsx)
+SYNTHETIC_BLOCK_COUNTS = {"Green Line": 150, "Red Line": 76}
+
+# Switch positions (True = reverse) that keep trains circulating on the main line
+MAIN_LINE_SWITCHES = {
+    "Green Line": {12: False, 28: True, 58: True, 85: True},  # 1→13, 28→29, 57→58, 100→101
+    "Red Line": {9: False, 15: True},                          # 9→10, 16→1 then forward past the yard
+}
+
+# Single-track sections every lap runs through twice: in to the turnaround
+# loop at the far end, and back out the other way. Trains only ever meet
+# head-on there, so the harness lets them through one direction at a time.
+# (section blocks, turnaround loop blocks in running order, direction mode of trains heading in)
+SINGLE_TRACK_SECTIONS = {
+    "Green Line": (range(13, 29), range(12, 0, -1), "backward_loop"),  # 150→28…13, 12…1, 13…28→29
+    "Red Line": (range(16, 53), range(53, 67), "forward"),             # 16…52, 53…66, 52…16→1
+}
+
+# Most trains a line holds without locking up: all of them must fit outside
+# its single-track section and turnaround at once, one train per block
+MAX_TRAINS_PER_LINE = {"Green Line": 121, "Red Line": 14}
+
+# (block a retiring train must be in, switch block, position (True = reverse) that routes it to the yard)
+YARD_EXITS = {
+    "Green Line": (57, 58, False),
+    "Red Line": (8, 9, True),
+}
+
+DEFAULT_FLEETS = (10, 50, 200)
+
+# A train held in one block this long (sim s) is stuck: longer than waiting out a
+# full turn of the other direction through the Red Line section at the slowest cruise speed
+STALL_AFTER = 900.0
+
+# Per-train movement dicts that must be empty for a train once it left at the yard
+TRAIN_STATE_ATTRIBUTES = (
+    "train_positions_in_block",
+    "train_actual_speeds",
+    "train_directions",
+    "last_movement_update",
+    "trains_at_yard",
+    "authority_ledger",
+)
+
+_MISSING = object()
+
+
+def build_synthetic_line(name, block_count=None, block_length=100.0, speed_limit=70,
+                         data_manager_cls=None):
+    """
+    Build a TrackLine with uniform blocks so the harness runs without Track Data.xlsx.
+
+    Args:
+        name: "Green Line" or "Red Line" (the routing rules are keyed on the name)
+        block_count: Number of blocks (default SYNTHETIC_BLOCK_COUNTS[name])
+        block_length: Length of every block (m)
+        speed_limit: Speed limit of every block (km/h)
+        data_manager_cls: TrackDataManager class (default UI_Variables.TrackDataManager)
+
+    Returns:
+        TrackLine ready for TrackModel.add_line
+    """
+    from Track_Blocks import Block
+    if data_manager_cls is None:
+        from UI_Variables import TrackDataManager as data_manager_cls
+
+    if block_count is None:
+        block_count = SYNTHETIC_BLOCK_COUNTS[name]
+    dm = data_manager_cls()
+    dm.blocks = [Block(i, length=block_length, speed_limit=speed_limit)
+                 for i in range(1, block_count + 1)]
+    for b in dm.blocks:
+        b.occupancy = 0
+    dm.station_location = [(7, "SHADYSIDE"), (35, "STEEL PLAZA")]
+    dm.initialize_bidirectional_directions(name)
+    line = TrackLine(name, dm)
+    line.switch_routing = dm.get_current_switch_routing(name)
+    return line
+
+
+class HarnessModel(TrackModel):
+    # TrackModel that counts its outbound messages and interlocks occupied blocks.
+
+    """
+    Stands in for the modules around the Track Model during a load run:
+    the output hooks count messages instead of sending them, and a train is
+    held at the end of its block while the block ahead is occupied, or while
+    trains come the other way through a single-track section (what the
+    Wayside would do by pulling authority). A held routing decision is
+    undone, so the train asks again on the next step.
+
+    Attributes:
+        message_counts: {"occupancy" / "beacon" / "station": messages sent}
+        log_lines: Terminal log lines (routing debug output - not traffic)
+        holds: Routing decisions refused because the next block was occupied
+            or the single-track section ahead was in use the other way
+        retired: {train_id: (line, block)} for trains that left at the yard
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.message_counts = {"occupancy": 0, "beacon": 0, "station": 0}
+        self.log_lines = 0
+        self.holds = 0
+        self.retired = {}
+
+    def send_block_occupancy_update(self, block_num, occupancy):
+        self.message_counts["occupancy"] += 1
+
+    def send_beacon(self, beacon_message):
+        self.message_counts["beacon"] += 1
+
+    def dispatch_station_events(self, events):
+        self.message_counts["station"] += len(events)
+
+    def log_to_terminal(self, message, level=None):
+        self.log_lines += 1
+
+    def get_next_block(self, current_block, train_idx):
+        train_id = self.data_manager.active_trains[train_idx]
+        saved_direction = self.train_directions.get(train_id, _MISSING)
+
+        next_block = super().get_next_block(current_block, train_idx)
+        if not next_block or next_block > len(self.data_manager.blocks):
+            return next_block
+        holder = getattr(self.data_manager.blocks[next_block - 1], "occupancy", 0)
+        if (not holder or holder == train_id) and self._section_allows(current_block, next_block):
+            return next_block
+
+        # Block ahead is occupied or the section is in use the other way - undo the routing decision and hold
+        if saved_direction is _MISSING:
+            self.train_directions.pop(train_id, None)
+        else:
+            self.train_directions[train_id] = saved_direction
+        self.holds += 1
+        return None
+
+    def _section_allows(self, current_block, next_block):
+        """
+        Direction lock for the bound line's single-track section.
+
+        Trains go in while none is coming back or waiting at the end of the
+        turnaround loop, and only as many as the loop can hold; trains in the
+        loop come back out once none is still on its way in.
+        """
+        section = SINGLE_TRACK_SECTIONS.get(self.get_current_line())
+        if section is None:
+            return True
+        blocks, turnaround, inbound_mode = section
+        if next_block not in blocks or current_block in blocks:
+            return True  # Not entering the section
+
+        inbound = outbound = turning = 0
+        waiting_to_leave = False
+        for train_id, block in zip(self.data_manager.active_trains, self.data_manager.train_locations):
+            if block in turnaround:
+                turning += 1
+                waiting_to_leave = waiting_to_leave or block == turnaround[-1]
+            elif block in blocks:
+                if self.train_directions.get(train_id, "forward") == inbound_mode:
+                    inbound += 1
+                else:
+                    outbound += 1
+        if current_block in turnaround:
+            return inbound == 0
+        return outbound == 0 and not waiting_to_leave and inbound + turning < len(turnaround) - 1
+
+    def remove_train_at_yard(self, train_id, current_block_num):
+        self.retired[train_id] = (self.get_current_line(), current_block_num)
+        super().remove_train_at_yard(train_id, current_block_num)
+
+
+class LoadHarness:
+    # Drives a synthetic fleet through the TrackModel engine and checks it stays consistent.
+
+    """
+    Each train gets a random line, dispatch time, cruise speed and service
+    time. Trains are dispatched from the yard once their entry block is
+    free (and the line has room, MAX_TRAINS_PER_LINE), circulate on the main
+    line and are sent back to the yard (by throwing the yard switch while
+    they are in the approach block) once their service time is up.
+
+    Every step is timed; the invariants are checked once per sim second:
+        - no two trains in one block and no occupancy without a train
+        - every dispatched train is either active or retired at the yard,
+          and retired trains leave no movement state behind
+        - no train stays in one block for stall_after sim seconds
+
+    Attributes:
+        model: HarnessModel being driven
+        schedule: [(dispatch_time, line, speed, service_time)] sorted by time
+        violations: {invariant name: count}
+        samples: First few violation messages
+    """
+
+    def __init__(self, fleet_size, duration=3600.0, dt=0.1, seed=0, speed=19.4,
+                 lines=None, model=None, stall_after=STALL_AFTER):
+        self.fleet_size = fleet_size
+        self.duration = duration
+        self.dt = dt
+        self.speed = speed
+        self.stall_after = stall_after
+        self.model = model if model is not None else HarnessModel()
+        if lines is None:
+            lines = [build_synthetic_line(name) for name in SYNTHETIC_BLOCK_COUNTS]
+        for line in lines:
+            self.model.add_line(line)
+            for block_num, state in MAIN_LINE_SWITCHES.get(line.name, {}).items():
+                self.model.set_switch(block_num, state, line=line)
+        self.line_names = [line.name for line in lines]
+
+        self.rng = random.Random(seed)
+        self.schedule = self._build_schedule()
+        self.pending = list(self.schedule)
+        self.retire_at = {}
+        self.last_moved = {}
+        self.reported_stalls = set()
+        self.dispatch_waits = []
+        self.step_times = []
+        self.violations = {}
+        self.samples = []
+        self.max_active = 0
+
+    def _build_schedule(self):
+        """Random dispatch times over the first half of the run, services of a quarter to half of it."""
+        schedule = []
+        for i in range(self.fleet_size):
+            schedule.append((
+                self.rng.uniform(0.0, self.duration / 2),
+                self.line_names[i % len(self.line_names)],
+                self.rng.uniform(0.6, 1.0) * self.speed,
+                self.rng.uniform(self.duration / 4, self.duration / 2),
+            ))
+        schedule.sort()
+        return schedule
+
+    # -------------------------------------------------------------------------
+    # RUN
+    # -------------------------------------------------------------------------
+    def run(self, trace_memory=True):
+        """
+        Run for the full duration.
+
+        Returns:
+            dict: Report (see format_report)
+        """
+        if trace_memory:
+            tracemalloc.start()
+        wall_start = time.perf_counter()
+        check_every = max(int(round(1.0 / self.dt)), 1)
+
+        steps = int(round(self.duration / self.dt))
+        for i in range(steps):
+            t0 = time.perf_counter()
+            self._dispatch_due()
+            self._set_yard_switches()
+            self.model.step(self.dt)
+            self.step_times.append(time.perf_counter() - t0)
+            self._track_movement()
+            if (i + 1) % check_every == 0:
+                self.check_invariants()
+
+        wall = time.perf_counter() - wall_start
+        memory = None
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = (current, peak)
+        return self._report(wall, memory)
+
+    def _dispatch_due(self):
+        """Dispatch every scheduled train whose time has come and whose entry block is free."""
+        now = self.model.sim_time
+        waiting = []
+        for entry in self.pending:
+            dispatch_time, line_name, speed, service = entry
+            if dispatch_time > now:
+                waiting.append(entry)
+                continue
+            entry_block = YARD_ENTRY_BLOCKS.get(line_name, 63)
+            full = len(self.model.get_train_locations(line_name)) >= MAX_TRAINS_PER_LINE.get(line_name, float("inf"))
+            if full or self.model.get_occupancy(line_name).get(entry_block) or self._yard_switch_open(line_name, entry_block):
+                waiting.append(entry)
+                continue
+            train_id = self.model.dispatch(speed, 10 ** 6, line=line_name, actual_speed=speed)
+            self.retire_at[train_id] = now + service
+            self.last_moved[train_id] = (entry_block, now)
+            self.dispatch_waits.append(now - dispatch_time)
+        self.pending = waiting
+
+    def _yard_switch_open(self, line_name, entry_block):
+        """True while the yard switch on the entry block is thrown for a retiring train (a train dispatched there would go straight back)."""
+        approach, switch_block, to_yard = YARD_EXITS.get(line_name, (None, None, None))
+        if switch_block != entry_block:
+            return False
+        line = self.model.track_lines.get_line(line_name)
+        return line.switches.is_reverse(switch_block) == to_yard
+
+    def _set_yard_switches(self):
+        """Route the train in each yard approach block to the yard once its service is over."""
+        now = self.model.sim_time
+        for line_name in self.line_names:
+            approach, switch_block, to_yard = YARD_EXITS.get(line_name, (None, None, None))
+            if approach is None:
+                continue
+            line = self.model.track_lines.get_line(line_name)
+            train_id = line.data_manager.blocks[approach - 1].occupancy
+            retiring = bool(train_id) and now >= self.retire_at.get(train_id, float("inf"))
+            wanted = to_yard if retiring else MAIN_LINE_SWITCHES[line_name][switch_block]
+            # Refused while a train is on the switch - tried again next step
+            if line.switches.is_reverse(switch_block) != wanted:
+                self.model.set_switch(switch_block, wanted, line=line, source="harness")
+
+    def _track_movement(self):
+        """Remember when each train last changed block (for stall detection)."""
+        now = self.model.sim_time
+        active = 0
+        for line_name in self.line_names:
+            for train_id, block in self.model.get_train_locations(line_name).items():
+                active += 1
+                if self.last_moved.get(train_id, (None,))[0] != block:
+                    self.last_moved[train_id] = (block, now)
+        self.max_active = max(self.max_active, active)
+
+    # -------------------------------------------------------------------------
+    # INVARIANTS
+    # -------------------------------------------------------------------------
+    def _violation(self, name, message):
+        self.violations[name] = self.violations.get(name, 0) + 1
+        if len(self.samples) < 20:
+            self.samples.append(f"t={self.model.sim_time:.1f}s {message}")
+
+    def check_invariants(self):
+        """Check occupancy and fleet invariants now. Returns the number of violations found."""
+        before = sum(self.violations.values())
+        active_ids = set()
+        for line in self.model.track_lines:
+            dm = line.data_manager
+            locations = self.model.get_train_locations(line)
+            active_ids.update(locations)
+
+            by_block = {}
+            for train_id, block in locations.items():
+                by_block.setdefault(block, []).append(train_id)
+            for block, trains in by_block.items():
+                if len(trains) > 1:
+                    self._violation("shared_block", f"{line.name} block {block}: trains {trains}")
+                elif 1 <= block <= len(dm.blocks) and dm.blocks[block - 1].occupancy != trains[0]:
+                    self._violation("occupancy_mismatch",
+                                    f"{line.name} block {block}: train {trains[0]} "
+                                    f"but occupancy {dm.blocks[block - 1].occupancy}")
+            for b in dm.blocks:
+                if b.occupancy and b.block_number not in by_block:
+                    self._violation("ghost_occupancy",
+                                    f"{line.name} block {b.block_number}: occupied by {b.occupancy} with no train")
+
+            for train_id in self.model.retired:
+                for attr in TRAIN_STATE_ATTRIBUTES:
+                    if train_id in getattr(line, attr):
+                        self._violation("retired_state", f"{line.name} train {train_id} still in {attr}")
+
+        dispatched = set(self.retire_at)
+        lost = dispatched - active_ids - set(self.model.retired)
+        for train_id in sorted(lost):
+            self._violation("lost_train", f"train {train_id} is neither active nor retired at the yard")
+        returned = active_ids & set(self.model.retired)
+        for train_id in sorted(returned):
+            self._violation("retired_state", f"train {train_id} retired but still active")
+
+        # Progress: a train held in one block this long is stuck, not waiting its turn
+        for line_name, block, train_id in self.stalled_trains():
+            stall = (train_id, self.last_moved[train_id][1])
+            if stall not in self.reported_stalls:
+                self.reported_stalls.add(stall)
+                self._violation("stalled", f"{line_name} train {train_id} has not left block {block} "
+                                           f"for {self.stall_after:.0f} s")
+        return sum(self.violations.values()) - before
+
+    # -------------------------------------------------------------------------
+    # REPORT
+    # -------------------------------------------------------------------------
+    def stalled_trains(self):
+        """[(line, block, train_id)] for active trains that have not changed block for stall_after sim seconds."""
+        now = self.model.sim_time
+        stalled = []
+        for line_name in self.line_names:
+            for train_id, block in self.model.get_train_locations(line_name).items():
+                moved_block, moved_at = self.last_moved.get(train_id, (block, now))
+                if now - moved_at >= self.stall_after:
+                    stalled.append((line_name, block, train_id))
+        return sorted(stalled)
+
+    def _report(self, wall, memory):
+        times = sorted(self.step_times)
+
+        def percentile(p):
+            if not times:
+                return 0.0
+            return times[min(int(p / 100.0 * len(times)), len(times) - 1)] * 1000.0
+
+        messages = sum(self.model.message_counts.values())
+        sim = max(self.model.sim_time, 1e-9)
+        active = sum(len(self.model.get_train_locations(name)) for name in self.line_names)
+        return {
+            "fleet": self.fleet_size,
+            "sim_time": self.model.sim_time,
+            "wall_time": wall,
+            "steps": len(times),
+            "step_ms": {
+                "mean": sum(times) / len(times) * 1000.0 if times else 0.0,
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "p99": percentile(99),
+                "max": times[-1] * 1000.0 if times else 0.0,
+            },
+            "messages": dict(self.model.message_counts),
+            "log_lines": self.model.log_lines,
+            "messages_per_sim_s": messages / sim,
+            "messages_per_wall_s": messages / wall if wall > 0 else 0.0,
+            "memory_current_mb": memory[0] / 1e6 if memory else None,
+            "memory_peak_mb": memory[1] / 1e6 if memory else None,
+            "dispatched": len(self.retire_at),
+            "not_dispatched": len(self.pending),
+            "max_dispatch_wait": max(self.dispatch_waits, default=0.0),
+            "retired": len(self.model.retired),
+            "active": active,
+            "max_active": self.max_active,
+            "holds": self.model.holds,
+            "stalled": self.stalled_trains(),
+            "violations": dict(self.violations),
+            "samples": list(self.samples),
+        }
+
+
+def format_report(report):
+    """Human-readable summary of one LoadHarness report."""
+    step = report["step_ms"]
+    lines = [
+        f"=== Fleet of {report['fleet']}: {report['sim_time']:.0f} sim s in {report['wall_time']:.1f} s "
+        f"({report['sim_time'] / max(report['wall_time'], 1e-9):.0f}x real time) ===",
+        f"  Step time (ms): mean {step['mean']:.3f}  p50 {step['p50']:.3f}  p95 {step['p95']:.3f}  "
+        f"p99 {step['p99']:.3f}  max {step['max']:.3f}",
+        f"  Messages: {report['messages']}  "
+        f"({report['messages_per_sim_s']:.1f}/sim s, {report['messages_per_wall_s']:.0f}/wall s)",
+    ]
+    if report["memory_peak_mb"] is not None:
+        lines.append(f"  Memory: {report['memory_current_mb']:.1f} MB now, {report['memory_peak_mb']:.1f} MB peak")
+    lines.append(
+        f"  Trains: {report['dispatched']} dispatched ({report['not_dispatched']} never got a free entry block, "
+        f"max wait {report['max_dispatch_wait']:.0f} s), {report['retired']} retired at the yard, "
+        f"{report['active']} active (max {report['max_active']}), {len(report['stalled'])} stalled")
+    lines.append(f"  Interlock holds: {report['holds']}  Debug log lines: {report['log_lines']}")
+    if report["stalled"]:
+        stalled = {}
+        for line_name, block, train_id in report["stalled"]:
+            stalled.setdefault(line_name, []).append(block)
+        for line_name, blocks in stalled.items():
+            lines.append(f"  ⚠️ Stalled on {line_name} in blocks {blocks}")
+    if report["violations"]:
+        lines.append(f"  ❌ Invariant violations: {report['violations']}")
+        lines.extend(f"     {sample}" for sample in report["samples"])
+    else:
+        lines.append("  ✅ No invariant violations")
+    return "\n".join(lines)
+
+
+def run_fleets(fleets=DEFAULT_FLEETS, duration=3600.0, dt=0.1, seed=0, speed=19.4, trace_memory=True,
+               stall_after=STALL_AFTER):
+    """Run one harness per fleet size and print each report. Returns the reports."""
+    reports = []
+    for fleet_size in fleets:
+        harness = LoadHarness(fleet_size, duration=duration, dt=dt, seed=seed, speed=speed,
+                              stall_after=stall_after)
+        report = harness.run(trace_memory=trace_memory)
+        print(format_report(report))
+        reports.append(report)
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Multi-train load harness for the Track Model engine")
+    parser.add_argument("--fleets", type=int, nargs="+", default=list(DEFAULT_FLEETS),
+                        help="Fleet sizes to run (trains split between Green and Red)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Sim seconds per run")
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=19.4, help="Top cruise speed (m/s)")
+    parser.add_argument("--stall-after", type=float, default=STALL_AFTER,
+                        help="Sim seconds in one block before a train counts as stalled (fails the run)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster)")
+    args = parser.parse_args()
+
+    reports = run_fleets(args.fleets, args.duration, args.dt, args.seed, args.speed,
+                         trace_memory=not args.no_memory, stall_after=args.stall_after)
+    sys.exit(1 if any(r["violations"] for r in reports) else 0)
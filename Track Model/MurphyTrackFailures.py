@@ -5,6 +5,22 @@ Manages Murphy Failures for track blocks including Track Circuit Failure,
 Broken Railroad, and Power Failure.
 """
 
+import time
+from collections import deque, namedtuple
+
+
+# Failure types as bits so a block's failures fit in one int
+FAILURE_BITS = {
+    "track_circuit": 0b001,
+    "broken_rail": 0b010,
+    "power": 0b100,
+}
+
+# One entry in the failure change stream: a failure was set (active=True)
+# or cleared (active=False) on a block at the given sim time. sequence
+# increases by one for every change so receivers can spot missed updates.
+FailureEvent = namedtuple("FailureEvent", ["sequence", "block", "failure", "active", "time"])
+
 class MurphyTrackFailures:
     # Manages Murphy Failures for track blocks including circuit failures, broken rails, and power failures.
     
@@ -14,11 +30,15 @@ class MurphyTrackFailures:
         heater_manager: Reference to HeaterSystemManager for power failure integration
         ui: Reference to UI for updating signals and crossings
         active_failures: Dictionary tracking active failure types for each block
+        failure_bits: {block_number: FAILURE_BITS mask} for blocks with a failure only
+        change_log: Most recent FailureEvents (the observable change stream)
+        sequence: Sequence number of the last FailureEvent
+        time_source: Callable returning the current sim time for event timestamps
         track_element_failures: Dictionary tracking track element failure states
         broken_rail_original_occupancy: Dictionary storing original occupancy for broken rail failures
     """
     
-    def __init__(self, data_manager, heater_manager=None, ui_reference=None):
+    def __init__(self, data_manager, heater_manager=None, ui_reference=None, time_source=None):
         # Initializes the Murphy Track Failures Manager with failure tracking for all blocks.
         """
         Initialize the Murphy Track Failures Manager.
@@ -27,6 +47,7 @@ class MurphyTrackFailures:
             data_manager: Reference to TrackDataManager
             heater_manager: Reference to HeaterSystemManager (optional)
             ui_reference: Reference to the UI (optional, for updating signals/crossings)
+            time_source: Callable returning sim time for event timestamps (default: wall clock)
         """
         self.data_manager = data_manager
         self.heater_manager = heater_manager
@@ -45,6 +66,15 @@ class MurphyTrackFailures:
         # Format: {block_number: original_occupancy}
         self.broken_rail_original_occupancy = {}
         
+        # Failure index and change stream
+        # failure_bits only holds blocks that currently have a failure, so
+        # "which blocks are failed" never needs a scan over every block
+        self.failure_bits = {}
+        self.change_log = deque(maxlen=200)
+        self.sequence = 0
+        self.time_source = time_source or time.time
+        self._listeners = []
+        
         # Initialize all blocks with no failure
         for block in self.data_manager.blocks:
             self.active_failures[block.block_number] = None
@@ -81,7 +111,7 @@ class MurphyTrackFailures:
         self._clear_failure_internal(block_num)
         
         # Set failure mode
-        self.active_failures[block_num] = "track_circuit"
+        self._set_failure(block_num, "track_circuit")
         block.failure_mode = "track_circuit"
         
         # Disable beacon data (set all beacon bits to 0)
@@ -123,7 +153,7 @@ class MurphyTrackFailures:
         self._clear_failure_internal(block_num)
         
         # Set failure mode
-        self.active_failures[block_num] = "broken_rail"
+        self._set_failure(block_num, "broken_rail")
         block.failure_mode = "broken_rail"
         
         # Store original occupancy and mark block as occupied
@@ -163,7 +193,7 @@ class MurphyTrackFailures:
         self._clear_failure_internal(block_num)
         
         # Set failure mode
-        self.active_failures[block_num] = "power"
+        self._set_failure(block_num, "power")
         block.failure_mode = "power"
         
 
@@ -234,7 +264,7 @@ class MurphyTrackFailures:
             return True
         
         # Clear the failure
-        self.active_failures[block_num] = None
+        self._clear_failure_index(block_num, failure_type)
         block.failure_mode = None
         
         # Restore block functionality based on failure type
@@ -269,14 +299,107 @@ class MurphyTrackFailures:
         # Clears all active failures across all blocks.
         """Clear all active failures on all blocks."""
         count = 0
-        for block_num in list(self.active_failures.keys()):
-            if self.active_failures[block_num] is not None:
-                self.clear_failure(block_num)
-                count += 1
+        for block_num in list(self.failure_bits):
+            self.clear_failure(block_num)
+            count += 1
         
         print(f"✅ Cleared {count} active failure(s)")
         return count
 
+    # -------------------------------------------------------------------------
+    # FAILURE INDEX AND CHANGE STREAM
+    # -------------------------------------------------------------------------
+    
+    def subscribe(self, callback):
+        # Registers a callback for failure changes.
+        """
+        Call callback(event) with a FailureEvent every time a failure is set or cleared.
+        
+        Args:
+            callback: Function taking one FailureEvent
+        """
+        self._listeners.append(callback)
+    
+    def _set_failure(self, block_num, failure_type):
+        # Records a new failure in the index and publishes the change.
+        self.active_failures[block_num] = failure_type
+        self.failure_bits[block_num] = self.failure_bits.get(block_num, 0) | FAILURE_BITS[failure_type]
+        self._publish(block_num, failure_type, True)
+    
+    def _clear_failure_index(self, block_num, failure_type):
+        # Removes a failure from the index and publishes the change.
+        self.active_failures[block_num] = None
+        bits = self.failure_bits.get(block_num, 0) & ~FAILURE_BITS.get(failure_type, 0)
+        if bits:
+            self.failure_bits[block_num] = bits
+        else:
+            self.failure_bits.pop(block_num, None)
+        self._publish(block_num, failure_type, False)
+    
+    def _publish(self, block_num, failure_type, active):
+        # Appends a FailureEvent to the change log and notifies listeners.
+        self.sequence += 1
+        try:
+            sim_time = self.time_source()
+        except Exception:
+            sim_time = time.time()
+        event = FailureEvent(self.sequence, block_num, failure_type, active, sim_time)
+        self.change_log.append(event)
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"❌ Failure listener error: {e}")
+    
+    def changes_since(self, sequence):
+        # Returns the change log entries after a given sequence number.
+        """
+        Get every FailureEvent newer than sequence.
+        
+        Args:
+            sequence (int): Last sequence number the caller has seen
+            
+        Returns:
+            list or None: Newer events in order, or None if some of them have
+            already dropped out of change_log (caller should take a full snapshot)
+        """
+        if sequence >= self.sequence:
+            return []
+        events = [e for e in self.change_log if e.sequence > sequence]
+        if not events or events[0].sequence != sequence + 1:
+            return None
+        return events
+    
+    def get_failed_blocks(self, failure_type=None):
+        # Returns sorted block numbers with a failure (optionally of one type).
+        """
+        Get the blocks that currently have a failure.
+        
+        Args:
+            failure_type (str): "track_circuit", "broken_rail" or "power" (None = any)
+            
+        Returns:
+            list: Sorted block numbers
+        """
+        if failure_type is None:
+            return sorted(self.failure_bits)
+        mask = FAILURE_BITS[failure_type]
+        return sorted(b for b, bits in self.failure_bits.items() if bits & mask)
+    
+    def get_failure_lists(self):
+        # Returns the failed blocks grouped by type in the Wayside message format.
+        """
+        Get all failures grouped by type, as sent to the Wayside Controllers.
+        
+        Returns:
+            dict: {'track_circuit_failures': [...], 'broken_rail_failures': [...], 'power_failures': [...]}
+        """
+        return {
+            'track_circuit_failures': self.get_failed_blocks("track_circuit"),
+            'broken_rail_failures': self.get_failed_blocks("broken_rail"),
+            'power_failures': self.get_failed_blocks("power"),
+        }
+
     # -------------------------------------------------------------------------
     # FAILURE STATUS QUERIES
     # -------------------------------------------------------------------------
@@ -305,7 +428,7 @@ class MurphyTrackFailures:
         Returns:
             bool: True if block has a failure, False otherwise
         """
-        return self.active_failures.get(block_num) is not None
+        return block_num in self.failure_bits
     
     def get_all_failures(self):
         # Returns a dictionary of all active failures.
@@ -315,7 +438,7 @@ class MurphyTrackFailures:
         Returns:
             dict: {block_number: failure_type} for blocks with active failures
         """
-        return {k: v for k, v in self.active_failures.items() if v is not None}
+        return {k: self.active_failures[k] for k in self.failure_bits}
     
     def can_send_beacon(self, block_num):
         # Checks if a block can send beacon signals based on failure state.
@@ -390,8 +513,7 @@ class MurphyTrackFailures:
         Returns:
             bool: True if block has power, False otherwise
         """
-        failure = self.active_failures.get(block_num)
-        return failure != "power"
+        return not self.failure_bits.get(block_num, 0) & FAILURE_BITS["power"]
 
     # -------------------------------------------------------------------------
     def is_track_element_failed(self, block_num):
@@ -0,0 +1,172 @@
+import numpy as np
+
+
+# Relative passenger arrival rate for each hour of the day (0 = midnight).
+# Morning peak around 08:00, evening peak around 17:00, quiet overnight.
+DEFAULT_HOURLY_PROFILE = np.array([
+    0.05, 0.03, 0.02, 0.02, 0.05, 0.20,   # 00-05
+    0.60, 1.40, 2.00, 1.30, 0.80, 0.75,   # 06-11
+    0.85, 0.80, 0.80, 1.00, 1.60, 2.00,   # 12-17
+    1.40, 0.90, 0.60, 0.45, 0.30, 0.15,   # 18-23
+])
+
+# Seated + standing capacity of one train (matches Train Model MAX_CAPACITY)
+TRAIN_CAPACITY = 222
+
+
+class PassengerDemandModel:
+    # Generates station passenger demand with time-of-day arrival rates and an origin-destination matrix.
+
+    """
+    Passengers arrive at every station as a non-homogeneous Poisson process
+    (base rate x hourly profile) and pick a destination from the OD matrix.
+    All stations are generated at once per sim step, from a seeded RNG.
+
+    Attributes:
+        stations: Station block numbers, in index order
+        base_rates: Peak-free arrivals per hour for each station
+        od_matrix: Row i = probability a passenger at station i is going to station j
+        waiting: [origin, destination] passengers waiting on the platforms
+        onboard: {train_id: passengers on that train per destination}
+    """
+
+    def __init__(self, station_blocks, base_rate_per_hour=60.0, od_matrix=None,
+                 hourly_profile=None, start_hour=6.0, seed=None, capacity=TRAIN_CAPACITY):
+        """
+        Args:
+            station_blocks: Block numbers of the stations on this line
+            base_rate_per_hour: Arrivals per hour at a profile value of 1.0 (scalar or per station)
+            od_matrix: n x n destination weights (default: every other station equally likely)
+            hourly_profile: 24 hourly rate multipliers (default: DEFAULT_HOURLY_PROFILE)
+            start_hour: Time of day at sim time 0
+            seed: RNG seed (None = random)
+            capacity: Passengers a train can carry
+        """
+        self.stations = [int(b) for b in station_blocks]
+        self.index = {block: i for i, block in enumerate(self.stations)}
+        n = len(self.stations)
+
+        self.base_rates = np.broadcast_to(np.asarray(base_rate_per_hour, dtype=float), (n,)).copy()
+        self.hourly_profile = np.asarray(
+            DEFAULT_HOURLY_PROFILE if hourly_profile is None else hourly_profile, dtype=float)
+        self.start_hour = float(start_hour)
+        self.capacity = int(capacity)
+        self.rng = np.random.default_rng(seed)
+
+        self.od_matrix = self._normalize_od(np.ones((n, n)) if od_matrix is None else od_matrix)
+        self.waiting = np.zeros((n, n), dtype=np.int64)
+        self.onboard = {}
+        self.last_sim_time = None
+
+    @staticmethod
+    def _normalize_od(od_matrix):
+        """Zero the diagonal and make every row sum to 1."""
+        od = np.array(od_matrix, dtype=float)
+        if od.size == 0:
+            return od
+        np.fill_diagonal(od, 0.0)
+        totals = od.sum(axis=1, keepdims=True)
+        return np.divide(od, totals, out=np.zeros_like(od), where=totals > 0)
+
+    # -------------------------------------------------------------------------
+    # ARRIVALS
+    # -------------------------------------------------------------------------
+    def profile_at(self, sim_time):
+        """Hourly profile value at sim_time (linear between the hourly points)."""
+        hour = (self.start_hour + sim_time / 3600.0) % 24.0
+        low = int(hour)
+        frac = hour - low
+        return (1 - frac) * self.hourly_profile[low] + frac * self.hourly_profile[(low + 1) % 24]
+
+    def expected_arrivals(self, t_start, dt):
+        """Expected arrivals per station over [t_start, t_start + dt] (trapezoid over the profile)."""
+        mean_profile = 0.5 * (self.profile_at(t_start) + self.profile_at(t_start + dt))
+        return self.base_rates * mean_profile * (dt / 3600.0)
+
+    def step(self, dt=None, sim_time=None):
+        """
+        Generate arrivals at every station for one sim step.
+
+        Args:
+            dt: Sim seconds to generate (used when sim_time is not given)
+            sim_time: Current sim time - dt is taken from the previous call
+
+        Returns:
+            numpy array: New passengers at each station this step
+        """
+        if sim_time is not None:
+            t_start = sim_time if self.last_sim_time is None else self.last_sim_time
+            dt = max(sim_time - t_start, 0.0)
+            self.last_sim_time = sim_time
+        else:
+            dt = 0.0 if dt is None else dt
+            t_start = self.last_sim_time or 0.0
+            self.last_sim_time = t_start + dt
+
+        n = len(self.stations)
+        if n == 0 or dt <= 0:
+            return np.zeros(n, dtype=np.int64)
+
+        arrivals = self.rng.poisson(self.expected_arrivals(t_start, dt))
+        if n > 1:
+            self.waiting += self.rng.multinomial(arrivals, self.od_matrix)
+        return arrivals
+
+    # -------------------------------------------------------------------------
+    # STATION STOPS
+    # -------------------------------------------------------------------------
+    def waiting_at(self, block_num):
+        """Passengers waiting at the station in block_num."""
+        i = self.index.get(block_num)
+        return 0 if i is None else int(self.waiting[i].sum())
+
+    def waiting_totals(self):
+        """{block_number: passengers waiting} for every station."""
+        return dict(zip(self.stations, self.waiting.sum(axis=1).tolist()))
+
+    def onboard_count(self, train_id):
+        """Passengers currently on train_id."""
+        load = self.onboard.get(train_id)
+        return 0 if load is None else int(load.sum())
+
+    def alight(self, train_id, block_num):
+        """Passengers on train_id whose destination is block_num get off. Returns the count."""
+        i = self.index.get(block_num)
+        load = self.onboard.get(train_id)
+        if i is None or load is None:
+            return 0
+        count = int(load[i])
+        load[i] = 0
+        return count
+
+    def board(self, train_id, block_num, capacity_left=None):
+        """
+        Waiting passengers at block_num board train_id, up to its free capacity.
+
+        Returns:
+            int: Passengers that boarded
+        """
+        i = self.index.get(block_num)
+        if i is None:
+            return 0
+        load = self.onboard.setdefault(train_id, np.zeros(len(self.stations), dtype=np.int64))
+        if capacity_left is None:
+            capacity_left = self.capacity - int(load.sum())
+
+        queue = self.waiting[i]
+        total = int(queue.sum())
+        count = max(min(total, int(capacity_left)), 0)
+        if count == 0:
+            return 0
+        if count == total:
+            taken = queue.copy()
+        else:
+            # Who gets on is random among the waiting passengers
+            taken = self.rng.multivariate_hypergeometric(queue, count)
+        queue -= taken
+        load += taken
+        return count
+
+    def forget_train(self, train_id):
+        """Drop a train that left service (its passengers leave with it)."""
+        self.onboard.pop(train_id, None)
@@ -0,0 +1,91 @@
+from collections import namedtuple
+
+
+# One station event:
+#   "arrival"   - train entered a station block
+#   "stop"      - train's authority reached 0 while in a station block (boarding)
+#   "departure" - a train that stopped at a station was given authority again
+StationEvent = namedtuple("StationEvent", ["kind", "train_id", "block", "station", "time"])
+
+
+class StationEventTracker:
+    # Turns occupancy and authority updates into station arrival / stop / departure events.
+
+    """
+    Fed directly from the block enter/leave events and the commanded authority
+    updates, so nothing has to poll the stations or the trains.
+
+    Attributes:
+        station_by_block: {block_number: station_name} index
+        previous_authority: Last commanded authority seen for each train
+        stopped_at: {train_id: block_number} for trains stopped at a station
+    """
+
+    def __init__(self, station_location=()):
+        self.station_by_block = {}
+        self.previous_authority = {}
+        self.stopped_at = {}
+        self._source = None
+        self._source_len = -1
+        self.sync(station_location)
+
+    def sync(self, station_location):
+        """Rebuild the block -> station index if the station list changed."""
+        if station_location is self._source and len(station_location) == self._source_len:
+            return
+        self.station_by_block = {}
+        for block_num, station_name in station_location:
+            try:
+                self.station_by_block[int(block_num)] = station_name
+            except (ValueError, TypeError):
+                continue
+        self._source = station_location
+        self._source_len = len(station_location)
+
+    def station_at(self, block_num):
+        """Station name in block_num, or None."""
+        return self.station_by_block.get(block_num)
+
+    def on_block_enter(self, train_id, block_num, time=None):
+        """A train entered block_num. Returns the resulting StationEvents."""
+        station = self.station_at(block_num)
+        if station is None:
+            return []
+        return [StationEvent("arrival", train_id, block_num, station, time)]
+
+    def on_block_leave(self, train_id, block_num, time=None):
+        """A train left block_num. Returns the resulting StationEvents."""
+        # Left without an authority update (e.g. authority counted in metres) -
+        # the stop is over either way
+        if self.stopped_at.get(train_id) == block_num:
+            del self.stopped_at[train_id]
+        return []
+
+    def on_authority(self, train_id, block_num, authority, time=None):
+        """
+        A new commanded authority was set for a train in block_num.
+
+        Returns:
+            list: "stop" when authority drops to 0 at a station, "departure"
+            when a train stopped at a station gets authority again
+        """
+        previous = self.previous_authority.get(train_id, -1)
+        self.previous_authority[train_id] = authority
+        events = []
+
+        if previous > 0 and authority == 0:
+            station = self.station_at(block_num)
+            if station is not None:
+                self.stopped_at[train_id] = block_num
+                events.append(StationEvent("stop", train_id, block_num, station, time))
+
+        elif previous == 0 and authority > 0 and train_id in self.stopped_at:
+            departure_block = self.stopped_at.pop(train_id)
+            events.append(StationEvent("departure", train_id, departure_block,
+                                       self.station_at(departure_block), time))
+        return events
+
+    def forget_train(self, train_id):
+        """Drop a train that left service."""
+        self.previous_authority.pop(train_id, None)
+        self.stopped_at.pop(train_id, None)
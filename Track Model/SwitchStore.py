@@ -0,0 +1,168 @@
+import threading
+from collections import deque, namedtuple
+from enum import IntEnum
+
+
+class SwitchPosition(IntEnum):
+    # Switch position as stored (REVERSE is block.switch_state == True).
+    NORMAL = 0
+    REVERSE = 1
+
+    @classmethod
+    def parse(cls, value):
+        """Position from "normal"/"reverse", a bool (True = reverse), 0/1 or "0"/"1"."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls.REVERSE if value.strip().lower() in ("reverse", "1", "true") else cls.NORMAL
+        return cls.REVERSE if value else cls.NORMAL
+
+    @property
+    def direction(self):
+        """"normal" / "reverse" as the Wayside and the tables spell it."""
+        return "reverse" if self else "normal"
+
+
+# One applied change: version is the store version right after it
+SwitchChange = namedtuple("SwitchChange", ["version", "block", "position", "previous", "source"])
+
+
+class SwitchStore:
+    # The one place a line's switch positions live.
+
+    """
+    Positions sit in a bytearray indexed by block number, so routing reads
+    one slot per decision. Every change bumps a monotonically increasing
+    version and is pushed to the subscribers (block mirrors, beacons, UI)
+    after the store lock is released. A switch whose block is occupied is
+    locked: set() refuses to move it unless forced.
+
+    Attributes:
+        positions: bytearray, positions[block] = SwitchPosition value
+        switch_blocks: Blocks known to carry a switch
+        version: Number of changes applied so far
+        block_versions: {block: version of its last change}
+        changes: Most recent SwitchChange records (for changes_since)
+    """
+
+    def __init__(self, block_count=0, is_occupied=None, history=256):
+        self.positions = bytearray(block_count + 1)
+        self.switch_blocks = set()
+        self.version = 0
+        self.block_versions = {}
+        self.changes = deque(maxlen=history)
+        self.subscribers = []
+        self.is_occupied = is_occupied
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_blocks(cls, blocks, switch_blocks=(), is_occupied=None):
+        """Seed a store from the blocks as loaded (see load)."""
+        store = cls(len(blocks), is_occupied)
+        store.load(blocks, switch_blocks)
+        return store
+
+    def load(self, blocks, switch_blocks=()):
+        """
+        Re-read every position from the blocks (line loaded or track data uploaded).
+
+        A block is reversed if its switch_state is True or its switch_direction
+        is "reverse" (block 62's yard default). Subscribers are not called and
+        the change history is dropped, so changes_since() of any earlier
+        version asks for a resync.
+        """
+        positions = bytearray(max(len(blocks), len(self.positions) - 1) + 1)
+        for b in blocks:
+            if getattr(b, "switch_state", False) is True or getattr(b, "switch_direction", None) == "reverse":
+                positions[b.block_number] = SwitchPosition.REVERSE
+        with self._lock:
+            self.positions = positions
+            self.switch_blocks = set(switch_blocks)
+            self.changes.clear()
+            self.block_versions.clear()
+            if self.version:
+                self.version += 1
+
+    # -------------------------------------------------------------------------
+    # READ
+    # -------------------------------------------------------------------------
+    def is_reverse(self, block_num):
+        """True if the switch in block_num is reversed (hot path - one slot read)."""
+        return 0 < block_num < len(self.positions) and self.positions[block_num] == 1
+
+    def position(self, block_num):
+        """SwitchPosition of block_num (NORMAL for blocks without a switch)."""
+        return SwitchPosition.REVERSE if self.is_reverse(block_num) else SwitchPosition.NORMAL
+
+    def direction(self, block_num):
+        """"normal" / "reverse" for block_num."""
+        return "reverse" if self.is_reverse(block_num) else "normal"
+
+    def is_locked(self, block_num):
+        """A switch is locked while a train occupies its block."""
+        return bool(self.is_occupied is not None and self.is_occupied(block_num))
+
+    def changes_since(self, version):
+        """
+        Changes applied after version, oldest first.
+
+        Returns:
+            list of SwitchChange, or None if some of them are no longer kept
+            (the caller should re-read every position)
+        """
+        with self._lock:
+            if version >= self.version:
+                return []
+            if not self.changes or self.changes[0].version > version + 1:
+                return None
+            return [c for c in self.changes if c.version > version]
+
+    # -------------------------------------------------------------------------
+    # WRITE
+    # -------------------------------------------------------------------------
+    def set(self, block_num, position, source=None, force=False):
+        """
+        Move a switch.
+
+        Args:
+            position: Anything SwitchPosition.parse accepts
+            source: Who asked (kept in the change record)
+            force: Move it even if the block is occupied
+
+        Returns:
+            bool: True if the switch is now in position, False if it is
+            locked or block_num is not a block
+        """
+        position = SwitchPosition.parse(position)
+        if block_num <= 0:
+            return False
+        with self._lock:
+            if block_num >= len(self.positions):
+                self.positions.extend(bytes(block_num + 1 - len(self.positions)))
+            self.switch_blocks.add(block_num)
+            previous = SwitchPosition(self.positions[block_num])
+            if previous == position:
+                return True
+            if not force and self.is_locked(block_num):
+                return False
+            self.positions[block_num] = position
+            self.version += 1
+            self.block_versions[block_num] = self.version
+            change = SwitchChange(self.version, block_num, position, previous, source)
+            self.changes.append(change)
+            subscribers = list(self.subscribers)
+
+        for callback in subscribers:
+            callback(change)
+        return True
+
+    def subscribe(self, callback):
+        """Call callback(SwitchChange) after every change. Returns callback."""
+        with self._lock:
+            self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
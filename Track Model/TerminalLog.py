@@ -0,0 +1,99 @@
+import threading
+from collections import deque
+
+
+# Log levels (same values as the logging module)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+
+def infer_level(message):
+    """Guess a level from the tags the Track Model already puts in its messages."""
+    text = str(message)
+    if "ERROR" in text or "❌" in text:
+        return ERROR
+    if "WARNING" in text or "⚠️" in text or "BLOCKED" in text:
+        return WARNING
+    if "DEBUG" in text or "CHECK]" in text or "ENTRY]" in text:
+        return DEBUG
+    return INFO
+
+
+class TerminalLogSink:
+    # Buffers event log messages and writes them to the terminal widgets in batches.
+
+    """
+    log() only appends to a bounded ring buffer, so it is cheap and safe to
+    call from the routing code and from socket threads. flush() runs on the
+    Tk thread once per frame: every pending line goes into each terminal with
+    a single insert, and old lines are trimmed so the widgets stay bounded.
+
+    Attributes:
+        terminals: Text widgets to write to (shared list, widgets can be added any time)
+        level: Messages below this level are dropped
+        max_lines: Lines kept in each terminal widget
+        pending: Ring buffer of lines waiting for the next flush
+        dropped: Lines pushed out of the ring buffer before they were flushed
+    """
+
+    def __init__(self, terminals=None, level=INFO, max_lines=500, max_pending=1000):
+        self.terminals = terminals if terminals is not None else []
+        self.level = level
+        self.max_lines = max_lines
+        self.pending = deque(maxlen=max_pending)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def log(self, message, level=None):
+        """Queue a message for the terminals. Returns False if it was filtered out."""
+        if level is None:
+            level = infer_level(message)
+        if level < self.level:
+            return False
+        with self._lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(str(message))
+        return True
+
+    def flush(self):
+        """Write every pending line to the terminals (call from the Tk thread). Returns lines written."""
+        with self._lock:
+            if not self.pending:
+                return 0
+            lines = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+
+        if dropped:
+            lines.insert(0, f"... {dropped} older messages dropped ...")
+        # Only the newest max_lines can survive the trim anyway
+        lines = lines[-self.max_lines:]
+        text = "\n".join(lines) + "\n"
+
+        for terminal in self.terminals:
+            try:
+                terminal.config(state="normal")
+                terminal.insert("end", text)
+                self._trim(terminal)
+                terminal.see("end")
+                terminal.config(state="disabled")
+            except Exception:
+                continue  # Widget destroyed
+        return len(lines)
+
+    def _trim(self, terminal):
+        """Delete the oldest lines so the terminal keeps at most max_lines."""
+        # 'end-1c' is the last character - its line number is the line count
+        line_count = int(str(terminal.index("end-1c")).split(".")[0]) - 1
+        excess = line_count - self.max_lines
+        if excess > 0:
+            terminal.delete("1.0", f"{excess + 1}.0")
+
+    def clear(self):
+        """Drop everything that has not been flushed yet."""
+        with self._lock:
+            self.pending.clear()
+            self.dropped = 0
@@ -22,6 +22,9 @@ sys.modules['tkinter'] = Mock()
 sys.modules['tkinter.ttk'] = Mock()
 sys.modules['tkinter.simpledialog'] = Mock()
 
+# Shared modules (ImageAssetCache, etc.) live in the repository root
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 
 class TestCase01_SwitchRoutingLogic(unittest.TestCase):
     """Test Case 1: Switch Routing Logic for Green and Red Lines"""
@@ -627,6 +630,1106 @@ class TestCase10_ControllerBlockSeparation(unittest.TestCase):
         print("✅ Controller message filtering working\n")
 
 
+class TestCase11_ImageAssetCache(unittest.TestCase):
+    """Test Case 11: Shared (path, size) image cache with LRU eviction"""
+    
+    def setUp(self):
+        import ImageAssetCache
+        self.module = ImageAssetCache
+        
+        # Fake PIL: every open() returns a 800x600 source that counts its resizes
+        self.resize_calls = []
+        
+        def fake_open(path):
+            source = Mock()
+            source.size = (800, 600)
+            source.resize.side_effect = lambda size, *args: self.resize_calls.append((path, size)) or Mock(size=size)
+            return source
+        
+        self.image_patch = patch.object(ImageAssetCache, 'Image', Mock(open=Mock(side_effect=fake_open)))
+        self.image_patch.start()
+        self.cache = ImageAssetCache.ImageAssetCache(max_entries=2)
+    
+    def tearDown(self):
+        self.image_patch.stop()
+    
+    def test_same_path_and_size_resized_once(self):
+        """Repeated lookups of one (path, size) only resize once"""
+        print("\n=== TEST CASE 11a: Cached Resize ===")
+        
+        first = self.cache.get_image("GreenLineOcc.png", (550, 450))
+        second = self.cache.get_image("GreenLineOcc.png", (550, 450))
+        
+        self.assertIs(first, second)
+        self.assertEqual(len(self.resize_calls), 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        
+        # A different size is a different entry
+        self.cache.get_image("GreenLineOcc.png", (400, 300))
+        self.assertEqual(len(self.resize_calls), 2)
+        print("✅ Resize happens once per (path, size)\n")
+    
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted past max_entries"""
+        print("\n=== TEST CASE 11b: LRU Eviction ===")
+        
+        self.cache.get_image("a.png", (10, 10))
+        self.cache.get_image("b.png", (10, 10))
+        self.cache.get_image("a.png", (10, 10))   # a is now most recent
+        self.cache.get_image("c.png", (10, 10))   # evicts b
+        
+        cached_paths = [os.path.basename(key[0]) for key in self.cache._scaled]
+        print(f"Cached after eviction: {cached_paths}")
+        self.assertEqual(cached_paths, ["a.png", "c.png"])
+        print("✅ LRU eviction correct\n")
+    
+    def test_fit_size_keeps_aspect_ratio(self):
+        """fit_size keeps the 4:3 source aspect ratio"""
+        print("\n=== TEST CASE 11c: Aspect Ratio Fit ===")
+        
+        self.assertEqual(self.cache.fit_size("track.png", 1000, 600), (800, 600))
+        self.assertEqual(self.cache.fit_size("track.png", 400, 600), (400, 300))
+        print("✅ Fitted sizes keep aspect ratio\n")
+    
+    def test_prescale_in_background(self):
+        """prescale fills the cache from a worker thread"""
+        print("\n=== TEST CASE 11d: Background Pre-scaling ===")
+        
+        worker = self.cache.prescale("RedLineOcc.png", [(550, 450)])
+        worker.join(timeout=2)
+        
+        self.cache.get_image("RedLineOcc.png", (550, 450))
+        self.assertEqual(len(self.resize_calls), 1)
+        self.assertEqual(self.cache.hits, 1)
+        
+        # Already cached - nothing left to do
+        self.assertIsNone(self.cache.prescale("RedLineOcc.png", [(550, 450)]))
+        print("✅ Pre-scaled image served from cache\n")
+
+
+class TestCase12_MultiLineSimulation(unittest.TestCase):
+    """Test Case 12: Per-line track state bound to the UI while stepping"""
+    
+    def setUp(self):
+        from TrackLineManager import TrackLine, TrackLineManager
+        
+        class FakeUI:
+            pass
+        
+        self.ui = FakeUI()
+        self.manager = TrackLineManager(self.ui)
+        self.green = self.manager.add_line(TrackLine("Green Line", data_manager=Mock(active_trains=[1, 3])))
+        self.red = self.manager.add_line(TrackLine("Red Line", data_manager=Mock(active_trains=[2])))
+        self.manager.show("Green Line")
+    
+    def test_line_lookup(self):
+        """Lines resolve from full name, short name, indicator and train"""
+        print("\n=== TEST CASE 12a: Line Lookup ===")
+        
+        self.assertIs(self.manager.get_line("Red"), self.red)
+        self.assertIs(self.manager.get_line(0), self.green)
+        self.assertIs(self.manager.get_line("1"), self.red)
+        self.assertIs(self.manager.line_for_train(2), self.red)
+        self.assertIs(self.manager.line_for_train("3"), self.green)
+        self.assertIsNone(self.manager.line_for_train(99))
+        self.assertEqual(self.red.track_tag, "Red")
+        print("✅ Line lookup correct\n")
+    
+    def test_using_binds_and_restores(self):
+        """Stepping a background line binds its state, then restores the displayed line"""
+        print("\n=== TEST CASE 12b: Bind / Restore ===")
+        
+        self.assertIs(self.ui.data_manager, self.green.data_manager)
+        self.assertTrue(self.manager.is_displayed())
+        
+        with self.manager.using(self.red):
+            self.assertIs(self.ui.data_manager, self.red.data_manager)
+            self.assertFalse(self.manager.is_displayed())
+            self.ui.train_actual_speeds[2] = 12.5
+            self.ui.trains_at_yard = {2}  # rebinding is captured too
+        
+        self.assertIs(self.ui.data_manager, self.green.data_manager)
+        self.assertTrue(self.manager.is_displayed())
+        self.assertEqual(self.red.train_actual_speeds, {2: 12.5})
+        self.assertEqual(self.green.train_actual_speeds, {})
+        self.assertEqual(self.red.trains_at_yard, {2})
+        print("✅ Per-line state kept separate\n")
+    
+    def test_outbound_messages_tagged(self):
+        """Every outbound dict message carries its line"""
+        print("\n=== TEST CASE 12c: Outbound Line Tag ===")
+        from TrackLineManager import LineServer
+        
+        sent = []
+        server = Mock()
+        server.send_to_ui = lambda ui, msg: sent.append((ui, msg))
+        server.running = True
+        red_server = LineServer(server, "Red Line")
+        
+        red_server.send_to_ui("Track SW", {"command": "block_occupancy", "value": {5: 1}})
+        red_server.send_to_ui("CTC", {"command": "x", "line": "Green Line"})
+        
+        self.assertTrue(red_server.running, "Everything but send_to_ui is the server's")
+        self.assertEqual(sent[0][1]["line"], "Red Line")
+        self.assertEqual(sent[1][1]["line"], "Green Line")
+        print("✅ Messages tagged with line\n")
+
+
+class TestCase13_ContinuousTrainPosition(unittest.TestCase):
+    """Test Case 13: Continuous position model with exact block-boundary events"""
+    
+    def setUp(self):
+        from TrainMovement import advance_through_blocks
+        self.advance = advance_through_blocks
+        # Short Green Line style blocks: 35 m and 50 m mixed in
+        self.lengths = {1: 100.0, 2: 35.0, 3: 50.0, 4: 35.0, 5: 200.0}
+    
+    def test_crosses_every_short_block(self):
+        """One long step crosses several short blocks, none are skipped"""
+        print("\n=== TEST CASE 13a: Multi-Block Step ===")
+        
+        # 20 m/s for 10 s = 200 m from 90 m into block 1 -> 10+35+50+35 m, ends 70 m into block 5
+        block, position, events = self.advance(
+            1, 1, 90.0, 20.0, 0.0, 10.0,
+            lambda b: self.lengths[b],
+            lambda b, t: b + 1
+        )
+        
+        entered = [e.block for e in events if e.kind == "enter"]
+        left = [e.block for e in events if e.kind == "leave"]
+        print(f"Entered: {entered}, left: {left}, final: block {block} @ {position:.1f} m")
+        
+        self.assertEqual(entered, [2, 3, 4, 5])
+        self.assertEqual(left, [1, 2, 3, 4])
+        self.assertEqual(block, 5)
+        self.assertAlmostEqual(position, 70.0)
+        print("✅ Every boundary crossed in order\n")
+    
+    def test_interpolated_timestamps(self):
+        """Each crossing gets the time the boundary was actually reached"""
+        print("\n=== TEST CASE 13b: Interpolated Timestamps ===")
+        
+        _, _, events = self.advance(
+            1, 1, 90.0, 20.0, 100.0, 10.0,
+            lambda b: self.lengths[b],
+            lambda b, t: b + 1
+        )
+        enter_times = [round(e.time, 3) for e in events if e.kind == "enter"]
+        print(f"Enter times: {enter_times}")
+        
+        # 10 m, then +35 m, +50 m, +35 m at 20 m/s
+        self.assertEqual(enter_times, [100.5, 102.25, 104.75, 106.5])
+        self.assertEqual(sorted(enter_times), enter_times)
+        print("✅ Crossing times interpolated within the step\n")
+    
+    def test_held_at_end_of_authority(self):
+        """No next block -> train is held at the boundary"""
+        print("\n=== TEST CASE 13c: Held at Authority Limit ===")
+        
+        block, position, events = self.advance(
+            1, 2, 0.0, 20.0, 0.0, 10.0,
+            lambda b: self.lengths[b],
+            lambda b, t: 3 if b == 2 else None
+        )
+        self.assertEqual(block, 3)
+        self.assertEqual(position, 50.0)
+        self.assertEqual([e.kind for e in events], ["leave", "enter"])
+        print("✅ Train held at block 3 boundary\n")
+    
+    def test_crossing_limit_carries_rest_of_step(self):
+        """A step longer than the crossing limit is finished by resuming from the last crossing"""
+        print("\n=== TEST CASE 13d: Crossing Limit Carry-Over ===")
+        from TrainMovement import MAX_CROSSINGS_PER_STEP, hit_crossing_limit
+        
+        # 600 one-metre blocks in a single 1 s step at 600 m/s
+        block, position, events = self.advance(1, 1, 0.5, 600.0, 0.0, 1.0, lambda b: 1.0, lambda b, t: b + 1)
+        self.assertTrue(hit_crossing_limit(events))
+        self.assertEqual((block, position), (MAX_CROSSINGS_PER_STEP + 1, 0.0))
+        
+        steps = 1
+        while hit_crossing_limit(events):
+            resume = events[-1].time
+            block, position, events = self.advance(1, block, position, 600.0, resume, 1.0 - resume,
+                                                   lambda b: 1.0, lambda b, t: b + 1)
+            steps += 1
+        self.assertEqual(steps, 3)
+        self.assertEqual(block, 601)
+        self.assertAlmostEqual(position, 0.5, places=6)
+        print(f"✅ 600 m covered in {steps} calls, ends in block {block}\n")
+
+
+class TestCase14_VectorizedHeaterModel(unittest.TestCase):
+    """Test Case 14: NumPy heater/temperature model stepped from sim time"""
+    
+    def setUp(self):
+        # HeaterSystemManager is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "HeaterSystemManager.py")
+        spec = importlib.util.spec_from_file_location("RealHeaterSystemManager", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.HeaterSystemManager = module.HeaterSystemManager
+    
+    def make_manager(self, seed=7, env_temp=30.0, time_constant=25.0):
+        data_manager = Mock(spec=["blocks", "environmental_temp"])
+        data_manager.blocks = [Mock(block_number=i, track_heater=[0, 1]) for i in range(1, 6)]
+        data_manager.environmental_temp = env_temp
+        return self.HeaterSystemManager(data_manager, time_constant=time_constant, seed=seed)
+    
+    def test_seeded_runs_are_identical(self):
+        """Same seed and sim times -> same temperatures"""
+        print("\n=== TEST CASE 14a: Seeded Determinism ===")
+        
+        first, second = self.make_manager(seed=3), self.make_manager(seed=3)
+        for t in range(0, 60, 5):
+            first.update_all_temperatures(sim_time=float(t))
+            second.update_all_temperatures(sim_time=float(t))
+        
+        print(f"Temperatures: {first.block_temperatures}")
+        self.assertEqual(first.block_temperatures, second.block_temperatures)
+        print("✅ Seeded runs match\n")
+    
+    def test_reports_only_flipped_heaters(self):
+        """Only blocks whose heater changed state are reported"""
+        print("\n=== TEST CASE 14b: Flip Reporting ===")
+        
+        heater = self.make_manager()
+        heater.data_manager.blocks[2].track_heater = [0, 0]  # Broken heater never switches
+        heater.sync_from_blocks()
+        
+        flipped = heater.update_all_temperatures(sim_time=0.0)
+        print(f"First step flipped: {flipped}")
+        self.assertEqual(flipped, [1, 2, 4, 5])
+        self.assertEqual(heater.data_manager.blocks[0].track_heater, [1, 1])
+        self.assertEqual(heater.data_manager.blocks[2].track_heater, [0, 0])
+        
+        # Still heating - nothing new to report
+        self.assertEqual(heater.update_all_temperatures(sim_time=1.0), [])
+        print("✅ Only state changes reported\n")
+    
+    def test_time_constant_controls_warm_up(self):
+        """One time constant covers ~63% of the gap to the heated temperature"""
+        print("\n=== TEST CASE 14c: Time Constant ===")
+        
+        heater = self.make_manager(time_constant=10.0)
+        heater.noise_std = 0.0
+        heater.step(dt=0.0)        # Heaters switch on
+        heater.step(dt=10.0)       # One time constant later
+        
+        max_temp = heater.target_temperature + heater.max_overshoot
+        expected = max_temp + (30.0 - max_temp) * 0.36788
+        print(f"Block 1 after 1 tau: {heater.get_block_temperature(1)}°F (expected {expected:.1f}°F)")
+        self.assertAlmostEqual(heater.get_block_temperature(1), expected, delta=0.1)
+        print("✅ Warm-up follows the time constant\n")
+
+
+class TestCase15_FailureIndexAndEvents(unittest.TestCase):
+    """Test Case 15: Murphy failure bitsets and change stream"""
+    
+    def setUp(self):
+        # MurphyTrackFailures is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MurphyTrackFailures.py")
+        spec = importlib.util.spec_from_file_location("RealMurphyTrackFailures", path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        
+        data_manager = Mock()
+        data_manager.blocks = [Mock(block_number=i, occupancy=0, beacon=[0] * 8) for i in range(1, 11)]
+        self.sim_time = [100.0]
+        self.murphy = self.module.MurphyTrackFailures(
+            data_manager, time_source=lambda: self.sim_time[0]
+        )
+        self.events = []
+        self.murphy.subscribe(self.events.append)
+    
+    def test_failure_bitsets(self):
+        """Failed blocks are indexed by type without scanning every block"""
+        print("\n=== TEST CASE 15a: Failure Bitsets ===")
+        
+        with patch('builtins.print'):
+            self.murphy.activate_power_failure(3)
+            self.murphy.activate_broken_rail_failure(7)
+        
+        print(f"Failure bits: {self.murphy.failure_bits}")
+        self.assertEqual(self.murphy.failure_bits, {3: self.module.FAILURE_BITS["power"],
+                                                    7: self.module.FAILURE_BITS["broken_rail"]})
+        self.assertFalse(self.murphy.has_power(3))
+        self.assertTrue(self.murphy.has_failure(7))
+        self.assertFalse(self.murphy.has_failure(5))
+        self.assertEqual(self.murphy.get_failure_lists(), {
+            'track_circuit_failures': [],
+            'broken_rail_failures': [7],
+            'power_failures': [3],
+        })
+        print("✅ Failures indexed by type\n")
+    
+    def test_change_stream(self):
+        """Every set/clear is published once with sim timestamp and sequence"""
+        print("\n=== TEST CASE 15b: Change Stream ===")
+        
+        with patch('builtins.print'):
+            self.murphy.activate_track_circuit_failure(2)
+            self.sim_time[0] = 130.0
+            self.murphy.activate_power_failure(2)   # Replaces the track circuit failure
+            self.murphy.clear_failure(4)            # Nothing to clear - no event
+        
+        summary = [(e.sequence, e.block, e.failure, e.active, e.time) for e in self.events]
+        print(f"Events: {summary}")
+        self.assertEqual(summary, [
+            (1, 2, "track_circuit", True, 100.0),
+            (2, 2, "track_circuit", False, 130.0),
+            (3, 2, "power", True, 130.0),
+        ])
+        print("✅ Changes published in order\n")
+    
+    def test_changes_since(self):
+        """Receivers can catch up from a sequence number or detect a gap"""
+        print("\n=== TEST CASE 15c: Catch-Up and Gap Detection ===")
+        
+        self.murphy.change_log = self.module.deque(maxlen=2)
+        with patch('builtins.print'):
+            for block in (1, 2, 3):
+                self.murphy.activate_broken_rail_failure(block)
+        
+        self.assertEqual([e.block for e in self.murphy.changes_since(1)], [2, 3])
+        self.assertEqual(self.murphy.changes_since(3), [])
+        self.assertIsNone(self.murphy.changes_since(0))  # Event 1 already dropped
+        print("✅ Missed changes detected\n")
+
+
+class TestCase16_StationEvents(unittest.TestCase):
+    """Test Case 16: Event-driven station arrival, stop and departure"""
+    
+    def setUp(self):
+        from StationEvents import StationEventTracker
+        self.stations = [(65, "GLENBURY"), (73, "DORMONT")]
+        self.tracker = StationEventTracker(self.stations)
+    
+    def test_arrival_on_block_enter(self):
+        """Entering a station block raises an arrival, other blocks raise nothing"""
+        print("\n=== TEST CASE 16a: Arrival Event ===")
+        
+        self.assertEqual(self.tracker.on_block_enter(1, 64, 10.0), [])
+        events = self.tracker.on_block_enter(1, 65, 12.5)
+        print(f"Events: {events}")
+        self.assertEqual([(e.kind, e.station, e.time) for e in events], [("arrival", "GLENBURY", 12.5)])
+        print("✅ Arrival raised from occupancy update\n")
+    
+    def test_stop_and_departure_from_authority(self):
+        """Authority 3 -> 0 at a station is a stop, 0 -> 2 is the departure"""
+        print("\n=== TEST CASE 16b: Stop and Departure ===")
+        
+        self.assertEqual(self.tracker.on_authority(1, 73, 3), [])
+        stop = self.tracker.on_authority(1, 73, 0)
+        self.assertEqual([(e.kind, e.block) for e in stop], [("stop", 73)])
+        self.assertEqual(self.tracker.stopped_at, {1: 73})
+        
+        # Repeated 0 authority does not board passengers twice
+        self.assertEqual(self.tracker.on_authority(1, 73, 0), [])
+        
+        departure = self.tracker.on_authority(1, 73, 2)
+        self.assertEqual([(e.kind, e.station) for e in departure], [("departure", "DORMONT")])
+        self.assertEqual(self.tracker.stopped_at, {})
+        print("✅ Stop and departure raised once each\n")
+    
+    def test_stop_away_from_station_and_index_sync(self):
+        """No stop outside a station; index follows changes to station_location"""
+        print("\n=== TEST CASE 16c: Station Index ===")
+        
+        self.tracker.on_authority(2, 40, 5)
+        self.assertEqual(self.tracker.on_authority(2, 40, 0), [])
+        
+        self.stations.append((40, "NEW STATION"))
+        self.tracker.sync(self.stations)
+        self.assertEqual(self.tracker.station_at(40), "NEW STATION")
+        print("✅ Index rebuilt when stations change\n")
+
+
+class TestCase17_PassengerDemand(unittest.TestCase):
+    """Test Case 17: Stochastic passenger demand with OD matrix"""
+    
+    def setUp(self):
+        from PassengerDemand import PassengerDemandModel
+        self.Model = PassengerDemandModel
+        self.stations = [2, 9, 16, 22]
+    
+    def test_seeded_and_peak_rates(self):
+        """Same seed gives same demand; the 08:00 peak is busier than 03:00"""
+        print("\n=== TEST CASE 17a: Seeded Arrivals and Peaks ===")
+        
+        first = self.Model(self.stations, seed=11, start_hour=8.0)
+        second = self.Model(self.stations, seed=11, start_hour=8.0)
+        for t in range(60, 1800, 60):
+            first.step(sim_time=float(t))
+            second.step(sim_time=float(t))
+        self.assertTrue((first.waiting == second.waiting).all())
+        
+        night = self.Model(self.stations, seed=11, start_hour=3.0)
+        night.step(dt=1800.0)
+        print(f"Peak waiting: {first.waiting.sum()}, night waiting: {night.waiting.sum()}")
+        self.assertGreater(first.waiting.sum(), night.waiting.sum())
+        
+        # Nobody waits for the station they are already at
+        self.assertEqual(int(first.waiting.diagonal().sum()), 0)
+        print("✅ Reproducible, time-of-day dependent demand\n")
+    
+    def test_board_and_alight_follow_destinations(self):
+        """Passengers board at their origin and alight at their destination"""
+        print("\n=== TEST CASE 17b: Origin-Destination Flow ===")
+        
+        od = [[0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+        model = self.Model(self.stations, seed=5, od_matrix=od, base_rate_per_hour=600.0)
+        model.step(dt=600.0)
+        waiting = model.waiting_at(2)
+        
+        boarded = model.board(1, 2)
+        self.assertEqual(boarded, waiting)
+        self.assertEqual(model.waiting_at(2), 0)
+        self.assertEqual(model.alight(1, 16), 0)          # Nobody is going to block 16
+        self.assertEqual(model.alight(1, 9), boarded)      # Everyone gets off at block 9
+        self.assertEqual(model.onboard_count(1), 0)
+        print(f"✅ {boarded} passengers rode 2 -> 9\n")
+    
+    def test_capacity_limit(self):
+        """Boarding never exceeds the train's capacity"""
+        print("\n=== TEST CASE 17c: Capacity Limit ===")
+        
+        model = self.Model(self.stations, seed=2, base_rate_per_hour=5000.0, capacity=222)
+        model.step(dt=3600.0)
+        total_waiting = model.waiting_at(2)
+        boarded = model.board(7, 2)
+        print(f"Waiting: {total_waiting}, boarded: {boarded}")
+        self.assertEqual(boarded, 222)
+        self.assertEqual(model.waiting_at(2), total_waiting - 222)
+        self.assertEqual(model.board(7, 9), 0)  # Train is full
+        print("✅ Train filled to capacity, the rest keep waiting\n")
+
+
+
+class TestCase18_CompiledTrackLayout(unittest.TestCase):
+    """Test Case 18: Cached binary track layout"""
+    
+    def setUp(self):
+        import tempfile
+        import TrackLayout
+        self.TrackLayout = TrackLayout
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "green_line.txt")
+        with open(self.source, "w") as f:
+            f.write("Line,Block,Section,Infrastructure\n"
+                    "Green,1,A,Light\n"
+                    "Green,2,A,STATION; PIONEER\n"
+                    "Green,3,A,\n"
+                    "Red,9,C,Switch (75-yard,75-76)\n")
+    
+    def tearDown(self):
+        self.TrackLayout._loaded.clear()
+        self.tmp.cleanup()
+    
+    def test_compile_and_load(self):
+        """Compiled layout keeps every block, section and infrastructure cell"""
+        print("\n=== TEST CASE 18a: Compile and Memory-Map Layout ===")
+        
+        layout = self.TrackLayout.load_layout(self.source)
+        self.assertEqual(layout.lines, ["Green", "Red"])
+        self.assertEqual(layout.blocks("Green")["block_number"].tolist(), [1, 2, 3])
+        
+        rows = layout.rows("Green")
+        self.assertEqual(rows[1]["section"], "A")
+        self.assertEqual(rows[1]["infrastructure"], "STATION; PIONEER")
+        self.assertEqual(rows[2]["infrastructure"], "")
+        # Commas inside the infrastructure cell are kept
+        self.assertEqual(layout.rows("Red")[0]["infrastructure"], "Switch (75-yard,75-76)")
+        print("✅ Layout compiled and loaded without pandas\n")
+    
+    def test_rebuilt_only_when_source_changes(self):
+        """Same sources reuse the compiled file; edited sources get a new one"""
+        print("\n=== TEST CASE 18b: Content-Hash Cache ===")
+        
+        first = self.TrackLayout.load_layout(self.source)
+        self.TrackLayout._loaded.clear()
+        mtime = os.path.getmtime(first.path)
+        second = self.TrackLayout.load_layout(self.source)
+        self.assertEqual(second.path, first.path)
+        self.assertEqual(os.path.getmtime(second.path), mtime)
+        
+        with open(self.source, "a") as f:
+            f.write("Green,4,B,Light\n")
+        third = self.TrackLayout.load_layout(self.source)
+        self.assertNotEqual(third.path, first.path)
+        self.assertEqual(len(third.blocks("Green")), 4)
+        print("✅ Compiled layout reused until the source changed\n")
+    
+    def test_invalid_sources_rejected(self):
+        """Duplicate blocks and damaged files are reported"""
+        print("\n=== TEST CASE 18c: Layout Validation ===")
+        
+        with open(self.source, "a") as f:
+            f.write("Green,2,A,Light\n")
+        with self.assertRaises(self.TrackLayout.LayoutError):
+            self.TrackLayout.load_layout(self.source)
+        
+        damaged = os.path.join(self.tmp.name, "damaged.bin")
+        with open(damaged, "wb") as f:
+            f.write(b"not a layout" * 10)
+        with self.assertRaises(self.TrackLayout.LayoutError):
+            self.TrackLayout.TrackLayout(damaged)
+        print("✅ Invalid layouts rejected\n")
+
+
+
+class _FakeText:
+    """Minimal stand-in for a tk.Text event log (counts widget calls)"""
+    
+    def __init__(self):
+        self.lines = []
+        self.inserts = 0
+    
+    def config(self, **kwargs):
+        pass
+    
+    def see(self, index):
+        pass
+    
+    def insert(self, index, text):
+        self.inserts += 1
+        self.lines.extend(text.split("\n")[:-1])
+    
+    def index(self, index):
+        return f"{len(self.lines) + 1}.0"
+    
+    def delete(self, start, end):
+        del self.lines[:int(end.split(".")[0]) - 1]
+
+
+class TestCase19_TerminalLogSink(unittest.TestCase):
+    """Test Case 19: Bounded, batched terminal event log"""
+    
+    def setUp(self):
+        import TerminalLog
+        self.TerminalLog = TerminalLog
+        self.terminal = _FakeText()
+    
+    def test_batched_flush(self):
+        """Many messages reach the terminal in one insert per flush"""
+        print("\n=== TEST CASE 19a: Batched Flush ===")
+        
+        sink = self.TerminalLog.TerminalLogSink([self.terminal], level=self.TerminalLog.DEBUG)
+        for i in range(50):
+            sink.log(f"Train 1 entered block {i}")
+        self.assertEqual(self.terminal.inserts, 0)  # Nothing touches the widget until flush
+        
+        self.assertEqual(sink.flush(), 50)
+        self.assertEqual(self.terminal.inserts, 1)
+        self.assertEqual(self.terminal.lines[-1], "Train 1 entered block 49")
+        self.assertEqual(sink.flush(), 0)
+        print("✅ 50 messages written with a single insert\n")
+    
+    def test_level_filtering(self):
+        """Debug routing messages are dropped at INFO level"""
+        print("\n=== TEST CASE 19b: Level Filtering ===")
+        
+        sink = self.TerminalLog.TerminalLogSink([self.terminal])
+        self.assertFalse(sink.log("[SWITCH DEBUG] Block 27: train_idx=0"))
+        self.assertTrue(sink.log("Switch 27: Reverse (27→76)"))
+        self.assertTrue(sink.log("[ERROR] lost connection"))
+        sink.flush()
+        self.assertEqual(self.terminal.lines, ["Switch 27: Reverse (27→76)", "[ERROR] lost connection"])
+        print("✅ Only INFO and above reached the terminal\n")
+    
+    def test_bounded_memory(self):
+        """Ring buffer and terminal trimming keep memory flat"""
+        print("\n=== TEST CASE 19c: Bounded Buffer and Terminal ===")
+        
+        sink = self.TerminalLog.TerminalLogSink([self.terminal], max_lines=100, max_pending=200)
+        for frame in range(10):
+            for i in range(300):
+                sink.log(f"frame {frame} line {i}")
+            self.assertLessEqual(len(sink.pending), 200)
+            sink.flush()
+            self.assertLessEqual(len(self.terminal.lines), 100)
+        self.assertEqual(self.terminal.lines[-1], "frame 9 line 299")
+        print(f"✅ Terminal holds {len(self.terminal.lines)} lines after 3000 messages\n")
+
+
+
+class TestCase20_BeaconTable(unittest.TestCase):
+    """Test Case 20: Precomputed beacon payloads"""
+    
+    def setUp(self):
+        from BeaconTable import BeaconTable
+        blocks = [Mock(block_number=n, length=100.0) for n in range(1, 77)]
+        routing = {27: {"normal": 28, "reverse": 76}, 38: {"normal": 39, "reverse": 71}}
+        stations = [(7, "SHADYSIDE"), (25, "PENN STATION"), (35, "STEEL PLAZA"), (45, "FIRST AVE")]
+        self.table = BeaconTable()
+        self.built = self.table.build_line("Red Line", blocks, routing, stations, {35: "STATION; STEEL PLAZA; UNDERGROUND"})
+        self.table.build_line("Green Line", blocks, {}, stations)
+    
+    def test_payloads_precomputed_for_both_positions(self):
+        """Each beacon has a payload for normal and reverse"""
+        print("\n=== TEST CASE 20a: Precomputed Beacon Payloads ===")
+        
+        self.assertEqual(self.built, 2)
+        normal = self.table.entries[("Red Line", 27, "normal")]
+        reverse = self.table.entries[("Red Line", 27, "reverse")]
+        self.assertEqual(normal["command"], "Beacon1")
+        self.assertFalse(normal["value"])
+        self.assertTrue(reverse["value"])
+        self.assertEqual(normal["branch"], 28)
+        self.assertEqual(reverse["branch"], 76)
+        # Normal route runs 28..34 (7 blocks) to Steel Plaza, never back through 27
+        self.assertEqual(normal["next_station"], "STEEL PLAZA")
+        self.assertEqual(normal["station_distance"], 700.0)
+        self.assertFalse(self.table.is_beacon("Green Line", 27))
+        print("✅ Branch, next station and distance computed at load time\n")
+    
+    def test_switch_change_invalidates(self):
+        """Lookups follow the switch; unchanged switches send nothing"""
+        print("\n=== TEST CASE 20b: Switch Change Lookup ===")
+        
+        self.assertIsNotNone(self.table.set_switch("Red Line", 38, "normal"))
+        self.assertIsNone(self.table.set_switch("Red Line", 38, "normal"))
+        self.assertFalse(self.table.lookup("Red Line", 38)["value"])
+        
+        payload = self.table.set_switch("Red Line", 38, "reverse")
+        self.assertEqual(payload["command"], "Beacon2")
+        self.assertTrue(self.table.lookup("Red Line", 38)["value"])
+        self.assertIsNone(self.table.set_switch("Red Line", 32, "reverse"))  # Switch without a beacon
+        self.assertIsNone(self.table.lookup("Red Line", 40))
+        print("✅ Beacon lookups follow switch changes\n")
+
+
+
+class TestCase21_TrackModelEngine(unittest.TestCase):
+    """Test Case 21: Tk-free TrackModel engine API"""
+    
+    def setUp(self):
+        # UI_Variables is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UI_Variables.py")
+        spec = importlib.util.spec_from_file_location("RealUIVariables", path)
+        ui_variables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_variables)
+        from Track_Blocks import Block
+        from TrackLineManager import TrackLine
+        from TrackModel import TrackModel
+        
+        self.occupancy_updates = []
+        
+        class RecordingModel(TrackModel):
+            def send_block_occupancy_update(model, block_num, occupancy):
+                self.occupancy_updates.append((model.get_current_line(), block_num, occupancy))
+        
+        self.model = RecordingModel()
+        for name, count in (("Green Line", 150), ("Red Line", 76)):
+            dm = ui_variables.TrackDataManager()
+            dm.blocks = [Block(i, length=100.0, speed_limit=70) for i in range(1, count + 1)]
+            for b in dm.blocks:
+                b.occupancy = 0
+            dm.station_location = [(7, "SHADYSIDE"), (35, "STEEL PLAZA")]
+            dm.initialize_bidirectional_directions(name)
+            line = TrackLine(name, dm)
+            line.switch_routing = dm.get_current_switch_routing(name)
+            line.murphy_failures = Mock()
+            self.model.add_line(line)
+    
+    def test_dispatch_and_step(self):
+        """Dispatched trains move block by block on their own line"""
+        print("\n=== TEST CASE 21a: Dispatch and Step ===")
+        
+        green = self.model.dispatch(20.0, 100, line="Green Line", actual_speed=20.0)
+        red = self.model.dispatch(20.0, 100, line="Red Line", actual_speed=20.0)
+        self.assertEqual(self.model.get_occupancy("Green Line"), {63: green})
+        self.assertEqual(self.model.get_occupancy("Red Line"), {9: red})
+        
+        for _ in range(105):  # 10.5 s at 20 m/s = 210 m = two 100 m blocks and a bit
+            self.model.step(0.1)
+        self.assertAlmostEqual(self.model.sim_time, 10.5)
+        self.assertEqual(self.model.get_train_locations("Green Line"), {green: 65})
+        self.assertEqual(self.model.get_occupancy("Green Line"), {65: green})
+        self.assertEqual(self.model.get_train_locations("Red Line"), {red: 11})
+        self.assertIn(("Red Line", 10, red), self.occupancy_updates)
+        print(f"✅ Both lines stepped headless, {len(self.occupancy_updates)} occupancy updates\n")
+    
+    def test_switch_and_failure_api(self):
+        """set_switch keeps every switch source in step; inject_failure goes to Murphy"""
+        print("\n=== TEST CASE 21b: Switch and Failure API ===")
+        
+        self.assertTrue(self.model.set_switch(27, "reverse", line="Red Line"))
+        red = self.model.track_lines.get_line("Red Line")
+        block = red.data_manager.blocks[26]
+        self.assertTrue(block.switch_state)
+        self.assertEqual(block.switch_direction, "reverse")
+        self.assertEqual(red.data_manager.switch_states[27], "reverse")
+        self.assertTrue(self.model.beacons.lookup("Red Line", 27)["value"])
+        self.assertFalse(self.model.set_switch(500, "reverse", line="Red Line"))
+        
+        self.model.inject_failure(12, "broken_rail", line="Red Line")
+        red.murphy_failures.activate_broken_rail_failure.assert_called_once_with(12)
+        self.model.inject_failure(12, "broken_rail", active=False, line="Red Line")
+        red.murphy_failures.clear_failure.assert_called_once_with(12)
+        with self.assertRaises(ValueError):
+            self.model.inject_failure(12, "flood", line="Red Line")
+        print("✅ Switches and failures driven through the engine API\n")
+
+
+class TestCase22_LoadHarness(unittest.TestCase):
+    """Test Case 22: Multi-train load harness and its invariants"""
+    
+    def setUp(self):
+        # UI_Variables is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UI_Variables.py")
+        spec = importlib.util.spec_from_file_location("RealUIVariables", path)
+        ui_variables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_variables)
+        import LoadHarness
+        
+        self.LoadHarness = LoadHarness
+        self.lines = lambda: [LoadHarness.build_synthetic_line(name, data_manager_cls=ui_variables.TrackDataManager)
+                              for name in ("Green Line", "Red Line")]
+    
+    def test_short_run_keeps_invariants(self):
+        """A small fleet runs ten sim minutes with every train accounted for"""
+        print("\n=== TEST CASE 22a: Short Load Run ===")
+        
+        harness = self.LoadHarness.LoadHarness(6, duration=600.0, dt=0.5, seed=3, lines=self.lines())
+        report = harness.run(trace_memory=False)
+        self.assertEqual(report["violations"], {})
+        self.assertEqual(report["dispatched"], 6)
+        self.assertEqual(report["retired"] + report["active"], report["dispatched"])
+        self.assertGreater(report["messages"]["occupancy"], 0)
+        self.assertEqual(report["steps"], 1200)
+        self.assertLessEqual(report["step_ms"]["p50"], report["step_ms"]["max"])
+        print(f"✅ {report['dispatched']} trains, {report['messages']['occupancy']} occupancy messages, "
+              f"no violations\n")
+    
+    def test_invariants_catch_corruption(self):
+        """Shared blocks, ghost occupancy and lost trains are all reported"""
+        print("\n=== TEST CASE 22b: Invariant Checks ===")
+        
+        harness = self.LoadHarness.LoadHarness(0, duration=10.0, lines=self.lines())
+        model = harness.model
+        a = model.dispatch(10.0, 100, line="Green Line")
+        b = model.dispatch(10.0, 100, line="Green Line", block=64)
+        harness.retire_at.update({a: 0.0, b: 0.0})
+        self.assertEqual(harness.check_invariants(), 0)
+        
+        green = model.track_lines.get_line("Green Line").data_manager
+        green.train_locations[1] = 63           # b jumps into a's block
+        green.blocks[63].occupancy = b          # ...and leaves 64 marked
+        harness.retire_at[99] = 0.0             # dispatched but never seen again
+        self.assertGreater(harness.check_invariants(), 0)
+        for name in ("shared_block", "ghost_occupancy", "lost_train"):
+            self.assertIn(name, harness.violations)
+        print(f"✅ Violations reported: {harness.violations}\n")
+    
+    def test_green_backward_loop_passes_block_27(self):
+        """Green trains looping back from 150 carry on down past 27 (no 27/28 ping-pong)"""
+        print("\n=== TEST CASE 22c: Green Backward Loop ===")
+        
+        harness = self.LoadHarness.LoadHarness(0, duration=10.0, lines=self.lines())
+        model = harness.model
+        train = model.dispatch(10.0, 100, line="Green Line", block=150)
+        line = model.track_lines.get_line("Green Line")
+        with model.track_lines.using(line):
+            route = [150]
+            for _ in range(4):
+                route.append(model.get_next_block(route[-1], 0))
+        self.assertEqual(route, [150, 28, 27, 26, 25])
+        self.assertEqual(line.train_directions[train], "backward_loop")
+        print(f"✅ Route {route}\n")
+    
+    def test_fleet_circulates_and_retires(self):
+        """Trains pass each other through the single-track sections and go back to the yard"""
+        print("\n=== TEST CASE 22d: Fleet Circulation ===")
+        
+        harness = self.LoadHarness.LoadHarness(10, duration=3600.0, dt=0.5, seed=2, lines=self.lines())
+        report = harness.run(trace_memory=False)
+        self.assertEqual(report["violations"], {})
+        self.assertEqual(report["stalled"], [])
+        self.assertEqual(report["retired"], 10)
+        self.assertNotIn("log", report["messages"])
+        print(f"✅ {report['retired']} trains retired, {report['holds']} holds, no stalls\n")
+    
+    def test_stalled_train_fails_run(self):
+        """A train that stops moving is reported as a violation"""
+        print("\n=== TEST CASE 22e: Stall Invariant ===")
+        
+        harness = self.LoadHarness.LoadHarness(0, duration=30.0, dt=0.5, lines=self.lines(), stall_after=20.0)
+        train = harness.model.dispatch(0.0, 100, line="Green Line", actual_speed=0.0)
+        harness.retire_at[train] = float("inf")
+        harness.last_moved[train] = (63, 0.0)
+        report = harness.run(trace_memory=False)
+        self.assertEqual(report["violations"], {"stalled": 1})
+        self.assertEqual(report["stalled"], [("Green Line", 63, train)])
+        print(f"✅ {report['samples'][0]}\n")
+
+
+class TestCase23_AuthorityLedger(unittest.TestCase):
+    """Test Case 23: Authority tracked in metres from the train's position"""
+    
+    def setUp(self):
+        # UI_Variables is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UI_Variables.py")
+        spec = importlib.util.spec_from_file_location("RealUIVariables", path)
+        ui_variables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_variables)
+        from LoadHarness import build_synthetic_line
+        from TrackModel import TrackModel
+        
+        self.authority_events = []
+        self.station_events = []
+        
+        class RecordingModel(TrackModel):
+            def dispatch_authority_events(model, events):
+                self.authority_events.extend(events)
+            
+            def dispatch_station_events(model, events):
+                self.station_events.extend(events)
+        
+        self.model = RecordingModel()
+        self.model.add_line(build_synthetic_line("Green Line", data_manager_cls=ui_variables.TrackDataManager))
+    
+    def test_ledger(self):
+        """Grants count down with distance and report the stop point once"""
+        print("\n=== TEST CASE 23a: Authority Ledger ===")
+        from AuthorityLedger import AuthorityLedger
+        
+        ledger = AuthorityLedger()
+        self.assertEqual(ledger.remaining(7), float("inf"))
+        ledger.grant(7, 250.0, stop_block=12, blocks=2)
+        self.assertIsNone(ledger.advance(7, 100.0))
+        self.assertAlmostEqual(ledger.remaining(7), 150.0)
+        event = ledger.advance(7, 150.0, time=4.0)
+        self.assertEqual((event.kind, event.train_id, event.block, event.time), ("stop_point", 7, 12, 4.0))
+        self.assertIsNone(ledger.advance(7, 0.0))
+        self.assertEqual(ledger.snapshot(), {7: 0.0})
+        ledger.forget(7)
+        self.assertNotIn(7, ledger)
+        print("✅ 250 m used up, one stop point event\n")
+    
+    def test_train_stops_at_authority_and_resumes(self):
+        """A train stops at the end of its authority and a new grant counts from where it is"""
+        print("\n=== TEST CASE 23b: Stop Point and New Grant ===")
+        
+        train = self.model.dispatch(20.0, 2, line="Green Line", actual_speed=20.0)
+        self.assertAlmostEqual(self.model.get_remaining_authority(train), 300.0)  # 63 + 64 + 65
+        for _ in range(300):  # 30 s at 20 m/s would be 600 m
+            self.model.step(0.1)
+        self.assertEqual(self.model.get_train_locations("Green Line"), {train: 65})
+        self.assertAlmostEqual(self.model.get_remaining_authority(train), 0.0, places=3)
+        self.assertEqual([(e.kind, e.block) for e in self.authority_events], [("stop_point", 65)])
+        
+        self.assertTrue(self.model.set_commanded_authority(train, 1))
+        self.assertAlmostEqual(self.model.get_remaining_authority(train), 100.0, places=3)
+        for _ in range(100):
+            self.model.step(0.1)
+        self.assertEqual(self.model.get_train_locations("Green Line"), {train: 66})
+        self.assertEqual(len(self.authority_events), 2)
+        print(f"✅ Stopped at 65, resumed to 66 on a new 1 block grant\n")
+    
+    def test_grant_follows_route_without_changing_it(self):
+        """Authority is measured along the predicted route and routing state is left alone"""
+        print("\n=== TEST CASE 23c: Route Prediction ===")
+        
+        self.model.set_switch(28, True, line="Green Line")
+        train = self.model.dispatch(20.0, 5, line="Green Line", block=148)
+        line = self.model.track_lines.get_line("Green Line")
+        self.assertAlmostEqual(self.model.get_remaining_authority(train), 600.0)
+        self.assertEqual(line.authority_ledger.stop_block(train), 26)
+        self.assertNotIn(train, line.train_directions)
+        with self.model.track_lines.using(line):
+            self.assertEqual(self.model.predict_route(train, 5), [149, 150, 28, 27, 26])
+        
+        unlimited = self.model.dispatch(20.0, 10 ** 6, line="Green Line", block=10)
+        self.assertEqual(self.model.get_remaining_authority(unlimited), float("inf"))
+        print("✅ 148 → 149 → 150 → 28 → 27 → 26 = 600 m\n")
+    
+    def test_commanded_authority_feeds_station_events(self):
+        """Authority set through the engine API raises station stop and departure events"""
+        print("\n=== TEST CASE 23d: Authority Station Events ===")
+        
+        train = self.model.dispatch(0.0, 3, line="Green Line", block=7)  # SHADYSIDE
+        self.assertEqual(self.station_events, [])
+        self.assertTrue(self.model.set_commanded_authority(train, 0))
+        self.assertEqual([(e.kind, e.block, e.station) for e in self.station_events], [("stop", 7, "SHADYSIDE")])
+        self.assertTrue(self.model.set_commanded_authority(train, 2))
+        self.assertEqual([e.kind for e in self.station_events], ["stop", "departure"])
+        print("✅ Authority 0 at SHADYSIDE stops the train, new authority departs it\n")
+
+
+class TestCase24_SwitchStore(unittest.TestCase):
+    """Test Case 24: Versioned switch store with occupancy locks"""
+    
+    def setUp(self):
+        # UI_Variables is mocked above - load the real module from its file
+        import importlib.util
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UI_Variables.py")
+        spec = importlib.util.spec_from_file_location("RealUIVariables", path)
+        ui_variables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_variables)
+        from LoadHarness import build_synthetic_line
+        from TrackModel import TrackModel
+        
+        self.beacons_sent = []
+        
+        class RecordingModel(TrackModel):
+            def send_beacon(model, beacon_message):
+                self.beacons_sent.append((model.get_current_line(), beacon_message))
+        
+        self.model = RecordingModel()
+        self.red = self.model.add_line(build_synthetic_line("Red Line", data_manager_cls=ui_variables.TrackDataManager))
+    
+    def test_store_versions_and_locks(self):
+        """Changes are versioned and pushed to subscribers; occupied switches are locked"""
+        print("\n=== TEST CASE 24a: Switch Store ===")
+        from SwitchStore import SwitchStore, SwitchPosition
+        
+        occupied = set()
+        store = SwitchStore(20, is_occupied=occupied.__contains__, history=2)
+        seen = []
+        store.subscribe(seen.append)
+        
+        self.assertEqual(SwitchPosition.parse("reverse"), SwitchPosition.REVERSE)
+        self.assertEqual(SwitchPosition.parse(0), SwitchPosition.NORMAL)
+        self.assertTrue(store.set(12, True, source="Track SW"))
+        self.assertTrue(store.set(12, "reverse"))  # Already there - no new version
+        self.assertEqual((store.version, store.direction(12)), (1, "reverse"))
+        self.assertEqual(seen[0], (1, 12, SwitchPosition.REVERSE, SwitchPosition.NORMAL, "Track SW"))
+        
+        occupied.add(12)
+        self.assertFalse(store.set(12, "normal"))
+        self.assertTrue(store.is_reverse(12))
+        self.assertTrue(store.set(12, "normal", force=True))
+        self.assertTrue(store.set(30, 1))  # Grows past the seeded blocks
+        
+        self.assertEqual([c.block for c in store.changes_since(1)], [12, 30])
+        self.assertIsNone(store.changes_since(0))  # Fell out of the history - resync
+        self.assertEqual(store.changes_since(store.version), [])
+        self.assertEqual(len(seen), 3)
+        print(f"✅ {store.version} versions, locked switch held, resync requested\n")
+    
+    def test_engine_routes_and_mirrors_from_store(self):
+        """set_switch moves the store; blocks, beacons and routing follow it"""
+        print("\n=== TEST CASE 24b: Engine Switch Store ===")
+        dm = self.red.data_manager
+        
+        self.assertTrue(self.model.set_switch(27, "reverse", line="Red Line"))
+        self.assertTrue(dm.blocks[26].switch_state)
+        self.assertEqual(dm.switch_states[27], "reverse")
+        self.assertEqual(len(self.beacons_sent), 1)
+        self.assertEqual(self.beacons_sent[0][0], "Red Line")
+        
+        # A train on the switch locks it
+        dm.blocks[51].occupancy = 5
+        self.assertFalse(self.model.set_switch(52, "reverse", line="Red Line"))
+        self.assertTrue(self.model.set_switch(52, "reverse", line="Red Line", force=True))
+        dm.blocks[51].occupancy = 0
+        
+        # Routing reads the store only - a stale block flag is ignored
+        dm.blocks[51].switch_state = False
+        with self.model.track_lines.using(self.red):
+            self.assertEqual(self.model.resolve_switch_state(52), "reverse")
+        print(f"✅ Store version {self.red.switches.version}, mirrors and beacon followed\n")
+
+
+class TestCase25_YardDispatchMessage(unittest.TestCase):
+    """Test Case 25: Speed and Authority yard dispatch through the UI message path"""
+    
+    def setUp(self):
+        # UI_Variables is mocked above - load the real module from its file
+        import importlib.util
+        import queue
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "UI_Variables.py")
+        spec = importlib.util.spec_from_file_location("RealUIVariables", path)
+        ui_variables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(ui_variables)
+        from LoadHarness import build_synthetic_line
+        # TrackModelUI subclasses tk.Tk - give the mocked tkinter a real base class
+        with patch.object(sys.modules['tkinter'], 'Tk', type("Tk", (), {}), create=True):
+            import UI_Structure
+        from TrackModel import TrackModel
+        
+        # The engine part of the UI without its widgets or sockets
+        ui = UI_Structure.TrackModelUI.__new__(UI_Structure.TrackModelUI)
+        TrackModel.__init__(ui)
+        ui.socket_server = MagicMock()
+        ui.terminal_log = MagicMock()
+        ui._inbound_messages = queue.Queue()
+        for widget_method in ("after", "refresh_ui", "send_outputs",
+                              "update_occupied_blocks_display", "update_block_marker"):
+            setattr(ui, widget_method, MagicMock())
+        for line_name in ("Green Line", "Red Line"):
+            ui.add_line(build_synthetic_line(line_name, data_manager_cls=ui_variables.TrackDataManager))
+        self.ui = ui
+    
+    def sent(self, ui_name, command):
+        """Messages sent to ui_name with the given command"""
+        return [c.args[1] for c in self.ui.socket_server.send_to_ui.call_args_list
+                if c.args[0] == ui_name and c.args[1].get("command") == command]
+    
+    def dispatch_message(self, message):
+        """Deliver message the way a socket thread does and handle it on the 'Tk thread'"""
+        self.ui._process_message(message, "Track SW")
+        self.ui.drain_inbound_messages()
+    
+    def test_yard_dispatch_at_block_63(self):
+        """A Wayside command for empty block 63 dispatches a Green Line train from the yard"""
+        print("\n=== TEST CASE 25a: Green Yard Dispatch ===")
+        
+        self.dispatch_message({"command": "Speed and Authority", "block_number": 63, "line": "Green Line",
+                               "commanded_speed": 12.0, "commanded_authority": 3})
+        
+        dm = self.ui.track_lines.get_line("Green Line").data_manager
+        self.assertEqual(dm.active_trains, [1])
+        self.assertEqual(dm.train_locations, [63])
+        self.assertEqual(dm.blocks[62].occupancy, 1)
+        self.assertEqual(self.sent("Train Model", "new_train"),
+                         [{"command": "new_train", "train_id": 1, "block_number": 63, "line": "Green Line"}])
+        self.assertIn(3, [m["value"] for m in self.sent("Train Model", "Commanded Authority")])
+        self.assertEqual(self.sent("Train Model", "block_occupancy")[0]["value"], {63: 1})
+        self.assertGreater(self.ui.get_remaining_authority(1), 0)
+        print("✅ Train 1 dispatched into block 63 and announced to the Train Model\n")
+    
+    def test_yard_dispatch_uses_line_entry_block(self):
+        """A Red Line yard dispatch enters at the Red Line's yard entry block"""
+        print("\n=== TEST CASE 25b: Red Yard Dispatch ===")
+        from TrackModel import YARD_ENTRY_BLOCKS
+        
+        self.dispatch_message({"command": "Speed and Authority", "block_number": "Yard", "line": "Red Line",
+                               "commanded_speed": 10.0, "commanded_authority": 2})
+        
+        red_entry = YARD_ENTRY_BLOCKS["Red Line"]
+        dm = self.ui.track_lines.get_line("Red Line").data_manager
+        self.assertEqual(dm.train_locations, [red_entry])
+        self.assertEqual(self.sent("Train Model", "new_train")[0]["block_number"], red_entry)
+        self.assertEqual(self.sent("CTC", "train_dispatched")[0]["entry_block"], red_entry)
+        self.assertEqual(self.ui.track_lines.get_line("Green Line").data_manager.active_trains, [])
+        print(f"✅ Red Line train entered at block {red_entry}\n")
+    
+    def test_movement_follows_clock_multiplier(self):
+        """The UI movement loop steps trains on sim time, so they keep pace at 10x"""
+        print("\n=== TEST CASE 25c: Movement at 10x ===")
+        
+        wall = [1000.0]
+        with patch("time.time", side_effect=lambda: wall[0]):
+            self.ui.time_multiplier = 10
+            self.dispatch_message({"command": "Speed and Authority", "block_number": 63, "line": "Green Line",
+                                   "commanded_speed": 10.0, "commanded_authority": 10 ** 6})
+            green = self.ui.track_lines.get_line("Green Line")
+            green.train_actual_speeds[1] = 5.0
+            wall[0] += 1.0  # 1 s of wall time = 10 s of sim time at 10x
+            self.ui.update_train_movements()
+        
+        self.assertEqual(green.data_manager.train_locations, [63])
+        self.assertAlmostEqual(green.train_positions_in_block[1], 50.0, places=3)
+        print(f"✅ 5 m/s for 1 s of wall time at 10x = {green.train_positions_in_block[1]:.0f} m\n")
+
+
 def run_comprehensive_tests():
     """Run all comprehensive test cases"""
     print("\n" + "="*70)
@@ -648,7 +1751,22 @@ def run_comprehensive_tests():
         TestCase07_TrainAuthorityMonitoring,
         TestCase08_BeaconTransmission,
         TestCase09_SwitchStateTracking,
-        TestCase10_ControllerBlockSeparation
+        TestCase10_ControllerBlockSeparation,
+        TestCase11_ImageAssetCache,
+        TestCase12_MultiLineSimulation,
+        TestCase13_ContinuousTrainPosition,
+        TestCase14_VectorizedHeaterModel,
+        TestCase15_FailureIndexAndEvents,
+        TestCase16_StationEvents,
+        TestCase17_PassengerDemand,
+        TestCase18_CompiledTrackLayout,
+        TestCase19_TerminalLogSink,
+        TestCase20_BeaconTable,
+        TestCase21_TrackModelEngine,
+        TestCase22_LoadHarness,
+        TestCase23_AuthorityLedger,
+        TestCase24_SwitchStore,
+        TestCase25_YardDispatchMessage
     ]
     
     for test_class in test_classes:
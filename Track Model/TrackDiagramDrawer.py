@@ -2,6 +2,7 @@ import tkinter as tk
 from typing import Dict, Any
 from PIL import Image, ImageTk
 import os
+from ImageAssetCache import image_cache
 
 class TrackDiagramDrawer:
     """
@@ -152,10 +153,8 @@ class TrackDiagramDrawer:
         for icon_path in possible_paths:
             if os.path.exists(icon_path):
                 try:
-                    img = Image.open(icon_path)
-                    img = img.resize(size, Image.Resampling.LANCZOS)
-                    self.station_photo = ImageTk.PhotoImage(img)
-                    self.station_image = img
+                    self.station_photo = image_cache.get_photo(icon_path, size)
+                    self.station_image = image_cache.get_image(icon_path, size)
                     print(f"[TrackDiagramDrawer] Station icon loaded from: {icon_path}")
                     return
                 except Exception as e:
@@ -185,10 +184,8 @@ class TrackDiagramDrawer:
         for icon_path in possible_paths:
             if os.path.exists(icon_path):
                 try:
-                    img = Image.open(icon_path)
-                    img = img.resize(size, Image.Resampling.LANCZOS)
-                    self.crossing_photo = ImageTk.PhotoImage(img)
-                    self.crossing_image = img
+                    self.crossing_photo = image_cache.get_photo(icon_path, size)
+                    self.crossing_image = image_cache.get_image(icon_path, size)
                     print(f"[TrackDiagramDrawer] Crossing icon loaded from: {icon_path}")
                     return
                 except Exception as e:
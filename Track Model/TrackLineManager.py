@@ -0,0 +1,248 @@
+import threading
+from contextlib import contextmanager
+
+from StationEvents import StationEventTracker
+from AuthorityLedger import AuthorityLedger
+from SwitchStore import SwitchStore
+
+
+class TrackLine:
+    # Holds everything that belongs to one simulated track line.
+
+    """
+    Attributes:
+        name: Line name as used by the UI ("Green Line" / "Red Line")
+        data_manager: TrackDataManager with this line's blocks, trains and stations
+        file_manager: FileUploadManager bound to this line's data_manager
+        heater_manager: HeaterSystemManager for this line's blocks
+        murphy_failures: MurphyTrackFailures for this line's blocks
+        train_actual_speeds / train_positions_in_block / last_movement_update /
+        train_directions / trains_at_yard:
+            Per-train movement state for trains running on this line
+        authority_ledger: Remaining authority (m) of the trains on this line
+        switches: SwitchStore - the authoritative switch positions of this line
+            (block.switch_state / switch_direction and data_manager.switch_states
+            are kept as mirrors for the tables and the Test UI)
+        server: LineServer that tags this line's outbound messages (None until
+            the line is attached to a socket server)
+    """
+
+    # Attributes that TrackModelUI reads from self.<name> and that must follow
+    # whichever line is currently being simulated or displayed.
+    BOUND_ATTRIBUTES = (
+        "data_manager",
+        "file_manager",
+        "heater_manager",
+        "murphy_failures",
+        "switch_routing",
+        "switches",
+        "train_actual_speeds",
+        "train_positions_in_block",
+        "last_movement_update",
+        "train_directions",
+        "authority_ledger",
+        "trains_at_yard",
+        "station_events",
+        "server",
+    )
+
+    def __init__(self, name, data_manager=None, file_manager=None,
+                 heater_manager=None, murphy_failures=None):
+        self.name = name
+        self.data_manager = data_manager
+        self.file_manager = file_manager
+        self.heater_manager = heater_manager
+        self.murphy_failures = murphy_failures
+        self.switch_routing = None
+        self.server = None
+
+        # Movement / routing state (one entry per train on this line)
+        self.train_actual_speeds = {}
+        self.train_positions_in_block = {}
+        self.last_movement_update = {}
+        self.train_directions = {}
+        self.trains_at_yard = set()
+        self.authority_ledger = AuthorityLedger()
+
+        # Switch positions (occupied switch blocks are locked)
+        self.switches = SwitchStore(is_occupied=self._block_occupied)
+        self.switches.subscribe(self._mirror_switch)
+        self.reload_switches()
+
+        # Station arrival / stop / departure tracking
+        station_location = getattr(data_manager, "station_location", None)
+        self.station_events = StationEventTracker(
+            station_location if isinstance(station_location, (list, tuple)) else ()
+        )
+
+    @property
+    def track_tag(self):
+        """Short line name used in Wayside payloads ("Green" / "Red")."""
+        return self.name.split()[0]
+
+    @property
+    def line_indicator(self):
+        """Numeric line id used by Wayside arrays (0 = Green, 1 = Red)."""
+        return 1 if self.track_tag == "Red" else 0
+
+    def reload_switches(self):
+        """Re-seed the switch store from data_manager's blocks (after a load or upload)."""
+        blocks = getattr(self.data_manager, "blocks", None)
+        if isinstance(blocks, list):
+            self.switches.load(blocks, getattr(self.data_manager, "switch_blocks", ()))
+
+    def _block_occupied(self, block_num):
+        """True if a train is in block_num (locks its switch)."""
+        blocks = getattr(self.data_manager, "blocks", None)
+        if not isinstance(blocks, list) or not (1 <= block_num <= len(blocks)):
+            return False
+        return bool(getattr(blocks[block_num - 1], "occupancy", 0))
+
+    def _mirror_switch(self, change):
+        """Copy a switch change onto the block fields the UI still reads."""
+        dm = self.data_manager
+        if dm is None:
+            return
+        blocks = getattr(dm, "blocks", None)
+        if isinstance(blocks, list) and 1 <= change.block <= len(blocks):
+            block = blocks[change.block - 1]
+            block.switch_state = bool(change.position)
+            block.switch_direction = change.position.direction
+        if isinstance(getattr(dm, "switch_states", None), dict):
+            dm.switch_states[change.block] = change.position.direction
+        if isinstance(getattr(dm, "switch_blocks", None), set):
+            dm.switch_blocks.add(change.block)
+
+    def has_train(self, train_id):
+        """True if train_id is running on this line."""
+        if self.data_manager is None:
+            return False
+        active = getattr(self.data_manager, "active_trains", [])
+        return train_id in active or str(train_id) in [str(t) for t in active]
+
+    def capture(self, target):
+        """Copy the bound attributes back from target (in case target rebound any of them)."""
+        for attr in self.BOUND_ATTRIBUTES:
+            if hasattr(target, attr):
+                setattr(self, attr, getattr(target, attr))
+
+    def bind(self, target):
+        """Point target's bound attributes at this line's state."""
+        for attr in self.BOUND_ATTRIBUTES:
+            setattr(target, attr, getattr(self, attr))
+
+
+class TrackLineManager:
+    # Keeps one TrackLine per line and switches the UI between them.
+
+    """
+    Every line is stepped on every simulation tick; the UI line selection only
+    chooses which line is displayed. While a line is being stepped it is bound
+    to the UI object so the existing routing/occupancy code works unchanged.
+    """
+
+    LINE_ALIASES = {
+        "green": "Green Line",
+        "green line": "Green Line",
+        "0": "Green Line",
+        "red": "Red Line",
+        "red line": "Red Line",
+        "1": "Red Line",
+    }
+
+    def __init__(self, target):
+        self.target = target
+        self.lines = {}
+        self.displayed_line = None
+        self.bound_line = None
+        self._lock = threading.RLock()
+
+    def add_line(self, line):
+        """Register a TrackLine."""
+        self.lines[line.name] = line
+        return line
+
+    def get_line(self, name):
+        """Look up a line by name, short name or line indicator."""
+        if name is None:
+            return None
+        if name in self.lines:
+            return self.lines[name]
+        return self.lines.get(self.LINE_ALIASES.get(str(name).strip().lower()))
+
+    def __iter__(self):
+        return iter(list(self.lines.values()))
+
+    def __len__(self):
+        return len(self.lines)
+
+    def line_for_train(self, train_id):
+        """Return the line a train is running on, or None."""
+        for line in self:
+            if line.has_train(train_id):
+                return line
+        return None
+
+    def show(self, name):
+        """Bind the named line to the UI as the displayed line."""
+        line = self.get_line(name)
+        if line is None:
+            return None
+        with self._lock:
+            if self.bound_line is not None:
+                self.bound_line.capture(self.target)
+            line.bind(self.target)
+            self.bound_line = line
+            self.displayed_line = line
+        return line
+
+    def is_displayed(self):
+        """True if the line currently bound to the UI is the displayed one."""
+        return self.bound_line is None or self.bound_line is self.displayed_line
+
+    @contextmanager
+    def using(self, line):
+        """
+        Temporarily bind line to the UI (for stepping or handling a message),
+        then restore whatever was bound before.
+        """
+        if isinstance(line, str):
+            line = self.get_line(line)
+        with self._lock:
+            previous = self.bound_line
+            if line is None or line is previous:
+                yield previous
+                return
+            if previous is not None:
+                previous.capture(self.target)
+            line.bind(self.target)
+            self.bound_line = line
+            try:
+                yield line
+            finally:
+                line.capture(self.target)
+                if previous is not None:
+                    previous.bind(self.target)
+                self.bound_line = previous
+
+
+class LineServer:
+    """
+    One line's handle on the shared socket server.
+
+    send_to_ui tags every dict message with the line's name (messages that
+    already set 'line' are left as they are); anything else is the server's.
+    """
+
+    def __init__(self, server, line_name):
+        self.socket_server = server
+        self.line_name = line_name
+
+    def send_to_ui(self, ui_name, message):
+        if isinstance(message, dict) and "line" not in message:
+            message = dict(message)
+            message["line"] = self.line_name
+        return self.socket_server.send_to_ui(ui_name, message)
+
+    def __getattr__(self, name):
+        return getattr(self.socket_server, name)
@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+
+# One block boundary event: kind is "leave" or "enter", time is the
+# interpolated moment (same clock as the caller's t_start) the train's
+# front crossed the boundary.
+BlockEvent = namedtuple("BlockEvent", ["kind", "train_id", "block", "time"])
+
+# Safety limit so a zero-length block (or bad data) can never spin forever
+MAX_CROSSINGS_PER_STEP = 256
+
+
+def hit_crossing_limit(events):
+    """
+    True if advance_through_blocks stopped at MAX_CROSSINGS_PER_STEP.
+
+    The rest of the step was not travelled: the train sits at the start of the
+    block it entered last, at events[-1].time, and the caller should resume
+    the move from that time on its next step.
+    """
+    return len(events) >= 2 * MAX_CROSSINGS_PER_STEP
+
+
+def advance_through_blocks(train_id, block, position, speed, t_start, dt,
+                           get_block_length, on_boundary, max_distance=None):
+    """
+    Move a train continuously for dt seconds and report every block boundary it crosses.
+
+    Unlike a single "overflow into the next block" per tick, this walks through
+    as many blocks as the distance covers, so short blocks are never skipped at
+    high clock multipliers and each crossing gets its own timestamp.
+
+    Args:
+        train_id: Train being moved (copied into the events)
+        block: Block the train is in at t_start
+        position: Distance already travelled inside that block (m)
+        speed: Actual speed (m/s), assumed constant over the step
+        t_start: Time at the start of the step (s)
+        dt: Step length (s)
+        get_block_length: fn(block) -> length in metres
+        on_boundary: fn(block, crossing_time) -> next block, or None to hold
+            the train at the end of block (end of authority, yard, ...)
+        max_distance: Furthest the train may go this step (m), e.g. its
+            remaining authority (None = no limit)
+
+    Returns:
+        (block, position, events) - where the train ended up and the ordered
+        list of BlockEvent("leave"/"enter") for every boundary crossed (at most
+        MAX_CROSSINGS_PER_STEP crossings - see hit_crossing_limit)
+    """
+    events = []
+    if speed <= 0 or dt <= 0:
+        return block, position, events
+
+    remaining = speed * dt
+    if max_distance is not None:
+        remaining = min(remaining, max(max_distance, 0.0))
+    travelled = 0.0
+
+    for _ in range(MAX_CROSSINGS_PER_STEP):
+        length = max(float(get_block_length(block)), 0.0)
+        to_boundary = length - position
+
+        if remaining < to_boundary:
+            # Step ends inside this block
+            return block, position + remaining, events
+
+        # Time the front of the train reaches the end of this block
+        crossing_time = t_start + (travelled + max(to_boundary, 0.0)) / speed
+        next_block = on_boundary(block, crossing_time)
+
+        if not next_block:
+            # Held at the boundary (no authority / left the line)
+            return block, max(length, position), events
+
+        events.append(BlockEvent("leave", train_id, block, crossing_time))
+        events.append(BlockEvent("enter", train_id, next_block, crossing_time))
+
+        step = max(to_boundary, 0.0)
+        travelled += step
+        remaining -= step
+        block = next_block
+        position = 0.0
+
+    # Hit the crossing limit - stop at the start of the current block
+    # (see hit_crossing_limit: the caller carries the rest of the step over)
+    return block, position, events
@@ -8,6 +8,7 @@ import tkinter.simpledialog as simpledialog
 import os
 import sys
 import random
+import queue
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 # TEMPORARILY COMMENTED OUT - Test UI disabled
 # from Test_UI import TrackModelTestUI
@@ -15,7 +16,12 @@ from FileUploadManager import FileUploadManager
 from TrackDiagramDrawer import TrackDiagramDrawer
 from HeaterSystemManager import HeaterSystemManager
 from TrainSocketServer import TrainSocketServer
-from MurphyTrackFailures import MurphyTrackFailures
+from MurphyTrackFailures import MurphyTrackFailures, FAILURE_BITS
+from ImageAssetCache import image_cache
+from TrackLineManager import TrackLine
+from TrackModel import TrackModel
+from StationEvents import StationEventTracker
+from TerminalLog import TerminalLogSink, INFO, WARNING
 
 
 def load_socket_config():
@@ -103,9 +109,9 @@ def _enable_debug_mode(app):
     print("🔧"*35 + "\n")
     
     # Wrap the send method
-    if hasattr(app, 'server'):
-        _ORIGINAL_SEND_TO_UI = app.server.send_to_ui
-        app.server.send_to_ui = lambda ui_name, msg: _wrapped_send_to_ui(app.server, ui_name, msg)
+    if getattr(app, 'socket_server', None) is not None:
+        _ORIGINAL_SEND_TO_UI = app.socket_server.send_to_ui
+        app.socket_server.send_to_ui = lambda ui_name, msg: _wrapped_send_to_ui(app.socket_server, ui_name, msg)
         print("✓ Wrapped server.send_to_ui() method\n")
     
     # Immediate test - DISABLED (trains should only stop at stations naturally)
@@ -170,8 +176,8 @@ def _immediate_boarding_test(app):
 # END DEBUG CODE
 # ============================================================================
 
-class TrackModelUI(tk.Tk):
-    # The main user interface for the Track Model system.
+class TrackModelUI(TrackModel, tk.Tk):
+    # The main user interface for the Track Model system (a view on top of the TrackModel engine).
 
     """
     Attributes:
@@ -198,19 +204,24 @@ class TrackModelUI(tk.Tk):
         # Socket server setup
         module_config = load_socket_config()
         config = module_config.get("Track Model", {"port": 4})
-        self.server = TrainSocketServer(
+        # Each line sends through its own LineServer (self.server while the line
+        # is bound), which tags the messages with the line - both lines run at once
+        self.socket_server = TrainSocketServer(
             port=config["port"],
             ui_id="Track Model"
         )
-        self.server.set_allowed_connections(["Track SW","Track HW", "Train Model", "CTC"])
-        self.server.start_server(self._process_message)
-        self.server.connect_to_ui('localhost', 12341, "CTC")
-        self.server.connect_to_ui('localhost', 12345, "Train Model")
-        self.server.connect_to_ui('localhost', 12342,  'Track SW')
-        self.server.connect_to_ui('localhost', 12343,'Track HW')
-
-        self.previous_beacon_states = {27: None, 38: None}  # Track previous beacon states to detect changes
+        self.socket_server.set_allowed_connections(["Track SW","Track HW", "Train Model", "CTC"])
+        # Socket threads only queue messages - they are handled on the Tk thread
+        self._inbound_messages = queue.Queue()
+        self.socket_server.start_server(self._process_message)
+        self.socket_server.connect_to_ui('localhost', 12341, "CTC")
+        self.socket_server.connect_to_ui('localhost', 12345, "Train Model")
+        self.socket_server.connect_to_ui('localhost', 12342,  'Track SW')
+        self.socket_server.connect_to_ui('localhost', 12343,'Track HW')
+
         self.terminals = []
+        # Event log messages are buffered and written to the terminals once per frame
+        self.terminal_log = TerminalLogSink(self.terminals, level=INFO)
 
         self.test_block_occupancy(4, 1)
 
@@ -280,17 +291,9 @@ class TrackModelUI(tk.Tk):
 
         self.data_manager.update_station_boarding_data()
         
-        # Track previous authority values to detect when it reaches 0
-        self._previous_train_authority = {}
-        
-        # Track which station block each train is stopped at (for beacon transmission on departure)
-        self._trains_stopped_at_station = {}  # train_id -> block_number
-
-        # Start monitoring station occupancy AFTER everything is ready
-        self.after(1000, self.monitor_station_occupancy)
-        
-        # Start monitoring train authority for passenger boarding
-        self.after(2000, self.monitor_train_authority_for_boarding)
+        # Station arrival / stop / departure events come straight from the
+        # occupancy and authority updates (block -> station index, no polling)
+        self.station_events = StationEventTracker(self.data_manager.station_location)
 
         style = ttk.Style(self)
         style.configure("Large.TCheckbutton", font=("Arial", 11), padding=5)
@@ -325,11 +328,17 @@ class TrackModelUI(tk.Tk):
         # Start temperature loop
         self.after(100, self.start_temperature_update_loop)
         
-        # Initialize train tracking data for actual speed and movement
-        self.train_actual_speeds = {}  # Dictionary to store actual speeds by train ID
-        self.train_positions_in_block = {}  # Track distance traveled in current block (meters)
-        self.last_movement_update = {}  # Track last update time for each train
-        self.train_directions = {}  # Track train direction: 'forward' or 'backward'
+        # Per-line track state: every line is simulated on every tick,
+        # the line radio buttons only choose which one is displayed
+        green_line = TrackLine("Green Line")
+        green_line.capture(self)
+        green_line.switch_routing = self.data_manager.switch_routing_green
+        green_line.reload_switches()
+        self.add_line(green_line)
+        for line_name in ("Red Line",):
+            self._create_track_line(line_name)
+        for line in self.track_lines:
+            self._watch_failures(line)
         
         # Start train movement update loop (runs every 100ms for smooth movement)
         self.after(100, self.update_train_movements)
@@ -337,6 +346,12 @@ class TrackModelUI(tk.Tk):
         # Refresh UI periodically
         self.after(1000, self.refresh_ui)
 
+        # Flush buffered event log lines to the terminals
+        self.after(100, self.flush_terminal_log)
+
+        # Handle messages queued by the socket threads
+        self.after(20, self.drain_inbound_messages)
+
     # ---------------- Helper ----------------
     def make_card(self, parent, title=None):
         # Make card method.
@@ -550,21 +565,19 @@ class TrackModelUI(tk.Tk):
             sheet_name = "Green Line"
             image_file = "GreenLineOcc.png"
         
-        # Load data from the selected sheet using file_manager
+        # Both lines keep running - just bind the selected line's state to the view
         try:
-            # Use the file_manager's auto_load_green_line method with the sheet_name parameter
-            loaded = self.file_manager.auto_load_green_line(sheet_name=sheet_name)
+            line = self.track_lines.get_line(selected) if hasattr(self, 'track_lines') else None
+            if line is None and hasattr(self, 'track_lines'):
+                line = self._create_track_line(sheet_name)
+            loaded = line is not None and self.track_lines.show(selected) is not None
             
             if loaded:
-                # print(f"[UI]  {selected} data successfully loaded.")
+                # print(f"[UI]  Now displaying {selected}")
                 
-                # Update switch routing based on selected line
-                if selected == "Red Line":
-                    self.switch_routing = self.data_manager.switch_routing_red
-                    # print(f"[UI]  Switched to Red Line switch routing ({len(self.data_manager.switch_routing_red)} switches)")
-                else:  # Green Line
-                    self.switch_routing = self.data_manager.switch_routing_green
-                    # print(f"[UI]  Switched to Green Line switch routing ({len(self.data_manager.switch_routing_green)} switches)")
+                # Keep the diagram drawer pointed at the displayed line
+                if hasattr(self, 'diagram_drawer'):
+                    self.diagram_drawer.track_data = self.data_manager
                 
                 # Update the track diagram image
                 try:
@@ -577,12 +590,6 @@ class TrackModelUI(tk.Tk):
                     pass
                     # print(f" Could not load {image_file}: {e}")
                 
-                # Repopulate infrastructure sets for the new line
-                self.data_manager.populate_infrastructure_sets()
-                
-                # Reinitialize bidirectional directions for the new line
-                self.data_manager.initialize_bidirectional_directions(selected)
-                
                 # Update diagram positions for the new line
                 if hasattr(self, 'diagram_drawer'):
                     self.diagram_drawer.set_line_positions(selected)
@@ -611,8 +618,11 @@ class TrackModelUI(tk.Tk):
                 # Update station boarding data
                 self.data_manager.update_station_boarding_data()
                 
-                # Reinitialize station ticket sales
-                self.data_manager.initialize_station_ticket_sales()
+                # Show the displayed line's trains
+                self.update_occupied_blocks_display()
+                self.draw_block_markers()
+                if hasattr(self, 'train_combo'):
+                    self.train_combo["values"] = self.data_manager.active_trains
                 
                 # Reinitialize station beacons with 128-bit arrays
                 # self.initialize_station_beacons()  # Not needed - beacons based on switch states
@@ -628,11 +638,99 @@ class TrackModelUI(tk.Tk):
             import traceback
             traceback.print_exc()
 
+    # ---------------- MULTI-LINE SIMULATION ----------------
+
+    def _create_track_line(self, line_name):
+        """
+        Load another line with its own blocks, trains, heaters and failures so it
+        can be simulated alongside the displayed one.
+        
+        Returns:
+            The registered TrackLine, or None if the line could not be loaded
+        """
+        line = self.load_line(line_name)
+        if line is None:
+            return None
+        line.file_manager.ui_reference = self
+        line.file_manager.terminals = self.file_manager.terminals
+        line.murphy_failures.ui_reference = self
+        return line
+
+    def _watch_failures(self, line):
+        """Timestamp a line's failure changes with sim time and publish them as they happen."""
+        if line.murphy_failures is None:
+            return
+        line.murphy_failures.time_source = self.get_sim_time
+        line.murphy_failures.subscribe(lambda event, line=line: self.on_failure_event(line, event))
+
+    def get_current_line(self):
+        """
+        Name of the line currently being simulated or displayed.
+        
+        While a line is being stepped (or one of its messages handled) this is
+        that line, otherwise it is the line selected in the UI.
+        """
+        track_lines = getattr(self, 'track_lines', None)
+        if track_lines is not None and track_lines.bound_line is not None:
+            return track_lines.bound_line.name
+        return self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
+
+    def get_sim_time(self):
+        """
+        Simulation time in seconds since the Track Model started.
+
+        Advances with wall-clock time scaled by the CTC clock multiplier (MULT).
+        The heater and ticket sales models and update_train_movements step on
+        it (trains are seeded on it when dispatched), so they keep pace at 10x / 50x.
+        """
+        import time
+        now = time.time()
+        if not hasattr(self, "_sim_wall_time"):
+            self._sim_wall_time = now
+        self.sim_time += (now - self._sim_wall_time) * getattr(self, "time_multiplier", 1)
+        self._sim_wall_time = now
+        return self.sim_time
+
+    def _line_for_message(self, message):
+        """Work out which line an incoming message is about."""
+        if not hasattr(self, 'track_lines') or not isinstance(message, dict):
+            return None
+        
+        # Explicit line / track tag
+        for key in ('line', 'track'):
+            line = self.track_lines.get_line(message.get(key))
+            if line is not None:
+                return line
+        value = message.get('value')
+        if isinstance(value, dict):
+            line = self.track_lines.get_line(value.get('track'))
+            if line is not None:
+                return line
+        
+        # Wayside switch arrays start with a line indicator (0 = Green, 1 = Red)
+        if message.get('command') == 'switch_states' and isinstance(value, list) and value:
+            if value[0] in (0, 1) and not isinstance(value[0], bool):
+                line = self.track_lines.get_line(str(value[0]))
+                if line is not None:
+                    return line
+        
+        # Otherwise follow the train
+        train_id = message.get('train_id')
+        if train_id is not None:
+            try:
+                train_id = int(train_id)
+            except (ValueError, TypeError):
+                pass
+            return self.track_lines.line_for_train(train_id)
+        return None
+
 
 
 
     def refresh_track_data_table(self):
         """Refresh the Track and Station Data table."""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         if not hasattr(self, 'tree'):
             return
             
@@ -658,6 +756,8 @@ class TrackModelUI(tk.Tk):
     
     def refresh_track_system_table(self):
         """Refresh the Track Elements table."""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         self.update_track_system_table()
         # # print("[UI] Track System table refreshed")
 
@@ -937,6 +1037,8 @@ class TrackModelUI(tk.Tk):
 
     def populate_station_view(self):
         """Populate the table with station data, preserving scroll position."""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # Check if we need to create the table or if we're switching from track view
         needs_recreation = False
         
@@ -1150,8 +1252,7 @@ class TrackModelUI(tk.Tk):
 
             try:
                 image_file = "GreenLineOcc.png" if hasattr(self, "selected_line") and self.selected_line.get() == "Green Line" else ("RedLineOcc.png" if hasattr(self, "selected_line") and self.selected_line.get() == "Red Line" else "GreenLineOcc.png")
-                blue_line_img = Image.open(image_file).resize((550, 450), Image.LANCZOS)
-                self.block_bg_img = ImageTk.PhotoImage(blue_line_img)
+                self.block_bg_img = image_cache.get_photo(image_file, (550, 450))
                 self.block_canvas = tk.Canvas(self.block_frame, bg="white", height=450, width=550, highlightthickness=0)
                 self.block_canvas.pack(fill="x", padx=10, pady=10)
                 self.block_canvas.create_image(0, 0, image=self.block_bg_img, anchor="nw")
@@ -1164,8 +1265,7 @@ class TrackModelUI(tk.Tk):
             # Load Train Image
             if not hasattr(self, "train_icon"):
                 try:
-                    train_img = Image.open("Train_Right.png").resize((40, 40), Image.LANCZOS)
-                    self.train_icon = ImageTk.PhotoImage(train_img)
+                    self.train_icon = image_cache.get_photo("Train_Right.png", (40, 40))
                 except Exception as e:
                     # print(" Could not load Train_Right.png:", e)
                     self.train_icon = None
@@ -1255,8 +1355,7 @@ class TrackModelUI(tk.Tk):
         # Load train icon once
         self.train_icon = None
         try:
-            img = Image.open("Train_Right.png").resize((40, 40), Image.LANCZOS)
-            self.train_icon = ImageTk.PhotoImage(img)
+            self.train_icon = image_cache.get_photo("Train_Right.png", (40, 40))
         except Exception as e:
             pass
             # print(f"[WARN] Could not load Train_Right.png: {e}")
@@ -1269,6 +1368,11 @@ class TrackModelUI(tk.Tk):
             # Store the current image file for resize events
             self.current_image_file = image_file
             
+            # Pre-scale the station view images in the background so the
+            # first switch to that view doesn't resize them on the Tk thread
+            for occ_file in ("GreenLineOcc.png", "RedLineOcc.png"):
+                image_cache.prescale(occ_file, [(550, 450)])
+            
             # Delay initial load to allow PLC panel to render first (so we can measure it)
             self.after(100, self.update_background_image)
             
@@ -1556,8 +1660,7 @@ class TrackModelUI(tk.Tk):
         def load_icon(path, size=(32, 32)):
             key = (path, size)
             if key not in self.icon_images:
-                img = Image.open(path).resize(size, Image.LANCZOS)
-                self.icon_images[key] = ImageTk.PhotoImage(img)
+                self.icon_images[key] = image_cache.get_photo(path, size)
             return self.icon_images[key]
 
         self.icon_images = {}
@@ -1571,8 +1674,7 @@ class TrackModelUI(tk.Tk):
         # Load train icon once
         self.train_icon = None
         try:
-            img = Image.open("Train_Right.png").resize((40, 40), Image.LANCZOS)
-            self.train_icon = ImageTk.PhotoImage(img)
+            self.train_icon = image_cache.get_photo("Train_Right.png", (40, 40))
             # print(" Train icon loaded successfully")
         except Exception as e:
             pass
@@ -1597,8 +1699,7 @@ class TrackModelUI(tk.Tk):
             key = (path, size)
             if key not in self.icon_images:
                 try:
-                    img = Image.open(path).resize(size, Image.LANCZOS)
-                    self.icon_images[key] = ImageTk.PhotoImage(img)
+                    self.icon_images[key] = image_cache.get_photo(path, size)
                 except Exception as e:
                     # print(f" Failed to load {path}: {e}")
                     return None
@@ -1607,9 +1708,20 @@ class TrackModelUI(tk.Tk):
     def start_temperature_update_loop(self):
         """Start periodic temperature updates (every 1 second)"""
         try:
-            if hasattr(self, 'heater_manager'):
+            sim_time = self.get_sim_time()
+            if hasattr(self, 'track_lines'):
+                # Update all temperatures and heater states on every line
+                for line in self.track_lines:
+                    # Passenger arrivals at every station for this sim step
+                    line.data_manager.update_station_ticket_sales(sim_time=sim_time)
+                    if line.heater_manager is not None:
+                        flipped = line.heater_manager.update_all_temperatures(sim_time=sim_time)
+                        if flipped and line is self.track_lines.displayed_line:
+                            # Only redraw the heater column when a heater actually switched
+                            self.update_track_system_table()
+            elif hasattr(self, 'heater_manager'):
                 # Update all temperatures and heater states
-                self.heater_manager.update_all_temperatures()
+                self.heater_manager.update_all_temperatures(sim_time=sim_time)
                 
                 # The refresh_ui method will handle updating the display
                 # No need to call it separately here since it's already on a timer
@@ -1657,6 +1769,8 @@ class TrackModelUI(tk.Tk):
     
     def update_occupied_blocks_display(self):
         """Update the display of occupied blocks."""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # print(f"[DEBUG] update_occupied_blocks_display called")
         
         if not hasattr(self, 'occupied_blocks_label'):
@@ -1712,16 +1826,32 @@ class TrackModelUI(tk.Tk):
             # # print(f"[DEBUG] Could not force update: {e}")
             # print("")
 
-    def log_to_terminal(self, message):
-        """Log a message to the UI Event Log / Terminal"""
-        for terminal in self.terminals:
-            terminal.config(state="normal")
-            terminal.insert("end", f"{message}\n")
-            terminal.see("end")
-            terminal.config(state="disabled")
+    def log_to_terminal(self, message, level=None):
+        """
+        Log a message to the UI Event Log / Terminal.
+
+        The message is buffered and written on the next flush_terminal_log,
+        so logging from the routing code never touches the Text widgets.
+
+        Args:
+            message: Text to log
+            level: TerminalLog level (None = inferred from the message tags)
+        """
+        self.terminal_log.log(message, level)
+
+    def flush_terminal_log(self):
+        """Write buffered event log lines to the terminals (runs every 100ms)."""
+        try:
+            self.terminal_log.flush()
+        except Exception as e:
+            pass
+            # print(f"[UI] Terminal log flush failed: {e}")
+        self.after(100, self.flush_terminal_log)
     
     def update_switch_display(self):
         """Update the display of switch states in the UI."""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # print(f"[DEBUG] update_switch_display called")
         
         # Update switch status labels if they exist
@@ -2315,1323 +2445,75 @@ class TrackModelUI(tk.Tk):
 
     def refresh_bidirectional_controls(self):
         """Refresh all bidirectional controls based on current switches and signals"""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # # print(" Refreshing bidirectional controls based on switches and signals")
         if hasattr(self.data_manager, 'bidirectional_directions'):
             for group_name in self.data_manager.bidirectional_directions.keys():
                 self.update_bidirectional_status(group_name)
     
     def update_train_movements(self):
-        """Update train positions based on actual speed and block lengths."""
-        import time
-        current_time = time.time()
+        """Step every line in the same tick, then schedule the next tick."""
+        # Sim time follows the CTC multiplier, like the Train Model speeds the trains move at
+        current_time = self.get_sim_time()
+        
+        if hasattr(self, 'track_lines'):
+            for line in self.track_lines:
+                with self.track_lines.using(line):
+                    self.step_line_movements(current_time)
+        else:
+            self.step_line_movements(current_time)
         
-        # Process each active train
-        for train_idx, train_id in enumerate(self.data_manager.active_trains):
-            if train_idx >= len(self.data_manager.train_locations):
-                continue
-                
-            current_block_num = self.data_manager.train_locations[train_idx]
-            if current_block_num == 0:  # Train not on track
-                continue
-            
-            # Get actual speed for this train (m/s)
-            actual_speed = self.train_actual_speeds.get(train_id, 0)
-            if actual_speed <= 0:
-                continue  # Train not moving
-            
-            # Initialize tracking for this train if needed
-            if train_id not in self.train_positions_in_block:
-                self.train_positions_in_block[train_id] = 0
-                self.last_movement_update[train_id] = current_time
-                # print(f"[MOVEMENT] Initialized tracking for {train_id} at block {current_block_num}")
-            
-            # Calculate time elapsed since last update (seconds)
-            time_delta = current_time - self.last_movement_update[train_id]
-            self.last_movement_update[train_id] = current_time
-            
-            # Calculate distance traveled (meters)
-            distance_traveled = actual_speed * time_delta
-            self.train_positions_in_block[train_id] += distance_traveled
-            
-            # Get block length (meters)
-            block_length = self.get_block_length(current_block_num)
-            
-            # Check if train has traveled the full block length
-            if self.train_positions_in_block[train_id] >= block_length:
-                # Check if train has arrived at yard (marked while at block 57)
-                if hasattr(self, 'trains_at_yard') and train_id in self.trains_at_yard:
-                    # Train has arrived at yard - remove from service
-                    # print(f" Train {train_id} Arrived at Yard - Removing from service")
-                    
-                    # Clear current block occupancy (block 57 where train is)
-                    if current_block_num <= len(self.data_manager.blocks):
-                        current_block = self.data_manager.blocks[current_block_num - 1]
-                        current_block.occupancy = 0
-                        self.send_block_occupancy_update(current_block_num, 0)
-                    
-                    # Remove from active trains
-                    if train_id in self.data_manager.active_trains:
-                        train_index = self.data_manager.active_trains.index(train_id)
-                        self.data_manager.active_trains.pop(train_index)
-                        if train_index < len(self.data_manager.train_locations):
-                            self.data_manager.train_locations.pop(train_index)
-                        if train_index < len(self.data_manager.commanded_speed):
-                            self.data_manager.commanded_speed.pop(train_index)
-                        if train_index < len(self.data_manager.commanded_authority):
-                            self.data_manager.commanded_authority.pop(train_index)
-                    
-                    # Clean up train tracking data
-                    if train_id in self.train_positions_in_block:
-                        del self.train_positions_in_block[train_id]
-                    if train_id in self.train_actual_speeds:
-                        del self.train_actual_speeds[train_id]
-                    if train_id in self.train_directions:
-                        del self.train_directions[train_id]
-                    if train_id in self.last_movement_update:
-                        del self.last_movement_update[train_id]
-                    
-                    # Remove from yard arrival set
-                    self.trains_at_yard.remove(train_id)
-                    
-                    # Update display
-                    self.update_occupied_blocks_display()
-                    
-                    continue  # Skip to next train
-                
-                # Move to next block
-                next_block = self.get_next_block(current_block_num, train_idx)
-                
-                if next_block and next_block <= len(self.data_manager.blocks):
-                    # Clear current block occupancy
-                    if current_block_num <= len(self.data_manager.blocks):
-                        current_block = self.data_manager.blocks[current_block_num - 1]
-                        current_block.occupancy = 0
-                        # print(f"[MOVEMENT] {train_id} leaving block {current_block_num}")
-                    
-                    # Set new block occupancy
-                    new_block = self.data_manager.blocks[next_block - 1]
-                    train_num = int(train_id)  # train_id is now just a number string like "1", "2", "3"
-                    new_block.occupancy = train_num
-                    
-                    # Update train location
-                    self.data_manager.train_locations[train_idx] = next_block
-                    
-                    # Reset position in new block (account for overflow)
-                    overflow = self.train_positions_in_block[train_id] - block_length
-                    self.train_positions_in_block[train_id] = overflow
-                    
-                    # print(f"[MOVEMENT] {train_id} entered block {next_block} (speed: {actual_speed:.1f} m/s)")
-                    
-                    # Send occupancy updates to other modules
-                    self.send_block_occupancy_update(current_block_num, 0)
-                    self.send_block_occupancy_update(next_block, train_num)
-                    
-                    # Update the display
-                    self.update_occupied_blocks_display()
-                else:
-                    pass
-                    # print(f"[MOVEMENT] {train_id} reached end of authority at block {current_block_num}")
-            
         # Schedule next update
         self.after(100, self.update_train_movements)  # Update every 100ms
-    
-    def get_block_length(self, block_num):
-        """Get the length of a block in meters."""
-        if block_num <= 0 or block_num > len(self.data_manager.blocks):
-            return 50.0  # Default block length
+
+    def dispatch_station_events(self, events):
+        """
+        Act on station events as they happen:
+        - stop: passenger boarding (handle_train_arrival_at_station)
+        - departure: beacon data for the station the train is leaving
         
-        block = self.data_manager.blocks[block_num - 1]
-        # Try to get actual block length from block data
-        if hasattr(block, 'length'):
-            return float(block.length)
-        elif hasattr(block, 'block_length'):
-            return float(block.block_length)
-        else:
-            return 50.0  # Default 50 meters if no length data
-    
-    def get_next_block(self, current_block, train_idx):
+        Args:
+            events: List of StationEvents.StationEvent
         """
-        Determine the next block for train movement.
-        Rules:
-        1. Always go in ascending order (1→2→3→...→150) EXCEPT:
-        2. Bidirectional sections allow descending:
-           - Block 100 → 85 (entering N section backwards)
-           - Block 150 → 28 (loop return)
-        3. Switches route based on their state
+        for event in events:
+            if event.kind == "stop":
+                self.handle_train_arrival_at_station(event.block, event.train_id)
+            elif event.kind == "departure":
+                self.send_beacon_data_on_departure(event.train_id, event.block)
+            # "arrival": train entered the station block - boarding waits for the stop
+
+    def dispatch_authority_events(self, events):
         """
-        # DEBUG: Log when train reaches critical switch blocks
-        if current_block in [1, 15, 16, 52, 53, 66]:
-            self.log_to_terminal(f"\n{'='*60}")
-            self.log_to_terminal(f"[SWITCH DEBUG] Block {current_block}: train_idx={train_idx}")
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                train_mode = self.train_directions.get(train_id, 'forward') if hasattr(self, 'train_directions') else 'N/A'
-                self.log_to_terminal(f"[SWITCH DEBUG]   Train {train_id}, mode={train_mode}")
-            current_line = getattr(self, 'selected_line', None)
-            line_name = current_line.get() if current_line else 'None'
-            self.log_to_terminal(f"[SWITCH DEBUG]   Current line={line_name}")
-            self.log_to_terminal(f"{'='*60}\n")
-        
-        # Check commanded authority
-        if train_idx < len(self.data_manager.commanded_authority):
-            authority = self.data_manager.commanded_authority[train_idx]
-            
-            # Calculate how many blocks the train has traveled from its starting point
-            # For now, use a simple counter (can be enhanced with actual tracking)
-            if not hasattr(self, 'train_blocks_traveled'):
-                self.train_blocks_traveled = {}
-            
-            train_id = self.data_manager.active_trains[train_idx]
-            if train_id not in self.train_blocks_traveled:
-                self.train_blocks_traveled[train_id] = 0
-            
-            # Check if we've reached authority limit
-            if self.train_blocks_traveled[train_id] >= authority:
-                # print(f"[AUTHORITY] {train_id} has reached authority limit ({authority} blocks)")
-                return None  # Stop at authority limit
-            
-            # Increment blocks traveled
-            self.train_blocks_traveled[train_id] += 1
-        
-        # ============================================================
-        # SPECIAL ROUTING RULES - BIDIRECTIONAL AND SWITCHES
-        # ============================================================
-        
-        
-        # RULE 1: End of line - Block 150 goes to 28 (GREEN LINE ONLY)
-        if current_block == 150:
-            # Check if we're on Green Line (block 150 only exists on Green Line)
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            
-            if is_green_line:
-                # Set backward loop mode when entering from 150
-                if train_idx < len(self.data_manager.active_trains):
-                    train_id = self.data_manager.active_trains[train_idx]
-                    self.train_directions[train_id] = 'backward_loop'
-                # print(f"[ROUTING] GREEN LINE: Block 150 → 28 (End of line return, entering backward loop)")
-                return 28  # Go to 28 from 150
-            
-            # If somehow on Red Line at block 150 (shouldn't happen), just continue forward
-            return current_block + 1
-        
-        # RULE 1b: Switch housed at block 28 controls routing from 28
-        # GREEN LINE: SWITCH (28-29; 150-28) - can route to 150
-        # RED LINE: SWITCH (27-28; 27-76) - different switch, normal forward routing
-        # From 150 (Green Line only): Block 150 → 28 → 27, then continues backward up the track
-        elif current_block == 28:
-            # Check current line
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            
-            # Check if this train is in backward loop mode (coming from 150)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for Red Line backward mode FIRST
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Red Line backward mode - continue backward to 27
-                    # print(f"[ROUTING] RED LINE backward: Block 28 → 27")
-                    return 27
-                
-                # Check for Green Line backward loop mode (coming from 150) - GREEN LINE ONLY
-                if is_green_line and self.train_directions.get(train_id) == 'backward_loop':
-                    # Train came from 150 → 28, now continue backward to 27
-                    # Stay in backward_loop mode to continue backward through the track
-                    # print(f"[ROUTING] GREEN LINE backward loop (from 150): Block 28 → 27 (continuing backward)")
-                    return 27  # Continue backward to 27, don't exit to 29
-            
-            # Normal forward routing (coming from block 27)
-            # GREEN LINE: Check switch for routing to 150 or 29
-            if is_green_line:
-                if len(self.data_manager.blocks) > 27:
-                    block_28 = self.data_manager.blocks[27]  # Switch housed at block 28 (index 27)
-                    if hasattr(block_28, 'switch_state'):
-                        if block_28.switch_state:  # True = Normal = To block 29
-                            return 29  # Continue forward
-                        else:  # False = Reverse = Loop to 150
-                            # Set backward loop mode to continue from 150
-                            if train_idx < len(self.data_manager.active_trains):
-                                train_id = self.data_manager.active_trains[train_idx]
-                                self.train_directions[train_id] = 'backward_loop'
-                            # print(f"[ROUTING] GREEN LINE: Block 28 → 150 (Loop via switch 28)")
-                            return 150  # Send to 150
-            
-            # RED LINE or default: continue to block 29
-            return 29
-
-        # RULE 2: Switch housed at block 12 controls junction at blocks 1, 12, and 13
-        # Excel: SWITCH (12-13; 1-13)
-        # Position "12-13" (True/Normal): At block 13, enter backward loop → 12 → 11 → ... → 1 → 13
-        # Position "1-13" (False/Reverse): Allows direct route 1 → 13
-        
-        elif current_block == 13:
-            # Check if train is in backward loop mode (from 150→28→27→...→13)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for Red Line backward mode FIRST
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Red Line backward mode - continue backward
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                    return next_block
-                
-                # Check for Green Line backward loop modes
-                if self.train_directions.get(train_id) == 'backward_loop':
-                    # Continue backward loop from 13 to 12
-                    # print(f"[ROUTING] Backward loop (150): Block 13 → 12")
-                    return 12
-                
-                # Check if train is in backward loop from switch 12 (13→12→...→1→13)
-                if self.train_directions.get(train_id) == 'backward_loop_12':
-                    # Continue backward through loop
-                    # print(f"[ROUTING] Backward loop (switch 12): Block 13 → 12")
-                    return 12
-            
-            # Check switch at block 12 to determine routing from block 13
-            if len(self.data_manager.blocks) > 11:
-                block_12 = self.data_manager.blocks[11]  # Switch housed at block 12 (index 11)
-                if hasattr(block_12, 'switch_state'):
-                    if block_12.switch_state:  # True = "12-13" = Enter backward loop
-                        # Set backward loop mode for switch 12
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            self.train_directions[train_id] = 'backward_loop_12'
-                        # print(f"[ROUTING] Block 13 → 12 (Entering backward loop via switch 12)")
-                        return 12
-                    else:  # False = "1-13" = Normal forward
-                        return 14  # Continue forward normally
-            return 14  # Default forward
-        
-        # RED LINE RULE: Block 9 - Yard access (RED LINE ONLY)
-        # Switch housed at block 9 controls yard access
-        # Only affects trains coming FROM block 8 (forward direction)
-        # Trains coming FROM block 10 (backward) ignore the switch
-        elif current_block == 9:
-            # Check current line
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            is_red_line = current_line and current_line.get() == "Red Line"
-            
-            # Check if train is in any backward mode FIRST (Green Line or Red Line)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for Green Line backward loop mode (GREEN LINE ONLY)
-                if is_green_line and self.train_directions.get(train_id) == 'backward_loop':
-                    # Green Line backward loop - continue backward from 9 to 8
-                    # print(f"[ROUTING] GREEN LINE backward loop: Block 9 → 8 (continuing backward)")
-                    return 8
-                
-                # Check for Red Line backward mode
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Train is in backward mode (coming from block 10)
-                    # Ignore yard switch and continue backward to block 8
-                    # print(f"[ROUTING] RED LINE backward: Block 9 → 8 (ignoring yard switch)")
-                    return 8
-            
-            # Not in backward mode - check for Red Line yard switch logic
-            if is_red_line:
-                # Train is going forward (from block 8)
-                # Check yard switch at block 9
-                if len(self.data_manager.blocks) > 8:
-                    block_9 = self.data_manager.blocks[8]  # Switch housed at block 9 (index 8)
-                    if hasattr(block_9, 'switch_state'):
-                        if not block_9.switch_state:  # False = Normal = Continue on main line
-                            # print(f"[ROUTING] RED LINE: Block 9 → 10 (continue on main line)")
-                            return 10  # Continue to 10
-                        else:  # True = To Yard (swapped logic to match display)
-                            # Train is going to yard - mark for removal
-                            if train_idx < len(self.data_manager.active_trains):
-                                train_id = self.data_manager.active_trains[train_idx]
-                                # print(f" Train {train_id} Arrived at Yard (Red Line Block 9)")
-                                
-                                # Mark this train for removal (will be handled in train movement logic)
-                                if not hasattr(self, 'trains_at_yard'):
-                                    self.trains_at_yard = set()
-                                self.trains_at_yard.add(train_id)
-                            
-                            # Return None to stop routing this train
-                            # print(f"[ROUTING] RED LINE: Block 9 → Yard (train marked for removal)")
-                            return None
-            
-            # Not Red Line OR default: continue to block 10
-            return 10
+        Act on trains reaching the end of their authority: log the stop point
+        and tell the Train Model and Wayside that the authority is used up.
         
-        elif 2 <= current_block <= 12:
-            # Check if train is in backward loop mode (from 150→28→27→...or from switch 12)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for Red Line entering loop mode (from block 16→15→14→...→1)
-                if self.train_directions.get(train_id) == 'entering_loop_15':
-                    # Continue backward through loop
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] RED LINE entering loop: Block {current_block} → {next_block}")
-                    return next_block
-                
-                # Check for Red Line backward mode FIRST
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Red Line backward mode - continue backward
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                    return next_block
-                
-                # Check for Green Line backward loop modes
-                if self.train_directions.get(train_id) in ['backward_loop', 'backward_loop_12']:
-                    # Continue backward
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] Backward loop: Block {current_block} → {next_block}")
-                    return next_block
-            
-            # Normal forward progression
-            return current_block + 1
-        
-        elif current_block == 1:
-            # Check if train is in backward loop mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for entering loop mode (from block 16→15→...→1)
-                if self.train_directions.get(train_id) == 'entering_loop_15':
-                    # Train completed the loop circuit, check switch to determine exit
-                    if len(self.data_manager.blocks) > 14:
-                        block_15 = self.data_manager.blocks[14]
-                        switch_state = getattr(block_15, 'switch_state', None)
-                        
-                        self.log_to_terminal(f"[BLOCK 1 LOOP EXIT] Completed loop, switch_state={switch_state}")
-                        
-                        if switch_state:  # True = 1-16 connection, exit to 16
-                            self.train_directions[train_id] = 'forward'
-                            # print(f"[ROUTING] RED LINE: Completed loop circuit, block 1 → 16 (exiting loop)")
-                            return 16
-                        else:  # False = continue through loop again to 2
-                            # print(f"[ROUTING] RED LINE: Continuing through loop, block 1 → 2")
-                            return 2
-                    
-                    # Default: exit to 16
-                    self.train_directions[train_id] = 'forward'
-                    # print(f"[ROUTING] RED LINE: Completed loop circuit, block 1 → 16 (exiting loop)")
-                    return 16
-                
-                # Check for Red Line backward mode FIRST
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Red Line backward mode - reached block 1
-                    # Always exit backward mode and go to block 16 to rejoin main track
-                    self.train_directions[train_id] = 'forward'
-                    # print(f"[ROUTING] RED LINE: Reached block 1 in backward mode, exiting to main track → 16")
-                    return 16
-                
-                # If in backward loop from 150, exit based on switch position
-                if self.train_directions.get(train_id) == 'backward_loop':
-                    self.train_directions[train_id] = 'forward'
-                    
-                    # Check switch at block 12 to determine where to exit
-                    if len(self.data_manager.blocks) > 11:
-                        block_12 = self.data_manager.blocks[11]  # Switch housed at block 12 (index 11)
-                        if hasattr(block_12, 'switch_state'):
-                            if not block_12.switch_state:  # False = "1-13" = Jump to 13
-                                # print(f"[ROUTING] Exiting backward loop (150) at block 1 → 13 (via switch 12)")
-                                return 13
-                    
-                    # Default: continue forward to 2
-                    # print(f"[ROUTING] Exiting backward loop (150) at block 1 → 2")
-                    return 2
-                
-                # If in backward loop from switch 12, exit to 13
-                if self.train_directions.get(train_id) == 'backward_loop_12':
-                    self.train_directions[train_id] = 'forward'
-                    # print(f"[ROUTING] Exiting backward loop (switch 12) at block 1 → 13")
-                    return 13
-            
-            # Not in any special mode - normal forward progression
-            # Check for RED LINE - on Red Line, block 1 always continues to block 2 in normal forward mode
-            current_line = getattr(self, 'selected_line', None)
-            is_red_line = current_line and current_line.get() == "Red Line"
-            
-            if is_red_line:
-                # Normal forward mode on Red Line: continue to block 2
-                self.log_to_terminal(f"[BLOCK 1 NORMAL] Forward mode, continuing to block 2")
-                # print(f"[ROUTING] RED LINE: Block 1 → 2 (normal forward)")
-                return 2
-            
-            # Green Line: Check switch at block 12 for normal routing
-            if len(self.data_manager.blocks) > 11:
-                block_12 = self.data_manager.blocks[11]  # Switch housed at block 12 (index 11)
-                if hasattr(block_12, 'switch_state'):
-                    if not block_12.switch_state:  # False = "1-13" = Allow 1 → 13 shortcut
-                        # print(f"[ROUTING] Block 1 → 13 (via switch 12 in '1-13' position)")
-                        return 13
-                    else:  # True = "12-13" = Normal forward progression
-                        return 2
-            
-            # Default: normal forward to 2
-            return 2
-        
-        # RULE 3: Blocks 14-27 - Handle backward loop mode from 150→28
-        elif (14 == current_block) or (17 <= current_block <= 26):
-            # Note: Block 27 is excluded and handled by specific rule below
-            # Note: Blocks 15 and 16 are excluded and handled by specific rules below
-            # Check if train is in backward loop mode (from 150→28→27→...)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for Red Line entering loop mode (from block 16→15→14→...→1)
-                if self.train_directions.get(train_id) == 'entering_loop_15':
-                    # Continue backward through loop
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] RED LINE entering loop: Block {current_block} → {next_block}")
-                    return next_block
-                
-                # Check for Red Line backward mode FIRST
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Red Line backward mode - continue backward
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                    return next_block
-                
-                # Check for Green Line backward loop mode
-                if self.train_directions.get(train_id) == 'backward_loop':
-                    # Continue backward
-                    next_block = current_block - 1
-                    # print(f"[ROUTING] Backward loop (150): Block {current_block} → {next_block}")
-                    return next_block
-            
-            # Normal forward progression
-            return current_block + 1
-        
-        # RULE 4: Switch housed at block 58 (Yard access from block 57)
-        # Excel: SWITCH TO YARD (57-yard) - switch housed at block 58
-        # Position 1: 57 → 58 (continue on main line)
-        # Position 2: 57 → yard (train arrives at yard and is removed)
-        # NOTE: This is GREEN LINE ONLY! On Red Line, block 57 is just normal track
-        # RULE 4: Block 57 - Check for backward mode first
-        elif current_block == 57:
-            # Check if train is in Red Line backward mode FIRST
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # In backward mode: continue backward to 56
-                    # print(f"[ROUTING] RED LINE backward: Block 57 → 56")
-                    return 56
-            
-            # Not in backward mode - check if we're on Green Line for yard switch
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            
-            if is_green_line:
-                # Green Line: Check yard switch at block 58
-                if len(self.data_manager.blocks) > 57:
-                    block_58 = self.data_manager.blocks[57]  # Switch housed at block 58 (index 57)
-                    if hasattr(block_58, 'switch_state'):
-                        if block_58.switch_state:  # True = Normal = Continue on main line
-                            return 58  # Continue to 58
-                        else:  # False = Reverse = Go to yard
-                            # Train is going to yard - mark for removal
-                            if train_idx < len(self.data_manager.active_trains):
-                                train_id = self.data_manager.active_trains[train_idx]
-                                # print(f" Train {train_id} Arrived at Yard (Green Line)")
-                                
-                                # Mark this train for removal (will be handled in train movement logic)
-                                if not hasattr(self, 'trains_at_yard'):
-                                    self.trains_at_yard = set()
-                                self.trains_at_yard.add(train_id)
-                            
-                            # Return None to stop routing this train
-                            return None
-            
-            # Red Line OR Green Line default: continue to block 58
-            return 58
-        
-        # RULE 5: Block 62 - Check for backward mode
-        elif current_block == 62:
-            # Check if train is in Red Line backward mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # In backward mode: continue backward to 61
-                    # print(f"[ROUTING] RED LINE backward: Block 62 → 61")
-                    return 61
-            
-            # Normal forward mode: go to 63 (yard entry or normal)
-            return 63
-        
-        # ============================================================
-        # RED LINE BACKWARD LOOP: Block 66 → 52 → 51 → ... → 16
-        # When train reaches block 66 (from switch 52 jump), it loops
-        # back and travels backward until reaching switch 15 at block 16
-        # ============================================================
-        
-        # RED LINE RULE 1: Block 66 - Check mode before routing
-        elif current_block == 66:
-            # Check if we're on Red Line
-            current_line = getattr(self, 'selected_line', None)
-            is_red_line = current_line and current_line.get() == "Red Line"
-            
-            if is_red_line:
-                # Check if train is already in backward mode
-                if train_idx < len(self.data_manager.active_trains):
-                    train_id = self.data_manager.active_trains[train_idx]
-                    train_mode = self.train_directions.get(train_id, 'forward')
-                    
-                    # DEBUG: Show mode at block 66
-                    self.log_to_terminal(f"[BLOCK 66 DEBUG] Train mode = {train_mode}")
-                    
-                    if train_mode == 'red_backward_66_to_16':
-                        # In backward mode (came from switch 52 jump), continue backward
-                        # print(f"[ROUTING] RED LINE backward: Block 66 → 65 (continuing backward)")
-                        return 65
-                    else:
-                        # In forward mode - arrived at 66 normally via 65→66
-                        # Exit the loop and go to 52, set backward mode to continue backward from 52
-                        self.train_directions[train_id] = 'red_backward_66_to_16'
-                        # print(f"[ROUTING] RED LINE forward: Block 66 → 52 (exiting loop, entering backward mode)")
-                        return 52
-                
-                # Default: exit to 52
-                return 52
-            else:
-                # Green Line: normal progression
-                return 67
-        
-        # RED LINE RULE 2: Blocks 52 down to 17 - Backward traversal
-        elif 17 <= current_block <= 52:
-            # Check if train is in Red Line backward mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                train_mode = self.train_directions.get(train_id, 'forward')
-                
-                # DEBUG: Log mode at block 52
-                if current_block == 52:
-                    self.log_to_terminal(f"[BLOCK 52 BACKWARD CHECK] Train mode = {train_mode}")
-                
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # BACKWARD MODE: Check for backward-only switches
-                    
-                    # DEBUG: Confirm entering backward mode logic at block 52
-                    if current_block == 52:
-                        self.log_to_terminal(f"[BLOCK 52 BACKWARD] Entering backward mode logic, should go to block 51")
-                    
-                    # Switch 32 (backward-only): When at block 33 going backward
-                    if current_block == 33:
-                        self.log_to_terminal(f"[BLOCK 33 ENTRY] Entered block 33 routing (backward mode), train_idx={train_idx}")
-                        
-                        current_line = getattr(self, 'selected_line', None)
-                        is_red_line = current_line and current_line.get() == "Red Line"
-                        self.log_to_terminal(f"[BLOCK 33 LINE CHECK] is_red_line = {is_red_line}")
-                        
-                        # Get train info for logging
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            current_mode = self.train_directions.get(train_id, 'forward')
-                            self.log_to_terminal(f"[BLOCK 33 MODE CHECK] Train {train_id} mode = {current_mode}")
-                        
-                        # Check Red Line switch routing directly (not self.switch_routing which may be set to Green)
-                        has_switch_routing_red = hasattr(self.data_manager, 'switch_routing_red')
-                        switch_32_in_routing = 32 in self.switch_routing_red if has_switch_routing_red else False
-                        self.log_to_terminal(f"[BLOCK 33 SWITCH CHECK] has_switch_routing_red = {has_switch_routing_red}")
-                        self.log_to_terminal(f"[BLOCK 33 SWITCH CHECK] 32 in switch_routing_red = {switch_32_in_routing}")
-                        
-                        if is_red_line and has_switch_routing_red and switch_32_in_routing:
-                            # Get the block object to check its switch_state
-                            if len(self.data_manager.blocks) > 31:
-                                block_32 = self.data_manager.blocks[31]  # Block 32 (index 31)
-                                
-                                # Check both switch_direction and switch_state
-                                switch_direction = getattr(block_32, 'switch_direction', None)
-                                switch_state_bool = getattr(block_32, 'switch_state', None)
-                                
-                                # Determine if switch is in reverse
-                                is_reverse = False
-                                if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                                    is_reverse = switch_state_bool
-                                elif switch_direction is not None:
-                                    is_reverse = (switch_direction == "reverse")
-                                
-                                switch_state = "reverse" if is_reverse else "normal"
-                            else:
-                                switch_state = "normal"
-                            self.log_to_terminal(f"[BLOCK 33 SWITCH STATE] switch_state = '{switch_state}'")
-                            
-                            if switch_state == "normal":
-                                # Normal: 33→32 (continue backward)
-                                self.log_to_terminal(f"[BLOCK 33 ROUTING] Normal position: 33 → 32 (continue backward)")
-                                # print(f"[ROUTING] RED LINE backward: Block 33 → 32 (Switch 32 normal)")
-                                return 32
-                            else:  # reverse
-                                # Reverse: 33→72 (backward jump), then enter forward mode for 72→73→74→75→76
-                                if train_idx < len(self.data_manager.active_trains):
-                                    train_id = self.data_manager.active_trains[train_idx]
-                                    self.train_directions[train_id] = 'red_branch_32_to_76_forward'
-                                    self.log_to_terminal(f"[BLOCK 33 ROUTING] Reverse position: 33 → 72, setting mode = 'red_branch_32_to_76_forward'")
-                                # print(f"[ROUTING] RED LINE backward: Block 33 → 72 (Switch 32 reverse jump, entering forward mode)")
-                                return 72
-                        else:
-                            self.log_to_terminal(f"[BLOCK 33 WARNING] Switch routing check failed - falling through")
-                    
-                    
-                    # Switch 43 (backward-only): When at block 44 going backward
-                    elif current_block == 44:
-                        self.log_to_terminal(f"[BLOCK 44 ENTRY] Entered block 44 routing (backward mode), train_idx={train_idx}")
-                        
-                        current_line = getattr(self, 'selected_line', None)
-                        is_red_line = current_line and current_line.get() == "Red Line"
-                        self.log_to_terminal(f"[BLOCK 44 LINE CHECK] is_red_line = {is_red_line}")
-                        
-                        # Get train info for logging
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            current_mode = self.train_directions.get(train_id, 'forward')
-                            self.log_to_terminal(f"[BLOCK 44 MODE CHECK] Train {train_id} mode = {current_mode}")
-                        
-                        # Check Red Line switch routing directly (not self.switch_routing which may be set to Green)
-                        has_switch_routing_red = hasattr(self.data_manager, 'switch_routing_red')
-                        switch_43_in_routing = 43 in self.switch_routing_red if has_switch_routing_red else False
-                        self.log_to_terminal(f"[BLOCK 44 SWITCH CHECK] has_switch_routing_red = {has_switch_routing_red}")
-                        self.log_to_terminal(f"[BLOCK 44 SWITCH CHECK] 43 in switch_routing_red = {switch_43_in_routing}")
-                        
-                        if is_red_line and has_switch_routing_red and switch_43_in_routing:
-                            # Get the block object to check its switch_state
-                            if len(self.data_manager.blocks) > 42:
-                                block_43 = self.data_manager.blocks[42]  # Block 43 (index 42)
-                                
-                                # Check both switch_direction and switch_state
-                                switch_direction = getattr(block_43, 'switch_direction', None)
-                                switch_state_bool = getattr(block_43, 'switch_state', None)
-                                
-                                # Determine if switch is in reverse
-                                is_reverse = False
-                                if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                                    is_reverse = switch_state_bool
-                                elif switch_direction is not None:
-                                    is_reverse = (switch_direction == "reverse")
-                                
-                                switch_state = "reverse" if is_reverse else "normal"
-                            else:
-                                switch_state = "normal"
-                            self.log_to_terminal(f"[BLOCK 44 SWITCH STATE] switch_state = '{switch_state}'")
-                            
-                            if switch_state == "normal":
-                                # Normal: 44→43 (continue backward)
-                                self.log_to_terminal(f"[BLOCK 44 ROUTING] Normal position: 44 → 43 (continue backward)")
-                                # print(f"[ROUTING] RED LINE backward: Block 44 → 43 (Switch 43 normal)")
-                                return 43
-                            else:  # reverse
-                                # Reverse: 44→67 (backward jump), then enter forward mode for 67→68→69→70→71
-                                if train_idx < len(self.data_manager.active_trains):
-                                    train_id = self.data_manager.active_trains[train_idx]
-                                    self.train_directions[train_id] = 'red_branch_43_to_71_forward'
-                                    self.log_to_terminal(f"[BLOCK 44 ROUTING] Reverse position: 44 → 67, setting mode = 'red_branch_43_to_71_forward'")
-                                # print(f"[ROUTING] RED LINE backward: Block 44 → 67 (Switch 43 reverse jump, entering forward mode)")
-                                return 67
-                        else:
-                            self.log_to_terminal(f"[BLOCK 44 WARNING] Switch routing check failed - falling through")
-                    
-                    
-                    # Continue backward (decrementing block numbers)
-                    next_block = current_block - 1
-                    
-                    # DEBUG: Log the routing decision for block 52
-                    if current_block == 52:
-                        self.log_to_terminal(f"[BLOCK 52 BACKWARD] Routing backward: 52 → {next_block}")
-                    
-                    # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                    return next_block
-            
-            # FORWARD MODE: Check for forward-only switches
-            current_line = getattr(self, 'selected_line', None)
-            is_red_line = current_line and current_line.get() == "Red Line"
-            
-            # Switch 27 (forward-only): When at block 27 going forward
-            if is_red_line and current_block == 27:
-                self.log_to_terminal(f"[BLOCK 27 ENTRY] Entered block 27 routing, train_idx={train_idx}")
-                self.log_to_terminal(f"[BLOCK 27 LINE CHECK] is_red_line = {is_red_line}")
-                
-                # Get train info for logging
-                if train_idx < len(self.data_manager.active_trains):
-                    train_id = self.data_manager.active_trains[train_idx]
-                    current_mode = self.train_directions.get(train_id, 'forward')
-                    self.log_to_terminal(f"[BLOCK 27 MODE CHECK] Train {train_id} mode = {current_mode}")
-                
-                # Check Red Line switch routing directly (not self.switch_routing which may be set to Green)
-                has_switch_routing_red = hasattr(self.data_manager, 'switch_routing_red')
-                switch_27_in_routing = 27 in self.switch_routing_red if has_switch_routing_red else False
-                self.log_to_terminal(f"[BLOCK 27 SWITCH CHECK] has_switch_routing_red = {has_switch_routing_red}")
-                self.log_to_terminal(f"[BLOCK 27 SWITCH CHECK] 27 in switch_routing_red = {switch_27_in_routing}")
-                
-                if has_switch_routing_red and switch_27_in_routing:
-                    # Get the block object to check its switch_state
-                    if len(self.data_manager.blocks) > 26:
-                        block_27 = self.data_manager.blocks[26]  # Block 27 (index 26)
-                        
-                        # Check both switch_direction and switch_state
-                        switch_direction = getattr(block_27, 'switch_direction', None)
-                        switch_state_bool = getattr(block_27, 'switch_state', None)
-                        
-                        # Determine if switch is in reverse
-                        is_reverse = False
-                        if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                            is_reverse = switch_state_bool
-                        elif switch_direction is not None:
-                            is_reverse = (switch_direction == "reverse")
-                        
-                        switch_state = "reverse" if is_reverse else "normal"
-                    self.log_to_terminal(f"[BLOCK 27 SWITCH STATE] switch_state = '{switch_state}'")
-                    
-                    if switch_state == "normal":
-                        # Normal: 27→28 (continue forward)
-                        self.log_to_terminal(f"[BLOCK 27 ROUTING] Normal position: 27 → 28")
-                        # print(f"[ROUTING] RED LINE forward: Block 27 → 28 (Switch 27 normal)")
-                        return 28
-                    else:  # reverse
-                        # Reverse: 27→76 (forward branch), then enter reverse mode for 76→75→74→73→72
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            self.train_directions[train_id] = 'red_branch_27_to_76_reverse'
-                            self.log_to_terminal(f"[BLOCK 27 ROUTING] Reverse position: 27 → 76, setting mode = 'red_branch_27_to_76_reverse'")
-                        # print(f"[ROUTING] RED LINE forward: Block 27 → 76 (Switch 27 reverse branch, entering reverse mode)")
-                        return 76
-                else:
-                    self.log_to_terminal(f"[BLOCK 27 WARNING] Switch routing check failed - falling through to default")
-            
-            
-            # Switch 38 (forward-only): When at block 38 going forward
-            elif is_red_line and current_block == 38:
-                self.log_to_terminal(f"[BLOCK 38 ENTRY] Entered block 38 routing, train_idx={train_idx}")
-                self.log_to_terminal(f"[BLOCK 38 LINE CHECK] is_red_line = {is_red_line}")
-                
-                # Get train info for logging
-                if train_idx < len(self.data_manager.active_trains):
-                    train_id = self.data_manager.active_trains[train_idx]
-                    current_mode = self.train_directions.get(train_id, 'forward')
-                    self.log_to_terminal(f"[BLOCK 38 MODE CHECK] Train {train_id} mode = {current_mode}")
-                
-                # Check Red Line switch routing directly (not self.switch_routing which may be set to Green)
-                has_switch_routing_red = hasattr(self.data_manager, 'switch_routing_red')
-                switch_38_in_routing = 38 in self.switch_routing_red if has_switch_routing_red else False
-                self.log_to_terminal(f"[BLOCK 38 SWITCH CHECK] has_switch_routing_red = {has_switch_routing_red}")
-                self.log_to_terminal(f"[BLOCK 38 SWITCH CHECK] 38 in switch_routing_red = {switch_38_in_routing}")
-                
-                if has_switch_routing_red and switch_38_in_routing:
-                    # Get the block object to check its switch_state
-                    if len(self.data_manager.blocks) > 37:
-                        block_38 = self.data_manager.blocks[37]  # Block 38 (index 37)
-                        
-                        # Check both switch_direction and switch_state
-                        switch_direction = getattr(block_38, 'switch_direction', None)
-                        switch_state_bool = getattr(block_38, 'switch_state', None)
-                        
-                        # Determine if switch is in reverse
-                        is_reverse = False
-                        if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                            is_reverse = switch_state_bool
-                        elif switch_direction is not None:
-                            is_reverse = (switch_direction == "reverse")
-                        
-                        switch_state = "reverse" if is_reverse else "normal"
-                    self.log_to_terminal(f"[BLOCK 38 SWITCH STATE] switch_state = '{switch_state}'")
-                    
-                    if switch_state == "normal":
-                        # Normal: 38→39 (continue forward)
-                        self.log_to_terminal(f"[BLOCK 38 ROUTING] Normal position: 38 → 39")
-                        # print(f"[ROUTING] RED LINE forward: Block 38 → 39 (Switch 38 normal)")
-                        return 39
-                    else:  # reverse
-                        # Reverse: 38→71 (forward jump), then enter reverse mode for 71→70→69→68→67
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            self.train_directions[train_id] = 'red_branch_38_to_71_reverse'
-                            self.log_to_terminal(f"[BLOCK 38 ROUTING] Reverse position: 38 → 71, setting mode = 'red_branch_38_to_71_reverse'")
-                        # print(f"[ROUTING] RED LINE forward: Block 38 → 71 (Switch 38 reverse jump, entering reverse mode)")
-                        return 71
-                else:
-                    self.log_to_terminal(f"[BLOCK 38 WARNING] Switch routing check failed - falling through to default")
-            
-            
-            # Switch 52 (forward mode)
-            elif is_red_line and current_block == 52:
-                # DEBUG: This should NOT run if train is in backward mode
-                if train_idx < len(self.data_manager.active_trains):
-                    train_id = self.data_manager.active_trains[train_idx]
-                    train_mode = self.train_directions.get(train_id, 'forward')
-                    self.log_to_terminal(f"[BLOCK 52 FORWARD CHECK] WARNING: Forward switch check triggered! Train mode = {train_mode}")
-                
-                # Check switch 52 direction
-                if len(self.data_manager.blocks) > 51:
-                    block_52 = self.data_manager.blocks[51]  # Block 52 (index 51)
-                    
-                    # Check both switch_direction (string from Wayside) and switch_state (boolean from Test UI)
-                    switch_direction = getattr(block_52, 'switch_direction', None)
-                    switch_state = getattr(block_52, 'switch_state', None)
-                    
-                    # DEBUG: Show both values
-                    self.log_to_terminal(f"[BLOCK 52 DEBUG] switch_direction={switch_direction}, switch_state={switch_state}")
-                    
-                    # Determine if switch is in reverse position
-                    # PRIORITY: Use switch_state (boolean from Test UI) if it exists, otherwise use switch_direction
-                    is_reverse = False
-                    if switch_state is not None and isinstance(switch_state, bool):
-                        # From Test UI: True = reverse (52-66 connection), False = normal (52-53 connection)
-                        is_reverse = switch_state
-                        self.log_to_terminal(f"[BLOCK 52 DEBUG] Using switch_state (boolean) = {switch_state}, is_reverse: {is_reverse}")
-                    elif switch_direction is not None:
-                        # From Wayside: check if it's "reverse"
-                        is_reverse = (switch_direction == "reverse")
-                        self.log_to_terminal(f"[BLOCK 52 DEBUG] Using switch_direction (string) = '{switch_direction}', is_reverse: {is_reverse}")
-                    
-                    if not is_reverse:
-                        return 53  # Continue normally to 53
-                    else:
-                        # Jump to 66 - set backward mode BEFORE routing
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            self.train_directions[train_id] = 'red_backward_66_to_16'
-                        # print(f"[ROUTING] RED LINE: Block 52 → 66 (Switch 52 jump, entering backward mode)")
-                        return 66
-            
-            # Default: normal forward progression
-            return current_block + 1
-        
-        # RED LINE RULE 3: Block 16 - Check switch 15 when in backward mode
-        elif current_block == 16:
-            self.log_to_terminal(f"[BLOCK 16 ENTRY] Entered block 16 routing, train_idx={train_idx}")
-            
-            # Check current line
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            is_red_line = current_line and current_line.get() == "Red Line"
-            
-            # Check if train is in Red Line backward mode from 66
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                current_mode = self.train_directions.get(train_id, 'forward')
-                self.log_to_terminal(f"[BLOCK 16 MODE CHECK] Train {train_id} mode = {current_mode}")
-                # print(f"[DEBUG] Block 16: Train {train_id} mode = {current_mode}")
-                
-                # Check for Green Line backward loop mode FIRST (GREEN LINE ONLY)
-                if is_green_line and self.train_directions.get(train_id) == 'backward_loop':
-                    # Green Line backward loop - continue backward from 16 to 15
-                    # print(f"[ROUTING] GREEN LINE backward loop: Block 16 → 15 (continuing backward)")
-                    return 15
-                
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # At switch 15, check which way to route
-                    self.log_to_terminal(f"[BLOCK 16 BACKWARD] In red_backward_66_to_16 mode")
-                    # print(f"[ROUTING] RED LINE backward: Reached block 16 (switch 15 junction)")
-                    
-                    # Check switch 15 state (use actual block.switch_state boolean)
-                    if len(self.data_manager.blocks) > 14:
-                        block_15 = self.data_manager.blocks[14]  # Switch at block 15 (index 14)
-                        if hasattr(block_15, 'switch_state'):
-                            # After swap: True = "1 to 16", False = "15 to 16"
-                            if block_15.switch_state:  # True = checked = "1 to 16"
-                                # Exit backward loop, go to block 1
-                                self.train_directions[train_id] = 'forward'
-                                # print(f"[ROUTING] RED LINE: Block 16 → 1 (Switch 15 set to '1 to 16', exit backward loop)")
-                                return 1
-                            else:  # False = unchecked = "15 to 16"
-                                # Continue backward to block 15
-                                # print(f"[ROUTING] RED LINE: Block 16 → 15 (Switch 15 set to '15 to 16', continue backward)")
-                                return 15
-                    
-                    # Default: continue backward to 15
-                    return 15
-            else:
-                self.log_to_terminal(f"[BLOCK 16 WARNING] train_idx {train_idx} out of range, active_trains length = {len(self.data_manager.active_trains)}")
-            
-            # Not in red_backward_66_to_16 mode, but might still be going backward
-            # Check if on Red Line and if switch 15 should control routing
-            self.log_to_terminal(f"[BLOCK 16 LINE CHECK] is_red_line = {is_red_line}")
-            
-            if is_red_line:
-                # Check if train is in ANY backward mode (not just red_backward_66_to_16)
-                train_id = self.data_manager.active_trains[train_idx] if train_idx < len(self.data_manager.active_trains) else None
-                self.log_to_terminal(f"[BLOCK 16 TRAIN ID] train_id = {train_id}")
-                
-                is_any_backward = False
-                if train_id and hasattr(self, 'train_directions'):
-                    train_mode = self.train_directions.get(train_id, 'forward')
-                    # Check for any backward mode (explicit check for backward modes only)
-                    is_any_backward = 'backward' in train_mode.lower()
-                    self.log_to_terminal(f"[BLOCK 16 MODE] train_mode = {train_mode}, is_any_backward = {is_any_backward}")
-                
-                # If in any backward mode, check switch 15 for routing
-                if is_any_backward:
-                    self.log_to_terminal(f"[BLOCK 16 ANY BACKWARD] Detected backward mode")
-                    if len(self.data_manager.active_trains) > 14:
-                        block_15 = self.data_manager.blocks[14]  # Switch at block 15
-                        if hasattr(block_15, 'switch_state'):
-                            # After swap: True = "1 to 16", False = "15 to 16"
-                            if block_15.switch_state:  # True = checked = "1 to 16"
-                                # Exit to block 1
-                                self.train_directions[train_id] = 'forward'
-                                # print(f"[ROUTING] RED LINE: Block 16 → 1 (Switch 15 set to '1 to 16', backward mode)")
-                                return 1
-                            else:  # False = unchecked = "15 to 16"
-                                # Continue backward to block 15
-                                # print(f"[ROUTING] RED LINE: Block 16 → 15 (Switch 15 set to '15 to 16', backward mode)")
-                                return 15
-                
-                # FORWARD MODE: Block 16 always routes to 17 in forward mode
-                # The switch does NOT affect forward routing
-                # It only affects backward mode routing (to exit the loop)
-                else:
-                    self.log_to_terminal(f"[BLOCK 16 FORWARD MODE] Normal forward, routing to block 17")
-                    # print(f"[ROUTING] RED LINE: Block 16 → 17 (normal forward)")
-                    return 17
-            
-            # Default: forward to block 17
-            self.log_to_terminal(f"[BLOCK 16 DEFAULT] Falling through to default, returning 17")
-            # print(f"[ROUTING] Block 16 → 17 (forward)")
-            return 17
-        
-        # RED LINE RULE 4: Block 15 - Handle backward mode exit
-        elif current_block == 15:
-            # Check current line
-            current_line = getattr(self, 'selected_line', None)
-            is_green_line = current_line and current_line.get() == "Green Line"
-            
-            # Check if train is in Red Line backward mode OR Green Line backward loop mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                
-                # Check for entering loop mode (from block 16)
-                if self.train_directions.get(train_id) == 'entering_loop_15':
-                    # Continue backward through loop circuit
-                    # print(f"[ROUTING] RED LINE entering loop: Block 15 → 14")
-                    return 14
-                
-                # Check for Red Line backward mode
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Continue backward from 15 to 14
-                    # print(f"[ROUTING] RED LINE backward: Block 15 → 14 (continuing backward)")
-                    return 14
-                
-                # Check for Green Line backward loop mode (from 150→28→27→...→15) - GREEN LINE ONLY
-                if is_green_line and self.train_directions.get(train_id) == 'backward_loop':
-                    # Continue backward from 15 to 14
-                    # print(f"[ROUTING] GREEN LINE backward loop: Block 15 → 14 (continuing backward)")
-                    return 14
-            
-            # Not in backward mode: normal forward to block 16
-            # Switch 15 does NOT affect forward routing from block 15
-            # It only affects backward mode routing at block 16
-            # print(f"[ROUTING] RED LINE: Block 15 → 16 (normal forward)")
-            return 16
-        
-        # RED LINE RULE 5: Blocks 1-14 - Check if in backward mode, if so exit
-        elif 1 <= current_block <= 14:
-            # Check if train is in Red Line backward mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'red_backward_66_to_16':
-                    # Continue backward
-                    if current_block > 1:
-                        next_block = current_block - 1
-                        # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                        return next_block
-                    else:
-                        # Reached block 1, exit backward mode
-                        self.train_directions[train_id] = 'forward'
-                        # print(f"[ROUTING] RED LINE: Reached block 1, exiting backward mode → 2")
-                        return 2
-            
-            # Not in backward mode: normal forward progression
-            # Check for any special routing at block 1
-            if current_block == 1:
-                switch_routing = self.data_manager.get_current_switch_routing(self.selected_line.get())
-                if switch_routing and 1 in switch_routing:
-                    switch_state = self.data_manager.switch_states.get(1, "normal")
-                    if switch_state == "normal":
-                        return 2
-                    else:  # reverse
-                        return 16  # Jump to block 16
-            
-            return current_block + 1  # Default forward
-        
-        # ============================================================
-        # END RED LINE BACKWARD LOOP
-        # ============================================================
-        
-        # RED LINE RULE 6: Blocks 53-76 - Handle backward mode, branch switches, and jump destinations
-        elif 53 <= current_block <= 76:
-            # Check if train is in any special mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                current_mode = self.train_directions.get(train_id, 'forward')
-                
-                # ====================================================================
-                # BRANCH SWITCH MODES (Switches 27, 32, 38, 43)
-                # ====================================================================
-                
-                # Mode: red_branch_27_to_76_reverse
-                # Path: 27→76→75→74→73→72, then exit to 33 in forward mode
-                if current_mode == 'red_branch_27_to_76_reverse':
-                    self.log_to_terminal(f"[BRANCH MODE 27] Train {train_id} in red_branch_27_to_76_reverse at block {current_block}")
-                    if current_block == 76:
-                        # Just entered from 27, continue backward to 75
-                        self.log_to_terminal(f"[BRANCH MODE 27] Block 76 → 75 (reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 27: Block 76 → 75 (reverse mode)")
-                        return 75
-                    elif current_block == 72:
-                        # Reached end of branch, exit to 33 in forward mode
-                        self.train_directions[train_id] = 'forward'
-                        self.log_to_terminal(f"[BRANCH MODE 27] Block 72 → 33 (exiting branch to forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 27: Block 72 → 33 (exiting branch to forward mode)")
-                        return 33
-                    elif 73 <= current_block <= 75:
-                        # Continue backward
-                        next_block = current_block - 1
-                        self.log_to_terminal(f"[BRANCH MODE 27] Block {current_block} → {next_block} (reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 27: Block {current_block} → {next_block} (reverse mode)")
-                        return next_block
-                
-                # Mode: red_branch_38_to_71_reverse
-                # Path: 38→71→70→69→68→67, then exit to 44 in forward mode
-                elif current_mode == 'red_branch_38_to_71_reverse':
-                    self.log_to_terminal(f"[BRANCH MODE 38] Train {train_id} in red_branch_38_to_71_reverse at block {current_block}")
-                    if current_block == 71:
-                        # Just entered from 38, continue backward to 70
-                        self.log_to_terminal(f"[BRANCH MODE 38] Block 71 → 70 (reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 38: Block 71 → 70 (reverse mode)")
-                        return 70
-                    elif current_block == 67:
-                        # Reached end of branch, exit to 44 in forward mode
-                        self.train_directions[train_id] = 'forward'
-                        self.log_to_terminal(f"[BRANCH MODE 38] Block 67 → 44 (exiting branch to forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 38: Block 67 → 44 (exiting branch to forward mode)")
-                        return 44
-                    elif 68 <= current_block <= 70:
-                        # Continue backward
-                        next_block = current_block - 1
-                        self.log_to_terminal(f"[BRANCH MODE 38] Block {current_block} → {next_block} (reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 38: Block {current_block} → {next_block} (reverse mode)")
-                        return next_block
-                
-                # Mode: red_branch_32_to_76_forward
-                # Path: 33→72→73→74→75→76, then exit to 27 in reverse mode
-                elif current_mode == 'red_branch_32_to_76_forward':
-                    self.log_to_terminal(f"[BRANCH MODE 32] Train {train_id} in red_branch_32_to_76_forward at block {current_block}")
-                    if current_block == 72:
-                        # Just entered from 33, continue forward to 73
-                        self.log_to_terminal(f"[BRANCH MODE 32] Block 72 → 73 (forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 32: Block 72 → 73 (forward mode)")
-                        return 73
-                    elif current_block == 76:
-                        # Reached end of branch, exit to 27 in reverse mode
-                        self.train_directions[train_id] = 'red_backward_66_to_16'  # Use standard backward mode
-                        self.log_to_terminal(f"[BRANCH MODE 32] Block 76 → 27 (exiting branch to reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 32: Block 76 → 27 (exiting branch to reverse mode)")
-                        return 27
-                    elif 73 <= current_block <= 75:
-                        # Continue forward
-                        next_block = current_block + 1
-                        self.log_to_terminal(f"[BRANCH MODE 32] Block {current_block} → {next_block} (forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 32: Block {current_block} → {next_block} (forward mode)")
-                        return next_block
-                
-                # Mode: red_branch_43_to_71_forward
-                # Path: 44→67→68→69→70→71, then exit to 38 in reverse mode
-                elif current_mode == 'red_branch_43_to_71_forward':
-                    self.log_to_terminal(f"[BRANCH MODE 43] Train {train_id} in red_branch_43_to_71_forward at block {current_block}")
-                    if current_block == 67:
-                        # Just entered from 44, continue forward to 68
-                        self.log_to_terminal(f"[BRANCH MODE 43] Block 67 → 68 (forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 43: Block 67 → 68 (forward mode)")
-                        return 68
-                    elif current_block == 71:
-                        # Reached end of branch, exit to 38 in reverse mode
-                        self.train_directions[train_id] = 'red_backward_66_to_16'  # Use standard backward mode
-                        self.log_to_terminal(f"[BRANCH MODE 43] Block 71 → 38 (exiting branch to reverse mode)")
-                        # print(f"[ROUTING] RED LINE branch 43: Block 71 → 38 (exiting branch to reverse mode)")
-                        return 38
-                    elif 68 <= current_block <= 70:
-                        # Continue forward
-                        next_block = current_block + 1
-                        self.log_to_terminal(f"[BRANCH MODE 43] Block {current_block} → {next_block} (forward mode)")
-                        # print(f"[ROUTING] RED LINE branch 43: Block {current_block} → {next_block} (forward mode)")
-                        return next_block
-                
-                # ====================================================================
-                # STANDARD RED LINE BACKWARD MODE (red_backward_66_to_16)
-                # ====================================================================
-                
-                elif current_mode == 'red_backward_66_to_16':
-                    # Train is in standard backward mode
-                    # This can happen if train jumped to block 67 or 72 via backward switches
-                    # OR if train exited from branch modes above
-                    
-                    # Continue backward from jump destinations or branch exits
-                    if current_block == 72:
-                        # Could be from switch 32 jump OR from branch 32 exit
-                        # Continue backward: 72→71→70→...
-                        # print(f"[ROUTING] RED LINE backward: Block 72 → 71 (continuing backward)")
-                        return 71
-                    elif current_block == 67:
-                        # Could be from switch 43 jump OR from branch 43 exit
-                        # Continue backward: 67→66→... (66 will loop back to 52)
-                        # print(f"[ROUTING] RED LINE backward: Block 67 → 66 (continuing backward)")
-                        return 66
-                    elif current_block >= 54:
-                        # Normal backward progression in this range
-                        next_block = current_block - 1
-                        # print(f"[ROUTING] RED LINE backward: Block {current_block} → {next_block}")
-                        return next_block
-                    else:  # current_block == 53
-                        # From 53, go back to 52
-                        # print(f"[ROUTING] RED LINE backward: Block 53 → 52")
-                        return 52
-            
-            # Not in any special mode: normal forward progression
-            # Blocks 71 and 76 can be reached via forward jumps
-            return current_block + 1  # Normal forward
-        
-        # RULE 7: Block 77 and beyond (Green Line specific, but keeping for compatibility)
-        # Switch is housed at block 76 but only affects backward traffic from N section
-        elif current_block == 76:
-            return 77  # Always go to 77 from 76 (forward direction)
-        
-        # RULE 8: Block 77 routing - controlled by switch at block 76
-        # Excel: SWITCH (76-77; 77-101) - switch housed at block 76
-        # Forward (from 76): ALWAYS goes 77 → 78 (cannot bypass to 101)
-        # Backward (from 78): Can go 77 → 101 (bypass) OR 77 → 78 (loop back into N section)
-        elif current_block == 77:
-            # Check if this train is in backward N section mode (coming from 78)
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'backward_n_section':
-                    # Train is traveling backward through N section (from 78)
-                    # Check switch at block 76 to decide routing
-                    if len(self.data_manager.blocks) > 75:
-                        block_76 = self.data_manager.blocks[75]  # Switch housed at block 76 (index 75)
-                        if hasattr(block_76, 'switch_state'):
-                            if block_76.switch_state:  # True = Normal = Loop back into N section
-                                # Don't exit backward mode, loop back to 78
-                                # print(f"[ROUTING] Block 77 → 78 (Looping back into N section via switch at 76)")
-                                return 78
-                            else:  # False = Reverse = Exit to 101
-                                # Exit backward traversal at 77, continue to 101
-                                self.train_directions[train_id] = 'forward'
-                                # print(f"[ROUTING] Exiting N section backward traversal at block 77 → 101 (via switch at 76)")
-                                return 101
-                    # Default: exit to 101
-                    self.train_directions[train_id] = 'forward'
-                    # print(f"[ROUTING] Exiting N section backward traversal at block 77 → 101")
-                    return 101
-            
-            # Forward direction (from block 76) - ALWAYS goes to 78
-            # Cannot bypass to 101 from forward direction
-            return 78  # Enter N section
-        
-        # RULE 9: Normal progression through N section (78-84)
-        elif 78 <= current_block < 85:
-            # First check if this train is in backward N section mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'backward_n_section':
-                    next_block = self.get_next_block_backward_n_section(current_block)
-                    if next_block == 101:
-                        # Exiting backward traversal, reset to forward
-                        self.train_directions[train_id] = 'forward'
-                        # print(f"[ROUTING] Exiting N section backward traversal at block {current_block} → 101")
-                    elif next_block:
-                        pass
-                        # print(f"[ROUTING] N section backward: Block {current_block} → {next_block}")
-                    return next_block
-            # Normal forward progression
-            return current_block + 1  # Normal ascending: 78→79→80→81→82→83→84→85
-        
-        # RULE 9b: Switch housed at block 85
-        elif current_block == 85:
-            # First check if this train is in backward N section mode
-            if train_idx < len(self.data_manager.active_trains):
-                train_id = self.data_manager.active_trains[train_idx]
-                if self.train_directions.get(train_id) == 'backward_n_section':
-                    next_block = self.get_next_block_backward_n_section(current_block)
-                    if next_block:
-                        pass
-                        # print(f"[ROUTING] N section backward: Block 85 → {next_block}")
-                    return next_block
-            
-            # Normal forward routing (not in backward mode)
-            if len(self.data_manager.blocks) > 84:
-                block_85 = self.data_manager.blocks[84]  # Switch housed at block 85 (index 84)
-                if hasattr(block_85, 'switch_state'):
-                    if block_85.switch_state:  # True = To block 86
-                        return 86  # Normal forward progression
-                    else:  # False = Would be for backward entry from 100
-                        # But when AT block 85 (coming from 84), we always go forward to 86
-                        return 86
-            return 86  # Default forward to 86
-        
-        # RULE 10: Normal progression from 86-99
-        elif 86 <= current_block <= 99:
-            return current_block + 1  # Continue ascending
-        
-        # RULE 11: Block 100 → 85 (BIDIRECTIONAL backward entry to N section)
-        elif current_block == 100:
-            # Check if switch at 85 is set for backward entry
-            if len(self.data_manager.blocks) > 84:
-                block_85 = self.data_manager.blocks[84]  # Block 85 at index 84
-                if hasattr(block_85, 'switch_state'):
-                    if not block_85.switch_state:  # False = Allow 100→85 backward route
-                        # print(f"[ROUTING] Block 100 → 85 (BIDIRECTIONAL: Backward entry to N section)")
-                        # Mark this train as going backward through N section
-                        if train_idx < len(self.data_manager.active_trains):
-                            train_id = self.data_manager.active_trains[train_idx]
-                            self.train_directions[train_id] = 'backward_n_section'
-                        return 85  # DESCENDING: 100 → 85
-                    else:
-                        return 101  # Normal ascending to 101
-            # Default: continue ascending
-            return 101
-        
-        # RULE 12: Continue normal progression 101-149
-        elif 101 <= current_block <= 149:
-            return current_block + 1  # Normal ascending
-        
-        # ============================================================
-        # DEFAULT: NORMAL ASCENDING PROGRESSION
-        # ============================================================
-        else:
-            # Standard ascending order for any other block
-            next_block = current_block + 1
-            
-            # Safety check
-            if next_block > 150:
-                return 150  # Stay at 150
-            
-            return next_block
-    
-    def get_next_block_backward_n_section(self, current_block):
-        """
-        Handle backward progression through N section (85→84→83→...→77→101).
-        This is only used when a train enters from block 100 to block 85.
+        Args:
+            events: List of AuthorityLedger.AuthorityEvent
         """
-        if current_block == 85:
-            return 84
-        elif current_block == 84:
-            return 83
-        elif current_block == 83:
-            return 82
-        elif current_block == 82:
-            return 81
-        elif current_block == 81:
-            return 80
-        elif current_block == 80:
-            return 79
-        elif current_block == 79:
-            return 78
-        elif current_block == 78:
-            return 77
-        elif current_block == 77:
-            # Exit N section backward traversal, continue to 101
-            return 101
-        else:
-            # Should not reach here in backward N section traversal
-            return None
-    
+        for event in events:
+            self.log_to_terminal(f" {event.train_id} reached its stop point at block {event.block}", INFO)
+            self.send_authority_remaining(event.train_id)
+
+    def send_authority_remaining(self, train_id):
+        """Send a train's remaining authority in metres (None = unlimited) to the Train Model and Wayside."""
+        metres = self.authority_ledger.remaining(train_id)
+        value = None if metres == float("inf") else round(metres, 1)
+        try:
+            self.server.send_to_ui("Train Model", {
+                "command": "Authority Remaining",
+                "value": value,
+                "train_id": train_id
+            })
+            for ui_name in ("Track SW", "Track HW"):
+                self.server.send_to_ui(ui_name, {
+                    "command": "authority_remaining",
+                    "track": self.get_current_track(),
+                    "value": {str(train_id): value}
+                })
+        except Exception as e:
+            print(f" Error sending remaining authority: {e}")
+
     def send_block_occupancy_update(self, block_num, occupancy):
         """Send block occupancy update to other modules."""
         try:
@@ -3646,7 +2528,7 @@ class TrackModelUI(tk.Tk):
             # Send to Track SW (Wayside Controller) in the exact format required
             # Flat structure with track, block, occupied fields
             self.server.send_to_ui("Track SW", {
-                'track': 'Green',
+                'track': self.get_current_track(),
                 'block': str(block_num),  # Convert to string
                 'occupied': str(occupancy)  # Send occupancy value as string (e.g., "0" or "1")
             })
@@ -3678,62 +2560,10 @@ class TrackModelUI(tk.Tk):
                     })
                     
 
-                    # Check for beacon data - only blocks 27 and 38 on Red Line
-                    if occupancy != 0 and block_num in [27, 38]:
-                        print(f"\n[BEACON DEBUG] Train entered beacon block {block_num}")
-                        # Only send beacons if on Red Line
-                        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
-                        print(f"[BEACON DEBUG] Current line: {current_line}")
-                        if "Red" in current_line or "red" in current_line:
-                            print(f"[BEACON DEBUG] ✓ On Red Line - processing beacon")
-                            # Determine which beacon command to send
-                            beacon_command = 'Beacon1' if block_num == 27 else 'Beacon2'
-                            
-                            # Get the block object
-                            block_obj = self.data_manager.blocks[block_num - 1]
-                            
-                            # Check switch state with priority: switch_state > switch_direction > switch_states dict
-                            switch_state_bool = getattr(block_obj, 'switch_state', None)
-                            switch_direction = getattr(block_obj, 'switch_direction', None)
-                            
-                            print(f"[BEACON DEBUG] Switch state sources:")
-                            print(f"[BEACON DEBUG]   - switch_state: {switch_state_bool}")
-                            print(f"[BEACON DEBUG]   - switch_direction: {switch_direction}")
-                            print(f"[BEACON DEBUG]   - switch_states dict: {self.data_manager.switch_states.get(block_num, 'not set')}")
-                            
-                            beacon_value = False  # Default to normal
-                            if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                                beacon_value = switch_state_bool
-                                print(f"[BEACON DEBUG] Using switch_state (Test UI): {beacon_value}")
-                            elif switch_direction is not None:
-                                beacon_value = (switch_direction == 'reverse')
-                                print(f"[BEACON DEBUG] Using switch_direction (Wayside): {switch_direction} → {beacon_value}")
-                            else:
-                                switch_state_str = self.data_manager.switch_states.get(block_num, 'normal')
-                                beacon_value = (switch_state_str == 'reverse')
-                                print(f"[BEACON DEBUG] Using switch_states dict: {switch_state_str} → {beacon_value}")
-                            
-                            # Send beacon data to Train Model
-                            beacon_message = {
-                                'command': beacon_command,
-                                'value': beacon_value
-                            }
-                            print(f"[BEACON DEBUG] Sending beacon message: {beacon_message}")
-                            self.server.send_to_ui("Train Model", beacon_message)
-                            print(f"🚨 {beacon_command.upper()} sent (train entered block {block_num}): {beacon_value}")
-                            
-                            # Send to Train SW for train controller
-                            self.server.send_to_ui("Train SW", beacon_message)
-                            
-                            # Report to CTC
-                            self.server.send_to_ui("CTC", {
-                                "command": "beacon_activated",
-                                "block": block_num,
-                                "beacon": beacon_command,
-                                "beacon_value": beacon_value
-                            })
-                        else:
-                            print(f"[BEACON DEBUG] ❌ Not on Red Line - beacon not sent")
+                    # Beacon blocks: precomputed payload for the current switch state
+                    beacon_message = self.beacons.lookup(self.get_current_line(), block_num)
+                    if beacon_message is not None:
+                        self.send_beacon(beacon_message)
             # print(f" Sent occupancy update: Block {block_num} = {occupancy}")
             
         except Exception as e:
@@ -3741,14 +2571,23 @@ class TrackModelUI(tk.Tk):
     
     def is_beacon_active(self, block):
         """Check if a beacon is active for a given block."""
-        # Only blocks 27 and 38 on Red Line have beacons
         if hasattr(block, 'block_number'):
-            block_num = block.block_number
-            # Check if on Red Line
-            current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
-            if "Red" in current_line or "red" in current_line:
-                return block_num in [27, 38]
+            return self.beacons.is_beacon(self.get_current_line(), block.block_number)
         return False
+
+    def send_beacon(self, beacon_message):
+        """Send a precomputed beacon payload to the Train Model / Train SW and report it to CTC."""
+        self.server.send_to_ui("Train Model", beacon_message)
+        # Send to Train SW for train controller
+        self.server.send_to_ui("Train SW", beacon_message)
+        # Report to CTC
+        self.server.send_to_ui("CTC", {
+            "command": "beacon_activated",
+            "block": beacon_message["block"],
+            "beacon": beacon_message["command"],
+            "beacon_value": beacon_message["value"]
+        })
+        # print(f"{beacon_message['command']} sent (block {beacon_message['block']}): {beacon_message['value']}")
     
     def log_switch_change(self, block_num, from_block, to_block, state, direction):
         """Log switch state changes with descriptive information"""
@@ -3803,11 +2642,7 @@ class TrackModelUI(tk.Tk):
                         self.bidir_controls["Blocks 77-85"].set("← Left")
         
         # Log to terminal if available
-        for terminal in self.terminals:
-            terminal.config(state="normal")
-            terminal.insert("end", f"Switch {block_num}: {direction} ({from_block}→{to_block})\n")
-            terminal.see("end")
-            terminal.config(state="disabled")
+        self.log_to_terminal(f"Switch {block_num}: {direction} ({from_block}→{to_block})", INFO)
     
     def force_bidirectional_table_visible(self):
         """Force the bidirectional table to be visible - debugging method"""
@@ -3908,14 +2743,12 @@ class TrackModelUI(tk.Tk):
 
         # Beacons - Only blocks 27 and 38 on Red Line
         terminal.insert("end", "=== BEACON STATUS ===\n")
-        active_beacons = [block for block in dm.blocks if self.is_beacon_active(block)]
-        if active_beacons:
-            for block in active_beacons:
-                block_num = block.block_number
-                # Get switch state for this beacon
-                switch_state = self.data_manager.switch_states.get(block_num, 'normal')
-                beacon_value = (switch_state == 'reverse')
-                terminal.insert("end", f"Beacon{1 if block_num == 27 else 2} (Block {block_num}): {beacon_value} (switch: {switch_state})\n")
+        beacon_blocks = self.beacons.beacons_on(self.get_current_line())
+        if beacon_blocks:
+            for block_num in beacon_blocks:
+                beacon = self.beacons.lookup(self.get_current_line(), block_num)
+                terminal.insert("end", f"{beacon['command']} (Block {block_num}): {beacon['value']} "
+                                       f"(branch: {beacon['branch']}, next station: {beacon['next_station']})\n")
         else:
             terminal.insert("end", "No active beacons (only on Red Line, blocks 27 & 38)\n")
         terminal.insert("end", "\n")
@@ -3925,10 +2758,8 @@ class TrackModelUI(tk.Tk):
         # print(" Terminal update complete")
 
     def _log_to_terminal(self, terminal, msg):
-        """Append a message to a specific terminal."""
-        terminal.insert("end", f"{msg}\n")
-        terminal.see("end")
-        terminal.config(state="disabled")
+        """Append a message to the terminals (batched with the rest of the event log)."""
+        self.log_to_terminal(msg)
     
     def log_message(self, msg):
         """Append a message to the terminal log."""
@@ -3970,8 +2801,9 @@ class TrackModelUI(tk.Tk):
         """Handle PNG/JPG upload - replace track diagram background and clear all icons"""
         try:
             # Load and resize the new image
-            new_img = Image.open(filename).resize((550, 450), Image.LANCZOS)
-            self.track_bg = ImageTk.PhotoImage(new_img)
+            # Drop any stale copy in case a file with the same name was re-uploaded
+            image_cache.clear(filename)
+            self.track_bg = image_cache.get_photo(filename, (550, 450))
             
             # Clear EVERYTHING from the canvas first
             self.track_canvas.delete("all")  # This removes all canvas items
@@ -4041,24 +2873,15 @@ class TrackModelUI(tk.Tk):
             else:
                 image_file = "GreenLineOcc.png" if hasattr(self, "selected_line") and self.selected_line.get() == "Green Line" else "GreenLineOcc.png"
             
-            # Load original image to get its aspect ratio
-            original_img = Image.open(image_file)
-            original_width, original_height = original_img.size
-            original_aspect = original_width / original_height
-            
             # Calculate dimensions that fit within available space while maintaining aspect ratio
-            if available_width / available_height > original_aspect:
-                # Height is the limiting factor
-                new_height = available_height
-                new_width = int(new_height * original_aspect)
-            else:
-                # Width is the limiting factor
-                new_width = available_width
-                new_height = int(new_width / original_aspect)
+            # (the original is opened once and each fitted size is resized once, then cached)
+            new_width, new_height = image_cache.fit_size(image_file, available_width, available_height)
+            self.track_bg = image_cache.get_photo(image_file, (new_width, new_height))
             
-            # Resize image maintaining aspect ratio
-            bg_img = original_img.resize((new_width, new_height), Image.LANCZOS)
-            self.track_bg = ImageTk.PhotoImage(bg_img)
+            # Have the other line's diagram ready at the same size for a line switch
+            other_file = "RedLineOcc.png" if image_file == "GreenLineOcc.png" else "GreenLineOcc.png"
+            if image_file in ("GreenLineOcc.png", "RedLineOcc.png"):
+                image_cache.prescale(other_file, [(new_width, new_height)])
             
             # Clear and redraw canvas
             self.track_canvas.delete("all")
@@ -4172,6 +2995,8 @@ class TrackModelUI(tk.Tk):
 
     def draw_block_markers(self):
         """Draw block markers (black dots or train icons) based on occupancy status"""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # Determine which position dictionary to use based on selected line
         if hasattr(self, 'selected_line'):
             current_line = self.selected_line.get()
@@ -4204,6 +3029,11 @@ class TrackModelUI(tk.Tk):
         
         self.block_markers = {}
         
+        # Blocks with a Murphy failure (index lookup, no per-block query)
+        failed_blocks = {}
+        if hasattr(self, 'murphy_failures') and self.murphy_failures:
+            failed_blocks = self.murphy_failures.failure_bits
+        
         # Draw marker for each block
         for block_num, (base_x, base_y) in positions.items():
             # Skip placeholder blocks (coordinates 0,0)
@@ -4225,9 +3055,7 @@ class TrackModelUI(tk.Tk):
                 marker = self.track_canvas.create_image(x, y, image=self.train_icon, anchor="center")
             else:
                 # Check if block has a Murphy failure
-                has_failure = False
-                if hasattr(self, 'murphy_failures') and self.murphy_failures:
-                    has_failure = self.murphy_failures.has_failure(block_num)
+                has_failure = block_num in failed_blocks
                 
                 # Draw dot - blue if failure, black otherwise
                 dot_radius = 4
@@ -4247,6 +3075,8 @@ class TrackModelUI(tk.Tk):
 
     def update_block_marker(self, block_num):
         """Update a single block marker based on its occupancy status"""
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # Determine which position dictionary to use based on selected line
         if hasattr(self, 'selected_line'):
             current_line = self.selected_line.get()
@@ -4460,6 +3290,12 @@ class TrackModelUI(tk.Tk):
             # Reset ticket sales and passenger data arrays to match new station data
             self.reset_station_data_arrays()
             
+            # Switch positions come from the new data (store, then beacon payloads)
+            line = self.track_lines.bound_line
+            if line is not None:
+                line.reload_switches()
+                self._build_beacon_table(line)
+            
             # Refresh both UIs to show the new data
             self.refresh_all_uis()
             
@@ -4630,11 +3466,7 @@ class TrackModelUI(tk.Tk):
 
     def log_to_all_terminals(self, message):
         """Log message to all terminal widgets"""
-        for terminal in self.terminals:
-            terminal.config(state="normal")
-            terminal.insert("end", f"{message}\n")
-            terminal.see("end")
-            terminal.config(state="disabled")
+        self.log_to_terminal(message)
 
     def create_block_occupancy_panel(self, parent):
         """Create Block Occupancy display panel for center area."""
@@ -4700,6 +3532,8 @@ class TrackModelUI(tk.Tk):
             self.draw_trains(canvas=self.block_canvas, items_list=self.train_items_block_canvas)
 
     def refresh_ui(self):
+        if not self.is_displayed_line():
+            return  # Stepping a line that isn't on screen
         # Update environmental temp (if temp_label exists)
         if hasattr(self, 'temp_label'):
             env_temp = getattr(self.data_manager, 'environmental_temp', None)
@@ -4743,6 +3577,10 @@ class TrackModelUI(tk.Tk):
             # print(f" Cannot turn on heater for block {block.block_number} - heater is not working")
             return False  # Can't turn on a non-working heater
         
+        if hasattr(self, 'heater_manager'):
+            # Keeps the heater manager's state arrays in step with the block
+            return self.heater_manager.set_heater_state(block, is_on, is_working)
+        
         block.track_heater = [1 if is_on else 0, 1 if is_working else 0]
         # print(f"🔧 Block {block.block_number} heater: {'ON' if is_on else 'OFF'}, {'WORKING' if is_working else 'BROKEN'}")
         return True
@@ -4784,9 +3622,7 @@ class TrackModelUI(tk.Tk):
             if self.murphy_failures.get_failure_status(block_num) == "track_circuit":
                 self.murphy_failures.clear_failure(block_num)
                 print(f"[FAILURE] Track Circuit Failure cleared on block {block_num}")
-        
-        # Immediately send updated failure list to wayside
-        self.send_failure_modes_to_wayside()
+        # The change is published to the wayside by on_failure_event
 
     def on_broken_rail_failure_change(self, block_num):
         """Called when broken rail failure checkbox is toggled."""
@@ -4799,9 +3635,7 @@ class TrackModelUI(tk.Tk):
             if self.murphy_failures.get_failure_status(block_num) == "broken_rail":
                 self.murphy_failures.clear_failure(block_num)
                 print(f"[FAILURE] Broken Rail Failure cleared on block {block_num}")
-        
-        # Immediately send updated failure list to wayside
-        self.send_failure_modes_to_wayside()
+        # The change is published to the wayside by on_failure_event
 
     def on_power_failure_change(self, block_num):
         """Called when power failure checkbox is toggled."""
@@ -4814,9 +3648,7 @@ class TrackModelUI(tk.Tk):
             if self.murphy_failures.get_failure_status(block_num) == "power":
                 self.murphy_failures.clear_failure(block_num)
                 print(f"[FAILURE] Power Failure cleared on block {block_num}")
-        
-        # Immediately send updated failure list to wayside
-        self.send_failure_modes_to_wayside()
+        # The change is published to the wayside by on_failure_event
 
 
     # 5. Add helper method to get selected block (if you don't have one already):
@@ -4985,12 +3817,13 @@ class TrackModelUI(tk.Tk):
 
         self.track_sys_tree.delete(*self.track_sys_tree.get_children())
         infra_map = getattr(self.data_manager, "infrastructure_data", {})
+        failure_bits = self.murphy_failures.failure_bits
         rows = []
         
         for b in self.data_manager.blocks:
             has_switch = b.block_number in self.data_manager.switch_blocks or getattr(b, "switch_state", False)
             # Check which light set to use based on selected line
-            current_line = self.selected_line.get() if hasattr(self, "selected_line") else "Green Line"
+            current_line = self.get_current_line()
             light_set = self.data_manager.green_line_lights if "Green" in current_line else self.data_manager.red_line_lights
             has_signal = b.block_number in light_set or getattr(b, "light_state", None) is not None
             has_crossing = b.block_number in self.data_manager.crossing_blocks or getattr(b, "crossing", False)
@@ -5004,7 +3837,8 @@ class TrackModelUI(tk.Tk):
             
             if has_switch or has_signal or has_crossing or has_station:
                 # Check for power failure
-                has_power = self.murphy_failures.has_power(b.block_number)
+                block_failures = failure_bits.get(b.block_number, 0)
+                has_power = not block_failures & FAILURE_BITS["power"]
                 
                 # Switch state
                 if has_switch:
@@ -5069,7 +3903,7 @@ class TrackModelUI(tk.Tk):
                     heater_display = "--"
                 
                 # Failure status
-                failure_status = self.murphy_failures.get_failure_display_text(b.block_number)
+                failure_status = self.murphy_failures.get_failure_display_text(b.block_number) if block_failures else "✅ OK"
 
                 rows.append((b.block_number, switch_state, signal_display, crossing_state, 
                             heater_display, failure_status))
@@ -5085,9 +3919,9 @@ class TrackModelUI(tk.Tk):
     def handle_train_arrival_at_station(self, block_num, train_id=None):
         """
         Handle when a train stops at a station (authority reaches 0).
-        - Generates random passengers boarding (0 to ticket_sales)
-        - Sends boarding count to Train Model immediately
-        - Resets ticket sales to new random value (0-70)
+        - Passengers headed for this station get off (demand model OD matrix)
+        - Waiting passengers board, up to the train's free capacity
+        - Sends boarding/disembarking counts to Train Model immediately
         - Sends updated station data to CTC
         
         This is ONLY called when a train's authority reaches 0 at a station,
@@ -5098,12 +3932,11 @@ class TrackModelUI(tk.Tk):
             train_id (str): ID of the train that stopped (optional)
         """
         # Check if this block is a station
-        station_info = next((s for s in self.data_manager.station_location if s[0] == block_num), None)
-        if not station_info:
+        station_name = self.get_station_events().station_at(block_num)
+        if station_name is None:
             # print(f"    Block {block_num} is not a station!")
             return  # Not a station
         
-        station_name = station_info[1]
         idx = block_num - 1
         
         # print(f"\n    BEFORE:")
@@ -5111,36 +3944,16 @@ class TrackModelUI(tk.Tk):
         # print(f"      Passengers boarding length: {len(self.data_manager.passengers_boarding)}")
         # print(f"      Block index: {idx}")
         
-        # Get current ticket sales (passengers waiting)
-        tickets_waiting = self.data_manager.ticket_sales[idx]
-        # print(f"      Current ticket sales at idx {idx}: {tickets_waiting}")
-        
-        # Generate random boarding count (0 to tickets_waiting)
-        if tickets_waiting > 0:
-            passengers_boarding = self.random.randint(0, tickets_waiting)
-        else:
-            passengers_boarding = 0
-        
-        # Update passengers boarding
-        self.data_manager.passengers_boarding[idx] = passengers_boarding
+        # Passengers for this station get off, then waiting passengers board
+        # (destinations come from the demand model's OD matrix)
+        passengers_boarding, passengers_disembarking = self.data_manager.board_train_at_station(train_id, block_num)
         
         # print(f"\n    TRAIN ARRIVAL at {station_name} (Block {block_num}):")
-        # print(f"      Passengers waiting: {tickets_waiting}")
-        # print(f"      Passengers boarding: {passengers_boarding}")
+        # print(f"      Passengers boarding: {passengers_boarding}, disembarking: {passengers_disembarking}")
         
         # Send passengers boarding to Train Model (with train_id)
         self.send_passengers_boarding_to_train_model(block_num, train_id)
         
-        # Generate new random ticket sales for next train (0-70)
-        new_tickets = self.random.randint(0, 70)
-        self.data_manager.ticket_sales[idx] = new_tickets
-        
-        # print(f"      New tickets sold: {new_tickets}")
-        
-        # print(f"\n    AFTER:")
-        # print(f"      ticket_sales[{idx}] = {self.data_manager.ticket_sales[idx]}")
-        # print(f"      passengers_boarding[{idx}] = {self.data_manager.passengers_boarding[idx]}")
-        
         # Send updated station data to CTC (ticket sales + disembarking)
         self.send_station_data_to_ctc(block_num)
 
@@ -5156,9 +3969,9 @@ class TrackModelUI(tk.Tk):
             str: Station name if found, or "Unknown Station" if not found
         """
         if hasattr(self.data_manager, 'station_location'):
-            for blk_num, station_name in self.data_manager.station_location:
-                if blk_num == block_num:
-                    return station_name
+            station_name = self.get_station_events().station_at(block_num)
+            if station_name is not None:
+                return station_name
         return "Unknown Station"
 
     def send_passengers_boarding_to_train_model(self, block_num, train_id=None):
@@ -5198,6 +4011,7 @@ class TrackModelUI(tk.Tk):
             boarding_message = {
                 'command': 'Passengers Boarding',
                 'value': passenger_count,
+                'disembarking': int(self.data_manager.passengers_disembarking[idx]),
                 'train_id': train_id_int
             }
             
@@ -5218,7 +4032,7 @@ class TrackModelUI(tk.Tk):
     def send_beacon_data_on_departure(self, train_id, block_num):
         """
         Send beacon data to Train Model when a train departs.
-        Only blocks 27 and 38 on Red Line have beacons.
+        Only beacon blocks (27 and 38 on Red Line) send anything.
         
         Args:
             train_id (str): ID of the departing train
@@ -5228,148 +4042,18 @@ class TrackModelUI(tk.Tk):
             bool: True if beacon data was sent successfully, False otherwise
         """
         try:
-            # Only send beacons for blocks 27 and 38 on Red Line
-            if block_num not in [27, 38]:
+            beacon_message = self.beacons.lookup(self.get_current_line(), block_num)
+            if beacon_message is None:
                 return False
             
-            # Check if on Red Line
-            current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
-            if "Green" in current_line:
-                return False
-            
-            # Get switch state for this beacon block
-            switch_state = self.data_manager.switch_states.get(block_num, 'normal')
-            beacon_value = (switch_state == 'reverse')
-            
-            # Determine which beacon command to send
-            beacon_command = 'beacon1' if block_num == 27 else 'beacon2'
-            
             # Send beacon data to Train Model
-            beacon_message = {
-                'command': beacon_command,
-                'value': beacon_value
-            }
             self.server.send_to_ui("Train Model", beacon_message)
-            
-            print(f"Sent {beacon_command} to Train Model:")
-            print(f"   Block: {block_num}")
-            print(f"   Value (switch state): {beacon_value}")
-            
             return True
                 
         except Exception as e:
             return False
 
 
-    def monitor_station_occupancy(self):
-        """
-        Monitor block occupancy at stations for tracking purposes.
-        Note: Passenger boarding is handled separately in monitor_train_authority_for_boarding()
-        when a train's authority reaches 0 at a station.
-        """
-        # Initialize previous occupancy tracking if not exists
-        if not hasattr(self, '_previous_station_occupancy'):
-            self._previous_station_occupancy = {}
-            for block_num, _ in self.data_manager.station_location:
-                self._previous_station_occupancy[block_num] = 0
-            # print("🔍 === STARTED MONITORING STATION OCCUPANCY ===")
-            # print(f"   Monitoring stations: {[f'Block {b}' for b, _ in self.data_manager.station_location]}\n")
-        
-        # Check each station for train arrival
-        for block_num, station_name in self.data_manager.station_location:
-            block_idx = block_num - 1
-            if block_idx < len(self.data_manager.blocks):
-                block = self.data_manager.blocks[block_idx]
-                current_occupancy = getattr(block, 'occupancy', 0)
-                previous_occupancy = self._previous_station_occupancy[block_num]
-                
-                # Debug: Print occupancy check (only on first few iterations)
-                if not hasattr(self, '_debug_count'):
-                    self._debug_count = 0
-                
-                if self._debug_count < 3:  # Only print first 3 times
-                    pass
-                    # print(f"   Checking Block {block_num} ({station_name}): prev={previous_occupancy}, curr={current_occupancy}")
-                
-                # Detect train arrival (occupancy changed from 0 to non-zero)
-                if previous_occupancy == 0 and current_occupancy != 0:
-                    # Train entered the station block
-                    # Note: Passenger boarding is handled separately when authority reaches 0
-                    # in monitor_train_authority_for_boarding()
-                    pass
-                    # print(f"\n === TRAIN ARRIVAL DETECTED ===")
-                    # print(f"   Train {current_occupancy} arrived at {station_name} (Block {block_num})")
-                    # print(f"   === TRAIN ARRIVAL HANDLED ===\n")
-                
-                # Update previous occupancy
-                self._previous_station_occupancy[block_num] = current_occupancy
-        
-        if self._debug_count < 3:
-            self._debug_count += 1
-        
-        # Check again in 500ms (faster monitoring for train arrivals)
-        self.after(500, self.monitor_station_occupancy)
-
-    def monitor_train_authority_for_boarding(self):
-        """
-        Monitor train authority values and trigger:
-        1. Passenger boarding when authority reaches 0 (train stops) at a station
-        2. Beacon transmission when authority increases from 0 (train departs) from a station
-        
-        This is called periodically (every 500ms) to check authority changes.
-        """
-        try:
-            # Check each active train
-            for idx, train_id in enumerate(self.data_manager.active_trains):
-                if idx < len(self.data_manager.commanded_authority):
-                    current_authority = self.data_manager.commanded_authority[idx]
-                    
-                    # Get previous authority (default to -1 if first check)
-                    previous_authority = self._previous_train_authority.get(train_id, -1)
-                    
-                    # ARRIVAL: Check if authority just reached 0 (train stopped)
-                    if previous_authority > 0 and current_authority == 0:
-                        # Authority reached 0 - check if train is at a station
-                        if idx < len(self.data_manager.train_locations):
-                            block_num = self.data_manager.train_locations[idx]
-                            
-                            # Check if this block has a station
-                            station_info = next(
-                                (s for s in self.data_manager.station_location if s[0] == block_num), 
-                                None
-                            )
-                            
-                            if station_info:
-                                station_name = station_info[1]
-                                
-                                # Record that this train is stopped at this station
-                                self._trains_stopped_at_station[train_id] = block_num
-                                
-                                # Handle passenger boarding (pass train_id)
-                                self.handle_train_arrival_at_station(block_num, train_id)
-                    
-                    # DEPARTURE: Check if authority increased from 0 (train departing)
-                    elif previous_authority == 0 and current_authority > 0:
-                        # Train is starting to move after being stopped
-                        # Check if this train was stopped at a station
-                        if train_id in self._trains_stopped_at_station:
-                            departure_block = self._trains_stopped_at_station[train_id]
-                            
-                            # Send beacon data for the station the train is leaving
-                            self.send_beacon_data_on_departure(train_id, departure_block)
-                            
-                            # Remove from stopped trains tracking
-                            del self._trains_stopped_at_station[train_id]
-                    
-                    # Update previous authority
-                    self._previous_train_authority[train_id] = current_authority
-        
-        except Exception as e:
-            pass
-        
-        # Schedule next check
-        self.after(500, self.monitor_train_authority_for_boarding)
-
     def prompt_and_activate_track_circuit(self):
         """Prompt for block number and activate/clear track circuit failure."""
         if self.failure_train_circuit_var.get():
@@ -5400,64 +4084,10 @@ class TrackModelUI(tk.Tk):
                 self.failure_train_circuit_var.set(True)
 
     def _create_train_from_wayside(self, speed, authority):
-        """Automatically create a train object when Wayside sends new speed/authority."""
-        # Initialize starting ID if not set yet
-        if not hasattr(self.data_manager, "next_train_id"):
-            self.data_manager.next_train_id = 1
-
-        # Assign new train ID (as integer)
-        train_id = self.data_manager.next_train_id
-        self.data_manager.next_train_id += 1
-
-        # Store train ID as integer
-        self.data_manager.active_trains.append(train_id)
-        self.data_manager.commanded_speed.append(speed)
-        self.data_manager.commanded_authority.append(authority)
-        self.data_manager.train_occupancy.append(0)
-        
-        # Initialize train actual speed to 0 (will be updated by Train Model)
-        self.train_actual_speeds[train_id] = 0
-        self.train_positions_in_block[train_id] = 0
-        import time
-        self.last_movement_update[train_id] = time.time()
-
-        # print(f"[TRAIN CREATED] ID={train_id}, Speed={speed} m/s, Authority={authority} blocks")
-
-        # Refresh dropdowns and terminals
-        self.train_combo["values"] = self.data_manager.active_trains
-        self.train_combo.set(train_id)
-        self.send_outputs()
-    
-    def _create_train_from_yard(self, speed, authority):
-        """Create a new train specifically from the Yard/Block 63, starting at block 63."""
-        # Initialize starting ID if not set yet
-        if not hasattr(self.data_manager, "next_train_id"):
-            self.data_manager.next_train_id = 1
-
-        # Assign new train ID (as integer)
-        train_id = self.data_manager.next_train_id
-        self.data_manager.next_train_id += 1
-
-        # Register new train in data manager (as integer)
-        self.data_manager.active_trains.append(train_id)
-        
-        # Ensure train_locations list exists and is properly sized
-        if not hasattr(self.data_manager, 'train_locations'):
-            self.data_manager.train_locations = []
-        
-        # Ensure the list is the same size as active_trains
-        while len(self.data_manager.train_locations) < len(self.data_manager.active_trains) - 1:
-            self.data_manager.train_locations.append(0)
-        
-        # Add this train at block 63
-        self.data_manager.train_locations.append(63)  # Start at block 63
-        
-        # Set commanded speed and authority
-        self.data_manager.commanded_speed.append(speed if speed is not None else 0)
-        self.data_manager.commanded_authority.append(authority if authority is not None else 0)
-        
-        # Initialize train occupancy (passengers)
-        self.data_manager.train_occupancy.append(0)
+        """Automatically create a train object when Wayside sends new speed/authority. Returns its ID."""
+        # Register the train on the bound line at that line's yard entry block
+        train_id = self.dispatch_train(speed, authority)
+        entry_block = self.data_manager.train_locations[self.data_manager.active_trains.index(train_id)]
 
         # print(f" [YARD/BLOCK 63 TRAIN CREATED] ID={train_id}, Starting at Block 63")
         # print(f"   Initial Speed={speed} m/s, Authority={authority} blocks")
@@ -5466,7 +4096,7 @@ class TrackModelUI(tk.Tk):
         # print(f"   Array sizes: active_trains={len(self.data_manager.active_trains)}, commanded_speed={len(self.data_manager.commanded_speed)}, commanded_authority={len(self.data_manager.commanded_authority)}")
 
         # Update UI elements if they exist
-        if hasattr(self, 'train_combo'):
+        if hasattr(self, 'train_combo') and self.is_displayed_line():
             self.train_combo["values"] = self.data_manager.active_trains
             self.train_combo.set(train_id)
         
@@ -5476,7 +4106,7 @@ class TrackModelUI(tk.Tk):
             self.server.send_to_ui("Train Model", {
                 "command": "new_train",
                 "train_id": train_id,
-                "block_number": 63
+                "block_number": entry_block
             })
             
             # Send commanded speed separately
@@ -5496,8 +4126,8 @@ class TrackModelUI(tk.Tk):
             self.server.send_to_ui("CTC", {
                 "command": "train_dispatched",
                 "train_id": train_id,
-                "from": "Yard/Block63",
-                "entry_block": 63
+                "from": f"Yard/Block{entry_block}",
+                "entry_block": entry_block
             })
         except Exception as e:
             print(f" Error sending train creation notifications: {e}")
@@ -5570,10 +4200,10 @@ class TrackModelUI(tk.Tk):
     def on_closing(self):
         """Handle application closing"""
         # print("Closing application...")
-        self.server.running = False
-        if self.server.server_socket:
+        self.socket_server.running = False
+        if self.socket_server.server_socket:
             try:
-                self.server.server_socket.close()
+                self.socket_server.server_socket.close()
             except:
                 pass
         self.root.destroy()
@@ -5584,9 +4214,24 @@ class TrackModelUI(tk.Tk):
     # ---------------- OUTPUT METHODS (Sending Data) ----------------
 
     def send_all_outputs(self):
-        """Send all outputs to appropriate UIs. Call this periodically or on state change."""
+        """Send all outputs of every simulated line. Call this periodically or on state change."""
+        if not hasattr(self, 'track_lines'):
+            return self.send_line_outputs()
+        for line in self.track_lines:
+            with self.track_lines.using(line):
+                self.send_line_outputs()
+
+    def send_all_failure_modes(self):
+        """Send the full failure lists of every simulated line to the waysides (once they have connected)."""
+        if not hasattr(self, 'track_lines'):
+            return self.send_failure_modes_to_wayside()
+        for line in self.track_lines:
+            with self.track_lines.using(line):
+                self.send_failure_modes_to_wayside()
+
+    def send_line_outputs(self):
+        """Send all outputs of the currently bound line to the appropriate UIs."""
         self.send_all_station_data_to_ctc()
-        self.send_failure_modes_to_wayside()
         self.send_block_occupancy_to_wayside()
         self.send_block_occupancy_to_train_model()
         self.send_commanded_speed_to_train_model()
@@ -5625,7 +4270,7 @@ class TrackModelUI(tk.Tk):
         This is called periodically by send_all_outputs().
         """
         # Get the current line and extract color
-        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
+        current_line = self.get_current_line()
         line_color = "Red" if "Red" in current_line else "Green"
         
         for block_num, station_name in self.data_manager.station_location:
@@ -5650,53 +4295,69 @@ class TrackModelUI(tk.Tk):
 
     def send_failure_modes_to_wayside(self):
         """
-        Send failure modes to Wayside Controllers (Track SW and Track HW).
+        Send the full failure lists to Wayside Controllers (Track SW and Track HW).
         Groups failures by type and sends as arrays of block numbers.
+        
+        Only needed when a wayside (re)connects or asks for a resync -
+        normal changes go out as deltas from publish_failure_changes().
         """
-        failures = self.murphy_failures.get_all_failures()
-        
-        # Group failures by type into arrays
-        track_circuit_failures = []
-        broken_rail_failures = []
-        power_failures = []
-        
-        for block_num, failure_type in failures.items():
-            if failure_type == "track_circuit":
-                track_circuit_failures.append(block_num)
-            elif failure_type == "broken_rail":
-                broken_rail_failures.append(block_num)
-            elif failure_type == "power_failure":
-                power_failures.append(block_num)
-        
-        # Sort arrays for consistent ordering
-        track_circuit_failures.sort()
-        broken_rail_failures.sort()
-        power_failures.sort()
+        failure_lists = self.murphy_failures.get_failure_lists()
         
         # Create message with arrays of block numbers for each failure type
         failure_message = {
             'command': 'failure_modes',
-            'track_circuit_failures': track_circuit_failures,
-            'broken_rail_failures': broken_rail_failures,
-            'power_failures': power_failures
+            'value': dict(failure_lists, sequence=self.murphy_failures.sequence),
+            'track': self.get_current_track(),
+            **failure_lists
         }
         
         # Send to both Track SW and Track HW
         self.server.send_to_ui("Track SW", failure_message)
         self.server.send_to_ui("Track HW", failure_message)
+
+    def on_failure_event(self, line, event):
+        """
+        Called by MurphyTrackFailures for every failure set/cleared.
+        Changes are queued and published together on the next idle cycle.
+        """
+        if not hasattr(self, '_pending_failure_events'):
+            self._pending_failure_events = []
+        self._pending_failure_events.append((line, event))
+        if len(self._pending_failure_events) == 1:
+            self.after_idle(self.publish_failure_changes)
+
+    def publish_failure_changes(self):
+        """
+        Push queued failure changes: redraw only the affected block markers and
+        send only the changed blocks to the Wayside Controllers.
+        """
+        pending = getattr(self, '_pending_failure_events', [])
+        self._pending_failure_events = []
+        if not pending:
+            return
         
-        # Debug output
-        total_failures = len(track_circuit_failures) + len(broken_rail_failures) + len(power_failures)
-        if total_failures > 0:
-            print(f"\n[FAILURE DEBUG] Sent failure modes to Wayside Controllers:")
-            if track_circuit_failures:
-                print(f"  🔴 Track Circuit Failures: {track_circuit_failures}")
-            if broken_rail_failures:
-                print(f"  🔴 Broken Rail Failures: {broken_rail_failures}")
-            if power_failures:
-                print(f"  🔴 Power Failures: {power_failures}")
-        # else:
-        #     print(f"[FAILURE DEBUG] No active failures to send")
+        for line in {line for line, _ in pending}:
+            events = [event for event_line, event in pending if event_line is line]
+            with self.track_lines.using(line):
+                if self.is_displayed_line():
+                    for block_num in {event.block for event in events}:
+                        if block_num in getattr(self, 'block_markers', {}):
+                            self.update_block_marker(block_num)
+                    self.update_track_system_table()
+                
+                failure_delta = {
+                    'command': 'failure_delta',
+                    'track': self.get_current_track(),
+                    'value': {
+                        'sequence': events[-1].sequence,
+                        'changes': [
+                            [e.sequence, e.block, e.failure, 1 if e.active else 0, round(e.time, 3)]
+                            for e in events
+                        ]
+                    }
+                }
+                self.server.send_to_ui("Track SW", failure_delta)
+                self.server.send_to_ui("Track HW", failure_delta)
 
 
     def send_block_occupancy_to_wayside(self):
@@ -5713,7 +4374,7 @@ class TrackModelUI(tk.Tk):
             self.server.send_to_ui("Track SW", {
                 'command': 'update_occupancy', 
                 'value': {
-                    'track': 'Green',
+                    'track': self.get_current_track(),
                     'block': str(block.block_number),  # Send as string
                     'occupied': is_occupied  # Boolean value
                 }
@@ -5746,7 +4407,7 @@ class TrackModelUI(tk.Tk):
         
         # Send in the flat format with all occupancy data at once
         self.server.send_to_ui("Track SW", {
-            'track': 'Green',
+            'track': self.get_current_track(),
             'block': 'all',  # Special indicator for bulk update
             'occupied': occupancy_data  # Dictionary of block_num: boolean
         })
@@ -5797,195 +4458,36 @@ class TrackModelUI(tk.Tk):
     def notify_switch_change_from_test_ui(self, block_num):
         """
         Called by Test UI when a switch state is manually changed.
-        Checks if beacon should be sent for blocks 27 or 38.
+        Moves the switch in the store to the block's new switch_state (forced -
+        the Test UI may move a switch under a train); the store sends the
+        beacon for blocks 27 or 38.
         
         Args:
             block_num (int): Block number that was changed
         """
-        print(f"\n[BEACON DEBUG] notify_switch_change_from_test_ui() called for block {block_num}")
-        if block_num in [27, 38]:
-            print(f"[BEACON DEBUG] Block {block_num} is a beacon block - calling send_beacon_for_switch_change()")
-            self.send_beacon_for_switch_change(block_num)
-        else:
-            print(f"[BEACON DEBUG] Block {block_num} is not a beacon block - ignoring")
-    
-    def send_beacon_for_switch_change(self, block_num):
-        """
-        Send beacon when switch state changes for blocks 27 or 38.
-        Only sends if the switch state is different from the previous state.
-        Sends regardless of block occupancy - switch state matters even without trains.
-        
-        Args:
-            block_num (int): Block number (27 or 38)
-        """
-        print(f"\n{'='*60}")
-        print(f"[BEACON DEBUG] send_beacon_for_switch_change() called for block {block_num}")
-        print(f"{'='*60}")
-        
-        # Only process beacon blocks on Red Line
-        if block_num not in [27, 38]:
-            print(f"[BEACON DEBUG] ❌ Block {block_num} is not a beacon block (only 27 and 38)")
-            return
-        print(f"[BEACON DEBUG] ✓ Block {block_num} is a beacon block")
-        
-        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
-        print(f"[BEACON DEBUG] Current line: {current_line}")
-        if "Green" in current_line:
-            print(f"[BEACON DEBUG] ❌ Not on Red Line - beacons only exist on Red Line")
-            return
-        print(f"[BEACON DEBUG] ✓ On Red Line")
-        
-        # Get the block object
-        if block_num > len(self.data_manager.blocks):
-            print(f"[BEACON DEBUG] ❌ Block {block_num} does not exist in data_manager.blocks")
-            return
-        block_obj = self.data_manager.blocks[block_num - 1]
-        print(f"[BEACON DEBUG] ✓ Block object retrieved")
-        
-        # Log occupancy for informational purposes (but don't stop if not occupied)
-        print(f"[BEACON DEBUG] Block occupancy: {block_obj.occupancy}")
-        print(f"[BEACON DEBUG] ℹ️ Beacon will be sent regardless of occupancy")
-        
-        # Determine current beacon value with priority: switch_state > switch_direction > switch_states dict
-        switch_state_bool = getattr(block_obj, 'switch_state', None)
-        switch_direction = getattr(block_obj, 'switch_direction', None)
-        
-        print(f"[BEACON DEBUG] Checking switch state sources:")
-        print(f"[BEACON DEBUG]   1. block.switch_state (Test UI): {switch_state_bool} (type: {type(switch_state_bool).__name__})")
-        print(f"[BEACON DEBUG]   2. block.switch_direction (Wayside): {switch_direction}")
-        print(f"[BEACON DEBUG]   3. switch_states dict: {self.data_manager.switch_states.get(block_num, 'not set')}")
-        
-        current_beacon_value = False  # Default to normal
-        source = "default"
-        if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-            current_beacon_value = switch_state_bool
-            source = "switch_state (Test UI)"
-            print(f"[BEACON DEBUG] ✓ Using switch_state from Test UI: {current_beacon_value}")
-        elif switch_direction is not None:
-            current_beacon_value = (switch_direction == 'reverse')
-            source = "switch_direction (Wayside)"
-            print(f"[BEACON DEBUG] ✓ Using switch_direction from Wayside: {switch_direction} → {current_beacon_value}")
-        else:
-            switch_state_str = self.data_manager.switch_states.get(block_num, 'normal')
-            current_beacon_value = (switch_state_str == 'reverse')
-            source = "switch_states dictionary"
-            print(f"[BEACON DEBUG] ✓ Using switch_states dictionary: {switch_state_str} → {current_beacon_value}")
-        
-        # Check if state changed
-        if not hasattr(self, 'previous_beacon_states'):
-            self.previous_beacon_states = {27: None, 38: None}
-        
-        previous_value = self.previous_beacon_states.get(block_num)
-        print(f"[BEACON DEBUG] Previous beacon value: {previous_value}")
-        print(f"[BEACON DEBUG] Current beacon value: {current_beacon_value}")
-        print(f"[BEACON DEBUG] Value source: {source}")
-        
-        # Send beacon if state changed or if it's the first time
-        if previous_value == current_beacon_value:
-            print(f"[BEACON DEBUG] ❌ Value unchanged - NOT sending beacon")
-            print(f"{'='*60}\n")
+        if not (1 <= block_num <= len(self.data_manager.blocks)):
             return
-        
-        print(f"[BEACON DEBUG] ✓ Value changed! Sending beacon...")
-        
-        beacon_command = 'Beacon1' if block_num == 27 else 'Beacon2'
-        
-        # Send beacon data to Train Model
-        beacon_message = {
-            'command': beacon_command,
-            'value': current_beacon_value
-        }
-        print(f"[BEACON DEBUG] Sending to Train Model: {beacon_message}")
-        self.server.send_to_ui("Train Model", beacon_message)
-        print(f"🔄 {beacon_command.upper()} sent (switch changed on block {block_num}): {current_beacon_value}")
-        
-        # Send to Train SW for train controller
-        print(f"[BEACON DEBUG] Sending to Train SW: {beacon_message}")
-        self.server.send_to_ui("Train SW", beacon_message)
-        
-        # Report to CTC
-        ctc_message = {
-            "command": "beacon_activated",
-            "block": block_num,
-            "beacon": beacon_command,
-            "beacon_value": current_beacon_value
-        }
-        print(f"[BEACON DEBUG] Sending to CTC: {ctc_message}")
-        self.server.send_to_ui("CTC", ctc_message)
-        
-        # Update previous state
-        self.previous_beacon_states[block_num] = current_beacon_value
-        print(f"[BEACON DEBUG] Updated previous_beacon_states[{block_num}] = {current_beacon_value}")
-        print(f"{'='*60}\n")
-
+        block = self.data_manager.blocks[block_num - 1]
+        self.switches.set(block_num, bool(getattr(block, 'switch_state', False)), source="Test UI", force=True)
+    
     def send_beacons_to_train_model(self):
         """
         Send beacon data to Train Model.
         Only 2 beacons exist in the system, both on the Red Line:
         - beacon1: boolean representing switch 27 state
         - beacon2: boolean representing switch 38 state
+        Beacons are only sent for occupied beacon blocks.
         """
-        # Only send beacons if we're on the Red Line
-        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
-        if "Green" in current_line:
-            return  # No beacons on Green Line
-        
-        # Beacon1: Block 27 - switch state
-        if len(self.data_manager.blocks) >= 27:
-            block_27 = self.data_manager.blocks[26]  # 0-indexed
-            if block_27.occupancy:
-                # Check both switch_state (boolean from Test UI) and switch_direction (string from Wayside)
-                # Priority: switch_state > switch_direction > switch_states dictionary
-                switch_state_bool = getattr(block_27, 'switch_state', None)
-                switch_direction = getattr(block_27, 'switch_direction', None)
-                
-                # Determine if switch is in reverse
-                beacon1_value = False  # Default to normal
-                if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                    beacon1_value = switch_state_bool  # True = reverse, False = normal
-                elif switch_direction is not None:
-                    beacon1_value = (switch_direction == 'reverse')
-                else:
-                    # Fallback to switch_states dictionary
-                    switch_state_str = self.data_manager.switch_states.get(27, 'normal')
-                    beacon1_value = (switch_state_str == 'reverse')
-                
-                self.server.send_to_ui("Train Model", {
-                    'command': 'Beacon1',
-                    'value': beacon1_value
-                })
-                # print(f"Sent Beacon1 to Train Model: {beacon1_value}")
-        
-        # Beacon2: Block 38 - switch state  
-        if len(self.data_manager.blocks) >= 38:
-            block_38 = self.data_manager.blocks[37]  # 0-indexed
-            if block_38.occupancy:
-                # Check both switch_state (boolean from Test UI) and switch_direction (string from Wayside)
-                # Priority: switch_state > switch_direction > switch_states dictionary
-                switch_state_bool = getattr(block_38, 'switch_state', None)
-                switch_direction = getattr(block_38, 'switch_direction', None)
-                
-                # Determine if switch is in reverse
-                beacon2_value = False  # Default to normal
-                if switch_state_bool is not None and isinstance(switch_state_bool, bool):
-                    beacon2_value = switch_state_bool  # True = reverse, False = normal
-                elif switch_direction is not None:
-                    beacon2_value = (switch_direction == 'reverse')
-                else:
-                    # Fallback to switch_states dictionary
-                    switch_state_str = self.data_manager.switch_states.get(38, 'normal')
-                    beacon2_value = (switch_state_str == 'reverse')
-                
-                self.server.send_to_ui("Train Model", {
-                    'command': 'Beacon2',
-                    'value': beacon2_value
-                })
-                # print(f"Sent Beacon2 to Train Model: {beacon2_value}")
+        current_line = self.get_current_line()
+        for block_num in self.beacons.beacons_on(current_line):
+            if block_num <= len(self.data_manager.blocks) and self.data_manager.blocks[block_num - 1].occupancy:
+                self.server.send_to_ui("Train Model", self.beacons.lookup(current_line, block_num))
+                # print(f"Sent beacon for block {block_num} to Train Model")
 
     def send_light_states_to_train_controller(self):
         """Send traffic light states to Train Controller as two-bit boolean arrays."""
         # Get the appropriate light set based on selected line
-        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
+        current_line = self.get_current_line()
         light_set = self.data_manager.green_line_lights if "Green" in current_line else self.data_manager.red_line_lights
         
         light_data = {}
@@ -6012,7 +4514,37 @@ class TrackModelUI(tk.Tk):
     # ---------------- INPUT HANDLERS (Update _process_message) ----------------
 
     def _process_message(self, message, source_ui_id):
-        """Process incoming messages from other UIs"""
+        """
+        Socket thread entry point: queue the message for the Tk thread.
+        
+        Handling a message binds its line to self (track_lines.using), which
+        must not happen while the Tk thread is redrawing the displayed line.
+        """
+        self._inbound_messages.put((message, source_ui_id))
+
+    def drain_inbound_messages(self):
+        """Handle every queued socket message on the Tk thread (runs every 20ms)."""
+        while True:
+            try:
+                message, source_ui_id = self._inbound_messages.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self.handle_message(message, source_ui_id)
+            except Exception as e:
+                print(f" Error handling message from {source_ui_id}: {e}")
+        self.after(20, self.drain_inbound_messages)
+
+    def handle_message(self, message, source_ui_id):
+        """Process a message from another UI on the line it belongs to (Tk thread)"""
+        line = self._line_for_message(message)
+        if line is None or not hasattr(self, 'track_lines'):
+            return self._process_line_message(message, source_ui_id)
+        with self.track_lines.using(line):
+            return self._process_line_message(message, source_ui_id)
+
+    def _process_line_message(self, message, source_ui_id):
+        """Process one incoming message against the currently bound line"""
         try:
             # print(f"📨 Received from {source_ui_id}: {message}")
             
@@ -6043,6 +4575,24 @@ class TrackModelUI(tk.Tk):
                         print(f" Could not convert block_number '{block_number}' to int")
                         block_number = None
             
+            # ============================================================
+            # FAILURE RESYNC - Wayside missed a failure_delta
+            # ============================================================
+            if command == 'failure_resync':
+                self.send_failure_modes_to_wayside()
+                return
+
+            # ============================================================
+            # CLOCK MULTIPLIER - from CTC (1x / 10x / 50x)
+            # ============================================================
+            if command == 'MULT':
+                try:
+                    self.get_sim_time()  # Bank the time elapsed at the old rate first
+                    self.time_multiplier = float(value)
+                except (ValueError, TypeError):
+                    print(f" Invalid clock multiplier: {value}")
+                return
+
             # ============================================================
             # COMMANDED SPEED AND AUTHORITY - Combined command
             # Receives from Wayside: separate fields (block_number, commanded_speed, commanded_authority)
@@ -6094,26 +4644,11 @@ class TrackModelUI(tk.Tk):
                         block_62 = self.data_manager.blocks[61]  # Block 62 (index 61)
                         
                         # Check if switch is in the correct position (reverse = yard to 63)
-                        if hasattr(block_62, 'switch_direction'):
-                            switch_direction = block_62.switch_direction
-                            # Reverse position allows trains from yard to enter block 63
-                            if switch_direction == "reverse":
-                                switch_allows_yard_entry = True
-                                # print(f" Switch at block 62 is in REVERSE (yard→63) - allowing train spawn")
-                            else:
-                                # print(f" Switch at block 62 is in NORMAL (main line→63) - blocking train spawn from yard")
-                                pass
+                        if 62 in self.switches.switch_blocks:
+                            switch_allows_yard_entry = self.switches.is_reverse(62)
                         else:
-                            # If no switch direction set, check switch_states dictionary
-                            if hasattr(self.data_manager, 'switch_states') and 62 in self.data_manager.switch_states:
-                                switch_direction = self.data_manager.switch_states[62]
-                                if switch_direction == "reverse":
-                                    switch_allows_yard_entry = True
-                                    # print(f" Switch at block 62 (from dict) is in REVERSE - allowing train spawn")
-                            else:
-                                # Default to allowing if switch state is unknown (backwards compatibility)
-                                switch_allows_yard_entry = True
-                                # print(f" Switch state at block 62 unknown - defaulting to allow")
+                            # Default to allowing if block 62 has no switch (backwards compatibility)
+                            switch_allows_yard_entry = True
                     else:
                         # If block 62 doesn't exist, allow spawn (backwards compatibility)
                         switch_allows_yard_entry = True
@@ -6136,97 +4671,31 @@ class TrackModelUI(tk.Tk):
                             # print(f" Block 63 command received, but train already exists. Using: {train_id}")
                     elif not switch_allows_yard_entry:
                         # Log that spawn was blocked due to switch position
-                        try:
-                            for terminal in self.terminals:
-                                terminal.config(state="normal")
-                                terminal.insert("end", f" YARD DISPATCH BLOCKED: Switch at block 62 not in yard→63 position\n")
-                                terminal.see("end")
-                                terminal.config(state="disabled")
-                        except Exception as e:
-                            pass
+                        self.log_to_terminal(" YARD DISPATCH BLOCKED: Switch at block 62 not in yard→63 position", WARNING)
                         # print(f" Cannot spawn train at block 63: switch at block 62 not in correct position")
                 
                 if is_yard_dispatch:
-                    # Create a new train for yard dispatch
-                    new_train_id = self._create_train_from_yard(commanded_speed, commanded_authority)
+                    # Dispatch through the engine (entry block, authority ledger, station events);
+                    # actual speed will be received from the Train Model
+                    new_train_id = self._create_train_from_wayside(commanded_speed, commanded_authority)
                     train_id = new_train_id
+                    block_num = self.data_manager.train_locations[self.data_manager.active_trains.index(new_train_id)]
                     
-                    # Initialize train position tracking (actual speed will be received from Train Model)
-                    self.train_actual_speeds[new_train_id] = 0  # Start at 0, will be updated by Train Model
-                    self.train_positions_in_block[new_train_id] = 0
-                    import time
-                    self.last_movement_update[new_train_id] = time.time()
-                    # print(f" Initialized position tracking for {new_train_id}, waiting for actual speed from Train Model")
-                    
-                    # Set/ensure position at block 63 (entry from yard)
-                    block_num = 63
-                    
-                    # Set occupancy at block 63 - CRITICAL: This must happen
-                    try:
-                        if 63 <= len(self.data_manager.blocks):
-                            yard_entry_block = self.data_manager.blocks[62]  # Block 63 (index 62)
-                            # Initialize occupancy if it doesn't exist
-                            if not hasattr(yard_entry_block, 'occupancy'):
-                                yard_entry_block.occupancy = 0
-                                # print(f"[DEBUG] Initialized occupancy attribute for block 63")
-                            
-                            # Extract train number from train_id (train_id is now just a number like "1", "2", "3")
-                            train_num = int(new_train_id)
-                            yard_entry_block.occupancy = train_num
-                            # print(f" Set initial occupancy at Block 63 for {new_train_id}")
-                            # print(f"[DEBUG] Block 63 occupancy is now: {yard_entry_block.occupancy}")
-                            
-                            # Send occupancy update to other modules
-                            try:
-                                self.server.send_to_ui("Train Model", {
-                                    "command": "Block Occupancy",
-                                    "value": {63: train_num}
-                                })
-                                self.server.send_to_ui("Track SW", {
-                                    "command": "block_occupancy", 
-                                    "value": {63: train_num}
-                                })
-                                self.server.send_to_ui("Track HW", {
-                                    "command": "block_occupancy",
-                                    "value": {63: train_num}
-                                })
-                            except Exception as e:
-                                print(f" Error sending occupancy updates: {e}")
-                    except Exception as e:
-                        # print(f" CRITICAL: Failed to set block 63 occupancy: {e}")
-                        import traceback
-                        traceback.print_exc()
+                    # Report the occupied entry block to the Train Model and the Waysides
+                    self.send_block_occupancy_update(block_num, new_train_id)
                     
                     # Log the yard dispatch
-                    try:
-                        for terminal in self.terminals:
-                            terminal.config(state="normal")
-                            terminal.insert("end", f" YARD DISPATCH: {new_train_id} → Block 63\n")
-                            terminal.insert("end", f"   Speed: {commanded_speed} m/s, Authority: {commanded_authority} blocks\n")
-                            terminal.see("end")
-                            terminal.config(state="disabled")
-                    except Exception as e:
-                        print(f" Error updating terminal: {e}")
+                    self.log_to_terminal(f" YARD DISPATCH: {new_train_id} → Block {block_num}", INFO)
+                    self.log_to_terminal(f"   Speed: {commanded_speed} m/s, Authority: {commanded_authority} blocks", INFO)
                     
-                    # Update the occupied blocks display - CRITICAL
+                    # Update the occupied blocks display and the train icon on the map
                     try:
                         self.update_occupied_blocks_display()
-                        # print("[DEBUG] Called update_occupied_blocks_display after yard dispatch")
-                        
-                        # UPDATE BLOCK MARKER TO SHOW TRAIN ICON ON MAP
                         if hasattr(self, 'update_block_marker'):
-                            self.update_block_marker(63)
-                            # print("[DEBUG] Updated block marker for block 63 - train should now be visible on map")
+                            self.update_block_marker(block_num)
                     except Exception as e:
                         print(f" Error updating occupied blocks display: {e}")
                     
-                    # Force a full UI refresh to ensure everything updates
-                    try:
-                        self.refresh_ui()
-                        # print("[DEBUG] Called refresh_ui after yard dispatch")
-                    except Exception as e:
-                        print(f" Error during refresh_ui: {e}")
-                    
                 # Convert block_num to int if it's not already (and not "Yard")
                 elif block_num is not None and isinstance(block_num, str):
                     try:
@@ -6271,7 +4740,6 @@ class TrackModelUI(tk.Tk):
                     if train_id in self.data_manager.active_trains:
                         idx = self.data_manager.active_trains.index(train_id)
                         self.data_manager.commanded_speed[idx] = commanded_speed
-                        self.data_manager.commanded_authority[idx] = commanded_authority
                         # print(f" Updated commanded values for {train_id}: Speed={commanded_speed}, Authority={commanded_authority}")
                         
                         # Send commanded speed to Train Model
@@ -6288,6 +4756,10 @@ class TrackModelUI(tk.Tk):
                             "train_id": train_id
                         })
                         # print(f" Sent Commanded Speed and Authority to Train Model for {train_id}")
+                        
+                        # New authority counts from where the train is now (also raises station stop / departure)
+                        self.command_authority(train_id, commanded_authority)
+                        self.send_authority_remaining(train_id)
                     else:
                         pass
                         # print(f" Train {train_id} not found in active trains (will still display in Train Details). Available: {self.data_manager.active_trains}")
@@ -6327,11 +4799,11 @@ class TrackModelUI(tk.Tk):
                             
                             # Update the switch state
                             if 1 <= block_num <= len(self.data_manager.blocks):
-                                block = self.data_manager.blocks[block_num - 1]
                                 # FLIPPED LOGIC: 0 = True (reverse), 1 = False (normal)
-                                block.switch_state = not bool(pos)
-                                
                                 direction = "normal" if pos else "reverse"
+                                if not self.switches.set(block_num, direction, source=source_ui_id):
+                                    self.log_to_terminal(f"[WARNING] Switch {block_num} is locked (block occupied) - kept {self.switches.direction(block_num)}")
+                                    continue
                                 # print(f"   Updated switch at block {block_num}: {direction}")
                                 
                                 # Log the switch routing if available
@@ -6417,7 +4889,7 @@ class TrackModelUI(tk.Tk):
                     # print(f" Received light states from {source_ui_id}")
                     
                     # Get all blocks with lights for the current line
-                    current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
+                    current_line = self.get_current_line()
                     
                     # Determine which blocks have lights based on current line
                     if "Green" in current_line:
@@ -6494,18 +4966,13 @@ class TrackModelUI(tk.Tk):
                 if train_id not in self.data_manager.active_trains:
                     print(f"WARNING: Current Speed received for unregistered train {train_id}. Auto-creating train.")
                     
-                    # Initialize next_train_id if not set
-                    if not hasattr(self.data_manager, "next_train_id"):
-                        self.data_manager.next_train_id = 1
-                    
-                    # Use the next available train ID from the counter
-                    new_train_id = self.data_manager.next_train_id
-                    self.data_manager.next_train_id += 1
+                    # Use the next available train ID from the shared counter
+                    new_train_id = self.allocate_train_id()
                     
                     # Add the new train with the proper ID
                     self.data_manager.active_trains.append(new_train_id)
                     self.train_positions_in_block[new_train_id] = 0
-                    self.last_movement_update[new_train_id] = time.time()
+                    self.last_movement_update[new_train_id] = self.get_sim_time()
                     
                     # Update train_id to the newly assigned ID
                     train_id = new_train_id
@@ -6535,7 +5002,7 @@ class TrackModelUI(tk.Tk):
                 # 5. Do one immediate movement update
                 #    so occupancy follows ACTUAL speed instantly
                 # ---------------------------
-                self.update_train_movements()
+                self.step_line_movements()
                 self.update_occupied_blocks_display()
 
                 print(f"[TRACK MODEL] Updated actual speed for Train {train_id}: {speed_ms:.2f} m/s")
@@ -6658,8 +5125,8 @@ class TrackModelUI(tk.Tk):
                     # Handle array of switch states
                     if isinstance(switches, list):
                         # Determine which line we're on
-                        current_line = getattr(self, 'selected_line', None)
-                        is_red_line = current_line and current_line.get() == "Red Line"
+                        current_line = self.get_current_line()
+                        is_red_line = current_line == "Red Line"
                         
                         # Define switch block mapping based on current line
                         if is_red_line:
@@ -6695,8 +5162,6 @@ class TrackModelUI(tk.Tk):
                                     continue  # Skip - this switch belongs to Track SW
                                 
                                 if 1 <= block_num <= len(self.data_manager.blocks):
-                                    block = self.data_manager.blocks[block_num - 1]
-                                    
                                     # DEBUG: Log what we received for Red Line switches
                                     if block_num in [27, 32, 38, 43]:
                                         self.log_to_terminal(f"[SWITCH UPDATE] Received update for block {block_num}")
@@ -6715,33 +5180,20 @@ class TrackModelUI(tk.Tk):
                                         self.log_to_terminal(f"[SWITCH UPDATE]   Normalized direction: {direction}")
                                     
                                     # Show routing path if configured
-                                    switch_routing = self.data_manager.get_current_switch_routing(self.selected_line.get())
+                                    switch_routing = self.data_manager.get_current_switch_routing(self.get_current_line())
                                     if switch_routing and block_num in switch_routing:
                                         next_block = switch_routing[block_num][direction]
                                         # print(f"   Switch {block_num}: {direction} → routes to block {next_block} (from {source_ui_id})")
-                                    # Store switch direction in block
-                                    block.switch_direction = direction
-                                    
-                                    # Update switch states dictionary
-                                    if not hasattr(self.data_manager, 'switch_states'):
-                                        self.data_manager.switch_states = {}
-                                    self.data_manager.switch_states[block_num] = direction
+                                    # Store it (the switch store mirrors it onto the block and sends any beacon)
+                                    if not self.switches.set(block_num, direction, source=source_ui_id):
+                                        self.log_to_terminal(f"[WARNING] Switch {block_num} is locked (block occupied) - kept {self.switches.direction(block_num)}")
+                                        continue
                                     
                                     # DEBUG: Confirm storage
                                     if block_num in [27, 32, 38, 43]:
-                                        self.log_to_terminal(f"[SWITCH UPDATE]   Stored in switch_states[{block_num}] = '{direction}'")
-                                    
-                                    # Send beacon if this is a beacon block (27 or 38) and occupied
-                                    if block_num in [27, 38]:
-                                        print(f"\n[BEACON DEBUG] Switch update received for beacon block {block_num}")
-                                        print(f"[BEACON DEBUG] New direction: {direction}")
-                                        print(f"[BEACON DEBUG] Calling send_beacon_for_switch_change({block_num})...")
-                                        self.send_beacon_for_switch_change(block_num)
+                                        self.log_to_terminal(f"[SWITCH UPDATE]   Stored switch {block_num} = '{direction}' (version {self.switches.version})")
                                     
                                     # print(f"   Updated switch at block {block_num}: {direction} (from {source_ui_id})")
-                                    
-                                    # Mark block as having a switch
-                                    self.data_manager.switch_blocks.add(block_num)
                     
                     # Refresh relevant UI components
                     self.refresh_track_data_table()
@@ -6768,34 +5220,18 @@ class TrackModelUI(tk.Tk):
                         # print(f" Ignoring switch update for block {block} - belongs to Track SW")
                         pass
                     elif 1 <= block <= len(self.data_manager.blocks):
-                        block_obj = self.data_manager.blocks[block - 1]
-                        
                         # DEBUG: Log what we received for Red Line switches
                         if block in [27, 32, 38, 43]:
                             self.log_to_terminal(f"[SWITCH UPDATE SINGLE] Received update for block {block}")
                             self.log_to_terminal(f"[SWITCH UPDATE SINGLE]   Raw direction: {repr(direction)}")
                         
-                        # Store switch state
-                        block_obj.switch_direction = direction
-                        
-                        # Update switch states dictionary
-                        if not hasattr(self.data_manager, 'switch_states'):
-                            self.data_manager.switch_states = {}
-                        self.data_manager.switch_states[block] = direction
+                        # Store it (the switch store mirrors it onto the block and sends any beacon)
+                        if not self.switches.set(block, direction, source=source_ui_id):
+                            self.log_to_terminal(f"[WARNING] Switch {block} is locked (block occupied) - kept {self.switches.direction(block)}")
                         
                         # DEBUG: Confirm storage
                         if block in [27, 32, 38, 43]:
-                            self.log_to_terminal(f"[SWITCH UPDATE SINGLE]   Stored in switch_states[{block}] = '{direction}'")
-                        
-                        # Send beacon if this is a beacon block (27 or 38) and occupied
-                        if block in [27, 38]:
-                            print(f"\n[BEACON DEBUG] Single switch update received for beacon block {block}")
-                            print(f"[BEACON DEBUG] New direction: {direction}")
-                            print(f"[BEACON DEBUG] Calling send_beacon_for_switch_change({block})...")
-                            self.send_beacon_for_switch_change(block)
-                        
-                        # Mark block as having a switch
-                        self.data_manager.switch_blocks.add(block)
+                            self.log_to_terminal(f"[SWITCH UPDATE SINGLE]   Stored switch {block} = '{self.switches.direction(block)}'")
                         
                         # print(f" Updated switch at block {block}: {direction} (from {source_ui_id})")
                         
@@ -6826,7 +5262,7 @@ class TrackModelUI(tk.Tk):
         
         Returns True if block is controlled by Track SW, False if Track HW
         """
-        current_line = self.selected_line.get() if hasattr(self, 'selected_line') else "Green Line"
+        current_line = self.get_current_line()
         
         if "Green" in current_line:
             # Green Line: Track SW controls 63-149
@@ -6857,10 +5293,8 @@ class TrackModelUI(tk.Tk):
     # ---------------- PERIODIC OUTPUT UPDATES ----------------
 
     def start_output_updates(self):
-        """Start periodic output updates (every 5 seconds)."""
+        """Start periodic output updates (every 5 seconds) for every line."""
         self.send_all_outputs()
-        # Also send occupancy updates to Wayside
-        self.send_block_occupancy_to_wayside()
         self.after(5000, self.start_output_updates)  # Send every 5 seconds
 
     def test_block_occupancy(self, block_num, occupancy):
@@ -6906,7 +5340,8 @@ if __name__ == "__main__":
     # Enable passenger boarding debug mode (logs messages only, no immediate tests)
     _enable_debug_mode(app)
 
-    # Start periodic output updates after a delay
+    # Start periodic output updates after a delay (failures go out in full once, then as deltas)
+    app.after(3000, app.send_all_failure_modes)
     app.after(3000, app.start_output_updates)
     
     # Verify integration
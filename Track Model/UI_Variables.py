@@ -1,8 +1,10 @@
-import pandas as pd
-import random
 from Track_Blocks import Block
+from PassengerDemand import PassengerDemandModel
 
 class TrackDataManager:
+    # Seed for the passenger demand model (None = different passengers every run)
+    demand_seed = None
+
     def __init__(self):
         # ---------------- Core Data ----------------
         self.blocks = []
@@ -79,6 +81,9 @@ class TrackDataManager:
             self.passengers_boarding[idx] = 0
             self.passengers_disembarking[idx] = 0
 
+        # Passenger demand (created with the station list in initialize_station_ticket_sales)
+        self.passenger_demand = None
+
 
     # ---------------- Excel Data Loading ----------------
     def load_excel_data(self, track_path=None, train_path=None):
@@ -88,18 +93,22 @@ class TrackDataManager:
             return True
 
         try:
-            track_df = pd.read_excel(track_path)
-            
+            from TrackLayout import load_layout
+
+            # Compiled layout is reused until the track file changes
+            layout = load_layout(track_path)
+
             # Clear old data
             self.blocks = []
 
-            # Load track data
-            for _, row in track_df.iterrows():
+            # Load track data (first line in the file)
+            for row in layout.rows(layout.lines[0]):
                 b = Block(
-                    grade=row.get("Block Grade (%)", 0.0),
-                    elevation=row.get("ELEVATION (M)", 0.0),
-                    length=row.get("Block Length (m)", 0.0),
-                    speed_limit=row.get("Speed Limit (Km/Hr)", 0.0),
+                    block_number=row["block_number"],
+                    grade=row["grade"],
+                    elevation=row["elevation"],
+                    length=row["length"],
+                    speed_limit=row["speed_limit"],
                     track_heater=False,
                     beacon=False,
                 )
@@ -109,6 +118,7 @@ class TrackDataManager:
 
             # Load train data if provided
             if train_path:
+                import pandas as pd
                 train_df = pd.read_excel(train_path)
                 self.active_trains = train_df["Train ID"].tolist() if "Train ID" in train_df else []
                 self.train_occupancy = train_df["Occupancy"].tolist() if "Occupancy" in train_df else []
@@ -190,8 +200,11 @@ class TrackDataManager:
         # print(f"  Stations: {sorted(self.station_blocks)}")
         # print(f"  Signals (hardcoded): {sorted(self.light_states)}")
 
-    def initialize_station_ticket_sales(self):
-        """Initialize random ticket sales and boarding/disembarking for all stations."""
+    def initialize_station_ticket_sales(self, warm_up=600.0):
+        """
+        Create the passenger demand model for this line's stations and fill the
+        platforms with warm_up seconds of arrivals.
+        """
         # print("🎫 === INITIALIZING STATION DATA ===")
         
         # Ensure arrays are the correct length
@@ -200,56 +213,53 @@ class TrackDataManager:
         self.passengers_boarding = [0] * num_blocks
         self.passengers_disembarking = [0] * num_blocks
         
-        for block_num, station_name in self.station_location:
-            idx = block_num - 1
-            if 0 <= idx < num_blocks:
-                # Generate random ticket sales between 0-70
-                ticket_count = random.randint(0, 70)
-                self.ticket_sales[idx] = ticket_count
-                
-                # Generate random boarding count (0 to ticket_sales)
-                boarding_count = random.randint(0, ticket_count)
-                self.passengers_boarding[idx] = boarding_count
-                
-                # print(f"   Station {station_name} (Block {block_num}): {ticket_count} tickets, {boarding_count} boarding")
+        station_blocks = [block_num for block_num, _ in self.station_location if 0 < block_num <= num_blocks]
+        self.passenger_demand = PassengerDemandModel(station_blocks, seed=self.demand_seed)
+        self.passenger_demand.step(dt=warm_up)
+        self.update_station_boarding_data()
         
         # print("   === STATION DATA INITIALIZATION COMPLETE ===\n")
 
-    def update_station_ticket_sales(self):
-        """Update ticket sales for all stations - called during refresh"""
-        for block_num, station_name in self.station_location:
-            idx = block_num - 1
-            if 0 <= idx < len(self.ticket_sales):
-                current_tickets = self.ticket_sales[idx]
-                
-                # Only increase if below max
-                if current_tickets < 50:
-                    # Generate random increase between 0 and 7
-                    new_tickets = random.randint(0, 7)
-                    
-                    # Add new tickets but don't exceed max of 50
-                    self.ticket_sales[idx] = min(current_tickets + new_tickets, 50)
-                    
-                    if new_tickets > 0:
-                        pass
-                        # print(f"🎫 {station_name} (Block {block_num}): {current_tickets} → {self.ticket_sales[idx]} (+{new_tickets})")
+    def update_station_ticket_sales(self, sim_time=None, dt=None):
+        """
+        Generate passenger arrivals at every station for one sim step.
+        
+        Args:
+            sim_time: Current sim time in seconds (dt is taken from the previous call)
+            dt: Seconds to generate when sim_time is not given
+        """
+        if self.passenger_demand is None:
+            self.initialize_station_ticket_sales()
+        self.passenger_demand.step(dt=dt, sim_time=sim_time)
+        self.update_station_boarding_data()
 
     def update_station_boarding_data(self):
-        """Update boarding data for all stations - called during refresh"""
-        for block_num, _ in self.station_location:
+        """Copy the passengers waiting at each station into ticket_sales."""
+        if self.passenger_demand is None:
+            return
+        for block_num, waiting in self.passenger_demand.waiting_totals().items():
             idx = block_num - 1
-            if 0 <= idx < len(self.passengers_boarding):
-                # Boarding data increases as more passengers arrive
-                current_boarding = self.passengers_boarding[idx]
-                current_tickets = self.ticket_sales[idx]
-                
-                # Passengers waiting can board (transfer from tickets to boarding)
-                if current_tickets > 0:
-                    # Random number of passengers decide to board (0 to min(3, available))
-                    boarding_now = random.randint(0, min(3, current_tickets))
-                    if boarding_now > 0:
-                        self.passengers_boarding[idx] += boarding_now
-                        self.ticket_sales[idx] -= boarding_now
+            if 0 <= idx < len(self.ticket_sales):
+                self.ticket_sales[idx] = waiting
+
+    def board_train_at_station(self, train_id, block_num):
+        """
+        Passengers for this station get off train_id, then waiting passengers board.
+        
+        Returns:
+            (boarding, disembarking) passenger counts
+        """
+        if self.passenger_demand is None:
+            self.initialize_station_ticket_sales()
+        disembarking = self.passenger_demand.alight(train_id, block_num)
+        boarding = self.passenger_demand.board(train_id, block_num)
+        
+        idx = block_num - 1
+        if 0 <= idx < len(self.passengers_boarding):
+            self.passengers_boarding[idx] = boarding
+            self.passengers_disembarking[idx] = disembarking
+            self.ticket_sales[idx] = self.passenger_demand.waiting_at(block_num)
+        return boarding, disembarking
 
     def initialize_bidirectional_directions(self, line="Green Line"):
         """Initialize bidirectional block directions based on the current line (Green or Red)."""
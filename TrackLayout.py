@@ -0,0 +1,376 @@
+"""
+TrackLayout.py
+
+Compiles the track layout sources (Track Data.xlsx sheets, line .txt/.csv
+files) into one binary layout file, and loads it back by memory-mapping it.
+
+The compiled file is named after a hash of the source contents, so it is
+only rebuilt when a source file changes. Loading it needs neither pandas
+nor openpyxl - only the compile step reads the spreadsheet.
+
+File layout (little endian):
+    header   magic, format version, source hash, index offset/size, records offset/count
+    index    UTF-8 JSON: line names -> record ranges, string table, source names
+    records  fixed-size block records (BLOCK_DTYPE), 8-byte aligned
+"""
+
+import csv
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+
+LAYOUT_MAGIC = b"TRKLAYT\0"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("<8sI32sQQQQ")
+
+# One record per block. section / infrastructure are indexes into the
+# string table (-1 = none).
+BLOCK_DTYPE = np.dtype([
+    ("block_number", "<i4"),
+    ("section", "<i4"),
+    ("infrastructure", "<i4"),
+    ("_pad", "<i4"),
+    ("length", "<f8"),
+    ("grade", "<f8"),
+    ("elevation", "<f8"),
+    ("speed_limit", "<f8"),
+])
+
+# Spreadsheet column -> record field
+EXCEL_COLUMNS = {
+    "Block Number": "block_number",
+    "Section": "section",
+    "Infrastructure": "infrastructure",
+    "Block Length (m)": "length",
+    "Block Grade (%)": "grade",
+    "ELEVATION (M)": "elevation",
+    "Speed Limit (Km/Hr)": "speed_limit",
+}
+
+DEFAULT_SHEETS = ("Green Line", "Red Line")
+CACHE_DIR_NAME = ".layout_cache"
+
+
+class LayoutError(ValueError):
+    """A layout source or compiled layout file is invalid."""
+
+
+# -------------------------------------------------------------------------
+# SOURCE READERS (compile step only)
+# -------------------------------------------------------------------------
+def _clean_text(value):
+    """Spreadsheet cell -> stripped string ('' for empty / NaN)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    text = str(value).strip()
+    return "" if text.lower() == "nan" else text
+
+
+def _clean_number(value, default=0.0):
+    """Spreadsheet cell -> float (default for empty / bad values)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(number) else number
+
+
+def _read_excel_lines(path, sheets):
+    """Read the given sheets of a track spreadsheet into {line: [row dicts]}."""
+    import pandas as pd  # Only needed to compile
+
+    lines = {}
+    workbook = pd.read_excel(path, sheet_name=None)
+    for sheet in sheets:
+        if sheet not in workbook:
+            continue
+        df = workbook[sheet]
+        missing = [col for col in ("Block Number", "Block Length (m)") if col not in df.columns]
+        if missing:
+            raise LayoutError(f"{os.path.basename(path)} [{sheet}]: missing column(s) {missing}")
+
+        rows = []
+        for record in df.to_dict("records"):
+            if _clean_text(record.get("Block Number")) == "":
+                continue
+            row = {}
+            for column, field in EXCEL_COLUMNS.items():
+                value = record.get(column)
+                if field in ("section", "infrastructure"):
+                    row[field] = _clean_text(value)
+                elif field == "block_number":
+                    row[field] = int(_clean_number(value))
+                else:
+                    row[field] = _clean_number(value)
+            rows.append(row)
+        lines[sheet] = rows
+    return lines
+
+
+def _read_text_lines(path):
+    """Read a Line,Block[,Section],Infrastructure text/CSV file into {line: [row dicts]}."""
+    lines = {}
+    with open(path, "r", newline="") as file:
+        reader = csv.reader(file)
+        headers = [h.strip().lower() for h in next(reader, [])]
+        has_section = len(headers) >= 4 and headers[2] == "section"
+        for row in reader:
+            if len(row) < 2 or not row[1].strip():
+                continue
+            try:
+                block_number = int(row[1].strip())
+            except ValueError:
+                raise LayoutError(f"{os.path.basename(path)}: bad block number {row[1]!r}")
+            if has_section:
+                section = row[2].strip() if len(row) > 2 else ""
+                infrastructure = ",".join(row[3:]).strip()
+            else:
+                section = ""
+                infrastructure = ",".join(row[2:]).strip()
+            lines.setdefault(row[0].strip(), []).append({
+                "block_number": block_number,
+                "section": section,
+                "infrastructure": infrastructure,
+                "length": 0.0,
+                "grade": 0.0,
+                "elevation": 0.0,
+                "speed_limit": 0.0,
+            })
+    return lines
+
+
+def _read_sources(sources, sheets):
+    """Read every source file into one {line: [row dicts]} (later sources add lines)."""
+    lines = {}
+    for path in sources:
+        ext = os.path.splitext(path)[1].lower()
+        if ext in (".xlsx", ".xls"):
+            lines.update(_read_excel_lines(path, sheets))
+        elif ext in (".txt", ".csv"):
+            for name, rows in _read_text_lines(path).items():
+                lines.setdefault(name, []).extend(rows)
+        else:
+            raise LayoutError(f"Unsupported layout source: {path}")
+    return lines
+
+
+def _validate(lines):
+    """Check the layout before it is written."""
+    if not lines:
+        raise LayoutError("No track lines found in the layout sources")
+    for name, rows in lines.items():
+        seen = set()
+        for row in rows:
+            number = row["block_number"]
+            if number < 0:
+                raise LayoutError(f"{name}: negative block number {number}")
+            if number in seen:
+                raise LayoutError(f"{name}: block {number} defined twice")
+            if row["length"] < 0:
+                raise LayoutError(f"{name}: block {number} has negative length")
+            seen.add(number)
+
+
+# -------------------------------------------------------------------------
+# COMPILE
+# -------------------------------------------------------------------------
+def source_hash(sources, sheets=DEFAULT_SHEETS):
+    """SHA-256 over the layout format version, the sheet list and every source file's bytes."""
+    digest = hashlib.sha256()
+    digest.update(f"v{LAYOUT_VERSION}|{'|'.join(sheets)}".encode())
+    for path in sources:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.digest()
+
+
+def compile_layout(sources, output_path, sheets=DEFAULT_SHEETS, content_hash=None):
+    """
+    Compile the layout sources into a binary layout file.
+
+    Args:
+        sources: Paths of .xlsx / .txt / .csv layout files
+        output_path: File to write (written to a temp file first, then renamed)
+        sheets: Spreadsheet sheets to read as lines
+        content_hash: Precomputed source_hash (computed if None)
+
+    Returns:
+        output_path
+    """
+    content_hash = content_hash or source_hash(sources, sheets)
+    lines = _read_sources(sources, sheets)
+    _validate(lines)
+
+    strings = []
+    string_ids = {}
+
+    def string_id(text):
+        if not text:
+            return -1
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    total = sum(len(rows) for rows in lines.values())
+    records = np.zeros(total, dtype=BLOCK_DTYPE)
+    index = {"lines": {}, "strings": strings, "sources": [os.path.basename(p) for p in sources]}
+    position = 0
+    for name, rows in lines.items():
+        index["lines"][name] = [position, len(rows)]
+        for row in rows:
+            rec = records[position]
+            rec["block_number"] = row["block_number"]
+            rec["section"] = string_id(row["section"])
+            rec["infrastructure"] = string_id(row["infrastructure"])
+            for field in ("length", "grade", "elevation", "speed_limit"):
+                rec[field] = row[field]
+            position += 1
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    index_offset = HEADER.size
+    records_offset = index_offset + len(index_bytes)
+    records_offset += (-records_offset) % 8  # Align records for direct mapping
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(LAYOUT_MAGIC, LAYOUT_VERSION, content_hash,
+                               index_offset, len(index_bytes), records_offset, total))
+        file.write(index_bytes)
+        file.write(b"\0" * (records_offset - index_offset - len(index_bytes)))
+        file.write(records.tobytes())
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+# -------------------------------------------------------------------------
+# LOAD
+# -------------------------------------------------------------------------
+class TrackLayout:
+    # Read-only, memory-mapped view of a compiled layout file.
+
+    """
+    Attributes:
+        path: Compiled layout file
+        source_hash: Hash of the sources it was compiled from
+        lines: Line names in the order they were compiled
+        strings: String table (sections and infrastructure text)
+    """
+
+    def __init__(self, path, expected_hash=None):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            raise LayoutError(f"{path}: file too short")
+        (magic, version, content_hash, index_offset, index_size,
+         records_offset, count) = HEADER.unpack_from(self._mmap, 0)
+        if magic != LAYOUT_MAGIC:
+            raise LayoutError(f"{path}: not a track layout file")
+        if version != LAYOUT_VERSION:
+            raise LayoutError(f"{path}: layout version {version}, expected {LAYOUT_VERSION}")
+        if expected_hash is not None and content_hash != expected_hash:
+            raise LayoutError(f"{path}: compiled from different sources")
+        if records_offset + count * BLOCK_DTYPE.itemsize > len(self._mmap):
+            raise LayoutError(f"{path}: truncated")
+
+        self.source_hash = content_hash
+        index = json.loads(bytes(self._mmap[index_offset:index_offset + index_size]).decode("utf-8"))
+        self._ranges = {name: tuple(r) for name, r in index["lines"].items()}
+        self.lines = list(self._ranges)
+        self.strings = index["strings"]
+        self.sources = index.get("sources", [])
+        self._records = np.frombuffer(self._mmap, dtype=BLOCK_DTYPE, count=count, offset=records_offset)
+
+    def _string(self, string_id):
+        return self.strings[string_id] if string_id >= 0 else ""
+
+    def blocks(self, line):
+        """Block records of a line as a read-only NumPy structured array (no copy)."""
+        if line not in self._ranges:
+            raise KeyError(line)
+        start, count = self._ranges[line]
+        return self._records[start:start + count]
+
+    def rows(self, line):
+        """Block records of a line as plain dicts with section/infrastructure text."""
+        result = []
+        for rec in self.blocks(line):
+            result.append({
+                "block_number": int(rec["block_number"]),
+                "section": self._string(int(rec["section"])),
+                "infrastructure": self._string(int(rec["infrastructure"])),
+                "length": float(rec["length"]),
+                "grade": float(rec["grade"]),
+                "elevation": float(rec["elevation"]),
+                "speed_limit": float(rec["speed_limit"]),
+            })
+        return result
+
+    def close(self):
+        """Release the memory map (views from blocks() must not be used afterwards)."""
+        self._records = None
+        self._mmap.close()
+
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def default_cache_path(sources, content_hash):
+    """Compiled file path for these sources: <first source dir>/.layout_cache/track_layout_<hash>.bin"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(sources[0])), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"track_layout_{content_hash.hex()[:16]}.bin")
+
+
+def load_layout(sources, sheets=DEFAULT_SHEETS, cache_path=None):
+    """
+    Load the compiled layout for these sources, compiling it first if the
+    sources changed since the last build.
+
+    Args:
+        sources: Path or list of paths of .xlsx / .txt / .csv layout files
+        sheets: Spreadsheet sheets to read as lines
+        cache_path: Compiled file to use (default: named after the source hash)
+
+    Returns:
+        TrackLayout
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    sources = [os.path.abspath(p) for p in sources]
+    sheets = tuple(sheets)
+    content_hash = source_hash(sources, sheets)
+    path = cache_path or default_cache_path(sources, content_hash)
+
+    with _load_lock:
+        layout = _loaded.get(path)
+        if layout is not None and layout.source_hash == content_hash:
+            return layout
+
+        if os.path.exists(path):
+            try:
+                layout = TrackLayout(path, expected_hash=content_hash)
+            except LayoutError:
+                layout = None  # Stale or damaged - rebuild below
+        else:
+            layout = None
+
+        if layout is None:
+            compile_layout(sources, path, sheets, content_hash)
+            layout = TrackLayout(path, expected_hash=content_hash)
+
+        _loaded[path] = layout
+        return layout
@@ -14,7 +14,7 @@ import tkinter as tk
 from PIL import Image, ImageTk
 from tkinter import font
 from tkinter import ttk
-from train_data import getTrainManager
+from train_data import getTrainManager, ControllerRoutingTable, normalizeTrainId
 import os, sys
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 from TrainSocketServer import TrainSocketServer
@@ -23,6 +23,11 @@ import pygame
 import ctypes
 import random
 
+# Messages from the Track Model that bring a train into service if it doesn't exist yet
+DISPATCH_COMMANDS = ('Commanded Authority', 'Commanded Speed', 'Block Occupancy', 'block_occupancy')
+# Controller endpoints the CTC already sends each clock command to
+CTC_CLOCK_ENDPOINTS = {'TIME': ('Train SW',), 'MULT': ('Train SW', 'Train HW')}
+
 class TrainModelPassengerGUI:
 	# The main GUI for the train model passenger interface.
 	"""
@@ -51,19 +56,26 @@ class TrainModelPassengerGUI:
 		# Socket server setup
 		moduleConfig = loadSocketConfig()
 		trainModelConfig = moduleConfig.get("Train Model", {"port": 12345})
+		# Which controller drives which train (config.json "Train Model" -> "controllers")
+		self.trainManager.setRouting(ControllerRoutingTable.fromConfig(trainModelConfig.get("controllers")))
+		controllerEndpoints = self.trainManager.routing.endpoints()
+		
 		self.server = TrainSocketServer(port=trainModelConfig["port"], ui_id="Train Model")
-		self.server.set_allowed_connections(["Train SW", "Train HW", "Track Model", "Test_UI", "CTC"])
+		self.server.set_allowed_connections(controllerEndpoints + ["Track Model", "Test_UI", "CTC"])
 		self.server.start_server(self._processMessage)
 		
 		# Connect using ports from config
-		trainSwConfig = moduleConfig.get("Train SW", {"port": 12346})
-		trainHwConfig = moduleConfig.get("Train HW", {"port": 12347})
+		defaultPorts = {"Train SW": 12346, "Train HW": 12347}
 		trackModelConfig = moduleConfig.get("Track Model", {"port": 12344})
 		CTCModelConfig = moduleConfig.get("CTC", {"port": 12341})
 		pygame.mixer.init()
 
-		self.server.connect_to_ui('localhost', trainSwConfig["port"], "Train SW")
-		self.server.connect_to_ui('localhost', trainHwConfig["port"], "Train HW")
+		for endpoint in controllerEndpoints:
+			endpointConfig = moduleConfig.get(endpoint, {"port": defaultPorts.get(endpoint)})
+			if endpointConfig.get("port") is None:
+				print(f"No port configured for controller endpoint {endpoint}")
+				continue
+			self.server.connect_to_ui(endpointConfig.get("ip", 'localhost'), endpointConfig["port"], endpoint)
 		self.server.connect_to_ui('localhost', trackModelConfig["port"], "Track Model")
 		self.server.connect_to_ui('localhost', CTCModelConfig["port"], "CTC")
 		self.server.connect_to_ui('localhost', 12349, "Test_UI")
@@ -99,28 +111,13 @@ class TrainModelPassengerGUI:
 		if currentTemp < targetTemp:
 			newTemp = currentTemp + 1
 			train.setCabinTemp(newTemp)
-			if train == self.currentTrain:
-				self.updateUIFromTrain(train)
 			self.root.after(1000, lambda: self._animateTemperatureChange(targetTemp, train))
 		elif currentTemp > targetTemp:
 			newTemp = currentTemp - 1
 			train.setCabinTemp(newTemp)
-			if train == self.currentTrain:
-				self.updateUIFromTrain(train)
 			self.root.after(1000, lambda: self._animateTemperatureChange(targetTemp, train))
 		
-		if train.trainId == 1:
-			self.server.send_to_ui("Train HW", {
-			'command': "Temp",
-			'value': currentTemp,
-			'train_id': 1
-		})
-		else:
-			self.server.send_to_ui("Train SW", {
-				'command': "Temp",
-				'value': currentTemp,
-				'train_id': train.trainId
-			})
+		self._sendToController(train, "Temp", currentTemp)
 		
    
 	def _processMessage(self, message: dict, sourceUiId: str):
@@ -137,21 +134,26 @@ class TrainModelPassengerGUI:
 			# 	self.Clock = message.get('value')
 			value = message.get('value')
 			trainId = message.get('train_id')
+			if trainId is not None:
+				trainId = normalizeTrainId(trainId)
 
 			if command == 'Beacon1' or command == 'Beacon2':
-				self.server.send_to_ui("Train SW", {
-					'command': command,
-					'value': value
-				})
-				self.server.send_to_ui("Train HW", {
-					'command': command,
-					'value': value
-				})
+				for endpoint in self.trainManager.routing.endpoints():
+					self.server.send_to_ui(endpoint, {
+						'command': command,
+						'value': value
+					})
+
+			if command == 'TIME' or command == 'MULT':
+				self._forwardClock(command, value)
 
 			# Determine which train to operate on
 			if trainId is not None:
-				# Operate on specified train
-				train = self.trainManager.getTrain(trainId)
+				# Operate on specified train (Track Model's dispatch messages bring a new train into service)
+				if command in DISPATCH_COMMANDS:
+					train = self.trainManager.dispatchTrain(trainId)
+				else:
+					train = self.trainManager.getTrain(trainId)
 				if not train or not train.deployed:
 					print(f"Train {trainId} not deployed or doesn't exist")
 					return
@@ -295,57 +297,23 @@ class TrainModelPassengerGUI:
 			elif command == 'Commanded Authority':
 				wasActive = train.active if train else False
 				train.setAuthority(value)
-				if train.trainId == 1:
-					self.server.send_to_ui("Train HW", {
-						'command': "Commanded Authority",
-						'value': value,
-						'train_id': trainId if trainId else train.trainId
-					})
-				else:
-					self.server.send_to_ui("Train SW", {
-					'command': "Commanded Authority",
-					'value': value,
-					'train_id': trainId if trainId else train.trainId
-					})
+				self._sendToController(train, "Commanded Authority", value)
 				if not wasActive and train.active:
 					print(f"Train {train.trainId} activated - refreshing selector")
 					self.refreshTrainSelectorIfNeeded() 
 			elif command == 'Commanded Speed':
 				train.setCommandedSpeed(value)
-				if train.trainId == 1:
-					self.server.send_to_ui("Train HW", {
-						'command': "Commanded Speed",
-						'value': value,
-						'train_id': trainId if trainId else train.trainId
-					})
-				else:
-					self.server.send_to_ui("Train SW", {
-					'command': "Commanded Speed",
-					'value': value,
-					'train_id': trainId if trainId else train.trainId
-					})
+				self._sendToController(train, "Commanded Speed", value)
 			elif command == 'Block Occupancy' or command == 'block_occupancy':
 				train.setBlock(value)
+				# Block entry lets the controller resync its integrated position
+				self._sendToController(train, "Current Block", train.block)
 				if train.line == 'green':
 					if (train.previousBlock == 57 and train.block != 58):
-						wasActive = train.active if train else False
-						train.active = False
-						if wasActive and not train.active:
-							if train.trainId in self.previousActiveTrains:
-								train.resetTrain()
-								self.previousActiveTrains.remove(train.trainId)
-						
-						self.refreshTrainSelector()
+						self._returnToYard(train)
 				else:
 					if (train.previousBlock == 9 and train.block != 10):
-						wasActive = train.active if train else False
-						train.active = False
-						if wasActive and not train.active:
-							if train.trainId in self.previousActiveTrains:
-								train.resetTrain()
-								self.previousActiveTrains.remove(train.trainId)
-						
-						self.refreshTrainSelector()
+						self._returnToYard(train)
 
 
 			elif command == 'Passengers Boarding':
@@ -355,17 +323,15 @@ class TrainModelPassengerGUI:
 					elif train.block == 9 and train.line == 'red':
 						self.disembarkAll(train)
 				else:
-					self.updateDisembarking(train)
+					# Track Model's demand model says how many get off here (older senders don't)
+					self.updateDisembarking(train, message.get('disembarking'))
 					self.updateBoarding(value, train)
 					
 			elif command == 'TIME':
 				self.uiLabels['time'].config(text=value)
 			elif command == 'MULT':
-				self.clockSpeed = value
-			
-			# Update UI if this is the currently selected train
-			if train == self.currentTrain:
-				self.updateUIFromTrain(train)
+				self.clockSpeed = float(value)
+			# The selected train's changes are drawn by the next frame's flushObservers
 				
 		except Exception as e:
 			print(f"Error processing message: {e}")
@@ -373,37 +339,24 @@ class TrainModelPassengerGUI:
 	def continuousPhysicsUpdate(self):
 		# Continuously updates physics for all active trains and sends speed updates.
 		# Process all active trains
-		for trainId in range(1, 15):
-			train = self.trainManager.getTrain(trainId)
-			if train and train.deployed and train.active:
+		for train in self.trainManager.getDeployedTrains():
+			if train.active:
 				# If calculateForceSpeedAccelerationDistance needs to be called individually:
 				oldSpeed = train.speed
-				train.calculateForceSpeedAccelerationDistance(self.clockSpeed)
+				train.stepPhysics(self.clockSpeed)
 				newSpeed = train.speed
 				
 				if oldSpeed != newSpeed:
 					# Send updates for this train
-					if train.trainId == 1:
-						self.server.send_to_ui("Train HW", {
-							'command': "Current Speed",
-							'value': train.speed,
-							'train_id': 1
-						})
-					else:
-						self.server.send_to_ui("Train SW", {
-							'command': "Current Speed",
-							'value': train.speed,
-							'train_id': train.trainId
-						})
+					self._sendToController(train, "Current Speed", train.speed)
 					self.server.send_to_ui("Track Model", {
 						'command': 'Current Speed',
 						'value': train.speed,
 						'train_id': train.trainId
 					})
 		
-		# Update UI for the currently selected train only
-		if self.currentTrain and self.currentTrain.active:
-			self.updateUIFromTrain(self.currentTrain)
+		# One coalesced notification per train per frame (changed fields only)
+		self.trainManager.flushObservers()
 		
 		# Schedule next update
 		self.root.after(100, self.continuousPhysicsUpdate)
@@ -416,73 +369,49 @@ class TrainModelPassengerGUI:
 			
 		train.setEmergencyBrake(True)
 		train.setAcceleration(-2.73)
-		if train.trainId == 1:
-			self.server.send_to_ui("Train HW", {
-				'command': "Passenger Emergency Signal",
-				'value': True,
-				'train_id': train.trainId
-			})
-		else:
-			self.server.send_to_ui("Train SW", {
-				'command': "Passenger Emergency Signal",
-				'value': True,
-				'train_id': train.trainId
-			})
+		self._sendToController(train, "Passenger Emergency Signal", True)
 		print(f"EMERGENCY BRAKE ACTIVATED for train {train.trainId}!")
-		
-		if train == self.currentTrain:
-			self.updateUIFromTrain(train)
 
 	def failureServiceBrakeVarChanged(self):
 		# Handles service brake failure mode activation/deactivation.
+		if self.currentTrain is None:
+			return
 		if self.failureBrakeVar.get():
 			self.currentTrain.setServiceBrake(0)
-			if self.currentTrain.trainId == 1:
-				self.server.send_to_ui("Train HW", {'command': "Service Brake Failure", 'value': True, 'train_id' : 1})
-			else:
-				self.server.send_to_ui("Train SW", {'command': "Service Brake Failure", 'value': True, 'train_id' : 2})
+			self._sendToController(self.currentTrain, "Service Brake Failure", True)
 			
 			print(f"Service Brake Failure Activated")
 		elif self.failureBrakeVar.get() == 0:
 			print(f"Service Brake Deactivated")
-			if self.currentTrain.trainId == 1:
-				self.server.send_to_ui("Train HW", {'command': "Service Brake Failure", 'value': False, 'train_id' : 1})
-			else:
-				self.server.send_to_ui("Train SW", {'command': "Service Brake Failure", 'value': False, 'train_id' : 2})
+			self._sendToController(self.currentTrain, "Service Brake Failure", False)
 
 	def failureTrainEngineVarChanged(self):
 		# Handles train engine failure mode activation/deactivation.
+		if self.currentTrain is None:
+			return
 		if self.failureTrainEngineVar.get():
 			self.currentTrain.setEngineFailure(True)
 			self.currentTrain.setPowerCommand(0)
 			self.currentTrain.setAcceleration(0)
-			if self.currentTrain.trainId == 1:
-				print("Train 1 Recieve it")
-				self.server.send_to_ui("Train HW", {'command': "Train Engine Failure", 'value': True, 'train_id' : 1})
-			else:
-				print("Train 2 Receives it")
-				self.server.send_to_ui("Train SW", {'command': "Train Engine Failure", 'value': True, 'train_id' : 2})
+			self._sendToController(self.currentTrain, "Train Engine Failure", True)
 			
 			print(f"Train Engine Failure Activated")
 		elif self.failureTrainEngineVar.get() == 0:
 			self.currentTrain.setEngineFailure(False)
 			print(f"Train Engine Failure Deactivated")
-			if self.currentTrain.trainId == 1:
-				self.server.send_to_ui("Train HW", {'command': "Train Engine Failure", 'value': False, 'train_id' : 1})
-			else:
-				self.server.send_to_ui("Train SW", {'command': "Train Engine Failure", 'value': False, 'train_id' : 2})
+			self._sendToController(self.currentTrain, "Train Engine Failure", False)
 
 	def SignalFailure(self):
+		if self.currentTrain is None:
+			return
 		if self.failureSignalPickupVar.get() == 0:
 			# Deactivates signal pickup failure mode.
 			print(f"Signal Pickup Failure Deactivated")
 			self.currentTrain.speedLimit = self.currentTrain.prevSpeedLimit
 			self.currentTrain.grade = self.currentTrain.prevGrade
 			self.currentTrain.elevation = self.currentTrain.prevElevation
-			if self.currentTrain.trainId == 1:
-				self.server.send_to_ui("Train HW", {'command': "Signal Pickup Failure", 'value': False, 'train_id' : 1})
-			else:
-				self.server.send_to_ui("Train SW", {'command': "Signal Pickup Failure", 'value': False, 'train_id' : 2})
+			self.currentTrain.markDirty('speedLimit', 'grade', 'elevation', 'commandedAuthority', 'commandedSpeed')
+			self._sendToController(self.currentTrain, "Signal Pickup Failure", False)
 
 	# def activateSignalFailure(self):
 		elif self.failureSignalPickupVar.get() == 1:
@@ -493,20 +422,21 @@ class TrainModelPassengerGUI:
 			self.currentTrain.speedLimit = 0
 			self.currentTrain.grade = 0
 			self.currentTrain.elevation = 0
+			self.currentTrain.markDirty('speedLimit', 'grade', 'elevation', 'commandedAuthority', 'commandedSpeed')
 			
-			if self.currentTrain.trainId == 1:
-				self.server.send_to_ui("Train HW", {'command': "Signal Pickup Failure", 'value': True, 'train_id' : 1})
-			else:
-				self.server.send_to_ui("Train SW", {'command': "Signal Pickup Failure", 'value': True, 'train_id' : 2})
+			self._sendToController(self.currentTrain, "Signal Pickup Failure", True)
 			
 			self.failureActivationInProgress = False
 			
-	def updateDisembarking(self, train):
+	def updateDisembarking(self, train, disembarking=None):
 		# Updates passenger disembarking when train is stopped with doors open.
 		if train and train.active:
 			if train.passengerCount != 0:
 				passengerCount = train.passengerCount
-				disembarking = random.randint(0, passengerCount)
+				if disembarking is None:
+					disembarking = random.randint(0, passengerCount)
+				else:
+					disembarking = max(0, min(int(disembarking), passengerCount))
 				
 				train.setDisembarking(disembarking)
 				train.setPassengerCount(passengerCount - disembarking)
@@ -555,10 +485,9 @@ class TrainModelPassengerGUI:
 			
 		MAX_CAPACITY = 222
 		if train.atStation:
-			if boarding > MAX_CAPACITY:
-				train.passengerCount = MAX_CAPACITY
-			else:
-				train.passengerCount = train.passengerCount + boarding
+			# Never more on board than the train can hold (passengers feed the mass in the physics)
+			train.passengerCount = min(train.passengerCount + boarding, MAX_CAPACITY)
+			train.markDirty('passengerCount')
 		
 		# Send update to track model
 		self.server.send_to_ui("Track Model", {
@@ -568,75 +497,130 @@ class TrainModelPassengerGUI:
 		})  
 
 
-	def updateUIFromTrain(self, train):
-		# Updates all UI elements when train data changes.
+	def _forwardClock(self, command: str, value):
+		# Passes the CTC clock (TIME/MULT) on to the controller endpoints the CTC does not send it to.
+		for endpoint in self.trainManager.routing.endpoints():
+			if endpoint in CTC_CLOCK_ENDPOINTS.get(command, ()):
+				continue
+			self.server.send_to_ui(endpoint, {
+				'command': command,
+				'value': value
+			})
+
+	def _returnToYard(self, train):
+		# Deactivates a train back in the yard; it leaves the fleet, frees its controller and loses the selection.
+		wasActive = train.active
+		train.setActive(False)
+		if wasActive and not train.active and train.trainId in self.previousActiveTrains:
+			self._sendToController(train, "Train Retired", True)
+			self.trainManager.retireTrain(train.trainId)
+			self.previousActiveTrains.remove(train.trainId)
+			if train is self.currentTrain:
+				# A retired train must not be driven again (its controller route is gone)
+				self.currentTrain = None
+		self.refreshTrainSelector()
+
+	def _sendToController(self, train, command: str, value):
+		# Sends a message about train to the controller endpoint it is routed to.
+		self.server.send_to_ui(self.trainManager.controllerFor(train.trainId), {
+			'command': command,
+			'value': value,
+			'train_id': train.trainId,
+			'line': train.line
+		})
+
+	def _onTrainChanged(self, train, changedFields):
+		# Train observer: redraws the widgets of the selected train whose fields changed.
+		if train is self.currentTrain:
+			self.updateUIFromTrain(train, changedFields)
+
+	def updateUIFromTrain(self, train, changedFields=None):
+		# Updates the UI elements showing changedFields (all of them when None).
+		def changed(*fields):
+			return changedFields is None or not changedFields.isdisjoint(fields)
+
 		# Update speed
-		imperialSpeed = train.speed * 2.23964
-		self.uiLabels['speed'].config(text=f"{imperialSpeed:.4f} MPH")
+		if changed('speed'):
+			imperialSpeed = train.speed * 2.23964
+			self.uiLabels['speed'].config(text=f"{imperialSpeed:.4f} MPH")
 		
 		# Update acceleration
-		imperialAcceleration = train.acceleration * 2.23694
-		self.uiLabels['acceleration'].config(text=f"{imperialAcceleration:.4f} MPH²")
+		if changed('acceleration'):
+			imperialAcceleration = train.acceleration * 2.23694
+			self.uiLabels['acceleration'].config(text=f"{imperialAcceleration:.4f} MPH²")
 		
 		# Update passenger count
-		self.uiLabels['passengerCount'].config(text=f"Passenger Count: {train.passengerCount}")
-		self.uiLabels['crewCount'].config(text=f"Crew Count: {train.crewCount}")
+		if changed('passengerCount'):
+			self.uiLabels['passengerCount'].config(text=f"Passenger Count: {train.passengerCount}")
+		if changed('crewCount'):
+			self.uiLabels['crewCount'].config(text=f"Crew Count: {train.crewCount}")
 
 		# SIGNAL PICKUP FAILURE CHECKING
-		if self.failureSignalPickupVar.get():
-			# Failure active - show ??? values
-			self.uiLabels['Commanded Authority'].config(text="Commanded Authority: ??? Blocks")
-			self.uiLabels['Commanded Speed'].config(text="Commanded Speed: ??? MPH")
-		else:
-			self.uiLabels['Commanded Authority'].config(text=f"Commanded Authority: {train.commandedAuthority:.0f} Blocks")
-			self.uiLabels['Commanded Speed'].config(text=f"Commanded Speed: {train.commandedSpeed:.0f} MPH")
+		if changed('commandedAuthority', 'commandedSpeed'):
+			if self.failureSignalPickupVar.get():
+				# Failure active - show ??? values
+				self.uiLabels['Commanded Authority'].config(text="Commanded Authority: ??? Blocks")
+				self.uiLabels['Commanded Speed'].config(text="Commanded Speed: ??? MPH")
+			else:
+				self.uiLabels['Commanded Authority'].config(text=f"Commanded Authority: {train.commandedAuthority:.0f} Blocks")
+				self.uiLabels['Commanded Speed'].config(text=f"Commanded Speed: {train.commandedSpeed:.0f} MPH")
 	
 		# Check for failure state changes
 		# self.updateFailureSignal()
 
 		# Normal operation - show actual values
-		imperialSpeedLimit = train.speedLimit / 1.61
-		self.uiLabels['Speed Limit'].config(text=f"Speed Limit: {imperialSpeedLimit:.1f} MPH")
+		if changed('speedLimit'):
+			imperialSpeedLimit = train.speedLimit / 1.61
+			self.uiLabels['Speed Limit'].config(text=f"Speed Limit: {imperialSpeedLimit:.1f} MPH")
 
 		# Update Grade and Elevation
-		self.uiLabels['Grade'].config(text=f"Grade: {train.grade}%")
-		self.uiLabels['Elevation'].config(text=f"Elevation: {train.elevation}ft")
+		if changed('grade'):
+			self.uiLabels['Grade'].config(text=f"Grade: {train.grade}%")
+		if changed('elevation'):
+			self.uiLabels['Elevation'].config(text=f"Elevation: {train.elevation}ft")
 		# Update cabin temp
-		if self.canvasFrameCircle and 'cabin_temp' in self.uiLabels:
+		if changed('cabinTemp') and self.canvasFrameCircle and 'cabin_temp' in self.uiLabels:
 			self.canvasFrameCircle.itemconfig(self.uiLabels['cabin_temp'], text=f"{train.cabinTemp:.0f}°F")
 		
 		# Update dimensions
-		imperialHeight = train.height * 3.28084
-		imperialLength = train.length * 3.28084
-		imperialWidth = train.width * 3.28084
-		self.uiLabels['height'].config(text=f"Height: {imperialHeight:.1f}ft")
-		self.uiLabels['length'].config(text=f"Length: {imperialLength:.1f}ft")
-		self.uiLabels['width'].config(text=f"Width: {imperialWidth:.1f}ft")
+		if changed('height', 'length', 'width'):
+			imperialHeight = train.height * 3.28084
+			imperialLength = train.length * 3.28084
+			imperialWidth = train.width * 3.28084
+			self.uiLabels['height'].config(text=f"Height: {imperialHeight:.1f}ft")
+			self.uiLabels['length'].config(text=f"Length: {imperialLength:.1f}ft")
+			self.uiLabels['width'].config(text=f"Width: {imperialWidth:.1f}ft")
 
 		# Update Announcement and Time
-		if self.currentTrain.emergencyBrakeActive:
-			self.uiLabels['announcement'].config(text=f"EMERGENCY")
-		else:
-			if "Arrived" in train.announcement or "Yard" in train.announcement:
-				self.uiLabels['announcement'].config(text=f"{train.announcement}")
+		if changed('emergencyBrakeActive', 'announcement', 'timeToStation'):
+			if self.currentTrain.emergencyBrakeActive:
+				self.uiLabels['announcement'].config(text=f"EMERGENCY")
 			else:
-				self.uiLabels['announcement'].config(text=(f"{train.announcement} in {train.timeToStation} mins"))
+				if "Arrived" in train.announcement or "Yard" in train.announcement:
+					self.uiLabels['announcement'].config(text=f"{train.announcement}")
+				else:
+					self.uiLabels['announcement'].config(text=(f"{train.announcement} in {train.timeToStation} mins"))
 
 		# Update power command and commanded values
-		self.uiLabels['power_command'].config(text=f"{train.powerCommand:.0f} Watts")
+		if changed('powerCommand'):
+			self.uiLabels['power_command'].config(text=f"{train.powerCommand:.0f} Watts")
 		
 		# Update door and light indicators
-		rightDoorColor = 'green' if train.rightDoorOpen else 'red'
-		self.uiIndicators['cabin_right_led'].itemconfig(self.uiIndicators['cabin_right_oval'], fill=rightDoorColor)
+		if changed('rightDoorOpen'):
+			rightDoorColor = 'green' if train.rightDoorOpen else 'red'
+			self.uiIndicators['cabin_right_led'].itemconfig(self.uiIndicators['cabin_right_oval'], fill=rightDoorColor)
 		
-		leftDoorColor = 'green' if train.leftDoorOpen else 'red'
-		self.uiIndicators['cabin_left_led'].itemconfig(self.uiIndicators['cabin_left_oval'], fill=leftDoorColor)
+		if changed('leftDoorOpen'):
+			leftDoorColor = 'green' if train.leftDoorOpen else 'red'
+			self.uiIndicators['cabin_left_led'].itemconfig(self.uiIndicators['cabin_left_oval'], fill=leftDoorColor)
 		
-		headlightColor = 'green' if train.headlightsOn else 'red'
-		self.uiIndicators['headlights_led'].itemconfig(self.uiIndicators['headlights_oval'], fill=headlightColor)
+		if changed('headlightsOn'):
+			headlightColor = 'green' if train.headlightsOn else 'red'
+			self.uiIndicators['headlights_led'].itemconfig(self.uiIndicators['headlights_oval'], fill=headlightColor)
 		
-		interiorColor = 'green' if train.interiorLightsOn else 'red'
-		self.uiIndicators['interior_led'].itemconfig(self.uiIndicators['interior_oval'], fill=interiorColor)
+		if changed('interiorLightsOn'):
+			interiorColor = 'green' if train.interiorLightsOn else 'red'
+			self.uiIndicators['interior_led'].itemconfig(self.uiIndicators['interior_oval'], fill=interiorColor)
 
 	def onTrainSelected(self, trainId: int):
 		# Handles train selection from dropdown and updates current train.
@@ -652,9 +636,8 @@ class TrainModelPassengerGUI:
 		# Checks if active trains have changed and refreshes selector if needed.
 		# Get current active trains
 		currentActiveTrains = set()
-		for trainId in range(1, 15):
-			train = self.trainManager.getTrain(trainId)
-			if train and train.active:
+		for trainId, train in list(self.trainManager.getAllTrains().items()):
+			if train.active:
 				currentActiveTrains.add(trainId)
 		
 		# Compare with previous state
@@ -1020,7 +1003,8 @@ class TrainModelPassengerGUI:
 	def run(self):
 		# Starts the application and initializes all scheduled updates.
 		# Register observer to update UI when train data changes
-		self.currentTrain.addObserver(self.updateUIFromTrain)
+		self.trainManager.addTrainObserver(self._onTrainChanged)
+		self.trainManager.setDeferredNotifications(True)
 
 		# Initialize the train selector dropdown
 		self.root.after(100, self.refreshTrainSelector)
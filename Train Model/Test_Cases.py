@@ -15,7 +15,7 @@ sys.modules['PIL.ImageTk'] = MagicMock()
 sys.modules['GreenLineData'] = MagicMock()
 sys.modules['RedLineData'] = MagicMock()
 
-from train_data import Train, TrainManager
+from train_data import Train, TrainManager, ControllerRoutingTable
 
 
 class Testing(unittest.TestCase):
@@ -382,5 +382,86 @@ class Testing(unittest.TestCase):
         
         return True
 
+    def test_observer_dirty_fields_coalesced(self):
+        """Test that deferred observers get one notification per flush with only the changed fields."""
+        calls = []
+        self.train.addObserver(lambda train, changed: calls.append(changed))
+        self.train_manager.setDeferredNotifications(True)
+        
+        print("\n=== Testing Coalesced Observer Notifications ===")
+        self.train.setCommandedSpeed(10.0)
+        self.train.setCommandedSpeed(12.0)
+        self.train.setRightDoor(False)  # Unchanged - not dirty
+        self.train.powerCommand = 50000
+        self.train.serviceBrakeActive = False
+        self.train.calculateForceSpeedAccelerationDistance(dt=0.1)
+        self.assertEqual(calls, [])
+        
+        self.assertEqual(self.train_manager.flushObservers(), 1)
+        self.assertEqual(len(calls), 1)
+        self.assertIn('commandedSpeed', calls[0])
+        self.assertIn('speed', calls[0])
+        self.assertNotIn('rightDoorOpen', calls[0])
+        self.assertEqual(self.train_manager.flushObservers(), 0)
+        print(f"Test passed: one notification with {sorted(calls[0])}")
+
+    def test_sub_stepped_physics_at_high_multiplier(self):
+        """Test that a 20 s frame is split into sub-steps and the brake stop does not overshoot."""
+        print("\n=== Testing Sub-Stepped Physics (20 s frame) ===")
+        self.train.speed = 15.0
+        self.train.serviceBrakeActive = True
+        self.train.distanceLeft = 1000.0
+        
+        steps = self.train.stepPhysics(20.0)
+        travelled = 1000.0 - self.train.distanceLeft
+        print(f"{steps} sub-steps, stopped after {travelled:.1f} m (exact 93.8 m)")
+        
+        self.assertEqual(self.train.speed, 0)
+        self.assertLess(steps, 200)  # Stops stepping once held at a stand
+        self.assertAlmostEqual(travelled, 15.0 ** 2 / (2 * 1.2), delta=2.0)
+        self.assertEqual(self.train.stepPhysics(60 * 60), 1)  # Held train: one sub-step
+
+    def test_elastic_fleet_and_controller_routing(self):
+        """Test that trains are created on dispatch, routed to controllers and destroyed on retirement."""
+        print("\n=== Testing Elastic Fleet and Controller Routing ===")
+        routing = ControllerRoutingTable(hwTrainIds=[1], swEndpoints=["Train SW", "Train SW 2"],
+                                         swCapacity=2, poolEndpoint="Train Controller Pool")
+        manager = TrainManager(numTrains=0, routing=routing)
+        
+        trains = [manager.dispatchTrain(train_id) for train_id in range(1, 31)]
+        self.assertEqual(len(manager.getAllTrains()), 30)
+        self.assertIs(manager.dispatchTrain(5), trains[4])
+        self.assertEqual(manager.controllerFor(1), "Train HW")
+        self.assertEqual(routing.load("Train SW"), 2)
+        self.assertEqual(routing.load("Train SW 2"), 2)
+        self.assertEqual(routing.load("Train Controller Pool"), 25)
+        
+        self.assertTrue(manager.retireTrain(2))
+        self.assertIsNone(manager.getTrain(2))
+        self.assertFalse(manager.retireTrain(2))
+        manager.dispatchTrain(40)
+        self.assertEqual(manager.controllerFor(40), "Train SW")  # Freed SW slot is reused
+        
+        manager.maxTrains = 30
+        self.assertIsNone(manager.dispatchTrain(41))
+        print(f"Test passed: {len(manager.getAllTrains())} trains routed {dict(sorted(routing.routes.items())[:3])}...")
+
+    def test_string_train_ids_are_normalised(self):
+        """Test that train IDs sent as strings (as the Track Model does) refer to the same trains and routes."""
+        print("\n=== Testing String Train IDs ===")
+        manager = TrainManager(numTrains=1)
+        
+        train = manager.dispatchTrain(2)
+        self.assertIs(manager.dispatchTrain('2'), train)
+        self.assertIs(manager.dispatchTrain('1'), manager.getTrain(1))
+        self.assertEqual(sorted(manager.getAllTrains()), [1, 2])
+        self.assertEqual(manager.controllerFor('1'), "Train HW")
+        self.assertEqual(manager.controllerFor('2'), "Train SW")
+        self.assertIs(manager.getTrain('2'), train)
+        
+        self.assertTrue(manager.retireTrain('2'))
+        self.assertNotIn(2, manager.routing.routes)
+        print(f"Test passed: trains {sorted(manager.getAllTrains())} routed {manager.routing.routes}")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -4,11 +4,17 @@ Handles all train data and state for both Test UI and Passenger UI
 All calculations are done in metric, then converted to imperial when displayed onto the UI, except for temperature which is already in farenheight
 """
 import os, sys
+import math
+import threading
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 from GreenLineData import GreenLine
 from RedLineData import RedLine
 from BlueLineData import BlueLine
 
+# Longest physics step (s) - longer frames are split into sub-steps of at most this
+MAX_PHYSICS_STEP = 0.1
+# Most sub-steps a frame may take per train (bounds CPU at high clock multipliers)
+MAX_SUB_STEPS = 50
 
 class Train:
 	# Represents a single train with all its properties.
@@ -47,6 +53,10 @@ class Train:
 	previousBlock: An integer representing the previous block.
 	station: A string representing the current station.
 	timeToStation: An integer representing time to next station in minutes.
+
+	Observers are called as callback(train, changedFields) with the names of the
+	attributes that changed since the last notification. With deferNotifications
+	set, changes are collected and delivered by flushObservers (once per UI frame).
 	"""
 
 	def __init__(self, trainId: int):
@@ -119,6 +129,9 @@ class Train:
 
 		# Observers (callbacks for UI updates)
 		self._observers = []
+		self._dirtyFields = set()
+		self._dirtyLock = threading.Lock()
+		self.deferNotifications = False
 
 	def addObserver(self, callback):
 		# Registers a callback to be notified of train state changes.
@@ -129,10 +142,32 @@ class Train:
 		if callback in self._observers:
 			self._observers.remove(callback)
 	
+	def markDirty(self, *fields):
+		# Records attributes that changed without going through a setter.
+		with self._dirtyLock:
+			self._dirtyFields.update(fields)
+
+	def _setField(self, name: str, value):
+		# Stores value in the named attribute and marks it dirty if it changed.
+		if getattr(self, name, None) != value:
+			setattr(self, name, value)
+			self.markDirty(name)
+
 	def _notifyObservers(self):
-		# Notifies all registered observers of state changes.
-		for callback in self._observers:
-			callback(self)
+		# Delivers pending changes now, or leaves them for the next flush when deferred.
+		if not self.deferNotifications:
+			self.flushObservers()
+
+	def flushObservers(self) -> bool:
+		# Calls every observer once with the set of fields changed since the last flush.
+		with self._dirtyLock:
+			if not self._dirtyFields:
+				return False
+			changedFields = frozenset(self._dirtyFields)
+			self._dirtyFields.clear()
+		for callback in list(self._observers):
+			callback(self, changedFields)
+		return True
 
 	def resetTrain(self):
 		"""Reset train to default state while preserving some settings"""
@@ -187,7 +222,7 @@ class Train:
 		
 		# Reset line and position
 		self.setLine("green")
-		self.block = 63
+		self._setField('block', 63)
 		self.previousBlock = 63
 		self.atStation = False
 		
@@ -197,7 +232,7 @@ class Train:
 		
 		# Reset activation flags
 		self.authorityReceived = False
-		self.active = False
+		self._setField('active', False)
 		
 		# Notify observers
 		self._notifyObservers()
@@ -205,7 +240,7 @@ class Train:
 	
 	def setLine(self, value: str):
 		# Sets the train's line assignment and initializes line data.
-		self.line = value
+		self._setField('line', value)
 		if value == 'green':
 			self.lineData = GreenLine()
 		elif value == 'red':
@@ -217,7 +252,7 @@ class Train:
 	def setBlock(self, value: int):
 		# Updates the current block and retrieves associated speed limit and grade.
 		self.previousBlock = self.block
-		self.block = value
+		self._setField('block', value)
 		self.setSpeedLimit(self.lineData.getValue(value, 'speedLimit'))
 		self.setGrade(self.lineData.getValue(value, 'blockGradePercent'))
 		stationCheck = self.lineData.getValue(value,'infrastructure') 
@@ -239,26 +274,26 @@ class Train:
 	def setSpeedLimit(self, value: float):
 		# Sets the speed limit for the train in m/s.
 		self.prevSpeedLimit = self.speedLimit
-		self.speedLimit = float(value)
+		self._setField('speedLimit', float(value))
 		self.speedLimitMps = self.speedLimit / 3.6
 		self._notifyObservers()
 	
 	def setElevation(self, value: float):
 		# Sets the elevation of the train in feet.
 		self.prevElevation = self.elevation
-		self.elevation = float(value)
+		self._setField('elevation', float(value))
 		self._notifyObservers()
 
 	def setGrade(self, value: float):
 		# Sets the grade percentage of the track.
 		self.prevGrade = self.grade
-		self.grade = float(value)
+		self._setField('grade', float(value))
 		self._notifyObservers()
 		
 	def setSpeed(self, value: float):
 		# Sets the current speed of the train in m/s.
 		try:
-			self.speed = float(value)
+			self._setField('speed', float(value))
 			print(f"Actual Speed Sent to Train Model")
 			self._notifyObservers()
 		except ValueError:
@@ -267,7 +302,7 @@ class Train:
 	def setAcceleration(self, value: float):
 		# Sets the current acceleration of the train in m/s².
 		try:
-			self.acceleration = float(value)
+			self._setField('acceleration', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -275,7 +310,7 @@ class Train:
 	def setPassengerCount(self, value: int):
 		# Sets the passenger count and ensures it is non-negative.
 		try:
-			self.passengerCount = max(0, int(value))
+			self._setField('passengerCount', max(0, int(value)))
 			print(f"Train Occupancy Sent to Track Model")
 			self._notifyObservers()
 		except ValueError:
@@ -284,7 +319,7 @@ class Train:
 	def setCrewCount(self, value: int):
 		# Sets the crew count and ensures it is non-negative.
 		try:
-			self.crewCount = max(0, int(value))
+			self._setField('crewCount', max(0, int(value)))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -293,7 +328,7 @@ class Train:
 		# Sets the power command and stores the previous value.
 		try:
 			self.lastPowerCommand = self.powerCommand
-			self.powerCommand = float(value)
+			self._setField('powerCommand', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -301,17 +336,17 @@ class Train:
 	def setAuthority(self, value: float):
 		# Sets the commanded authority and activates train if first authority received.
 		try:
-			self.commandedAuthority = float(value)
+			self._setField('commandedAuthority', float(value))
 			
 			# Check if this is a state change (inactive -> active)
 			wasActive = self.active
 			
 			if not self.authorityReceived:
 				self.authorityReceived = True
-				self.active = True
+				self._setField('active', True)
 				print(f"Train {self.trainId} received first authority - AUTO ACTIVATING")
-				self.serviceBrakeActive = False
-				self.announcement = "Traveling From Yard"
+				self._setField('serviceBrakeActive', False)
+				self._setField('announcement', "Traveling From Yard")
 			
 			# Notify observers
 			self._notifyObservers()
@@ -326,7 +361,7 @@ class Train:
 	def setCommandedSpeed(self, value: float):
 		# Sets the commanded speed for the train.
 		try:
-			self.commandedSpeed = float(value)
+			self._setField('commandedSpeed', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -334,7 +369,7 @@ class Train:
 	def setCabinTemp(self, value: float):
 		# Sets the cabin temperature in fahrenheit.
 		try:
-			self.cabinTemp = float(value)
+			self._setField('cabinTemp', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -342,7 +377,7 @@ class Train:
 	def setHeight(self, value: float):
 		# Sets the train height in meters.
 		try:
-			self.height = float(value)
+			self._setField('height', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -350,7 +385,7 @@ class Train:
 	def setLength(self, value: float):
 		# Sets the train length in meters.
 		try:
-			self.length = float(value)
+			self._setField('length', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
@@ -358,41 +393,37 @@ class Train:
 	def setWidth(self, value: float):
 		# Sets the train width in meters.
 		try:
-			self.width = float(value)
+			self._setField('width', float(value))
 			self._notifyObservers()
 		except ValueError:
 			pass
 
 	def setAnnouncement(self, announcement: str):
 		# Sets the current station name.
-		self.announcement = str(announcement)
+		self._setField('announcement', str(announcement))
 		self._notifyObservers()
 		
 	def setTimeToStation(self, minutes: int):
 		# Sets the time to next station in minutes.
 		try:
-			self.timeToStation = max(0, int(minutes))
+			self._setField('timeToStation', max(0, int(minutes)))
 			self._notifyObservers()
 		except ValueError:
 			pass
 	
 	def setServiceBrake(self, value: bool):
 		# Sets the service brake state.
-		value = bool(value)
-		if value:
-			self.serviceBrakeActive = True
-		else:
-			self.serviceBrakeActive = False
+		self._setField('serviceBrakeActive', bool(value))
 		self._notifyObservers()
 
 	def setDisembarking(self, value: int):
 		# Sets the number of passengers currently disembarking.
-		self.passengersDisembarking = int(value)
+		self._setField('passengersDisembarking', int(value))
 		self._notifyObservers()
 	
 	def setActive(self, active: bool):
 		# Sets whether the train should receive physics updates.
-		self.active = active
+		self._setField('active', active)
 
 	def calculateForceSpeedAccelerationDistance(self, dt):
 		# Calculates train physics based on current state and commands.
@@ -461,7 +492,11 @@ class Train:
 
 		newSpeed = self.speed + (avgAcceleration * dt)
 		
+		# Event: the train comes to a stand part way through the step
+		stopDistance = None
 		if newSpeed < 0:
+			if avgAcceleration < 0:
+				stopDistance = (self.speed ** 2) / (2 * -avgAcceleration)
 			newSpeed = 0
 			aNew = 0
 		
@@ -477,19 +512,15 @@ class Train:
 		if aNew > MAX_ACCEL:
 			aNew = MAX_ACCEL
 
-		# Calculate distance with final speed values
-		if hasattr(self, 'speedPrev'):
-			avgSpeed = (newSpeed + self.speedPrev) / 2
-		else:
-			avgSpeed = newSpeed
-
-		distance = avgSpeed * dt
+		# Calculate distance with final speed values (trapezoid over this step)
+		avgSpeed = (newSpeed + self.speed) / 2
+		distance = avgSpeed * dt if stopDistance is None else stopDistance
 		
 		# Update state
 		self.accelerationPrev = aNew
 		self.speedPrev = self.speed
-		self.speed = newSpeed
-		self.acceleration = aNew
+		self._setField('speed', newSpeed)
+		self._setField('acceleration', aNew)
 		if self.distanceLeft != None:
 			self.distanceLeft = self.distanceLeft - distance
 			if newSpeed > 0.1: #may need to fix depending on how the train stops at a station
@@ -503,52 +534,91 @@ class Train:
 
 		self._notifyObservers()
 	
+	def isHeld(self) -> bool:
+		# True if the train is stopped and nothing will start it moving this step.
+		if self.speed != 0:
+			return False
+		return self.emergencyBrakeActive or self.serviceBrakeActive or self.atStation or self.powerCommand <= 0
+
+	def stepPhysics(self, dt: float, maxStep: float = MAX_PHYSICS_STEP, maxSubSteps: int = MAX_SUB_STEPS) -> int:
+		# Advances the physics by dt seconds in equal sub-steps of at most maxStep.
+		"""
+		A frame at a high clock multiplier covers many seconds; one trapezoidal
+		step that long overshoots brake stops, grade changes and speed-limit
+		clamps. The frame is split into sub-steps (no more than maxSubSteps,
+		so CPU per frame stays bounded) and every clamp is applied per sub-step.
+		A train held at a stand stops stepping early. Observers are notified
+		once for the whole frame.
+
+		Returns:
+		int: Number of sub-steps taken
+		"""
+		dt = float(dt)
+		if dt <= 0:
+			return 0
+		subSteps = min(max(1, math.ceil(dt / maxStep - 1e-9)), maxSubSteps)
+		subDt = dt / subSteps
+
+		deferred = self.deferNotifications
+		self.deferNotifications = True
+		taken = 0
+		try:
+			for _ in range(subSteps):
+				self.calculateForceSpeedAccelerationDistance(subDt)
+				taken += 1
+				if self.isHeld() and self.acceleration == 0:
+					break
+		finally:
+			self.deferNotifications = deferred
+		self._notifyObservers()
+		return taken
+
 	# Door controls
 	def setRightDoor(self, isOpen: bool):
 		# Sets the right door state.
-		self.rightDoorOpen = bool(isOpen)
+		self._setField('rightDoorOpen', bool(isOpen))
 		self._notifyObservers()
 	
 	def setLeftDoor(self, isOpen: bool):
 		# Sets the left door state.
-		self.leftDoorOpen = bool(isOpen)
+		self._setField('leftDoorOpen', bool(isOpen))
 		self._notifyObservers()
 	
 	# Light controls
 	def setHeadlights(self, isOn: bool):
 		# Sets the headlight state.
-		self.headlightsOn = bool(isOn)
+		self._setField('headlightsOn', bool(isOn))
 		self._notifyObservers()
 	
 	def setInteriorLights(self, isOn: bool):
 		# Sets the interior light state.
-		self.interiorLightsOn = bool(isOn)
+		self._setField('interiorLightsOn', bool(isOn))
 		self._notifyObservers()
 	
 	# Failure modes
 	def setEngineFailure(self, active: bool):
 		# Sets the engine failure state.
-		self.engineFailure = bool(active)
+		self._setField('engineFailure', bool(active))
 		self._notifyObservers()
 	
 	def setSignalPickupFailure(self, active: bool):
 		# Sets the signal pickup failure state.
-		self.signalPickupFailure = bool(active)
+		self._setField('signalPickupFailure', bool(active))
 		self._notifyObservers()
 	
 	def setBrakeFailure(self, active: bool):
 		# Sets the brake failure state.
-		self.brakeFailure = bool(active)
+		self._setField('brakeFailure', bool(active))
 		self._notifyObservers()
 	
 	def setEmergencyBrake(self, active: bool):
 		# Sets the emergency brake state.
-		self.emergencyBrakeActive = bool(active)
+		self._setField('emergencyBrakeActive', bool(active))
 		self._notifyObservers()
 	
 	def setDeployed(self, deployed: bool):
 		# Sets whether the train is deployed.
-		self.deployed = bool(deployed)
+		self._setField('deployed', bool(deployed))
 		self._notifyObservers()
 	
 	def getStateDict(self) -> dict:
@@ -594,22 +664,167 @@ class Train:
 		}
 
 
+def normalizeTrainId(trainId):
+	# Returns trainId as an int (the Track Model sends ids as strings); non-numeric ids are returned unchanged.
+	try:
+		return int(trainId)
+	except (TypeError, ValueError):
+		return trainId
+
+
+class ControllerRoutingTable:
+	# Maps each train ID to the controller endpoint (socket UI name) that drives it.
+	"""
+	Trains in hwTrainIds always go to the hardware controller. Every other
+	train is given the software endpoint with the fewest trains; once all of
+	them hold swCapacity trains the rest go to the headless controller pool
+	(or, without a pool, to the least loaded software endpoint anyway).
+
+	Attributes:
+	hwEndpoint: A string naming the hardware controller endpoint.
+	hwTrainIds: A set of train IDs pinned to the hardware controller.
+	swEndpoints: A list of software controller endpoint names.
+	swCapacity: An integer limit of trains per software endpoint (None = unlimited).
+	poolEndpoint: A string naming the headless controller pool endpoint (None = no pool).
+	routes: A dictionary mapping train IDs to endpoint names.
+	"""
+
+	def __init__(self, hwTrainIds=(1,), swEndpoints=("Train SW",), swCapacity=None,
+				 poolEndpoint=None, hwEndpoint="Train HW"):
+		# Initializes an empty routing table with the given endpoints.
+		self.hwEndpoint = hwEndpoint
+		self.hwTrainIds = {normalizeTrainId(trainId) for trainId in hwTrainIds}
+		self.swEndpoints = list(swEndpoints) or ["Train SW"]
+		self.swCapacity = swCapacity
+		self.poolEndpoint = poolEndpoint
+		self.routes = {}
+
+	@classmethod
+	def fromConfig(cls, config):
+		# Builds a routing table from the "controllers" entry of config.json (missing keys keep the defaults).
+		"""
+		Example:
+		"Train Model": {"port": 12345, "controllers": {"hw_trains": [1],
+			"sw_endpoints": ["Train SW", "Train SW 2"], "sw_capacity": 10,
+			"pool": "Train Controller Pool"}}
+		"""
+		config = config or {}
+		return cls(
+			hwTrainIds=config.get("hw_trains", (1,)),
+			swEndpoints=config.get("sw_endpoints", ("Train SW",)),
+			swCapacity=config.get("sw_capacity"),
+			poolEndpoint=config.get("pool"),
+			hwEndpoint=config.get("hw_endpoint", "Train HW"),
+		)
+
+	def endpoints(self) -> list:
+		# Returns every endpoint a train can be routed to.
+		endpoints = [self.hwEndpoint] + self.swEndpoints
+		if self.poolEndpoint:
+			endpoints.append(self.poolEndpoint)
+		return endpoints
+
+	def load(self, endpoint: str) -> int:
+		# Returns how many trains are routed to endpoint.
+		return sum(1 for routed in self.routes.values() if routed == endpoint)
+
+	def assign(self, trainId: int) -> str:
+		# Routes trainId (if it is not routed yet) and returns its endpoint.
+		trainId = normalizeTrainId(trainId)
+		if trainId in self.routes:
+			return self.routes[trainId]
+		if trainId in self.hwTrainIds:
+			endpoint = self.hwEndpoint
+		else:
+			loads = {name: self.load(name) for name in self.swEndpoints}
+			endpoint = min(self.swEndpoints, key=lambda name: loads[name])
+			if self.swCapacity is not None and loads[endpoint] >= self.swCapacity and self.poolEndpoint:
+				endpoint = self.poolEndpoint
+		self.routes[trainId] = endpoint
+		return endpoint
+
+	def pin(self, trainId: int, endpoint: str):
+		# Routes trainId to endpoint regardless of the assignment rules.
+		self.routes[normalizeTrainId(trainId)] = endpoint
+
+	def endpointFor(self, trainId: int) -> str:
+		# Returns the endpoint of trainId, routing it first if needed.
+		return self.assign(trainId)
+
+	def release(self, trainId: int):
+		# Forgets the route of a train that left service.
+		self.routes.pop(normalizeTrainId(trainId), None)
+
+
 class TrainManager:
 	# Manages all trains in the system.
 	"""
+	Trains are created when they are dispatched and destroyed when they return
+	to the yard; numTrains are created up front.
+
 	Attributes:
 	trains: A dictionary mapping train IDs to Train objects.
 	selectedTrainId: An integer representing the currently selected train ID.
+	maxTrains: An integer limit on trains in service at once (None = unlimited).
+	routing: A ControllerRoutingTable mapping trains to controller endpoints.
 	"""
 	
-	def __init__(self, numTrains: int = 14):
+	def __init__(self, numTrains: int = 14, maxTrains: int = None, routing: ControllerRoutingTable = None):
 		# Initializes the train manager with the specified number of trains.
-		self.trains = {i + 1: Train(i + 1) for i in range(numTrains)}
+		self.trains = {}
 		self.selectedTrainId = 1
+		self.maxTrains = maxTrains
+		self.routing = routing if routing is not None else ControllerRoutingTable()
+		self.deferNotifications = False
+		self._trainObservers = []
+		self._lock = threading.RLock()
+		for i in range(numTrains):
+			self.dispatchTrain(i + 1)
 	
 	def getTrain(self, trainId: int) -> Train:
 		# Returns a specific train by ID.
-		return self.trains.get(trainId)
+		return self.trains.get(normalizeTrainId(trainId))
+
+	def dispatchTrain(self, trainId: int) -> Train:
+		# Returns the train with trainId, creating and routing it if it is not in service yet.
+		trainId = normalizeTrainId(trainId)
+		with self._lock:
+			train = self.trains.get(trainId)
+			if train is not None:
+				return train
+			if self.maxTrains is not None and len(self.trains) >= self.maxTrains:
+				print(f"Train {trainId} not created - fleet is at its limit of {self.maxTrains}")
+				return None
+			train = Train(trainId)
+			train.deferNotifications = self.deferNotifications
+			for callback in self._trainObservers:
+				train.addObserver(callback)
+			self.routing.assign(trainId)
+			self.trains[trainId] = train
+			return train
+
+	def retireTrain(self, trainId: int) -> bool:
+		# Destroys a train that returned to the yard and releases its controller route.
+		trainId = normalizeTrainId(trainId)
+		with self._lock:
+			train = self.trains.pop(trainId, None)
+			if train is None:
+				return False
+			self.routing.release(trainId)
+			for callback in self._trainObservers:
+				train.removeObserver(callback)
+			return True
+
+	def setRouting(self, routing: ControllerRoutingTable):
+		# Replaces the routing table and routes the trains already in service through it.
+		with self._lock:
+			self.routing = routing
+			for trainId in self.trains:
+				routing.assign(trainId)
+
+	def controllerFor(self, trainId: int) -> str:
+		# Returns the controller endpoint (socket UI name) that drives trainId.
+		return self.routing.endpointFor(trainId)
 	
 	def getSelectedTrain(self) -> Train:
 		# Returns the currently selected train.
@@ -617,6 +832,7 @@ class TrainManager:
 	
 	def selectTrain(self, trainId: int) -> Train:
 		# Selects a train by ID and returns it.
+		trainId = normalizeTrainId(trainId)
 		if trainId in self.trains:
 			self.selectedTrainId = trainId
 			return self.trains[trainId]
@@ -628,12 +844,28 @@ class TrainManager:
 	
 	def getDeployedTrains(self) -> list:
 		# Returns a list of currently deployed trains.
-		return [train for train in self.trains.values() if train.deployed]
+		return [train for train in list(self.trains.values()) if train.deployed]
 	
 	def updateAllPhysics(self, dt: float = 0.1):
 		# Updates physics for all deployed trains.
 		for train in self.getDeployedTrains():
-			train.calculateForceSpeedAccelerationDistance(dt)
+			train.stepPhysics(dt)
+
+	def addTrainObserver(self, callback):
+		# Registers an observer on every train, including trains dispatched later.
+		self._trainObservers.append(callback)
+		for train in list(self.trains.values()):
+			train.addObserver(callback)
+
+	def setDeferredNotifications(self, deferred: bool = True):
+		# Collects observer notifications until flushObservers (one UI update per frame).
+		self.deferNotifications = deferred
+		for train in list(self.trains.values()):
+			train.deferNotifications = deferred
+
+	def flushObservers(self) -> int:
+		# Delivers the pending changes of every train; returns how many trains changed.
+		return sum(1 for train in list(self.trains.values()) if train.flushObservers())
 
 	
 # Global singleton instance
@@ -643,5 +875,6 @@ def getTrainManager() -> TrainManager:
 	# Returns the global TrainManager instance.
 	global _trainManager
 	if _trainManager is None:
-		_trainManager = TrainManager()
+		# Train 1 exists from the start (initial selection); the rest are created on dispatch
+		_trainManager = TrainManager(numTrains=1)
 	return _trainManager
\ No newline at end of file
@@ -45,6 +45,10 @@ station_location = []
 
 # environmental_temp: float
 # failure_modes = []
+
+# Track Model failures per line, kept up to date from failure_delta messages
+# {track: {"sequence": int, "track_circuit": set, "broken_rail": set, "power": set}}
+track_failure_state = {}
 # track_circuit_fail: bool
 # railway_crossing_fail: bool
 # power_fail: bool
@@ -519,7 +523,10 @@ def _process_message(data, connection=None, server_instance=None):
             handle_track_model_crossing(value)
 
         elif command == 'failure_modes':
-            handle_track_failures(value)
+            handle_track_failure_snapshot(value, message_data.get('track', 'Green'))
+
+        elif command == 'failure_delta':
+            handle_track_failure_delta(value, message_data.get('track', 'Green'))
 
         elif command == 'block_occupancy' or command == 'Block Occpancy':
             handle_block_occupancy(value)
@@ -804,6 +811,62 @@ def handle_track_model_crossing(value):
         
     except Exception as e:
         print(f"Error in handle_track_model_crossing: {e}")
+
+
+def handle_track_failure_snapshot(value, track="Green"):
+    """Replace the stored failures for a line with Track Model's full failure lists"""
+    if not isinstance(value, dict):
+        print(f"Invalid failure_modes format: {value}")
+        return
+    track_failure_state[track] = {
+        "sequence": value.get('sequence', 0),
+        "track_circuit": set(value.get('track_circuit_failures', [])),
+        "broken_rail": set(value.get('broken_rail_failures', [])),
+        "power": set(value.get('power_failures', [])),
+    }
+    UITestData.handle_track_failures(value)
+
+
+def handle_track_failure_delta(value, track="Green"):
+    """
+    Apply a failure_delta from Track Model (only the blocks that changed).
+
+    Format: {'sequence': n, 'changes': [[sequence, block, failure_type, active (1/0), sim_time], ...]}
+    A gap in the sequence numbers means a delta was missed, so the full
+    failure lists are requested again with failure_resync.
+    """
+    try:
+        state = track_failure_state.get(track)
+        if state is None:
+            # No snapshot yet for this line
+            test_data.send_to_track_model({"command": "failure_resync", "track": track})
+            return
+        
+        # Drop changes that were already applied
+        changes = [c for c in value.get('changes', []) if c[0] > state["sequence"]]
+        if not changes:
+            return
+        if changes[0][0] != state["sequence"] + 1:
+            test_data.send_to_track_model({"command": "failure_resync", "track": track})
+            return
+        
+        for sequence, block, failure_type, active, sim_time in changes:
+            blocks = state.setdefault(failure_type, set())
+            if active:
+                blocks.add(block)
+            else:
+                blocks.discard(block)
+            state["sequence"] = sequence
+            add_to_message_log(f"Track Model: {failure_type} failure {'SET' if active else 'CLEARED'} on block {block}")
+        
+        # Occupancy display, PLC safety checks and CTC forward use the full lists
+        UITestData.handle_track_failures({
+            'track_circuit_failures': sorted(state.get("track_circuit", ())),
+            'broken_rail_failures': sorted(state.get("broken_rail", ())),
+            'power_failures': sorted(state.get("power", ())),
+        })
+    except Exception as e:
+        print(f"Error in handle_track_failure_delta: {e}")
     
     # # Store as simple attributes
     # right_panel.update_suggested_speed = speed
@@ -1499,6 +1562,7 @@ class UITestData:
         """Send commanded speed and authority to Track Model"""
         track_model_message = {
             "command": "Speed and Authority",
+            "track": track,
             "block_number": block,
             "commanded_speed": speed,
             "commanded_authority": authority,
@@ -1720,6 +1784,7 @@ class UITestData:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             add_to_message_log(f"{current_time} ERROR: Failed to process CTC maintenance request")
 
+    @staticmethod
     def handle_track_failures(value):
         """ Handle track failure notifications from Track Model.
         Forwards failures to CTC in the expected format.
@@ -1,6 +1,14 @@
 import os
 import re
 
+from TrackLayout import load_layout
+
+# Line name -> track layout source (compiled once into a cached binary layout)
+TXT_FILES = {
+    "Green": "Wayside_Controller/SW/data/green_line.txt",
+    "Red": "Wayside_Controller/SW/data/red_line.txt"
+}
+
 class RailwayData:
     def __init__(self):
         """Data model for railway control system - manages track data, blocks, and commands"""
@@ -56,33 +64,31 @@ class RailwayData:
         # System log reference for broadcasting messages
         self.system_log = None
         
+    def load_track_layout(self):
+        """Load the compiled track layout for the TXT files (rebuilt only when a file changes)"""
+        sources = []
+        for line_name, file_path in TXT_FILES.items():
+            if os.path.exists(file_path):
+                sources.append(file_path)
+            else:
+                print(f"Warning: {file_path} not found. Skipping {line_name} line data.")
+        if not sources:
+            return None
+        return load_layout(sources)
+
     def load_section_mapping_from_files(self):
-        """Load section mapping from TXT files instead of hardcoding"""
+        """Load section mapping from the compiled track layout instead of hardcoding"""
         section_mapping = {}
-        txt_files = {
-            "Green": "Wayside_Controller/SW/data/green_line.txt", 
-            "Red": "Wayside_Controller/SW/data/red_line.txt"
-        }
-        
-        for line_name, file_path in txt_files.items():
-                with open(file_path, 'r') as file:
-                    lines = file.readlines()
-                    # Check if file has section column (4 columns means it has section)
-                    if len(lines) > 0:
-                        headers = lines[0].strip().split(',')
-                        has_section_column = len(headers) >= 4 and headers[2].lower() == 'section'
-                        
-                        if has_section_column:
-                            # Process data lines (skip header)
-                            for row_line in lines[1:]:
-                                row = row_line.strip().split(',')
-                                if len(row) >= 4:  # Line,Block,Section,Infrastructure
-                                    block = row[1].strip()
-                                    section = row[2].strip()
-                                    if block and section:  # Make sure we have valid data
-                                        section_mapping[f"{line_name}-{block}"] = section
-                        else:
-                            print(f"Warning: {file_path} doesn't have section column.")
+        layout = self.load_track_layout()
+        if layout is None:
+            return section_mapping
+
+        for line_name in TXT_FILES:
+            if line_name not in layout.lines:
+                continue
+            for row in layout.rows(line_name):
+                if row["section"]:  # Make sure we have valid data
+                    section_mapping[f"{line_name}-{row['block_number']}"] = row["section"]
         return section_mapping
     
     def get_section_for_block(self, line, block_number):
@@ -134,119 +140,74 @@ class RailwayData:
         self.switch_positions = {}
         self.railway_crossings = {}
 
-        # Map line names to their data files
-        txt_files = {
-            "Green": "Wayside_Controller/SW/data/green_line.txt", 
-            "Red": "Wayside_Controller/SW/data/red_line.txt"
-        }
+        layout = self.load_track_layout()
+        if layout is None:
+            return
+
+        for line in TXT_FILES:
+            if line not in layout.lines:
+                continue
+            for row in layout.rows(line):
+                block = str(row["block_number"])
+                # Old format files have no section column - get from mapping
+                section = row["section"] or self.get_section_for_block(line, block)
+                infrastructure = row["infrastructure"]
+
+                # --- SWITCHES ---
+                if 'Switch' in infrastructure:
+                    switch_name = f"Switch {block}"
+                    directions = self.extract_switch_directions(infrastructure)
+                    
+                    #set first direction as the default
+                    default_direction = directions[0] if directions else "Unknown"
+                    
+                    # Initialize numeric position (1 for first/default)
+                    numeric_position = 1
+                    
+                    self.switch_positions[switch_name] = {
+                        "condition": default_direction,
+                        "direction": default_direction,
+                        "options": directions,  # Store all possible directions for UI
+                        "line": line,  # Track which line this switch belongs to
+                        "numeric_position": numeric_position,  # ADD THIS LINE
+                        "section": section  # Store section info
+                    }
+
+                # --- RAILWAY CROSSINGS ---
+                if 'RAILWAY CROSSING' in infrastructure:
+                    crossing_name = f"Railway {block}"
+                    self.railway_crossings[crossing_name] = {
+                        "condition": "Normal Operation",
+                        "lights": "Off",    # Default state
+                        "bar": "Open",    # Default state  
+                        "line": line,        # Track which line this crossing belongs to
+                        "section": section   # Store section info
+                    }
+
+                # --- LIGHTS ---
+                if 'Light' in infrastructure and 'Switch' not in infrastructure:
+                    light_name = f"Light {block}"
+                    self.light_states[light_name] = {
+                        "condition": "Normal Operation",
+                        "signal": "Green",  # Default signal state
+                        "line": line,        # Track which line this light belongs to
+                        "section": section   # Store section info
+                    }
 
-        for line, file_path in txt_files.items():
-            try:
-                with open(file_path, 'r') as file:
-                    lines = file.readlines()
-                    if len(lines) > 0:
-                        headers = lines[0].strip().split(',')
-                        has_section_column = len(headers) >= 4 and headers[2].lower() == 'section'
-                        
-                        # Skip header line (index 0) and process data lines
-                        for row_line in lines[1:]:
-                            row = row_line.strip().split(',')
-                            
-                            if has_section_column:
-                                # New format with sections: Line,Block,Section,Infrastructure
-                                if len(row) >= 4:
-                                    block = row[1].strip()
-                                    section = row[2].strip()
-                                    infrastructure = row[3].strip()
-                                else:
-                                    continue
-                            else:
-                                # Old format without sections: Line,Block,Infrastructure
-                                if len(row) >= 3:
-                                    block = row[1].strip()
-                                    section = self.get_section_for_block(line, block)  # Get from mapping
-                                    infrastructure = row[2].strip()
-                                else:
-                                    continue
-
-                            # --- SWITCHES ---
-                            if 'Switch' in infrastructure:
-                                switch_name = f"Switch {block}"
-                                directions = self.extract_switch_directions(infrastructure)
-                                
-                                #set first direction as the default
-                                default_direction = directions[0] if directions else "Unknown"
-                                
-                                # Initialize numeric position (1 for first/default)
-                                numeric_position = 1
-                                
-                                self.switch_positions[switch_name] = {
-                                    "condition": default_direction,
-                                    "direction": default_direction,
-                                    "options": directions,  # Store all possible directions for UI
-                                    "line": line,  # Track which line this switch belongs to
-                                    "numeric_position": numeric_position,  # ADD THIS LINE
-                                    "section": section  # Store section info
-                                }
-
-                            # --- RAILWAY CROSSINGS ---
-                            if 'RAILWAY CROSSING' in infrastructure:
-                                crossing_name = f"Railway {block}"
-                                self.railway_crossings[crossing_name] = {
-                                    "condition": "Normal Operation",
-                                    "lights": "Off",    # Default state
-                                    "bar": "Open",    # Default state  
-                                    "line": line,        # Track which line this crossing belongs to
-                                    "section": section   # Store section info
-                                }
-
-                            # --- LIGHTS ---
-                            if 'Light' in infrastructure and 'Switch' not in infrastructure:
-                                light_name = f"Light {block}"
-                                self.light_states[light_name] = {
-                                    "condition": "Normal Operation",
-                                    "signal": "Green",  # Default signal state
-                                    "line": line,        # Track which line this light belongs to
-                                    "section": section   # Store section info
-                                }
-
-            except FileNotFoundError:
-                print(f"Warning: {file_path} not found. Skipping {line} line data.")
 
     def load_all_block_data(self):
         """Load all block data from TXT files - each block starts unoccupied"""
         all_block_data = []
-        txt_files = {
-            "Green": "Wayside_Controller/SW/data/green_line.txt", 
-            "Red": "Wayside_Controller/SW/data/red_line.txt"
-        }
-        
-        for line, file_path in txt_files.items():
-            try:
-                with open(file_path, 'r') as file:
-                    lines = file.readlines()
-                    if len(lines) > 0:
-                        headers = lines[0].strip().split(',')
-                        has_section_column = len(headers) >= 4 and headers[2].lower() == 'section'
-                        
-                        # Skip header line and process each block
-                        for row_line in lines[1:]:
-                            row = row_line.strip().split(',')
-                            
-                            if has_section_column:
-                                # New format: Line,Block,Section,Infrastructure
-                                if len(row) >= 2:
-                                    # Each block starts as unoccupied: 
-                                    # ["No", line, block_number, "No"]
-                                    block_num = row[1].strip()
-                                    all_block_data.append(["No", line, block_num, "No"])
-                            else:
-                                # Old format: Line,Block,Infrastructure
-                                if len(row) >= 2:
-                                    block_num = row[1].strip()
-                                    all_block_data.append(["No", line, block_num, "No"])
-            except FileNotFoundError:
-                print(f"Warning: {file_path} not found. Skipping {line} block data.")
+        layout = self.load_track_layout()
+        if layout is None:
+            return all_block_data
+
+        for line in TXT_FILES:
+            if line not in layout.lines:
+                continue
+            # Each block starts as unoccupied: ["No", line, block_number, "No"]
+            for block_num in layout.blocks(line)["block_number"].tolist():
+                all_block_data.append(["No", line, str(block_num), "No"])
         
         return all_block_data
 
@@ -35,6 +35,9 @@ class RailwayControlSystem:
         # ADD THIS LINE: Track previous occupancy to detect changes
         self.previous_occupancy = {"Green": {}, "Red": {}}
 
+        # Track Model failures per line, kept up to date from failure_delta messages
+        self.track_failures = {}
+
         # Load socket configuration first
         module_config = load_socket_config().get("Track SW", {"port": 2})
         
@@ -88,13 +91,15 @@ class RailwayControlSystem:
             elif command == 'update_occupancy':
                 self.handle_occupancy_update(data)
             elif command == 'failure_modes':
-                handle_track_failures(value)
+                self.handle_track_failures(data, message.get('track', 'Green'))
+            elif command == 'failure_delta':
+                self.handle_track_failure_delta(data, message.get('track', 'Green'))
             
                 
         except Exception as e:
             print(f"Error processing message: {e}")
     
-    def handle_track_failures(value):
+    def handle_track_failures(self, value, track="Green"):
         """ Handle track failure notifications from Track Model.
         Forwards failures to CTC in the expected format.
     
@@ -102,13 +107,22 @@ class RailwayControlSystem:
         {
             'track_circuit_failures': [block_nums],
             'broken_rail_failures': [block_nums],
-            'power_failures': [block_nums]
+            'power_failures': [block_nums],
+            'sequence': last failure change number
         }
         """
         # Extract failure arrays
         track_circuit_failures = value.get('track_circuit_failures', [])
         broken_rail_failures = value.get('broken_rail_failures', [])
         power_failures = value.get('power_failures', [])
+        
+        # Full snapshot - replaces whatever deltas were applied before
+        self.track_failures[track] = {
+            "sequence": value.get('sequence', 0),
+            "track_circuit": set(track_circuit_failures),
+            "broken_rail": set(broken_rail_failures),
+            "power": set(power_failures),
+        }
         #  Combine all failures into one list
         all_failed_blocks = set(track_circuit_failures + broken_rail_failures + power_failures)
         # Log to terminal
@@ -127,6 +141,40 @@ class RailwayControlSystem:
             print(f" All failures cleared")
     
         print(f"{'='*60}\n")
+
+    def handle_track_failure_delta(self, value, track="Green"):
+        """ Apply a failure_delta from Track Model (only the blocks that changed).
+    
+        Expected format from Track Model:
+        {
+            'sequence': last change number in this message,
+            'changes': [[sequence, block, failure_type, active (1/0), sim_time], ...]
+        }
+        A gap in the sequence numbers means a delta was missed, so the full
+        failure lists are requested again with failure_resync.
+        """
+        state = self.track_failures.get(track)
+        if state is None:
+            # No snapshot yet for this line
+            self.send_to_track_model({"command": "failure_resync", "track": track})
+            return
+        
+        # Drop changes that were already applied
+        changes = [c for c in value.get('changes', []) if c[0] > state["sequence"]]
+        if not changes:
+            return
+        if changes[0][0] != state["sequence"] + 1:
+            self.send_to_track_model({"command": "failure_resync", "track": track})
+            return
+        
+        for sequence, block, failure_type, active, sim_time in changes:
+            blocks = state.setdefault(failure_type, set())
+            if active:
+                blocks.add(block)
+            else:
+                blocks.discard(block)
+            state["sequence"] = sequence
+            print(f" Track failure {'SET' if active else 'CLEARED'}: {track} block {block} ({failure_type}) at t={sim_time}")
         
     def handle_ctc_maintenance(self):
         """Handle maintenance mode request from CTC"""
@@ -196,6 +244,7 @@ class RailwayControlSystem:
         """Send commanded speed and authority to Track Model"""
         track_model_message = {
             "command": "Speed and Authority",
+            "track": track,
             "block_number": block,
             "commanded_speed": speed,
             "commanded_authority": authority,
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 from datetime import datetime
 from ui_test.system_log import SystemLog
+from ImageAssetCache import image_cache
 
 class CenterPanel(tk.Frame):
     def __init__(self, parent, data):
@@ -66,13 +67,16 @@ class CenterPanel(tk.Frame):
         if self.log_callback:
             self.log_callback(f"{current_time} INFO: Line changed to {self.data.current_line}")
 
+    def _load_track_image(self, image_file):
+        """Get the half-size track image from the shared image cache"""
+        width, height = image_cache.get_source_size(image_file)
+        return image_cache.get_photo(image_file, (width // 2, height // 2))
+
     def update_track_image(self):
         """Change track image based on selected line"""
         image_files = "Red and Green Line.png"
         
-        img = tk.PhotoImage(file=image_files)
-        img = img.subsample(2, 2)
-        self.track_image = img
+        self.track_image = self._load_track_image(image_files)
         self._draw_centered_image()
        
 
@@ -81,9 +85,7 @@ class CenterPanel(tk.Frame):
         
         image_files = "Red and Green Line.png"
         
-        img = tk.PhotoImage(file=image_files)
-        img = img.subsample(2, 2)
-        self.track_image = img
+        self.track_image = self._load_track_image(image_files)
         self._draw_centered_image()
 
         self.canvas.bind("<Configure>", lambda e: self._draw_centered_image())
@@ -92,9 +94,16 @@ class CenterPanel(tk.Frame):
     def _draw_centered_image(self):
         """Helper to center the track image on the canvas"""
         if hasattr(self, 'track_image') and self.track_image:
-            self.canvas.delete("all")
             w = self.canvas.winfo_width()
             h = self.canvas.winfo_height()
+            
+            # Nothing changed since the last draw (refresh_ui runs on every data update)
+            draw_key = (w, h, id(self.track_image))
+            if getattr(self, '_last_draw_key', None) == draw_key:
+                return
+            self._last_draw_key = draw_key
+            
+            self.canvas.delete("all")
             self.canvas.create_image(
                 w // 2, h // 2,
                 image=self.track_image,
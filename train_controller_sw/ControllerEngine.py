@@ -0,0 +1,680 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from PIKernel import pi_power, pi_power_batch
+from PositionTracker import PositionTracker
+from RouteIndex import (greenLineTrackInformation, redLineTrackInformation,
+                        greenLineStationDoorSides, redLineStationDoorSides)
+from SimClock import SimClock
+from SpeedProfile import get_speed_profile
+
+
+def load_socket_config():
+    """Load socket configuration from config.json"""
+    config_path = Path("config.json")
+    config = {}  #  Initialize config first
+
+    if config_path.exists():
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Error reading config.json: {e}")
+        except Exception as e:
+            print(f"Error loading config: {e}")
+    else:
+        print("Warning: config.json not found, using default configuration")
+
+    return config.get("modules", {})
+
+METERS_PER_SEC_TO_MPH = 2.23694  # 1 m/s = 2.23694 mph
+MPH_TO_METERS_PER_SEC = 0.44704  # 1 mph = 0.44704 m/s
+KW_TO_WATTS = 1000  # 1 kW = 1000 W
+WATTS_TO_KW = 0.001  # 1 W = 0.001 kW
+
+# Controller state owned by TrainControllerCore; a Driver UI view reads and writes it through
+CONTROLLER_FIELDS = (
+    'train_id', 'position_tracker',
+    'has_received_commanded_speed', 'has_received_authority', 'has_control_authority',
+    'initial_service_brake_applied',
+    'current_speed_ms', 'commanded_speed_mph', 'commanded_speed_ms', 'track_speed_limit_mph',
+    'manual_setpoint_speed', 'commanded_authority', 'is_auto_mode',
+    'service_brake_active', 'emergency_brake_active', 'door_safety_lock',
+    'kp', 'ki', 'max_power_kw', 'integral_error', 'prev_error', 'last_power_sent',
+    '_speed_reduction_brake_time', '_last_brake_check_time', '_previous_commanded_speed_mph',
+)
+
+# From this many trains on, step_all runs the PI loop of every train in one
+# pi_power_batch call (below it the scalar loop is faster - see PIKernel.benchmark)
+BATCH_MIN_TRAINS = 16
+
+# Auto mode brakes when the train is this far above its braking curve (m/s)
+PROFILE_BRAKE_TOLERANCE_MS = 0.5
+
+# Commands that carry no train_id and apply to every controller
+BROADCAST_COMMANDS = ('TIME', 'MULT')
+
+
+class TrainControllerCore:
+    """
+    One software train controller with no window: position tracking, station
+    stop logic and the PI speed loop that used to live in
+    Main_Window.calculate_power_command, for a single train.
+
+    Brake, door, light and announcement commands go to the host - the Driver UI
+    view attached to this controller, or the core itself when headless, which
+    sends them to the Train Model tagged with its own train_id.
+    """
+
+    def __init__(self, train_id, selected_line='GREEN', server=None, engine=None, clock=None):
+        self.train_id = train_id
+        self.selected_line = selected_line
+        self.server = server
+        self.engine = engine
+        self.clock = clock if clock is not None else SimClock()
+        self.view = None
+        self.status_log = deque(maxlen=50)
+
+        # Initialize position tracker based on selected line
+        if selected_line == 'GREEN':
+            self.position_tracker = PositionTracker(greenLineTrackInformation, greenLineStationDoorSides, selected_line, self.clock)
+        else:  # RED
+            self.position_tracker = PositionTracker(redLineTrackInformation, redLineStationDoorSides, selected_line, self.clock)
+        # Braking-curve tables for the line's segments (shared by every train on it)
+        self.speed_profile = get_speed_profile(selected_line, self.position_tracker.track_info)
+
+        # Service brake is held until both commanded speed and authority arrive
+        self.has_received_commanded_speed = False
+        self.has_received_authority = False
+        self.has_control_authority = False
+        self.initial_service_brake_applied = True
+
+        # Speeds (m/s for calculations, mph where the track gives mph) and authority
+        self.current_speed_ms = 0.0
+        self.commanded_speed_mph = 0.0
+        self.commanded_speed_ms = 0.0
+        self.track_speed_limit_mph = 0.0  # Raw speed limit from track (before authority adjustment)
+        self.manual_setpoint_speed = 0.0  # Manual mode setpoint in MPH
+        self.commanded_authority = 0
+        self.is_auto_mode = True
+
+        # Brakes, doors and failures
+        self.service_brake_active = True
+        self.emergency_brake_active = False
+        self.door_safety_lock = False
+        self.passenger_emergency = False
+        self.failures = set()
+
+        # PI controller
+        self.kp = 10.0
+        self.ki = 2.0
+        self.max_power_kw = 120.0
+        self.integral_error = 0.0
+        self.prev_error = 0.0
+        self.last_power_sent = None
+        self._speed_reduction_brake_time = 0.0
+        self._last_brake_check_time = time.time()
+        self._previous_commanded_speed_mph = 0.0
+        self._power_debug_counter = 0
+        self._step_commanded_speed_mph = 0.0
+        self._profile_brake_active = False  # Service brake applied to get back under the braking curve
+
+    @property
+    def host(self):
+        """Receiver of side effects: the attached view, or this core when headless"""
+        return self.view if self.view is not None else self
+
+    def attach_view(self, view):
+        """Show this controller in a Driver UI window (view is a Main_Window)"""
+        self.view = view
+
+    def detach_view(self):
+        """Go back to running headless"""
+        self.view = None
+
+    # ========== INPUTS ==========
+    def handle_message(self, message):
+        """
+        Apply a message from the Train Model / CTC with no window attached
+        (what Main_Window._process_message does for the controller state)
+
+        Returns:
+            bool: False if the command is not one the controller acts on
+        """
+        command = message.get('command')
+        value = message.get('value')
+        try:
+            if command == 'Commanded Speed':
+                self.has_received_commanded_speed = True
+                self.track_speed_limit_mph = float(value)
+                self._apply_authority_to_speed()
+                self._check_initial_conditions()
+
+            elif command == 'Commanded Authority':
+                self.has_received_authority = True
+                prev_authority = self.commanded_authority
+                self.commanded_authority = int(value)
+                self._apply_authority_to_speed()
+
+                # Release service brake if authority increased from 0
+                if prev_authority == 0 and self.commanded_authority > 0:
+                    if self.service_brake_active and not self.position_tracker.is_at_station:
+                        self.service_brake_active = False
+                        self.send_service_brake(False)
+                self.add_to_status_log(f"Authority: {self.commanded_authority} blocks")
+                self._check_initial_conditions()
+
+            elif command == 'Current Speed':
+                self.current_speed_ms = float(value)
+
+            elif command == 'Passenger Emergency Signal':
+                self.passenger_emergency = bool(value)
+                if self.passenger_emergency:
+                    self.emergency_brake_activate()
+
+            elif command in ('Brake Failure', 'Service Brake Failure', 'Signal Pickup Failure', 'Train Engine Failure'):
+                failure = 'Brake Failure' if command == 'Service Brake Failure' else command
+                if value:
+                    self.failures.add(failure)
+                    self.add_to_status_log(f"CRITICAL: {failure} detected!")
+                    self.emergency_brake_activate()
+                else:
+                    self.failures.discard(failure)
+                    self.add_to_status_log(f"✓ {failure} cleared")
+
+            elif command == 'PID Parameters':
+                self.kp = float(message.get('kp', 10.0))
+                self.ki = float(message.get('ki', 2.0))
+
+            elif command == 'Current Block':
+                self.position_tracker.resync(int(value))
+
+            elif command == 'TIME':
+                self.clock.set_time(value)
+
+            elif command == 'MULT':
+                self.clock.set_multiplier(value)
+
+            else:
+                return False
+        except (TypeError, ValueError) as e:
+            print(f"[TRAIN {self.train_id}] Value conversion error for {command}: {e}")
+        return True
+
+    def _apply_authority_to_speed(self):
+        """Commanded speed from the track limit and authority (0 or 1 block = stop)"""
+        if self.commanded_authority in (0, 1):
+            self.commanded_speed_mph = 0.0
+        else:
+            self.commanded_speed_mph = self.track_speed_limit_mph
+        self.commanded_speed_ms = self.commanded_speed_mph * MPH_TO_METERS_PER_SEC
+
+    def _check_initial_conditions(self):
+        """Release the initial service brake once speed and authority have both arrived"""
+        if (self.has_received_commanded_speed and
+            self.has_received_authority and
+            not self.has_control_authority):
+            self.has_control_authority = True
+            if self.service_brake_active and self.initial_service_brake_applied:
+                self.service_brake_active = False
+                self.send_service_brake(False)
+                self.initial_service_brake_applied = False
+                self.add_to_status_log("Initial conditions met - service brake released, ready to move")
+
+    # ========== CONTROL LOOP ==========
+    def step(self):
+        """
+        Calculate power using PI controller - COMPLETE HW STYLE
+
+        Critical order:
+        1. Update position tracking FIRST
+        2. Determine commanded speed (manual vs auto, station logic)
+        3. Handle service brake for speed reductions
+        4. Calculate PI controller output
+        5. Override power if brakes active or authority zero
+
+        Returns:
+            float: Power command in kW
+        """
+        commanded_speed_ms = self.commanded_speed()
+
+        # ===== STEPS 4-5: PI CONTROLLER, BRAKE AND AUTHORITY OVERRIDES =====
+        power, self.integral_error, self.prev_error = pi_power(
+            commanded_speed_ms, self.current_speed_ms, self.kp, self.ki, self.max_power_kw,
+            self.integral_error, self.prev_error, self.brake_engaged, self.commanded_authority)
+        self.log_power(power)
+        return power
+
+    @property
+    def brake_engaged(self):
+        """Power is overridden to zero while either brake is on"""
+        return self.service_brake_active or self.emergency_brake_active
+
+    def commanded_speed(self):
+        """
+        Steps 1-3 of step(): position tracking, commanded speed (manual limit,
+        station hold / braking curve) and the speed-reduction service brake
+
+        Returns:
+            float: Speed the PI loop should track this period, in m/s
+        """
+        # Conversion constants
+        MPH_TO_MS = 0.44704
+        MS_TO_MPH = 2.23694
+        host = self.host
+
+        # ===== STEP 1: UPDATE POSITION TRACKING =====
+        self.position_tracker.update(self.current_speed_ms, host)
+
+        # Get current speed
+        current_speed_ms = self.current_speed_ms
+        current_speed_mph = current_speed_ms * MS_TO_MPH
+
+        # ===== STEP 2: DETERMINE COMMANDED SPEED =====
+        if not self.is_auto_mode:
+            # MANUAL MODE
+            self._release_profile_brake(host)
+            commanded_speed_mph = self.manual_setpoint_speed
+
+            # Manual mode speed limit enforcement (unless authority=4)
+            if self.commanded_authority != 4 and self.track_speed_limit_mph > 0:
+                if commanded_speed_mph > self.track_speed_limit_mph:
+                    commanded_speed_mph = self.track_speed_limit_mph
+
+            commanded_speed_ms = commanded_speed_mph * MPH_TO_MS
+        else:
+            # AUTOMATIC MODE
+            commanded_speed_mph = self.commanded_speed_mph
+            commanded_speed_ms = commanded_speed_mph * MPH_TO_MS
+
+            # STATION LOGIC (auto mode only)
+            if not self.emergency_brake_active:
+                if self.position_tracker.is_at_station:
+                    # FORCE STOP AT STATION
+                    commanded_speed_ms = 0.0
+                    commanded_speed_mph = 0.0
+                    self._profile_brake_active = False  # The station hold owns the brake now
+
+                    # Ensure service brake active
+                    if not self.service_brake_active:
+                        self.service_brake_active = True
+                        host.send_service_brake(True)
+                        station = self.position_tracker.get_current_station_name()
+                        print(f"[TRAIN {self.train_id}] Service brake ENGAGED at {station}")
+                        host.add_to_status_log(f"Holding at {station}")
+
+                    # Unlock doors when stopped
+                    host.unlock_doors()
+
+                else:
+                    # BRAKING CURVE: speed limits ahead and the station stop, precomputed per segment
+                    allowed_speed_ms = self.speed_profile.allowed_speed(
+                        self.position_tracker.current_segment_index,
+                        self.position_tracker.distance_traveled_in_segment)
+                    if allowed_speed_ms < commanded_speed_ms:
+                        commanded_speed_ms = allowed_speed_ms
+                        commanded_speed_mph = commanded_speed_ms * MS_TO_MPH
+                    self._follow_braking_curve(current_speed_ms, allowed_speed_ms, host)
+
+        # ===== STEP 3: SPEED REDUCTION DETECTION =====
+        SPEED_REDUCTION_THRESHOLD = 5.0  # MPH
+        SERVICE_BRAKE_DURATION = 0.5  # seconds
+
+        current_time = time.time()
+        dt_check = current_time - self._last_brake_check_time
+        self._last_brake_check_time = current_time
+
+        # Detect significant speed reduction in auto mode
+        if self.is_auto_mode and not self.emergency_brake_active:
+            if not self.position_tracker.is_at_station:
+                speed_reduction = self._previous_commanded_speed_mph - commanded_speed_mph
+
+                if speed_reduction > SPEED_REDUCTION_THRESHOLD and current_speed_mph > commanded_speed_mph + 3.0:
+                    if self._speed_reduction_brake_time <= 0:
+                        self._speed_reduction_brake_time = SERVICE_BRAKE_DURATION
+                        print(f"[TRAIN {self.train_id}] Speed drop {self._previous_commanded_speed_mph:.1f}→{commanded_speed_mph:.1f} MPH - Service brake")
+                        self.service_brake_active = True
+                        host.send_service_brake(True)
+
+        # Count down brake timer
+        if self._speed_reduction_brake_time > 0:
+            self._speed_reduction_brake_time -= dt_check
+            if self._speed_reduction_brake_time <= 0:
+                self._speed_reduction_brake_time = 0.0
+                if not self.position_tracker.is_at_station:
+                    self.service_brake_active = False
+                    host.send_service_brake(False)
+
+        self._previous_commanded_speed_mph = commanded_speed_mph
+
+        self._step_commanded_speed_mph = commanded_speed_mph
+        return commanded_speed_ms
+
+    def _follow_braking_curve(self, current_speed_ms, allowed_speed_ms, host):
+        """Service brake while above the braking curve - with no power the train only coasts"""
+        if current_speed_ms > allowed_speed_ms + PROFILE_BRAKE_TOLERANCE_MS:
+            if not self.service_brake_active:
+                self.service_brake_active = True
+                self._profile_brake_active = True
+                host.send_service_brake(True)
+        elif current_speed_ms <= allowed_speed_ms:
+            self._release_profile_brake(host)
+
+    def _release_profile_brake(self, host):
+        """Release the service brake if the braking curve applied it"""
+        if self._profile_brake_active:
+            self._profile_brake_active = False
+            self.service_brake_active = False
+            host.send_service_brake(False)
+
+    def log_power(self, power):
+        """Debug output every 10th power command"""
+        self._power_debug_counter += 1
+        if self._power_debug_counter % 10 == 0:
+            print(f"[POWER] Train {self.train_id}: Cmd={self._step_commanded_speed_mph:.1f}mph, "
+                  f"Curr={self.current_speed_ms * METERS_PER_SEC_TO_MPH:.1f}mph, "
+                  f"Err={self.prev_error:.2f}m/s, Power={power:.1f}kW, "
+                  f"Brake={'ON' if self.service_brake_active else 'OFF'}")
+
+    def tick(self, power_kw=None):
+        """
+        One control period: calculate power (unless the engine already has, in
+        its batched PI step), send it (zero once while a brake is on) and
+        lock/unlock the doors from the current speed
+
+        Returns:
+            float: Power command in kW
+        """
+        host = self.host
+        try:
+            if power_kw is None:
+                power_kw = self.step()
+
+            # BRAKE CHECK WHEN SENDING (TC_HW style)
+            if self.service_brake_active or self.emergency_brake_active:
+                if self.last_power_sent != 0:
+                    host.send_setpoint_power(0.0)
+                    self.last_power_sent = 0
+                    print(f"[TRAIN {self.train_id}] Brake active - power command set to ZERO")
+            else:
+                host.send_setpoint_power(power_kw)
+                self.last_power_sent = power_kw * KW_TO_WATTS
+        except Exception as e:
+            print(f"[TRAIN {self.train_id}] Error in power calculation: {e}")
+            power_kw = power_kw or 0.0
+
+        # Door safety based on speed
+        if self.current_speed_ms > 1.0 and not self.door_safety_lock:
+            host.lock_doors()
+        elif self.current_speed_ms < 0.1 and self.door_safety_lock and self.position_tracker.is_at_station:
+            host.unlock_doors()
+
+        # Nobody is at a headless controller to press "release": let go of the
+        # emergency brake once stopped and nothing is holding it any more
+        if (self.view is None and self.emergency_brake_active
+                and not self.failures and not self.passenger_emergency):
+            self.emergency_brake_release()
+
+        return power_kw
+
+    # ========== HEADLESS HOST ==========
+    def add_to_status_log(self, message):
+        """Keep the most recent status messages (shown when a view is attached)"""
+        self.status_log.append(f"[{time.strftime('%H:%M:%S')}] {message}")
+
+    def lock_doors(self):
+        """Lock doors when train is moving"""
+        if not self.door_safety_lock:
+            self.door_safety_lock = True
+            self.add_to_status_log("Doors locked - train in motion")
+
+    def unlock_doors(self):
+        """Unlock doors when train is stopped at station"""
+        if self.door_safety_lock and self.current_speed_ms < 0.1:
+            self.door_safety_lock = False
+            self.add_to_status_log("Doors unlocked - train stopped at station")
+
+    def emergency_brake_activate(self):
+        """Activate emergency brake (service brake released, integral reset)"""
+        if not self.emergency_brake_active:
+            self.emergency_brake_active = True
+            self.send_emergency_brake_signal(True)
+            self.integral_error = 0.0
+            self.service_brake_active = False
+            self.send_service_brake(False)
+            self.add_to_status_log("EMERGENCY BRAKE ACTIVATED!")
+
+    def emergency_brake_release(self):
+        """Release emergency brake - only when stopped with no active failure"""
+        if self.current_speed_ms > 0.1 or self.failures:
+            return False
+        self.emergency_brake_active = False
+        self.send_emergency_brake_signal(False)
+        self.add_to_status_log("✓ Emergency brake released")
+        return True
+
+    def _send(self, command, value):
+        """Send one command about this train to the Train Model"""
+        if self.server is None:
+            return
+        try:
+            self.server.send_to_ui("Train Model", {
+                'command': command,
+                'value': value,
+                'train_id': self.train_id
+            })
+        except Exception as e:
+            print(f"[TRAIN {self.train_id}] Error sending {command}: {e}")
+
+    def send_setpoint_power(self, power_kw):
+        """Send setpoint power to Train Model (kW in, Watts out)"""
+        self._send("Power Command", float(power_kw * KW_TO_WATTS))
+
+    def send_service_brake(self, is_active):
+        self._send("Service Brake", bool(is_active))
+
+    def send_emergency_brake_signal(self, is_active):
+        self._send("Emergency Brake", bool(is_active))
+
+    def send_left_door_signal(self, is_open):
+        self._send("Left Door Signal", bool(is_open))
+
+    def send_right_door_signal(self, is_open):
+        self._send("Right Door Signal", bool(is_open))
+
+    def send_headlights(self, is_on):
+        self._send("Headlights", bool(is_on))
+
+    def send_cabin_lights(self, is_on):
+        self._send("Cabin Lights", bool(is_on))
+
+    def send_station_announcement(self, message):
+        self._send("Announcement", str(message))
+
+
+class ControllerEngine:
+    """
+    Hosts one TrainControllerCore per train in a single process and steps them
+    all together every tick, so controller cost grows with trains, not windows.
+
+    Messages are routed by their train_id. A train's controller is created the
+    first time it is heard from and dropped when the Train Model retires it.
+    A Driver UI window can be opened on any controller (open_view) and closed
+    again without affecting the others.
+    """
+
+    def __init__(self, server=None, default_line='GREEN', period=0.1, clock=None):
+        self.server = server
+        self.default_line = default_line
+        self.clock = clock if clock is not None else SimClock()  # shared by every controller
+        self.period = period  # seconds per tick (the Driver UI's 100 ms loop)
+        self.controllers = {}
+        self.running = False
+        self.root = None
+        self._lock = threading.RLock()
+
+    def add_train(self, train_id, selected_line=None):
+        """Create (or return) the controller of train_id"""
+        with self._lock:
+            core = self.controllers.get(train_id)
+            if core is not None:
+                return core
+            core = TrainControllerCore(train_id, (selected_line or self.default_line).upper(),
+                                       server=self.server, engine=self, clock=self.clock)
+            self.controllers[train_id] = core
+        # Hold the train until speed and authority arrive (as Main_Window does on start)
+        core.send_service_brake(True)
+        print(f"[ENGINE] Controller added for train {train_id} ({core.selected_line})")
+        return core
+
+    def remove_train(self, train_id):
+        """Drop the controller of a train that left service"""
+        with self._lock:
+            core = self.controllers.pop(train_id, None)
+        if core is not None and core.view is not None:
+            core.view.on_closing()
+        return core
+
+    def get(self, train_id):
+        return self.controllers.get(train_id)
+
+    def _process_message(self, message, source_ui_id):
+        """Route an incoming message to the controller (or view) of its train"""
+        command = message.get('command')
+        train_id = message.get('train_id')
+
+        if train_id is None:
+            if command in BROADCAST_COMMANDS:
+                # One clock for every controller; open windows also show it
+                if command == 'TIME':
+                    self.clock.set_time(message.get('value'))
+                else:
+                    self.clock.set_multiplier(message.get('value'))
+                for core in list(self.controllers.values()):
+                    if core.view is not None:
+                        core.view._process_message(message, source_ui_id)
+            return
+
+        if command == 'Train Retired':
+            self.remove_train(train_id)
+            return
+
+        core = self.controllers.get(train_id) or self.add_train(train_id, message.get('line'))
+        if core.view is not None:
+            core.view._process_message(message, source_ui_id)
+        else:
+            core.handle_message(message)
+
+    def step_all(self):
+        """
+        Tick every controller once. With BATCH_MIN_TRAINS or more trains the PI
+        loops run as one pi_power_batch call over all of them
+
+        Returns:
+            dict: {train_id: power command in kW}
+        """
+        with self._lock:
+            controllers = list(self.controllers.values())
+        if len(controllers) < BATCH_MIN_TRAINS:
+            return {core.train_id: core.tick() for core in controllers}
+
+        commanded = np.zeros(len(controllers))
+        for i, core in enumerate(controllers):
+            try:
+                commanded[i] = core.commanded_speed()
+            except Exception as e:
+                print(f"[TRAIN {core.train_id}] Error in power calculation: {e}")
+                commanded[i] = core.current_speed_ms  # no error, no power change
+
+        power, integral, prev = pi_power_batch(
+            commanded,
+            [core.current_speed_ms for core in controllers],
+            np.array([core.kp for core in controllers]),
+            np.array([core.ki for core in controllers]),
+            [core.max_power_kw for core in controllers],
+            [core.integral_error for core in controllers],
+            [core.prev_error for core in controllers],
+            [core.brake_engaged for core in controllers],
+            [core.commanded_authority for core in controllers])
+
+        powers = {}
+        for i, core in enumerate(controllers):
+            core.integral_error = float(integral[i])
+            core.prev_error = float(prev[i])
+            core.log_power(float(power[i]))
+            powers[core.train_id] = core.tick(float(power[i]))
+        return powers
+
+    def open_view(self, train_id, root):
+        """Open a Driver UI window on the controller of train_id"""
+        import tkinter as tk
+        from Driver_UI import Main_Window  # Tk is only loaded once a window is wanted
+
+        core = self.controllers.get(train_id) or self.add_train(train_id)
+        return Main_Window(tk.Toplevel(root), core.selected_line, controller=core)
+
+    def start(self, root=None):
+        """
+        Start ticking: on root's event loop when windows may be opened on the
+        controllers (Tk must only be touched from its own thread), otherwise
+        on a background thread
+        """
+        self.running = True
+        if root is not None:
+            self.root = root
+            self._tick_on_root()
+        else:
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def _tick_on_root(self):
+        if not self.running:
+            return
+        self.step_all()
+        self.root.after(int(self.period * 1000), self._tick_on_root)
+
+    def run(self):
+        """Tick every period until stop() (blocking)"""
+        self.running = True
+        next_tick = time.monotonic()
+        while self.running:
+            self.step_all()
+            next_tick += self.period
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def stop(self):
+        self.running = False
+
+
+def main(argv=None):
+    """python ControllerEngine.py [ui_id] [GREEN|RED] - run a headless controller pool"""
+    argv = sys.argv[1:] if argv is None else argv
+    ui_id = argv[0] if argv else "Train Controller Pool"
+    default_line = argv[1].upper() if len(argv) > 1 else 'GREEN'
+
+    from TrainSocketServer import TrainSocketServer  # repo root is on sys.path (see PositionTracker)
+
+    module_config = load_socket_config()
+    port = module_config.get(ui_id, {}).get("port", 12348)
+    train_model_port = module_config.get("Train Model", {}).get("port", 12345)
+
+    server = TrainSocketServer(port=port, ui_id=ui_id)
+    engine = ControllerEngine(server, default_line=default_line)
+    server.set_allowed_connections(["Train Model", "Track Model", "CTC"])
+    server.start_server(engine._process_message)
+    server.connect_to_ui('localhost', train_model_port, "Train Model")
+
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        engine.stop()
+        server.stop_server()
+
+
+if __name__ == "__main__":
+    main()
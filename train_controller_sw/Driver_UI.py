@@ -1,29 +1,3 @@
-import json          
-from pathlib import Path 
-
-def load_socket_config():
-    """Load socket configuration from config.json"""
-    config_path = Path("config.json")
-    config = {}  #  Initialize config first
-    
-    if config_path.exists():
-        try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"Error reading config.json: {e}")
-        except Exception as e:
-            print(f"Error loading config: {e}")
-    else:
-        print("Warning: config.json not found, using default configuration")
-    
-    return config.get("modules", {})
-
-METERS_PER_SEC_TO_MPH = 2.23694  # 1 m/s = 2.23694 mph
-MPH_TO_METERS_PER_SEC = 0.44704  # 1 mph = 0.44704 m/s
-KW_TO_WATTS = 1000  # 1 kW = 1000 W
-WATTS_TO_KW = 0.001  # 1 W = 0.001 kW
-
 import tkinter as tk
 from tkinter import ttk
 import math
@@ -46,472 +20,20 @@ import pygame
 import os, sys
 sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
 from TrainSocketServer import TrainSocketServer
-
-# GREEN LINE PRELOADED TRACK INFORMATION
-greenLineTrackInformation = {
-    'segments': [
-        # YARD to GLENBURY (initialization)
-        {
-            'from_station': 'YARD',
-            'to_station': 'GLENBURY',
-            'distance': 300.0,
-            'from_block': 63,
-            'to_block': 65,
-            'station_block_half_length': 100.0,
-            'speed_limit': 43.50
-        },
-        # Main loop segments
-        {
-            'from_station': 'GLENBURY',
-            'to_station': 'DORMONT',
-            'distance': 850.0,
-            'from_block': 65,
-            'to_block': 73,
-            'station_block_half_length': 50.0,
-            'speed_limit': 24.85
-        },
-        {
-            'from_station': 'DORMONT',
-            'to_station': 'MT LEBANON',
-            'distance': 550.0,
-            'from_block': 73,
-            'to_block': 77,
-            'station_block_half_length': 150.0,
-            'speed_limit': 43.50
-        },
-        {
-            'from_station': 'MT LEBANON',
-            'to_station': 'POPLAR',
-            'distance': 2936.6,
-            'from_block': 77,
-            'to_block': 88,
-            'station_block_half_length': 50.0,
-            'speed_limit': 15.53
-        },
-        {
-            'from_station': 'POPLAR',
-            'to_station': 'CASTLE SHANNON',
-            'distance': 662.5,
-            'from_block': 88,
-            'to_block': 96,
-            'station_block_half_length': 37.5,
-            'speed_limit': 15.53
-        },
-        {
-            'from_station': 'CASTLE SHANNON',
-            'to_station': 'DORMONT',
-            'distance': 740.0,
-            'from_block': 96,
-            'to_block': 105,
-            'station_block_half_length': 50.0,
-            'speed_limit': 24.85
-        },
-    ]
-}
-
-# RED LINE PRELOADED TRACK INFORMATION
-redLineTrackInformation = {
-    'segments': [
-        # YARD to SHADYSIDE (initialization)
-        {
-            'from_station': 'YARD',
-            'to_station': 'SHADYSIDE',
-            'distance': 75.0,
-            'from_block': 8,
-            'to_block': 7,
-            'station_block_half_length': 37.5,
-            'speed_limit': 24.85
-        },
-        {
-            'from_station': 'SHADYSIDE',
-            'to_station': 'HERRON AVE',
-            'distance': 362.5,
-            'from_block': 7,
-            'to_block': 16,
-            'station_block_half_length': 25.0,
-            'speed_limit': 24.85
-        },
-        {
-            'from_station': 'HERRON AVE',
-            'to_station': 'SWISSVILLE',
-            'distance': 1300.0,
-            'from_block': 16,
-            'to_block': 21,
-            'station_block_half_length': 50.0,
-            'speed_limit': 34.17
-        },
-        {
-            'from_station': 'SWISSVILLE',
-            'to_station': 'PENN STATION',
-            'distance': 325.0,
-            'from_block': 21,
-            'to_block': 25,
-            'station_block_half_length': 25.0,
-            'speed_limit': 43.50
-        },
-        {
-            'from_station': 'PENN STATION',
-            'to_station': 'STEEL PLAZA',
-            'distance': 520.0,
-            'from_block': 25,
-            'to_block': 35,
-            'station_block_half_length': 25.0,
-            'speed_limit': 43.50
-        },
-    ]
-}
-
-# Station door side mapping
-greenLineStationDoorSides = {
-    'PIONEER': 'left',
-    'EDGEBROOK': 'left',
-    'LLC PLAZA': 'both',
-    'WHITED': 'both',
-    'SOUTH BANK': 'left',
-    'CENTRAL': 'right',
-    'INGLEWOOD': 'right',
-    'OVERBROOK': 'right',
-    'GLENBURY': 'right',
-    'DORMONT': 'right',
-    'MT LEBANON': 'both',
-    'POPLAR': 'left',
-    'CASTLE SHANNON': 'left'
-}
-
-redLineStationDoorSides = {
-    'SHADYSIDE': 'both',
-    'HERRON AVE': 'both',
-    'SWISSVILLE': 'both',
-    'PENN STATION': 'both',
-    'STEEL PLAZA': 'both',
-    'FIRST AVE': 'both',
-    'STATION SQUARE': 'both',
-    'SOUTH HILLS JUNCTION': 'both'
-}
-
-# GREEN LINE underground blocks
-greenLineUndergroundBlocks = {36, 37, 38, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50, 51, 52, 
-                      53, 54, 55, 56, 57, 122, 123, 124, 125, 126, 127, 128, 129, 130, 
-                      131, 132, 133, 134, 135, 136, 137, 138, 139, 140, 142, 143}
-
-# RED LINE underground blocks
-redLineUndergroundBlocks = {24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46,
-                            67, 68, 69, 70, 71, 72, 73, 74, 75, 76}
-
-# Special case: INGLEWOOD at block 132 uses left door instead of right
-STATION_DOOR_EXCEPTIONS = {
-    132: 'left'  # INGLEWOOD at block 132 uses left door
-}
-
-# Position Tracking Module - Based on TC_HW Working Implementation
-# This should replace the PositionTracker class in Driver_UI.py
-
-class PositionTracker:
-    """Track train position along the route - TC_HW style implementation"""
-    def __init__(self, track_info, station_door_sides, selected_line):
-        self.track_info = track_info
-        self.station_door_sides = station_door_sides
-        self.selected_line = selected_line
-        
-        # Set underground blocks based on selected line
-        if selected_line == 'GREEN':
-            self.underground_blocks = greenLineUndergroundBlocks
-        else:  # RED
-            self.underground_blocks = redLineUndergroundBlocks
-        
-        self.current_segment_index = 0
-        self.distance_traveled_in_segment = 0.0
-        self.distance_to_next_station = 0.0
-        self.last_update_time = None
-        self.current_block = 63 if selected_line == 'GREEN' else 8
-        self.is_at_station = False
-        self.station_dwell_start_time = None
-        
-        # Track underground state
-        self.is_underground = self.current_block in self.underground_blocks
-        self.last_underground_state = self.is_underground
-        
-        # Constants - MATCHING TC_HW
-        self.DECELERATION_DISTANCE = 200.0  # meters
-        self.STATION_STOP_THRESHOLD = 5.0   # meters
-        self.STATION_DWELL_TIME = 30.0      # seconds
-        self.TIME_SCALE = 10.0  # 10x faster simulation
-        
-        # Door safety
-        self.doors_open_at_station = False
-        self.doors_locked = False
-        
-        # Initialize distance to next station
-        if len(self.track_info['segments']) > 0:
-            self.distance_to_next_station = self.track_info['segments'][0]['distance']
-        
-    def update(self, current_speed_ms, ui_callback=None):
-        """
-        Update position based on velocity and time - TC_HW STYLE
-        
-        Key differences from old implementation:
-        1. Simple station detection (no complex arrival logic)
-        2. Early return when at station
-        3. Direct brake control integration
-        """
-        current_time = time.time()
-        
-        # Initialize timing on first call
-        if self.last_update_time is None:
-            self.last_update_time = current_time
-            return
-        
-        # Calculate time elapsed since last update
-        dt = current_time - self.last_update_time
-        self.last_update_time = current_time
-        
-        # Apply time acceleration
-        dt = dt * self.TIME_SCALE
-        
-        # Check and update underground status
-        self._update_underground_status(ui_callback)
-        
-        # Door safety: Lock doors when train is moving
-        if current_speed_ms > 1.0 and not self.doors_locked:
-            self.doors_locked = True
-            if ui_callback and hasattr(ui_callback, 'lock_doors'):
-                ui_callback.lock_doors()
-        
-        # ===== AT STATION LOGIC (TC_HW STYLE) =====
-        if self.is_at_station:
-            # Check if dwell time is complete
-            if self.station_dwell_start_time is not None:
-                dwell_elapsed = current_time - self.station_dwell_start_time
-                
-                # Display remaining dwell time
-                if not hasattr(self, '_last_dwell_print'):
-                    self._last_dwell_print = 0
-                self._last_dwell_print += 1
-                
-                if self._last_dwell_print % 10 == 0:
-                    remaining = max(0, self.STATION_DWELL_TIME - dwell_elapsed)
-                    if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
-                        ui_callback.add_to_status_log(f"Station dwell: {int(remaining)}s remaining")
-                    self._last_dwell_print = 0
-                
-                if dwell_elapsed >= self.STATION_DWELL_TIME:
-                    station_name = self.get_current_station_name()
-                    print(f"[POSITION] Dwell complete at {station_name}, departing")
-                    
-                    # CRITICAL: RELEASE SERVICE BRAKE BEFORE DEPARTURE (TC_HW style)
-                    if ui_callback:
-                        ui_callback.service_brake_active = False
-                        ui_callback.send_service_brake(False)
-                        print(f" Service brake RELEASED for departure from {station_name}")
-                    
-                    # CLOSE DOORS before departure
-                    if ui_callback:
-                        if hasattr(ui_callback, 'send_left_door_signal'):
-                            ui_callback.send_left_door_signal(False)
-                            if hasattr(ui_callback, 'left_door_btn') and ui_callback.left_door_btn.is_on:
-                                ui_callback.left_door_btn.toggle()
-                        if hasattr(ui_callback, 'send_right_door_signal'):
-                            ui_callback.send_right_door_signal(False)
-                            if hasattr(ui_callback, 'right_door_btn') and ui_callback.right_door_btn.is_on:
-                                ui_callback.right_door_btn.toggle()
-                        if hasattr(ui_callback, 'add_to_status_log'):
-                            ui_callback.add_to_status_log("Doors closing - preparing to depart")
-                    
-                    # Move to next segment
-                    self.current_segment_index += 1
-                    if self.current_segment_index >= len(self.track_info['segments']):
-                        self.current_segment_index = 1  # Loop back to main route
-                    
-                    # Reset for next segment
-                    self.distance_traveled_in_segment = 0.0
-                    self.distance_to_next_station = self.track_info['segments'][self.current_segment_index]['distance']
-                    self.is_at_station = False
-                    self.station_dwell_start_time = None
-                    self.doors_open_at_station = False
-                    self.doors_locked = False
-                    
-                    if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
-                        next_station = self.get_next_station_name()
-                        ui_callback.add_to_status_log(f"Departing for {next_station}")
-                        print(f"[POSITION] Next destination: {next_station}")
-                        
-                        # Send announcement to Train Model for passengers
-                        if hasattr(ui_callback, 'server') and ui_callback.server:
-                            try:
-                                ui_callback.server.send_to_ui("Train Model", {
-                                    'command': 'Announcement',
-                                    'value': f"Departing for {next_station}",
-                                    'train_id': 2
-                                })
-                                print(f"[ANNOUNCEMENT] Sent to Train Model: Departing for {next_station}")
-                            except Exception as e:
-                                print(f"[ANNOUNCEMENT] Error sending to Train Model: {e}")
-            
-            return  # CRITICAL: Early return while at station
-        
-        # ===== MOVING - UPDATE POSITION =====
-        # Calculate displacement: distance = velocity × time
-        displacement = current_speed_ms * dt
-        
-        # Update position tracking
-        self.distance_traveled_in_segment += displacement
-        self.distance_to_next_station = self.track_info['segments'][self.current_segment_index]['distance'] - self.distance_traveled_in_segment
-        
-        # ===== CHECK FOR STATION ARRIVAL (SIMPLE) =====
-        if self.distance_to_next_station <= self.STATION_STOP_THRESHOLD:
-            self.is_at_station = True
-            self.station_dwell_start_time = current_time
-            self.distance_to_next_station = 0.0
-            current_station = self.track_info['segments'][self.current_segment_index]['to_station']
-            
-            print(f"[POSITION] *** ARRIVED AT {current_station} ***")
-            
-            if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
-                ui_callback.add_to_status_log(f"*** ARRIVED AT {current_station} ***")
-                
-                # Send announcement to Train Model for passengers
-                if hasattr(ui_callback, 'server') and ui_callback.server:
-                    try:
-                        ui_callback.server.send_to_ui("Train Model", {
-                            'command': 'Announcement',
-                            'value': f"Arrived at {current_station}",
-                            'train_id': 2
-                        })
-                        print(f"[ANNOUNCEMENT] Sent to Train Model: Arrived at {current_station}")
-                    except Exception as e:
-                        print(f"[ANNOUNCEMENT] Error sending to Train Model: {e}")
-            
-            # Open appropriate doors at station
-            self._open_station_doors(ui_callback)
-        
-        # Update current block
-        self._update_current_block()
-    
-    def _update_underground_status(self, ui_callback):
-        """Update underground status and control lights"""
-        new_underground = self.current_block in self.underground_blocks
-        
-        if new_underground != self.last_underground_state:
-            self.is_underground = new_underground
-            
-            if ui_callback:
-                if new_underground:
-                    # Turn lights ON
-                    if hasattr(ui_callback, 'send_headlights'):
-                        ui_callback.send_headlights(True)
-                    if hasattr(ui_callback, 'send_cabin_lights'):
-                        ui_callback.send_cabin_lights(True)
-                    
-                    # Update UI buttons to show lights are ON
-                    if hasattr(ui_callback, 'headlights_btn') and not ui_callback.headlights_btn.is_on:
-                        ui_callback.headlights_btn.toggle()
-                    if hasattr(ui_callback, 'cabin_lights_btn') and not ui_callback.cabin_lights_btn.is_on:
-                        ui_callback.cabin_lights_btn.toggle()
-                    
-                    if hasattr(ui_callback, 'add_to_status_log'):
-                        ui_callback.add_to_status_log(f"Entering underground tunnel (Block {self.current_block}) - Lights ON")
-                else:
-                    # Turn lights OFF
-                    if hasattr(ui_callback, 'send_headlights'):
-                        ui_callback.send_headlights(False)
-                    if hasattr(ui_callback, 'send_cabin_lights'):
-                        ui_callback.send_cabin_lights(False)
-                    
-                    # Update UI buttons to show lights are OFF
-                    if hasattr(ui_callback, 'headlights_btn') and ui_callback.headlights_btn.is_on:
-                        ui_callback.headlights_btn.toggle()
-                    if hasattr(ui_callback, 'cabin_lights_btn') and ui_callback.cabin_lights_btn.is_on:
-                        ui_callback.cabin_lights_btn.toggle()
-                    
-                    if hasattr(ui_callback, 'add_to_status_log'):
-                        ui_callback.add_to_status_log(f"Exiting tunnel (Block {self.current_block}) - Lights OFF")
-            
-            self.last_underground_state = new_underground
-    
-    def _open_station_doors(self, ui_callback):
-        """Open appropriate doors at station"""
-        if not ui_callback:
-            return
-        
-        station_name = self.get_current_station_name()
-        
-        # Check for block-specific exceptions first
-        door_side = STATION_DOOR_EXCEPTIONS.get(self.current_block)
-        if not door_side:
-            door_side = self.station_door_sides.get(station_name, 'both')
-        
-        self.doors_open_at_station = True
-        
-        if hasattr(ui_callback, 'add_to_status_log'):
-            ui_callback.add_to_status_log(f"[DOOR] Station {station_name}: {door_side} door(s)")
-        
-        # Open appropriate doors
-        if door_side == 'left' or door_side == 'both':
-            if hasattr(ui_callback, 'send_left_door_signal'):
-                ui_callback.send_left_door_signal(True)
-            if hasattr(ui_callback, 'left_door_btn'):
-                if not ui_callback.left_door_btn.is_on:
-                    ui_callback.left_door_btn.toggle()
-        
-        if door_side == 'right' or door_side == 'both':
-            if hasattr(ui_callback, 'send_right_door_signal'):
-                ui_callback.send_right_door_signal(True)
-            if hasattr(ui_callback, 'right_door_btn'):
-                if not ui_callback.right_door_btn.is_on:
-                    ui_callback.right_door_btn.toggle()
-    
-    def _update_current_block(self):
-        """Update current block based on position"""
-        if self.current_segment_index >= len(self.track_info['segments']):
-            return
-        
-        segment = self.track_info['segments'][self.current_segment_index]
-        from_block = segment['from_block']
-        to_block = segment['to_block']
-        total_distance = segment['distance']
-        
-        if total_distance > 0:
-            progress = min(1.0, self.distance_traveled_in_segment / total_distance)
-            
-            # Simple linear interpolation
-            if to_block > from_block:
-                blocks_span = to_block - from_block
-                self.current_block = from_block + int(progress * blocks_span)
-            else:
-                self.current_block = from_block
-    
-    def get_distance_to_next_station(self):
-        """Get distance remaining to next station in meters"""
-        return self.distance_to_next_station
-    
-    def get_next_station_name(self):
-        """Get name of next station"""
-        if self.current_segment_index < len(self.track_info['segments']):
-            return self.track_info['segments'][self.current_segment_index]['to_station']
-        return "YARD"
-    
-    def get_current_station_name(self):
-        """Get name of current station"""
-        if self.current_segment_index < len(self.track_info['segments']):
-            return self.track_info['segments'][self.current_segment_index]['to_station']
-        return "YARD"
-    
-    def should_decelerate_for_station(self):
-        """Check if train should start decelerating for station"""
-        return self.distance_to_next_station <= self.DECELERATION_DISTANCE and not self.is_at_station
-    
-    def get_current_speed_limit(self):
-        """Get speed limit for current segment in MPH"""
-        if self.current_segment_index < len(self.track_info['segments']):
-            return self.track_info['segments'][self.current_segment_index]['speed_limit']
-        return 43.50  # Default
-
-
+from ControllerEngine import (TrainControllerCore, CONTROLLER_FIELDS, load_socket_config,
+                              METERS_PER_SEC_TO_MPH, MPH_TO_METERS_PER_SEC)
 
 class Main_Window:
-    def __init__(self, root, selected_line):
+    """
+    Driver UI for one train. The controller state and PI loop live on a
+    TrainControllerCore (self.controller); the window is a view over it. Built
+    without a controller it runs standalone with its own core and socket server,
+    given one (ControllerEngine.open_view) it shows that train of the engine.
+    """
+    def __init__(self, root, selected_line, controller=None):
         self.root = root
         self.selected_line = selected_line
+        self.controller = controller if controller is not None else TrainControllerCore(2, selected_line)
         self.root.title("Train Controller - Monitor Display")
         #add zoomed command to make screen fit 
         #self.root.attributes('-zoomed', True)  # On macOS/Linux
@@ -531,26 +53,26 @@ class Main_Window:
         # Select line at startup
         
         
-        # Initialize position tracker based on selected line
-        if self.selected_line == 'GREEN':
-            self.position_tracker = PositionTracker(greenLineTrackInformation, greenLineStationDoorSides, selected_line)
-            self.current_block = 63
-        else:  # RED
-            self.position_tracker = PositionTracker(redLineTrackInformation, redLineStationDoorSides, selected_line)
-            self.current_block = 8
+        # Position tracker is the controller's (self.position_tracker reads through)
+        self.current_block = self.position_tracker.current_block
 
-        # Socket server setup
-        #added socket server 
-        module_config = load_socket_config()
-        train_model_config = module_config.get("Train SW", {"port": 12346})
-        self.server = TrainSocketServer(port=train_model_config["port"], ui_id="Train SW")
-        
-        self.server.set_allowed_connections(["Train Model", "Track Model", "Train HW", "CTC"])
-        self.server.start_server(self._process_message)
-        self.server.connect_to_ui('localhost', 12345, "Train Model")
-        self.server.connect_to_ui('localhost', 12344, "Track Model")
-        self.server.connect_to_ui('localhost', 12347, "Train HW")
-        self.server.connect_to_ui('localhost', 12341, "CTC")
+        if self.controller.engine is not None:
+            # View on an engine-hosted controller: the engine's server carries its messages
+            self.server = self.controller.server
+        else:
+            # Socket server setup
+            #added socket server 
+            module_config = load_socket_config()
+            train_model_config = module_config.get("Train SW", {"port": 12346})
+            self.server = TrainSocketServer(port=train_model_config["port"], ui_id="Train SW")
+            self.controller.server = self.server
+            
+            self.server.set_allowed_connections(["Train Model", "Track Model", "Train HW", "CTC"])
+            self.server.start_server(self._process_message)
+            self.server.connect_to_ui('localhost', 12345, "Train Model")
+            self.server.connect_to_ui('localhost', 12344, "Track Model")
+            self.server.connect_to_ui('localhost', 12347, "Train HW")
+            self.server.connect_to_ui('localhost', 12341, "CTC")
         
         main_container = tk.Frame(self.root, bg="white", relief=tk.RAISED, bd=5)
         main_container.place(relx=0.02, rely=0.08, relwidth=0.96, relheight=0.9)
@@ -877,60 +399,29 @@ class Main_Window:
                                 command=self.toggle_engineer_ui)
         engineer_btn.place(relx=0.72, rely=0.015, relwidth=0.1, relheight=0.045)
 
-        # In the __init__ method of Main_Window class, add these flags:
-        self.has_received_commanded_speed = False
-        self.has_received_authority = False
-        self.initial_service_brake_applied = True  # Track initial service brake
-
-         # State variables
-        self.current_speed = 0  # Will be in mph (converted from m/s for display)
-        self.current_speed_ms = 0  # Store original m/s value for calculations
-        self.commanded_speed_ms = 0  # Store commanded speed in m/s for calculations
-        self.commanded_speed_mph = 0
+         # State variables (display and driver inputs; controller state is on self.controller)
+        self.current_speed = self.current_speed_ms * METERS_PER_SEC_TO_MPH  # mph for display
         self.display_commanded_speed_mph = 0  # Raw commanded speed (before authority adjustment)
         self.set_speed = 45
         self.set_temp = 70
-        self.is_auto_mode = True
-        self.service_brake_active = True
-        self.root.after(2000, lambda: self.send_service_brake(True))  # Send after 2 seconds
+        if self.controller.engine is None:
+            self.root.after(2000, lambda: self.send_service_brake(True))  # Send after 2 seconds
 
-        self.emergency_brake_active = False
-        self.door_safety_lock = False
         self.emergency_brake_auto_triggered = False
-        self.commanded_authority = 0
-
-
-        self.has_control_authority = False  # ←  Don't send power until we have authority
-        
-        # PID Control Parameters
-        self.kp = 10.0  # Default proportional gain (will be updated from Engineer UI)
-        self.ki = 2.0   # Default integral gain (will be updated from Engineer UI)
-        self.max_power_kw = 120.0  # Maximum power in kW
-        self.integral_error = 0.0  # For PI calculation (in m/s)
-        self.prev_error = 0.0  # Previous error for trapezoidal integration (TC_HW style)
         self.sample_time = 0.1  # 100ms update rate
-        self.last_power_sent = None  # Track last power to avoid duplicates
 
         # Track previous commanded speed for speed reduction detection
         self.previous_commanded_speed_ms = 0.0
         
         # Time multiplier for simulation speed (1x or 10x)
         self.time_multiplier = 1  # Default to normal speed
-        
-        # HW-STYLE POWER CALCULATION VARIABLES
-        self._integral_error = 0.0
-        self._prev_error = 0.0
-        self._speed_reduction_brake_time = 0.0
-        self._last_brake_check_time = time.time()
-        self._previous_commanded_speed_mph = 0.0
-        
-        # Track speed limit variables
-        self.track_speed_limit_mph = 0.0  # Raw speed limit from track (before authority adjustment)
-        self.manual_setpoint_speed = 0.0  # Manual mode setpoint in MPH
 
         #create engineer UI
         self.engineer_ui = EngineerUI(self, callback=self._onPIDParametersApplied)
         
+        self.controller.attach_view(self)
+        if self.controller.engine is not None:
+            self.show_controller_state()
         self.update_displays()
         # Test Panel
         #self.test_panel = TestPanel(self.root, self)
@@ -1114,6 +605,9 @@ class Main_Window:
             elif command == 'TIME':
                 time_str = str(value)
                 
+                # Simulation clock that drives position tracking
+                self.controller.clock.set_time(time_str)
+                
                 # Update ClockDisplay widget
                 if hasattr(self, 'clock') and self.clock:
                     self.clock.set_time(time_str)
@@ -1125,16 +619,16 @@ class Main_Window:
                 # Note: We don't log every time update to avoid console spam
             
             # ========== MULT (TIME MULTIPLIER) ==========
-            # Receives speed multiplier from CTC (1x or 10x)
+            # Receives speed multiplier from CTC (1x, 10x, 50x, ...)
             # This controls how fast the simulation runs
             # Updates: position_tracker.TIME_SCALE and clock.speed_multiplier
             elif command == "MULT":
                 try:
-                    multiplier = int(value)
+                    multiplier = float(value)
                     
-                    # Validate multiplier is 1 or 10
-                    if multiplier not in [1, 10]:
-                        print(f"[MULT] Invalid value: {multiplier} (must be 1 or 10)")
+                    # Any positive multiplier
+                    if multiplier <= 0:
+                        print(f"[MULT] Invalid value: {multiplier} (must be positive)")
                         self.add_to_status_log(f"Invalid MULT value: {multiplier}")
                     else:
                         # Call set_speed_mult to update position tracker and clock
@@ -1142,12 +636,18 @@ class Main_Window:
                         print(f"[MULT] Received and processed: {multiplier}x speed")
                         
                 except ValueError as e:
-                    print(f"[MULT] ValueError: {value} is not a valid integer - {e}")
+                    print(f"[MULT] ValueError: {value} is not a valid number - {e}")
                     self.add_to_status_log(f"Invalid MULT format: {value}")
                 except Exception as e:
                     print(f"[MULT] Error processing MULT command: {e}")
                     self.add_to_status_log(f"Error processing MULT: {str(e)}")
             
+            # ========== BLOCK ENTRY (POSITION RESYNC) ==========
+            # Track Model block occupancy, forwarded by the Train Model
+            elif command == "Current Block":
+                self.position_tracker.resync(int(value))
+                self.current_block = self.position_tracker.current_block
+            
             else:
                 print(f"Unknown command: {command}")
                 
@@ -1215,155 +715,11 @@ class Main_Window:
         """
         Calculate power using PI controller - COMPLETE HW STYLE
         
-        Critical order:
-        1. Update position tracking FIRST
-        2. Determine commanded speed (manual vs auto, station logic)
-        3. Handle service brake for speed reductions  
-        4. Calculate PI controller output
-        5. Override power if brakes active or authority zero
+        Runs the controller's step (TrainControllerCore.step): position
+        tracking, station logic, speed-reduction brake, PI output and the
+        brake/authority overrides, with this window receiving its commands.
         """
-        # Conversion constants
-        MPH_TO_MS = 0.44704
-        MS_TO_MPH = 2.23694
-        
-        # ===== STEP 1: UPDATE POSITION TRACKING =====
-        if hasattr(self, 'position_tracker'):
-            self.position_tracker.update(self.current_speed_ms, self)
-        
-        # Get current speed
-        current_speed_ms = self.current_speed_ms
-        current_speed_mph = current_speed_ms * MS_TO_MPH
-        
-        # ===== STEP 2: DETERMINE COMMANDED SPEED =====
-        if not self.is_auto_mode:
-            # MANUAL MODE
-            commanded_speed_mph = self.manual_setpoint_speed if hasattr(self, 'manual_setpoint_speed') else float(self.set_speed)
-            
-            # Manual mode speed limit enforcement (unless authority=4)
-            if self.commanded_authority != 4 and self.track_speed_limit_mph > 0:
-                if commanded_speed_mph > self.track_speed_limit_mph:
-                    commanded_speed_mph = self.track_speed_limit_mph
-                    print(f"[MANUAL] Speed limited to {self.track_speed_limit_mph:.1f} MPH")
-            
-            commanded_speed_ms = commanded_speed_mph * MPH_TO_MS
-        else:
-            # AUTOMATIC MODE
-            commanded_speed_mph = self.commanded_speed_mph
-            commanded_speed_ms = commanded_speed_mph * MPH_TO_MS
-            
-            # STATION LOGIC (auto mode only)
-            if not self.emergency_brake_active:
-                if hasattr(self, 'position_tracker') and self.position_tracker.is_at_station:
-                    # FORCE STOP AT STATION
-                    commanded_speed_ms = 0.0
-                    commanded_speed_mph = 0.0
-                    
-                    # Ensure service brake active
-                    if not self.service_brake_active:
-                        self.service_brake_active = True
-                        self.send_service_brake(True)
-                        station = self.position_tracker.get_current_station_name()
-                        print(f"[STATION] Service brake ENGAGED at {station}")
-                        self.add_to_status_log(f"Holding at {station}")
-                    
-                    # Unlock doors when stopped
-                    self.unlock_doors()
-                        
-                elif hasattr(self, 'position_tracker') and self.position_tracker.should_decelerate_for_station():
-                    # DECELERATION PROFILE
-                    dist_to_station = self.position_tracker.get_distance_to_next_station()
-                    DECEL_RATE = 1.0  # m/s²
-                    
-                    if dist_to_station > 0:
-                        target_speed = (2 * DECEL_RATE * dist_to_station) ** 0.5
-                        commanded_speed_ms = min(commanded_speed_ms, target_speed)
-                        commanded_speed_mph = commanded_speed_ms * MS_TO_MPH
-                    else:
-                        commanded_speed_ms = 0.0
-                        commanded_speed_mph = 0.0
-        
-        # ===== STEP 3: SPEED REDUCTION DETECTION =====
-        SPEED_REDUCTION_THRESHOLD = 5.0  # MPH
-        SERVICE_BRAKE_DURATION = 0.5  # seconds
-        
-        current_time = time.time()
-        dt_check = current_time - self._last_brake_check_time
-        self._last_brake_check_time = current_time
-        
-        # Detect significant speed reduction in auto mode
-        if self.is_auto_mode and not self.emergency_brake_active:
-            if hasattr(self, 'position_tracker') and not self.position_tracker.is_at_station:
-                speed_reduction = self._previous_commanded_speed_mph - commanded_speed_mph
-                
-                if speed_reduction > SPEED_REDUCTION_THRESHOLD and current_speed_mph > commanded_speed_mph + 3.0:
-                    if self._speed_reduction_brake_time <= 0:
-                        self._speed_reduction_brake_time = SERVICE_BRAKE_DURATION
-                        print(f"⚠️  Speed drop {self._previous_commanded_speed_mph:.1f}→{commanded_speed_mph:.1f} MPH - Service brake")
-                        self.service_brake_active = True
-                        self.send_service_brake(True)
-        
-        # Count down brake timer
-        if self._speed_reduction_brake_time > 0:
-            self._speed_reduction_brake_time -= dt_check
-            if self._speed_reduction_brake_time <= 0:
-                self._speed_reduction_brake_time = 0.0
-                if hasattr(self, 'position_tracker') and not self.position_tracker.is_at_station:
-                    self.service_brake_active = False
-                    self.send_service_brake(False)
-                    print(f"🟢 Service brake released")
-        
-        self._previous_commanded_speed_mph = commanded_speed_mph
-        
-        # ===== STEP 4: PI CONTROLLER =====
-        velocity_error = commanded_speed_ms - current_speed_ms
-        
-        # Get gains
-        kp = self.kp if hasattr(self, 'kp') else 10.0
-        ki = self.ki if hasattr(self, 'ki') else 2.0
-        max_power = self.max_power_kw if hasattr(self, 'max_power_kw') else 120.0
-        sample_time = 0.1  # seconds
-        
-        # Initialize if needed
-        if not hasattr(self, 'integral_error'):
-            self.integral_error = 0.0
-        if not hasattr(self, 'prev_error'):
-            self.prev_error = 0.0
-        
-        # P term
-        p_term = kp * velocity_error
-        power_without_integral = p_term
-        
-        # Anti-windup: only integrate if not saturated
-        if power_without_integral < max_power:
-            # Trapezoidal integration
-            self.integral_error += (sample_time / 2.0) * (velocity_error + self.prev_error)
-        
-        self.prev_error = velocity_error
-        
-        # PI output
-        i_term = ki * self.integral_error
-        power = p_term + i_term
-        
-        # Clamp
-        power = max(0.0, min(max_power, power))
-        
-        # ===== STEP 5: BRAKE AND AUTHORITY OVERRIDES =====
-        if self.service_brake_active or self.emergency_brake_active:
-            power = 0.0
-        
-        if self.commanded_authority == 0:
-            power = 0.0
-        
-        # Debug output
-        if not hasattr(self, '_power_debug_counter'):
-            self._power_debug_counter = 0
-        self._power_debug_counter += 1
-        if self._power_debug_counter % 10 == 0:
-            print(f"[POWER] Cmd={commanded_speed_mph:.1f}mph, Curr={current_speed_mph:.1f}mph, "
-                  f"Err={velocity_error:.2f}m/s, Power={power:.1f}kW, "
-                  f"Brake={'ON' if self.service_brake_active else 'OFF'}")
-        
-        return power
+        return self.controller.step()
 
     def on_closing(self):
         """Handle application closing"""
@@ -1373,6 +729,12 @@ class Main_Window:
         if hasattr(self, 'engineer_ui'):
             self.engineer_ui.window.destroy()
         
+        if self.controller.engine is not None:
+            # Only the view closes - the engine keeps driving the train headless
+            self.controller.detach_view()
+            self.root.destroy()
+            return
+        
         # Close server
         self.server.running = False
         if self.server.server_socket:
@@ -1395,16 +757,31 @@ class Main_Window:
         self.status_log.see(tk.END)
         self.status_log.config(state=tk.DISABLED)
     
+    def show_controller_state(self):
+        """Fill the displays from the controller (window opened on a train already running)"""
+        self.set_current_speed(self.current_speed_ms * METERS_PER_SEC_TO_MPH)
+        self.set_authority(self.commanded_authority)
+        self.set_commanded_speed(round(self.commanded_speed_mph, 1))
+        if self.emergency_brake_active:
+            self.emergency_light.activate()
+        
+        # Replay what happened while the train ran headless
+        self.status_log.config(state=tk.NORMAL)
+        for line in self.controller.status_log:
+            self.status_log.insert(tk.END, f"{line}\n")
+        self.status_log.see(tk.END)
+        self.status_log.config(state=tk.DISABLED)
+    
     def set_speed_mult(self, multiplier):
         """
         Set the speed multiplier for the entire system
         Updates position tracker and clock display
         
         Args:
-            multiplier (int): Speed multiplier (1 or 10)
+            multiplier (float): Speed multiplier (any positive value)
         """
-        if multiplier not in [1, 10]:
-            print(f"[SPEED MULT] Invalid multiplier: {multiplier} (must be 1 or 10)")
+        if multiplier <= 0:
+            print(f"[SPEED MULT] Invalid multiplier: {multiplier} (must be positive)")
             return
         
         print(f"[SPEED MULT] Setting speed multiplier to {multiplier}x")
@@ -1412,10 +789,9 @@ class Main_Window:
         # Update time multiplier
         self.time_multiplier = multiplier
         
-        # Update position tracker TIME_SCALE
-        if hasattr(self, 'position_tracker') and self.position_tracker:
-            self.position_tracker.TIME_SCALE = float(multiplier)
-            print(f"[SPEED MULT] Position tracker TIME_SCALE updated to {multiplier}")
+        # Update the simulation clock (position tracker TIME_SCALE reads it)
+        self.controller.clock.set_multiplier(multiplier)
+        print(f"[SPEED MULT] Simulation clock multiplier updated to {multiplier}")
         
         # Update ClockDisplay - try each possible interface once
         if hasattr(self, 'clock') and self.clock:
@@ -1523,38 +899,17 @@ class Main_Window:
         Update all displays - TC_HW STYLE
         
         CRITICAL: Always calculate power, check brakes when SENDING
-        Position tracking happens INSIDE calculate_power_command()
+        Position tracking happens INSIDE the controller's tick()
         """
         
-        # ALWAYS calculate power (even when brake is on)
-        try:
-            power_kw = self.calculate_power_command()
-            power_watts = power_kw * 1000
-            
-            # BRAKE CHECK WHEN SENDING (TC_HW style)
-            if self.service_brake_active or self.emergency_brake_active:
-                # Brake active - send zero power
-                if self.last_power_sent != 0:
-                    self.send_setpoint_power(0.0)
-                    self.last_power_sent = 0
-                    print(f"Brake active - power command set to ZERO")
-            else:
-                # No brake - ALWAYS send power (don't throttle by 100W)
-                # This ensures authority/speed changes update immediately
-                self.send_setpoint_power(power_kw)
-                self.last_power_sent = power_watts
-        except Exception as e:
-            print(f"Error in power calculation: {e}")
+        # Standalone window: tick its own controller (calculates and sends power,
+        # door safety). Engine-hosted controllers are ticked by the engine.
+        if self.controller.engine is None:
+            self.controller.tick()
         
         # Update E-brake release button state
         self.update_ebrake_release_state()
         
-        # Update door safety based on speed
-        if self.current_speed_ms > 1.0 and not self.door_safety_lock:
-            self.lock_doors()
-        elif self.current_speed_ms < 0.1 and self.door_safety_lock and self.position_tracker.is_at_station:
-            self.unlock_doors()
-        
         # Schedule next update
         self.root.after(100, self.update_displays)
     
@@ -1938,7 +1293,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Power Command",
                 'value': power_watts,
-                'train_id' : 2
+                'train_id': self.train_id
             })
         except Exception as e:
             print(f"ERROR sending power: {e}")
@@ -1955,7 +1310,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Emergency Brake",
                 'value': bool(is_active), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent emergency brake signal: {is_active}")
         except Exception as e:
@@ -1972,7 +1327,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Headlights",
                 'value': bool(is_on), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent headlights: {is_on}")
         except Exception as e:
@@ -1989,7 +1344,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Cabin Lights",
                 'value': bool(is_on), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent cabin lights: {is_on}")
         except Exception as e:
@@ -2006,7 +1361,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Left Door Signal",
                 'value': bool(is_open), 
-                "train_id": 2
+                'train_id': self.train_id
             })
             print(f"Sent left door signal: {is_open}")
         except Exception as e:
@@ -2023,7 +1378,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Right Door Signal",
                 'value': bool(is_open), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent right door signal: {is_open}")
         except Exception as e:
@@ -2041,7 +1396,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Temp",
                 'value': float(temp_fahrenheit), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent temperature setpoint: {temp_fahrenheit}°F")
         except Exception as e:
@@ -2058,7 +1413,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Drivetrain Mode",
                 'value': bool(is_auto), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent drivetrain mode: {'auto' if is_auto else 'manual'}")
         except Exception as e:
@@ -2078,7 +1433,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Service Brake",
                 'value': bool(is_active), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             status = "ACTIVE" if is_active else "RELEASED"
             print(f"[SENT] Service Brake: {status} (value={is_active})")
@@ -2096,7 +1451,7 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Announcement",
                 'value': str(message), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent station announcement: {message}")
         except Exception as e:
@@ -2113,13 +1468,22 @@ class Main_Window:
             self.server.send_to_ui("Train Model", {
                 'command': "Train Horn",
                 'value': bool(is_active), 
-                'train_id' : 2
+                'train_id': self.train_id
             })
             print(f"Sent train horn: {is_active}")
         except Exception as e:
             print(f"Error sending train horn: {e}")
 
 
+def _controller_field(name):
+    """Main_Window attribute stored on its TrainControllerCore"""
+    return property(lambda self: getattr(self.controller, name),
+                    lambda self, value: setattr(self.controller, name, value))
+
+for _field in CONTROLLER_FIELDS:
+    setattr(Main_Window, _field, _controller_field(_field))
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     root.withdraw()  # Hide main window until line is selected
@@ -0,0 +1,143 @@
+"""
+PI speed controller maths, for one train (pi_power) or for every train at
+once (pi_power_batch). Both follow the control law used by the Driver UI and
+the HW controller:
+
+    e_k   = v_cmd - v                                  (m/s)
+    u_k   = u_{k-1} + (T/2)(e_k + e_{k-1})   only while Kp*e_k < P_max
+    P_cmd = clamp(Kp*e_k + Ki*u_k, 0, P_max)           (kW)
+
+and P_cmd is forced to 0 while a brake is on or the authority is 0.
+
+Run this file to benchmark the batched kernel against the scalar loop:
+    python PIKernel.py [trains] [ticks]
+"""
+import sys
+import time
+
+import numpy as np
+
+SAMPLE_TIME = 0.1  # seconds (100 ms control period)
+
+
+def pi_power(commanded_speed_ms, current_speed_ms, kp, ki, max_power,
+             integral_error, prev_error, brake_active=False, authority=1,
+             sample_time=SAMPLE_TIME):
+    """
+    One PI step for one train
+
+    Returns:
+        tuple: (power_kw, integral_error, prev_error) - the last two are the
+        controller state to keep for the next step
+    """
+    velocity_error = commanded_speed_ms - current_speed_ms
+
+    # P term
+    p_term = kp * velocity_error
+
+    # Anti-windup: only integrate if not saturated
+    if p_term < max_power:
+        # Trapezoidal integration
+        integral_error += (sample_time / 2.0) * (velocity_error + prev_error)
+
+    # PI output, clamped
+    power = p_term + ki * integral_error
+    power = max(0.0, min(max_power, power))
+
+    # Brake and authority overrides
+    if brake_active or authority == 0:
+        power = 0.0
+
+    return power, integral_error, velocity_error
+
+
+def pi_power_batch(commanded_speed_ms, current_speed_ms, kp, ki, max_power,
+                   integral_error, prev_error, brake_active, authority,
+                   sample_time=SAMPLE_TIME):
+    """
+    pi_power for N trains in one call. Every argument is an array of length N
+    (or a scalar shared by all trains).
+
+    integral_error and prev_error are updated in place when they are float
+    arrays, so an engine can keep them between ticks without copying.
+
+    Returns:
+        tuple: (power_kw, integral_error, prev_error) as float arrays
+    """
+    commanded_speed_ms = np.asarray(commanded_speed_ms, dtype=float)
+    velocity_error = commanded_speed_ms - np.asarray(current_speed_ms, dtype=float)
+    integral_error = np.asarray(integral_error, dtype=float)
+    prev_error = np.asarray(prev_error, dtype=float)
+    max_power = np.asarray(max_power, dtype=float)
+
+    p_term = kp * velocity_error
+
+    # Anti-windup: trains at the power limit keep their integral
+    integrate = p_term < max_power
+    integral_error += np.where(integrate, (sample_time / 2.0) * (velocity_error + prev_error), 0.0)
+    prev_error[...] = velocity_error
+
+    power = np.minimum(max_power, p_term + ki * integral_error)
+    power = np.maximum(power, 0.0)
+    power[np.asarray(brake_active, dtype=bool) | (np.asarray(authority) == 0)] = 0.0
+
+    return power, integral_error, prev_error
+
+
+def benchmark(trains=1000, ticks=200, seed=0):
+    """
+    Time ticks control periods of trains trains with the scalar loop and with
+    pi_power_batch, and check that both give the same power commands
+
+    Returns:
+        dict: scalar_s, batch_s, speedup, max_difference_kw
+    """
+    rng = np.random.default_rng(seed)
+    commanded = rng.uniform(0.0, 20.0, trains)
+    kp = rng.uniform(5.0, 15.0, trains)
+    ki = rng.uniform(0.5, 3.0, trains)
+    max_power = np.full(trains, 120.0)
+    brake = rng.random(trains) < 0.1
+    authority = rng.integers(0, 5, trains)
+    speeds = rng.uniform(0.0, 20.0, (ticks, trains))
+
+    # Scalar path: one pi_power call per train per tick (what the controllers did)
+    integral = [0.0] * trains
+    prev = [0.0] * trains
+    commanded_list, kp_list, ki_list = commanded.tolist(), kp.tolist(), ki.tolist()
+    max_list, brake_list, authority_list = max_power.tolist(), brake.tolist(), authority.tolist()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        current = speeds[tick].tolist()
+        scalar_power = [0.0] * trains
+        for i in range(trains):
+            scalar_power[i], integral[i], prev[i] = pi_power(
+                commanded_list[i], current[i], kp_list[i], ki_list[i], max_list[i],
+                integral[i], prev[i], brake_list[i], authority_list[i])
+    scalar_s = time.perf_counter() - start
+
+    # Batched path: one call per tick for every train
+    integral_batch = np.zeros(trains)
+    prev_batch = np.zeros(trains)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        batch_power, _, _ = pi_power_batch(commanded, speeds[tick], kp, ki, max_power,
+                                           integral_batch, prev_batch, brake, authority)
+    batch_s = time.perf_counter() - start
+
+    return {
+        'scalar_s': scalar_s,
+        'batch_s': batch_s,
+        'speedup': scalar_s / batch_s if batch_s > 0 else float('inf'),
+        'max_difference_kw': float(np.max(np.abs(np.asarray(scalar_power) - batch_power))),
+    }
+
+
+if __name__ == "__main__":
+    trains = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for n in sorted({1, 10, 100, trains}):
+        result = benchmark(n, ticks)
+        print(f"{n:6d} trains x {ticks} ticks: scalar {result['scalar_s'] * 1000:8.2f} ms, "
+              f"batch {result['batch_s'] * 1000:8.2f} ms, speedup {result['speedup']:6.1f}x, "
+              f"max difference {result['max_difference_kw']:.2e} kW")
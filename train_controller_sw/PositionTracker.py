@@ -0,0 +1,325 @@
+import os, sys
+sys.path.insert(1, "/".join(os.path.realpath(__file__).split("/")[0:-2]))
+from SimClock import SimClock
+# The precomputed route index is shared with the HW controller
+from RouteIndex import get_route_index
+
+# Position Tracking Module - Based on TC_HW Working Implementation
+# Kept free of Tk so headless controllers (ControllerEngine) can use it too
+
+class PositionTracker:
+    """
+    Track train position along the route - TC_HW style implementation
+
+    Time comes from the simulation clock (SimClock, shared by every
+    controller of an engine), so distance and dwell are in simulation seconds
+    at any multiplier. Distance is the trapezoid of successive speed samples,
+    and block-entry reports from the Track Model (resync) pin the position
+    exactly when the train enters a station block.
+    """
+    def __init__(self, track_info, station_door_sides, selected_line, clock=None):
+        self.track_info = track_info
+        self.clock = clock if clock is not None else SimClock()
+        self.station_door_sides = station_door_sides
+        self.selected_line = selected_line
+        
+        # Blocks, stop points, door sides and tunnels of the route, built once per line
+        self.route_index = get_route_index(selected_line, track_info)
+        self.underground_blocks = self.route_index.underground
+        
+        self.current_segment_index = 0
+        self.distance_traveled_in_segment = 0.0
+        self.distance_to_next_station = 0.0
+        self.last_update_time = None  # simulation seconds
+        self.last_speed_ms = 0.0
+        self.current_block = 63 if selected_line == 'GREEN' else 8
+        self.track_reports_blocks = False  # True once the Track Model has reported a block
+        self.is_at_station = False
+        self.station_dwell_start_time = None
+        
+        # Track underground state
+        self.is_underground = self.route_index.is_underground(self.current_block)
+        self.last_underground_state = self.is_underground
+        
+        # Constants - MATCHING TC_HW
+        self.DECELERATION_DISTANCE = 200.0  # meters
+        self.STATION_STOP_THRESHOLD = 5.0   # meters
+        self.STATION_DWELL_TIME = 30.0      # simulation seconds
+        
+        # Door safety
+        self.doors_open_at_station = False
+        self.doors_locked = False
+        
+        # Initialize distance to next station
+        if len(self.track_info['segments']) > 0:
+            self.distance_to_next_station = self.track_info['segments'][0]['distance']
+        
+    def update(self, current_speed_ms, ui_callback=None):
+        """
+        Update position based on velocity and time - TC_HW STYLE
+        
+        Key differences from old implementation:
+        1. Simple station detection (no complex arrival logic)
+        2. Early return when at station
+        3. Direct brake control integration
+        """
+        current_time = self.clock.now()
+        
+        # Initialize timing on first call
+        if self.last_update_time is None:
+            self.last_update_time = current_time
+            self.last_speed_ms = current_speed_ms
+            return
+        
+        # Simulation time elapsed since last update (already at the clock's multiplier)
+        dt = current_time - self.last_update_time
+        self.last_update_time = current_time
+        
+        # Average of the two speed samples: exact while acceleration between them is constant
+        average_speed_ms = (self.last_speed_ms + current_speed_ms) / 2.0
+        self.last_speed_ms = current_speed_ms
+        
+        # Check and update underground status
+        self._update_underground_status(ui_callback)
+        
+        # Door safety: Lock doors when train is moving
+        if current_speed_ms > 1.0 and not self.doors_locked:
+            self.doors_locked = True
+            if ui_callback and hasattr(ui_callback, 'lock_doors'):
+                ui_callback.lock_doors()
+        
+        # ===== AT STATION LOGIC (TC_HW STYLE) =====
+        if self.is_at_station:
+            # Check if dwell time is complete
+            if self.station_dwell_start_time is not None:
+                dwell_elapsed = current_time - self.station_dwell_start_time
+                
+                # Display remaining dwell time
+                if not hasattr(self, '_last_dwell_print'):
+                    self._last_dwell_print = 0
+                self._last_dwell_print += 1
+                
+                if self._last_dwell_print % 10 == 0:
+                    remaining = max(0, self.STATION_DWELL_TIME - dwell_elapsed)
+                    if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
+                        ui_callback.add_to_status_log(f"Station dwell: {int(remaining)}s remaining")
+                    self._last_dwell_print = 0
+                
+                if dwell_elapsed >= self.STATION_DWELL_TIME:
+                    station_name = self.get_current_station_name()
+                    print(f"[POSITION] Dwell complete at {station_name}, departing")
+                    
+                    # CRITICAL: RELEASE SERVICE BRAKE BEFORE DEPARTURE (TC_HW style)
+                    if ui_callback:
+                        ui_callback.service_brake_active = False
+                        ui_callback.send_service_brake(False)
+                        print(f" Service brake RELEASED for departure from {station_name}")
+                    
+                    # CLOSE DOORS before departure
+                    if ui_callback:
+                        if hasattr(ui_callback, 'send_left_door_signal'):
+                            ui_callback.send_left_door_signal(False)
+                            if hasattr(ui_callback, 'left_door_btn') and ui_callback.left_door_btn.is_on:
+                                ui_callback.left_door_btn.toggle()
+                        if hasattr(ui_callback, 'send_right_door_signal'):
+                            ui_callback.send_right_door_signal(False)
+                            if hasattr(ui_callback, 'right_door_btn') and ui_callback.right_door_btn.is_on:
+                                ui_callback.right_door_btn.toggle()
+                        if hasattr(ui_callback, 'add_to_status_log'):
+                            ui_callback.add_to_status_log("Doors closing - preparing to depart")
+                    
+                    # Move to next segment
+                    self.current_segment_index += 1
+                    if self.current_segment_index >= len(self.track_info['segments']):
+                        self.current_segment_index = self.track_info.get('loop_start', 1)  # Loop back to main route
+                    
+                    # Reset for next segment
+                    self.distance_traveled_in_segment = 0.0
+                    self.distance_to_next_station = self.track_info['segments'][self.current_segment_index]['distance']
+                    self.is_at_station = False
+                    self.station_dwell_start_time = None
+                    self.doors_open_at_station = False
+                    self.doors_locked = False
+                    
+                    if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
+                        next_station = self.get_next_station_name()
+                        ui_callback.add_to_status_log(f"Departing for {next_station}")
+                        print(f"[POSITION] Next destination: {next_station}")
+                        
+                        # Send announcement to Train Model for passengers (tagged with the controller's train ID)
+                        if hasattr(ui_callback, 'send_station_announcement'):
+                            ui_callback.send_station_announcement(f"Departing for {next_station}")
+            
+            return  # CRITICAL: Early return while at station
+        
+        # ===== MOVING - UPDATE POSITION =====
+        # Calculate displacement: distance = velocity × time
+        displacement = average_speed_ms * dt
+        
+        # Update position tracking
+        self.distance_traveled_in_segment += displacement
+        self.distance_to_next_station = self.track_info['segments'][self.current_segment_index]['distance'] - self.distance_traveled_in_segment
+        
+        # ===== CHECK FOR STATION ARRIVAL (SIMPLE) =====
+        if self.distance_to_next_station <= self.STATION_STOP_THRESHOLD:
+            self.is_at_station = True
+            self.station_dwell_start_time = current_time
+            self.distance_to_next_station = 0.0
+            current_station = self.track_info['segments'][self.current_segment_index]['to_station']
+            
+            print(f"[POSITION] *** ARRIVED AT {current_station} ***")
+            
+            if ui_callback and hasattr(ui_callback, 'add_to_status_log'):
+                ui_callback.add_to_status_log(f"*** ARRIVED AT {current_station} ***")
+                
+                # Send announcement to Train Model for passengers (tagged with the controller's train ID)
+                if hasattr(ui_callback, 'send_station_announcement'):
+                    ui_callback.send_station_announcement(f"Arrived at {current_station}")
+            
+            # Open appropriate doors at station
+            self._open_station_doors(ui_callback)
+        
+        # Update current block
+        self._update_current_block()
+    
+    def _update_underground_status(self, ui_callback):
+        """Update underground status and control lights"""
+        new_underground = self.route_index.is_underground(self.current_block)
+        
+        if new_underground != self.last_underground_state:
+            self.is_underground = new_underground
+            
+            if ui_callback:
+                if new_underground:
+                    # Turn lights ON
+                    if hasattr(ui_callback, 'send_headlights'):
+                        ui_callback.send_headlights(True)
+                    if hasattr(ui_callback, 'send_cabin_lights'):
+                        ui_callback.send_cabin_lights(True)
+                    
+                    # Update UI buttons to show lights are ON
+                    if hasattr(ui_callback, 'headlights_btn') and not ui_callback.headlights_btn.is_on:
+                        ui_callback.headlights_btn.toggle()
+                    if hasattr(ui_callback, 'cabin_lights_btn') and not ui_callback.cabin_lights_btn.is_on:
+                        ui_callback.cabin_lights_btn.toggle()
+                    
+                    if hasattr(ui_callback, 'add_to_status_log'):
+                        ui_callback.add_to_status_log(f"Entering underground tunnel (Block {self.current_block}) - Lights ON")
+                else:
+                    # Turn lights OFF
+                    if hasattr(ui_callback, 'send_headlights'):
+                        ui_callback.send_headlights(False)
+                    if hasattr(ui_callback, 'send_cabin_lights'):
+                        ui_callback.send_cabin_lights(False)
+                    
+                    # Update UI buttons to show lights are OFF
+                    if hasattr(ui_callback, 'headlights_btn') and ui_callback.headlights_btn.is_on:
+                        ui_callback.headlights_btn.toggle()
+                    if hasattr(ui_callback, 'cabin_lights_btn') and ui_callback.cabin_lights_btn.is_on:
+                        ui_callback.cabin_lights_btn.toggle()
+                    
+                    if hasattr(ui_callback, 'add_to_status_log'):
+                        ui_callback.add_to_status_log(f"Exiting tunnel (Block {self.current_block}) - Lights OFF")
+            
+            self.last_underground_state = new_underground
+    
+    def _open_station_doors(self, ui_callback):
+        """Open appropriate doors at station"""
+        if not ui_callback:
+            return
+        
+        station_name = self.get_current_station_name()
+        
+        door_side = self.route_index.door_side(self.current_segment_index)
+        
+        self.doors_open_at_station = True
+        
+        if hasattr(ui_callback, 'add_to_status_log'):
+            ui_callback.add_to_status_log(f"[DOOR] Station {station_name}: {door_side} door(s)")
+        
+        # Open appropriate doors
+        if door_side == 'left' or door_side == 'both':
+            if hasattr(ui_callback, 'send_left_door_signal'):
+                ui_callback.send_left_door_signal(True)
+            if hasattr(ui_callback, 'left_door_btn'):
+                if not ui_callback.left_door_btn.is_on:
+                    ui_callback.left_door_btn.toggle()
+        
+        if door_side == 'right' or door_side == 'both':
+            if hasattr(ui_callback, 'send_right_door_signal'):
+                ui_callback.send_right_door_signal(True)
+            if hasattr(ui_callback, 'right_door_btn'):
+                if not ui_callback.right_door_btn.is_on:
+                    ui_callback.right_door_btn.toggle()
+    
+    @property
+    def TIME_SCALE(self):
+        """Simulation speed multiplier (the clock's)"""
+        return self.clock.multiplier
+    
+    @TIME_SCALE.setter
+    def TIME_SCALE(self, multiplier):
+        self.clock.set_multiplier(multiplier)
+    
+    def resync(self, block):
+        """
+        Block-entry report from the Track Model (forwarded by the Train Model)
+        
+        The reported block becomes the current block. Entering the station
+        block of the current segment puts the train exactly half that block
+        before its stop point, which replaces the integrated distance.
+        
+        Returns:
+            float: Correction applied to the distance travelled (m)
+        """
+        self.current_block = block
+        self.track_reports_blocks = True
+        if self.is_at_station or self.current_segment_index >= len(self.track_info['segments']):
+            return 0.0
+        
+        segment = self.track_info['segments'][self.current_segment_index]
+        if block != segment['to_block']:
+            return 0.0
+        
+        # Stop point is the middle of the station block
+        expected = segment['distance'] - segment.get('station_block_half_length', 0.0)
+        correction = expected - self.distance_traveled_in_segment
+        self.distance_traveled_in_segment = expected
+        self.distance_to_next_station = segment['distance'] - expected
+        if abs(correction) > 1.0:
+            print(f"[POSITION] Resync at block {block}: corrected by {correction:+.1f} m")
+        return correction
+    
+    def _update_current_block(self):
+        """Update current block based on position (until the Track Model reports blocks)"""
+        if self.track_reports_blocks or self.current_segment_index >= len(self.track_info['segments']):
+            return
+        
+        self.current_block = self.route_index.block_at(self.current_segment_index,
+                                                       self.distance_traveled_in_segment)
+    
+    def get_distance_to_next_station(self):
+        """Get distance remaining to next station in meters"""
+        return self.distance_to_next_station
+    
+    def get_next_station_name(self):
+        """Get name of next station"""
+        if self.current_segment_index < len(self.track_info['segments']):
+            return self.track_info['segments'][self.current_segment_index]['to_station']
+        return "YARD"
+    
+    def get_current_station_name(self):
+        """Get name of current station"""
+        if self.current_segment_index < len(self.track_info['segments']):
+            return self.track_info['segments'][self.current_segment_index]['to_station']
+        return "YARD"
+    
+    def should_decelerate_for_station(self):
+        """Check if train should start decelerating for station"""
+        return self.distance_to_next_station <= self.DECELERATION_DISTANCE and not self.is_at_station
+    
+    def get_current_speed_limit(self):
+        """Get speed limit for current segment in MPH"""
+        if self.current_segment_index < len(self.track_info['segments']):
+            return self.track_info['segments'][self.current_segment_index]['speed_limit']
+        return 43.50  # Default
@@ -648,7 +648,7 @@ class TestTimeAndMultiplier(unittest.TestCase):
         """Test that invalid MULT values are rejected"""
         message = {
             'command': 'MULT',
-            'value': 5,  # Invalid - only 1 or 10 allowed
+            'value': 0,  # Invalid - multiplier must be positive
             'train_id': 1
         }
         
@@ -661,6 +661,388 @@ class TestTimeAndMultiplier(unittest.TestCase):
                         "Time multiplier should not change with invalid value")
 
 
+class TestControllerEngine(unittest.TestCase):
+    """Test cases for hosting several headless controllers in one ControllerEngine"""
+    
+    def setUp(self):
+        from ControllerEngine import ControllerEngine
+        self.server = MagicMock()
+        self.engine = ControllerEngine(self.server)
+    
+    def sent(self, train_id, command):
+        """Values of every command sent to the Train Model for train_id"""
+        return [call.args[1]['value'] for call in self.server.send_to_ui.call_args_list
+                if call.args[1]['train_id'] == train_id and call.args[1]['command'] == command]
+    
+    def test_messages_create_and_route_controllers(self):
+        """Test that each train gets its own controller, created on first message"""
+        self.engine._process_message({'command': 'Commanded Authority', 'value': 4, 'train_id': 3}, 'Train Model')
+        self.engine._process_message({'command': 'Commanded Speed', 'value': 30, 'train_id': 3}, 'Train Model')
+        self.engine._process_message({'command': 'Commanded Speed', 'value': 20, 'train_id': 7, 'line': 'red'}, 'Train Model')
+        
+        self.assertEqual(sorted(self.engine.controllers), [3, 7])
+        self.assertEqual(self.engine.get(7).selected_line, 'RED')
+        self.assertEqual(self.engine.get(3).commanded_speed_mph, 30.0)
+        self.assertEqual(self.engine.get(7).commanded_speed_mph, 0.0,
+                        "No authority yet - train 7 must stay stopped")
+        self.assertFalse(self.engine.get(3).service_brake_active,
+                        "Initial brake released once speed and authority arrived")
+        self.assertTrue(self.engine.get(7).service_brake_active)
+    
+    def test_step_all_sends_power_per_train(self):
+        """Test that one engine tick sends each train its own power command"""
+        for train_id in (1, 2):
+            self.engine._process_message({'command': 'Commanded Authority', 'value': 4, 'train_id': train_id}, 'Train Model')
+            self.engine._process_message({'command': 'Commanded Speed', 'value': 40, 'train_id': train_id}, 'Train Model')
+        self.engine._process_message({'command': 'Current Speed', 'value': 17.0, 'train_id': 2}, 'Train Model')
+        
+        powers = self.engine.step_all()
+        
+        self.assertGreater(powers[1], powers[2],
+                          "The stopped train should get more power than the one near its speed")
+        self.assertEqual(self.sent(1, 'Power Command'), [powers[1] * 1000])
+        self.assertEqual(self.sent(2, 'Power Command'), [powers[2] * 1000])
+    
+    def test_failure_and_retirement(self):
+        """Test that a failure brakes only its train and retired trains are dropped"""
+        for train_id in (1, 2):
+            self.engine._process_message({'command': 'Commanded Authority', 'value': 4, 'train_id': train_id}, 'Train Model')
+        self.engine._process_message({'command': 'Train Engine Failure', 'value': True, 'train_id': 2}, 'Train Model')
+        
+        self.assertTrue(self.engine.get(2).emergency_brake_active)
+        self.assertFalse(self.engine.get(1).emergency_brake_active)
+        self.assertEqual(self.sent(2, 'Emergency Brake'), [True])
+        
+        # Failure cleared while stopped: nobody is there to press release, the engine does
+        self.engine._process_message({'command': 'Train Engine Failure', 'value': False, 'train_id': 2}, 'Train Model')
+        self.engine.step_all()
+        self.assertFalse(self.engine.get(2).emergency_brake_active)
+        
+        self.engine._process_message({'command': 'Train Retired', 'value': True, 'train_id': 2}, 'Train Model')
+        self.assertEqual(list(self.engine.controllers), [1])
+
+
+class TestPIKernel(unittest.TestCase):
+    """Test cases for the batched PI controller kernel"""
+    
+    def test_batch_matches_scalar(self):
+        """Test that pi_power_batch gives exactly what pi_power gives, train by train"""
+        from PIKernel import benchmark
+        
+        result = benchmark(trains=50, ticks=20)
+        
+        self.assertEqual(result['max_difference_kw'], 0.0,
+                        "Batched and scalar power commands must be identical")
+    
+    def test_batch_overrides_and_anti_windup(self):
+        """Test brake/authority overrides and that saturated trains stop integrating"""
+        from PIKernel import pi_power_batch
+        import numpy as np
+        
+        integral = np.array([1.0, 1.0, 1.0, 1.0])
+        prev = np.zeros(4)
+        power, integral, prev = pi_power_batch(
+            [10.0, 10.0, 10.0, 30.0], [0.0, 0.0, 0.0, 0.0], 10.0, 2.0, 120.0,
+            integral, prev, [False, True, False, False], [4, 4, 0, 4])
+        
+        self.assertEqual(power[0], 103.0)
+        self.assertEqual(power[1], 0.0, "Brake on - no power")
+        self.assertEqual(power[2], 0.0, "Authority 0 - no power")
+        self.assertEqual(power[3], 120.0, "Clamped to max power")
+        self.assertEqual(integral[3], 1.0, "Saturated train must not integrate")
+        self.assertEqual(integral[0], 1.5)
+        self.assertEqual(list(prev), [10.0, 10.0, 10.0, 30.0])
+    
+    def test_engine_batched_step_matches_scalar_step(self):
+        """Test that a large engine (batched PI) commands what each controller would alone"""
+        from ControllerEngine import ControllerEngine, BATCH_MIN_TRAINS
+        
+        engines = [ControllerEngine(MagicMock()) for _ in range(2)]
+        for engine in engines:
+            for train_id in range(1, BATCH_MIN_TRAINS + 5):
+                engine._process_message({'command': 'Commanded Authority', 'value': 4, 'train_id': train_id}, 'Train Model')
+                engine._process_message({'command': 'Commanded Speed', 'value': 10 + train_id, 'train_id': train_id}, 'Train Model')
+        
+        batched, scalar = engines
+        for tick in range(5):
+            for engine in engines:
+                for train_id, core in engine.controllers.items():
+                    core.current_speed_ms = tick * train_id * 0.1
+            powers = batched.step_all()
+            for train_id, core in scalar.controllers.items():
+                self.assertAlmostEqual(powers[train_id], core.tick(), places=9)
+                self.assertAlmostEqual(batched.get(train_id).integral_error, core.integral_error, places=9)
+
+
+class TestSimClock(unittest.TestCase):
+    """Test cases for sim-clock-driven position tracking"""
+    
+    def setUp(self):
+        from SimClock import SimClock
+        from PositionTracker import PositionTracker
+        from RouteIndex import greenLineTrackInformation, greenLineStationDoorSides
+        self.wall = [0.0]
+        self.clock = SimClock(wall=lambda: self.wall[0])
+        self.tracker = PositionTracker(greenLineTrackInformation, greenLineStationDoorSides,
+                                       'GREEN', clock=self.clock)
+    
+    def test_clock_follows_time_and_multiplier(self):
+        """Test that the clock extrapolates at the multiplier and re-anchors on TIME"""
+        self.clock.set_time("07:00:00")
+        self.assertTrue(self.clock.set_multiplier(50))
+        self.wall[0] += 0.1
+        self.assertAlmostEqual(self.clock.now(), 7 * 3600 + 5.0)
+        
+        self.clock.set_time("07:00:10")
+        self.assertAlmostEqual(self.clock.now(), 7 * 3600 + 10.0)
+        self.assertFalse(self.clock.set_multiplier(0), "Multiplier must be positive")
+        self.assertEqual(self.tracker.TIME_SCALE, 50.0)
+    
+    def test_distance_uses_sim_time(self):
+        """Test that a 100 ms wall tick at 50x moves the train 5 sim seconds"""
+        self.clock.set_multiplier(50)
+        self.tracker.update(10.0)
+        self.wall[0] += 0.1
+        self.tracker.update(10.0)
+        
+        self.assertAlmostEqual(self.tracker.distance_traveled_in_segment, 50.0)
+    
+    def test_block_report_resyncs_position(self):
+        """Test that entering the station block replaces the integrated distance"""
+        segment = self.tracker.track_info['segments'][0]
+        self.tracker.distance_traveled_in_segment = 12.0
+        
+        correction = self.tracker.resync(segment['to_block'])
+        
+        expected = segment['distance'] - segment.get('station_block_half_length', 0.0)
+        self.assertAlmostEqual(self.tracker.distance_traveled_in_segment, expected)
+        self.assertAlmostEqual(correction, expected - 12.0)
+        self.assertEqual(self.tracker.current_block, segment['to_block'])
+
+
+class TestSpeedProfile(unittest.TestCase):
+    """Test cases for the precomputed braking-curve tables"""
+    
+    def test_envelope_obeys_limits_and_stops_at_station(self):
+        """Test that the envelope keeps to block speed limits and reaches 0 at the stop point"""
+        from SpeedProfile import SpeedProfile, SERVICE_BRAKE_DECEL, BRAKE_MARGIN
+        line = MagicMock()
+        line.getBlock.side_effect = lambda block: {'blockLengthM': 200.0, 'blockGradePercent': 0.0,
+                                                   'speedLimit': 36.0 if block < 3 else 18.0}
+        segment = {'from_block': 1, 'to_block': 4, 'distance': 600.0, 'speed_limit': 22.37}
+        profile = SpeedProfile({'segments': [segment]}, line)
+        
+        self.assertAlmostEqual(profile.allowed_speed(0, 0.0), 10.0, msg="36 km/h is 10 m/s")
+        self.assertAlmostEqual(profile.allowed_speed(0, 350.0), 5.0, msg="18 km/h from block 3 on")
+        self.assertLess(profile.allowed_speed(0, 290.0), 10.0, "Brakes ahead of the lower limit")
+        self.assertEqual(profile.allowed_speed(0, 600.0), 0.0)
+        decel = BRAKE_MARGIN * SERVICE_BRAKE_DECEL
+        self.assertAlmostEqual(profile.allowed_speed(0, 590.0), (2 * decel * 10.0) ** 0.5)
+    
+    def test_downgrade_brakes_earlier(self):
+        """Test that a downgrade lowers the curve (less braking) and an upgrade raises it"""
+        from SpeedProfile import SpeedProfile
+        curves = []
+        for grade in (-3.0, 0.0, 3.0):
+            line = MagicMock()
+            line.getBlock.return_value = {'blockLengthM': 100.0, 'blockGradePercent': grade, 'speedLimit': 70.0}
+            profile = SpeedProfile({'segments': [{'from_block': 1, 'to_block': 3, 'distance': 200.0}]}, line)
+            curves.append(profile.allowed_speed(0, 150.0))
+        
+        self.assertLess(curves[0], curves[1])
+        self.assertLess(curves[1], curves[2])
+    
+    def test_controller_brakes_above_curve(self):
+        """Test that auto mode caps the commanded speed at the curve and brakes when over it"""
+        from ControllerEngine import ControllerEngine
+        engine = ControllerEngine(MagicMock())
+        engine._process_message({'command': 'Commanded Authority', 'value': 4, 'train_id': 1}, 'Train Model')
+        engine._process_message({'command': 'Commanded Speed', 'value': 43, 'train_id': 1}, 'Train Model')
+        core = engine.get(1)
+        core.position_tracker.distance_traveled_in_segment = 280.0
+        core.position_tracker.distance_to_next_station = 20.0
+        core.current_speed_ms = 15.0
+        
+        commanded_ms = core.commanded_speed()
+        
+        self.assertAlmostEqual(commanded_ms, core.speed_profile.allowed_speed(0, 280.0), places=6)
+        self.assertTrue(core.service_brake_active, "15 m/s is far above the curve 20 m out")
+        
+        core.current_speed_ms = 1.0
+        core.commanded_speed()
+        self.assertFalse(core.service_brake_active, "Back under the curve - brake released")
+
+
+class TestHWControllerCore(unittest.TestCase):
+    """Test cases for the class-based hardware controller core (run headless)"""
+    
+    def setUp(self):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'HW_Train_Controller'))
+        from TC_HW_ControllerCore import HWTrainController, HardwareIO
+        from SimClock import SimClock
+        self.wall = [0.0]
+        self.io = MagicMock(spec=HardwareIO)
+        self.train = HWTrainController(trainId=3, io=self.io, clock=SimClock(wall=lambda: self.wall[0]))
+    
+    def test_station_stop_and_departure(self):
+        """Test that the train stops at GLENBURY with brake and right doors, then departs after the dwell"""
+        self.train.currentSpeed = 10.0
+        self.train.updatePositionTracking()  # Starts the position clock
+        self.wall[0] = 29.6  # 296 m of the 300 m segment
+        self.train.updatePositionTracking()
+        
+        self.assertTrue(self.train.isAtStation)
+        self.assertTrue(self.train.serviceBrakeActive)
+        self.io.sendToTrainModel.assert_any_call('Service Brake', True)
+        self.io.setLED.assert_called_once_with('right_door', True)
+        
+        self.train.currentSpeed = 0.0
+        self.wall[0] = 59.6  # 30 s dwell
+        self.train.updatePositionTracking()
+        
+        self.assertFalse(self.train.isAtStation)
+        self.assertFalse(self.train.serviceBrakeActive)
+        self.assertEqual(self.train.currentSegmentIndex, 1)
+        self.io.setLED.assert_any_call('left_door', False)
+        self.io.sendToTrainModel.assert_any_call('Announcement', 'Travelling to DORMONT')
+    
+    def test_trains_keep_separate_state(self):
+        """Test that two controllers integrate independently with the shared PI kernel"""
+        from TC_HW_ControllerCore import HWTrainController
+        from PIKernel import pi_power
+        other = HWTrainController(trainId=4, selectedLine='RED')
+        for train, speed in ((self.train, 2.0), (other, 6.0)):
+            train.commandedSpeed = 22.37  # 10 m/s
+            train.drivetrainManualMode = True
+            train.manualSetpointSpeed = train.displayCommandedSpeed = 22.37
+            train.currentSpeed = speed
+        
+        power = self.train.calculatePowerCommand(15.0, 3.0, 120.0)
+        
+        expected, integral, _ = pi_power(22.37 * 0.44704, 2.0, 15.0, 3.0, 120.0, 0.0, 0.0)
+        self.assertAlmostEqual(power, expected)
+        self.assertAlmostEqual(self.train.integralError, integral)
+        self.assertEqual(other.integralError, 0.0, "The other train has not run a period yet")
+        self.assertEqual(other.currentBlock, 8, "Red line trains start at their yard")
+
+
+
+class TestGPIOStateMirror(unittest.TestCase):
+    """Test cases for the client-side copy of the GPIO server state (snapshots and sequenced deltas)"""
+    
+    def setUp(self):
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'HW_Train_Controller'))
+        from TC_GPIO_StateMirror import GPIOStateMirror
+        self.mirror = GPIOStateMirror()
+    
+    def snapshot(self, seq, **data):
+        return self.mirror.apply({'type': 'state_update', 'seq': seq, 'data': data})
+    
+    def delta(self, seq, **data):
+        return self.mirror.apply({'type': 'state_delta', 'seq': seq, 'data': data})
+    
+    def test_in_order_deltas(self):
+        """Test that consecutive deltas update the state and return only the changed keys"""
+        self.assertEqual(self.snapshot(4, horn=False, headlights=False), {'horn': False, 'headlights': False})
+        self.assertEqual(self.delta(5, horn=True), {'horn': True})
+        self.assertEqual(self.delta(6, headlights=True), {'headlights': True})
+        
+        self.assertEqual(self.mirror.state, {'horn': True, 'headlights': True})
+        self.assertEqual(self.mirror.seq, 6)
+        self.assertFalse(self.mirror.needsResync)
+    
+    def test_gap_needs_resync(self):
+        """Test that a missing seq stops deltas until the next full state"""
+        self.snapshot(1, horn=False, headlights=False)
+        self.assertIsNone(self.delta(3, horn=True), "seq 2 was lost")
+        self.assertTrue(self.mirror.needsResync)
+        self.assertEqual(self.mirror.resyncCount, 1)
+        self.assertIsNone(self.delta(4, headlights=True), "No deltas until resynced")
+        self.assertEqual(self.mirror.state, {'horn': False, 'headlights': False})
+        
+        self.assertEqual(self.snapshot(4, horn=True, headlights=True), {'horn': True, 'headlights': True})
+        self.assertFalse(self.mirror.needsResync)
+        self.assertEqual(self.delta(5, horn=False), {'horn': False})
+    
+    def test_deltas_ignored_until_snapshot(self):
+        """Test that deltas before the first full state are dropped"""
+        self.assertIsNone(self.delta(1, horn=True))
+        self.assertEqual(self.mirror.state, {})
+        self.assertFalse(self.mirror.needsResync)
+        
+        self.snapshot(2, horn=False)
+        self.assertEqual(self.delta(3, horn=True), {'horn': True})
+    
+    def test_stale_snapshot_rejected(self):
+        """Test that a snapshot older than the applied deltas changes nothing"""
+        self.snapshot(5, horn=False)
+        self.delta(6, horn=True)
+        
+        self.assertIsNone(self.snapshot(5, horn=False))
+        self.assertEqual(self.mirror.state, {'horn': True})
+        self.assertEqual(self.mirror.seq, 6)
+
+
+class TestRouteIndex(unittest.TestCase):
+    """Test cases for the precomputed route index shared by the SW and HW controllers"""
+    
+    def setUp(self):
+        from RouteIndex import get_route_index, greenLineTrackInformation
+        self.index = get_route_index('GREEN', greenLineTrackInformation)
+        self.track_info = greenLineTrackInformation
+    
+    def test_block_lookup_across_jump(self):
+        """Test that CENTRAL to WHITED runs from block 150 straight to block 28"""
+        segment_index = 10  # CENTRAL to WHITED
+        route = self.index.segments[segment_index]
+        crossing = route.starts[route.blocks.index(28)]
+        
+        self.assertEqual(self.index.block_at(segment_index, 0.0), 141)
+        self.assertEqual(self.index.block_at(segment_index, crossing - 1.0), 150)
+        self.assertEqual(self.index.block_at(segment_index, crossing + 1.0), 28)
+        self.assertEqual(self.index.block_at(segment_index, self.track_info['segments'][segment_index]['distance']), 22)
+    
+    def test_segments_from_line_data(self):
+        """Test that segment distances, stop points and names come from the line data blocks"""
+        from GreenLineData import GreenLine
+        from RouteIndex import redLineTrackInformation
+        line_data = GreenLine()
+        segment = self.track_info['segments'][1]  # GLENBURY to DORMONT
+        lengths = [line_data.getBlock(block)['blockLengthM'] for block in range(65, 74)]
+        self.assertEqual((segment['from_station'], segment['to_station']), ('GLENBURY', 'DORMONT'))
+        self.assertAlmostEqual(segment['distance'], lengths[0] / 2 + sum(lengths[1:-1]) + lengths[-1] / 2)
+        self.assertEqual(segment['station_block_half_length'], lengths[-1] / 2)
+        self.assertEqual(self.track_info['segments'][0]['distance'], 300.0, "Full yard block 63, block 64, half of 65")
+        
+        for info in (self.track_info, redLineTrackInformation):
+            segments = info['segments']
+            for previous, segment in zip(segments, segments[1:]):
+                self.assertEqual(previous['to_block'], segment['from_block'])
+            self.assertEqual(segments[-1]['to_block'], segments[info['loop_start']]['from_block'],
+                             "The last stop is where the loop restarts")
+    
+    def test_doors_and_tunnels(self):
+        """Test door sides (line data, INGLEWOOD exception) and underground blocks"""
+        self.assertEqual(self.index.door_side(8), 'left', "INGLEWOOD at block 132 opens the left doors")
+        self.assertEqual(self.index.door_side(18), 'right', "INGLEWOOD at block 48 opens the right doors")
+        self.assertTrue(self.index.is_underground(39), "CENTRAL is underground in the line data")
+        self.assertTrue(self.index.is_underground(123))
+        self.assertFalse(self.index.is_underground(65))
+    
+    def test_tracker_uses_shared_index(self):
+        """Test that the SW position tracker gets its block from the shared index"""
+        from PositionTracker import PositionTracker
+        from RouteIndex import get_route_index, greenLineTrackInformation, greenLineStationDoorSides
+        tracker = PositionTracker(greenLineTrackInformation, greenLineStationDoorSides, 'GREEN')
+        other = PositionTracker(greenLineTrackInformation, greenLineStationDoorSides, 'GREEN')
+        self.assertIs(tracker.route_index, other.route_index)
+        self.assertIs(tracker.route_index, get_route_index('GREEN', greenLineTrackInformation))
+        
+        tracker.distance_traveled_in_segment = 150.0
+        tracker._update_current_block()
+        self.assertEqual(tracker.current_block, tracker.route_index.block_at(0, 150.0))
+
+
 def run_tests():
     """Run all tests and print results"""
     # Create test suite
@@ -677,7 +1059,14 @@ def run_tests():
         TestTemperatureControl,
         TestStationAnnouncement,
         TestPowerCalculation,
-        TestTimeAndMultiplier
+        TestTimeAndMultiplier,
+        TestControllerEngine,
+        TestPIKernel,
+        TestSimClock,
+        TestSpeedProfile,
+        TestHWControllerCore,
+        TestGPIOStateMirror,
+        TestRouteIndex
     ]
     
     suite = unittest.TestSuite()